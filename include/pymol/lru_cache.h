@@ -0,0 +1,196 @@
+#pragma once
+
+#include <cstddef>
+#include <functional>
+#include <list>
+#include <unordered_map>
+#include <utility>
+
+namespace pymol
+{
+
+/**
+ * Size-bounded key-value cache which evicts the least recently used entries.
+ *
+ * Every entry has a cost (default 1), the cache keeps the sum of all costs
+ * at or below `capacity()`. With unit costs, the capacity is the maximum
+ * number of entries; with byte sizes as costs, it's a memory budget.
+ *
+ * Example:
+ *
+ *     pymol::lru_cache<std::string, int> cache(2);
+ *     cache.put("a", 1);
+ *     cache.put("b", 2);
+ *     cache.get("a"); // -> pointer to 1, "a" is now most recently used
+ *     cache.put("c", 3); // evicts "b"
+ */
+template <typename Key, typename Value, typename Hash = std::hash<Key>>
+class lru_cache
+{
+  struct Entry {
+    Key key;
+    Value value;
+    std::size_t cost;
+  };
+
+  using list_t = std::list<Entry>;
+
+  list_t m_list; // most recently used first
+  std::unordered_map<Key, typename list_t::iterator, Hash> m_map;
+  std::size_t m_capacity;
+  std::size_t m_cost = 0;
+  std::size_t m_hits = 0;
+  std::size_t m_misses = 0;
+  std::function<void(const Key&, Value&)> m_on_evict;
+
+  void evict(std::size_t reserve = 0)
+  {
+    while (!m_list.empty() && m_cost + reserve > m_capacity) {
+      auto& back = m_list.back();
+      m_cost -= back.cost;
+      if (m_on_evict) {
+        m_on_evict(back.key, back.value);
+      }
+      m_map.erase(back.key);
+      m_list.pop_back();
+    }
+  }
+
+public:
+  explicit lru_cache(std::size_t capacity = 0)
+      : m_capacity(capacity)
+  {
+  }
+
+  /**
+   * Look up `key` and mark it as most recently used. Updates the hit/miss
+   * statistics.
+   * @return Pointer to the cached value or nullptr if not found. Only valid
+   * until the next modification of the cache.
+   */
+  Value* get(const Key& key)
+  {
+    auto it = m_map.find(key);
+    if (it == m_map.end()) {
+      ++m_misses;
+      return nullptr;
+    }
+    ++m_hits;
+    m_list.splice(m_list.begin(), m_list, it->second);
+    return &it->second->value;
+  }
+
+  /**
+   * Like get(), but entries for which `is_valid(value)` is false are stale.
+   * Stale entries get removed and count as a miss.
+   */
+  template <typename Pred> Value* get(const Key& key, Pred is_valid)
+  {
+    auto it = m_map.find(key);
+    if (it != m_map.end() && !is_valid(it->second->value)) {
+      erase(key);
+    }
+    return get(key);
+  }
+
+  /**
+   * Look up `key` without changing the usage order or statistics.
+   */
+  const Value* peek(const Key& key) const
+  {
+    auto it = m_map.find(key);
+    return (it == m_map.end()) ? nullptr : &it->second->value;
+  }
+
+  /**
+   * Insert or replace the value for `key`. Entries with a cost larger than
+   * the capacity are not stored.
+   * @return True if the value was stored
+   */
+  bool put(const Key& key, Value value, std::size_t cost = 1)
+  {
+    erase(key);
+
+    if (cost > m_capacity) {
+      return false;
+    }
+
+    evict(cost);
+    m_list.push_front(Entry{key, std::move(value), cost});
+    m_map.emplace(key, m_list.begin());
+    m_cost += cost;
+    return true;
+  }
+
+  /**
+   * Remove `key` from the cache.
+   * @return True if it was found
+   */
+  bool erase(const Key& key)
+  {
+    auto it = m_map.find(key);
+    if (it == m_map.end()) {
+      return false;
+    }
+    m_cost -= it->second->cost;
+    m_list.erase(it->second);
+    m_map.erase(it);
+    return true;
+  }
+
+  /**
+   * Remove all entries for which `pred(key, value)` is true.
+   */
+  template <typename Pred> void erase_if(Pred pred)
+  {
+    for (auto it = m_list.begin(); it != m_list.end();) {
+      if (pred(it->key, it->value)) {
+        m_cost -= it->cost;
+        m_map.erase(it->key);
+        it = m_list.erase(it);
+      } else {
+        ++it;
+      }
+    }
+  }
+
+  /**
+   * Remove all entries. Does not reset the statistics.
+   */
+  void clear()
+  {
+    m_list.clear();
+    m_map.clear();
+    m_cost = 0;
+  }
+
+  /**
+   * Change the capacity, evicts entries if necessary.
+   */
+  void set_capacity(std::size_t capacity)
+  {
+    m_capacity = capacity;
+    evict();
+  }
+
+  /**
+   * Set a function which gets called for every entry which is dropped to
+   * make room (by put() or set_capacity()). Not called by erase(),
+   * erase_if() or clear().
+   */
+  void set_on_evict(std::function<void(const Key&, Value&)> on_evict)
+  {
+    m_on_evict = std::move(on_evict);
+  }
+
+  void reset_stats() { m_hits = m_misses = 0; }
+
+  std::size_t size() const { return m_list.size(); }
+  bool empty() const { return m_list.empty(); }
+  std::size_t capacity() const { return m_capacity; }
+  std::size_t cost() const { return m_cost; }
+  std::size_t hits() const { return m_hits; }
+  std::size_t misses() const { return m_misses; }
+};
+
+} // namespace pymol
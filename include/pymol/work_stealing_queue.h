@@ -0,0 +1,124 @@
+#pragma once
+
+#include <algorithm>
+#include <atomic>
+#include <cassert>
+#include <cstddef>
+#include <memory>
+
+namespace pymol
+{
+
+/**
+ * Lock-free distribution of a fixed number of work items (e.g. image tiles)
+ * over a fixed number of workers.
+ *
+ * Every worker starts on its own contiguous range of items. Once its range
+ * is exhausted, a worker steals items from the worker with the most
+ * remaining items, so all workers stay busy if the items have uneven costs.
+ * Every item is handed out exactly once.
+ *
+ * Example:
+ *
+ *     pymol::work_stealing_queue queue(n_tiles, n_thread);
+ *
+ *     // in thread `t`
+ *     for (std::size_t tile; queue.pop(t, tile);) {
+ *       render(tile);
+ *     }
+ */
+class work_stealing_queue
+{
+  struct alignas(64) Range {
+    std::atomic<std::size_t> next{0};
+    std::size_t end = 0;
+
+    std::size_t remaining() const
+    {
+      auto const n = next.load(std::memory_order_relaxed);
+      return n < end ? end - n : 0;
+    }
+  };
+
+  std::unique_ptr<Range[]> m_ranges;
+  std::size_t m_n_worker;
+  std::size_t m_size;
+  std::atomic<std::size_t> m_popped{0};
+
+  bool take(Range& range, std::size_t& item)
+  {
+    if (!range.remaining()) {
+      return false;
+    }
+    // may overshoot `end` if others take concurrently, that's harmless
+    item = range.next.fetch_add(1, std::memory_order_relaxed);
+    if (item >= range.end) {
+      return false;
+    }
+    m_popped.fetch_add(1, std::memory_order_relaxed);
+    return true;
+  }
+
+public:
+  /**
+   * @param size Number of work items
+   * @param n_worker Number of workers
+   */
+  work_stealing_queue(std::size_t size, std::size_t n_worker)
+      : m_n_worker(std::max<std::size_t>(n_worker, 1))
+      , m_size(size)
+  {
+    m_ranges.reset(new Range[m_n_worker]);
+    for (std::size_t i = 0; i < m_n_worker; ++i) {
+      m_ranges[i].next = size * i / m_n_worker;
+      m_ranges[i].end = size * (i + 1) / m_n_worker;
+    }
+  }
+
+  work_stealing_queue(const work_stealing_queue&) = delete;
+  work_stealing_queue& operator=(const work_stealing_queue&) = delete;
+
+  /**
+   * Get the next work item for `worker`.
+   * @param worker Worker index, must be less than the number of workers
+   * @param[out] item Work item index
+   * @return False if all items have been handed out
+   */
+  bool pop(std::size_t worker, std::size_t& item)
+  {
+    assert(worker < m_n_worker);
+
+    if (take(m_ranges[worker], item)) {
+      return true;
+    }
+
+    for (;;) {
+      Range* victim = nullptr;
+      std::size_t most = 0;
+      for (std::size_t i = 0; i < m_n_worker; ++i) {
+        auto const remaining = m_ranges[i].remaining();
+        if (remaining > most) {
+          most = remaining;
+          victim = &m_ranges[i];
+        }
+      }
+      if (!victim) {
+        return false;
+      }
+      if (take(*victim, item)) {
+        return true;
+      }
+    }
+  }
+
+  /// Number of work items
+  std::size_t size() const { return m_size; }
+
+  /// Number of work items which have been handed out so far
+  std::size_t popped() const
+  {
+    return m_popped.load(std::memory_order_relaxed);
+  }
+};
+
+} // namespace pymol
@@ -28,6 +28,11 @@ CarveHelper::CarveHelper(PyMOLGlobals* G, float cutoff, const float* vertices,
   }
 
   m_voxelmap.reset(MapNew(G, -m_cutoff, vertices, n_vertices, nullptr));
+
+  // set up now, so that queries don't modify the map (contouring threads)
+  if (m_voxelmap) {
+    MapSetupExpress(m_voxelmap.get());
+  }
 }
 
 /**
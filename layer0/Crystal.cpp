@@ -179,8 +179,8 @@ const float* CCrystal::realToFrac() const
     xx_matrix_invert(r2f, f2r, 3);
 
     auto this_mutable = const_cast<CCrystal*>(this);
-    this_mutable->m_RealToFracValid = true;
     std::copy_n(r2f, 9, this_mutable->RealToFrac);
+    this_mutable->m_RealToFracValid = true;
   }
 
   return RealToFrac;
@@ -190,7 +190,6 @@ const float* CCrystal::fracToReal() const
 {
   if (!m_FracToRealValid) {
     auto this_mutable = const_cast<CCrystal*>(this);
-    this_mutable->m_FracToRealValid = true;
     auto* f2r = this_mutable->FracToReal;
 
     identity33f(f2r);
@@ -219,6 +218,8 @@ const float* CCrystal::fracToReal() const
       f2r[5] = -sabg[1] * cabgs[0] * Dim[2];
       f2r[8] = sabg[1] * sabgs1 * Dim[2];
     }
+
+    this_mutable->m_FracToRealValid = true;
   }
 
   return FracToReal;
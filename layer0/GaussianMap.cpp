@@ -0,0 +1,405 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Gaussian (simulated density) maps by splatting and FFT convolution.
+ */
+
+#include <algorithm>
+#include <cmath>
+#include <complex>
+
+#include "pocketfft_hdronly.h"
+
+#include "Field.h"
+#include "GaussianMap.h"
+#include "Vector.h"
+
+namespace
+{
+
+/// Minimum per-axis variance (in units of the squared grid spacing) of both
+/// parts of a split Gaussian. With (0.85 h)^2 the error of sampling their
+/// convolution on the grid stays below ~0.1%.
+constexpr double MinSplitVariance = 0.72;
+
+/// Truncation of the unit-mass splatting Gaussians, exp(-12) ~ 6e-6
+constexpr double SpreadElim = 12.0;
+
+/// Rough cost of one FFT per point and log2(points), in multiply-adds
+constexpr double FFTCostFactor = 2.5;
+
+/**
+ * Adds separable Gaussians to a grid, keeps the per-axis weights between
+ * calls (one instance per thread).
+ */
+struct Splatter {
+  std::vector<float> w[3];
+
+  /**
+   * Add `amp * exp(-d^2 / (2 * variance))` to all grid points within a box
+   * of half-width `sqrt(radius2)` around `u` (grid coordinates).
+   */
+  void operator()(float* grid, const int* dim, const float* spacing,
+      const float* u, double amp, double variance, double radius2)
+  {
+    int lo[3], hi[3];
+    const double r = std::sqrt(radius2);
+
+    for (int a = 0; a < 3; ++a) {
+      const double r_a = r / spacing[a];
+      lo[a] = std::max(0, (int) std::ceil(u[a] - r_a));
+      hi[a] = std::min(dim[a] - 1, (int) std::floor(u[a] + r_a));
+      if (lo[a] > hi[a])
+        return;
+
+      const double f = -0.5 * spacing[a] * spacing[a] / variance;
+      w[a].resize(hi[a] - lo[a] + 1);
+      for (int i = lo[a]; i <= hi[a]; ++i) {
+        const double d = i - u[a];
+        w[a][i - lo[a]] = (float) std::exp(f * d * d);
+      }
+    }
+
+    const int n_k = hi[2] - lo[2] + 1;
+    const float* w_k = w[2].data();
+
+    for (int i = lo[0]; i <= hi[0]; ++i) {
+      const float w_i = (float) amp * w[0][i - lo[0]];
+      for (int j = lo[1]; j <= hi[1]; ++j) {
+        const float w_ij = w_i * w[1][j - lo[1]];
+        float* p = grid + (std::size_t(i) * dim[1] + j) * dim[2] + lo[2];
+        for (int k = 0; k < n_k; ++k) {
+          p[k] += w_ij * w_k[k];
+        }
+      }
+    }
+  }
+};
+
+/// Signed frequency index of DFT element `i` of `n`
+int frequency(int i, int n)
+{
+  return (i <= n / 2) ? i : i - n;
+}
+
+/// Volume (in grid points) of the box which Splatter visits
+double boxVolume(const float* spacing, double radius2)
+{
+  const double r = std::sqrt(radius2);
+  double volume = 1.0;
+  for (int a = 0; a < 3; ++a) {
+    volume *= 2.0 * r / spacing[a] + 1.0;
+  }
+  return volume;
+}
+
+/// 3D normalization of a Gaussian with per-axis `variance`
+double gaussianNorm(double variance)
+{
+  return std::pow(2.0 * cPI * variance, -1.5);
+}
+
+} // namespace
+
+GaussianMapFFT::GaussianMapFFT(const GaussianMapParams& params,
+    const std::vector<GaussianMapElement>& elements,
+    const std::vector<GaussianMapAtom>& atoms)
+    : m_params(params)
+    , m_elements(elements)
+    , m_atoms(atoms)
+{
+  const float* h = params.spacing;
+  const double h_max = std::max({h[0], h[1], h[2]});
+
+  m_spread_variance = MinSplitVariance * h_max * h_max;
+  m_min_atom_variance = 0.0F;
+
+  std::vector<int> n_atom_element(elements.size(), 0);
+  for (std::size_t i = 0; i != atoms.size(); ++i) {
+    if (i == 0 || m_min_atom_variance > atoms[i].variance)
+      m_min_atom_variance = atoms[i].variance;
+    ++n_atom_element[atoms[i].element];
+  }
+
+  // wide terms get split, the remainder must be wide as well
+  const auto n_terms = GaussianMapElement::NTerms;
+  m_narrow.assign(elements.size() * n_terms, false);
+  for (int e = 0; e != int(elements.size()); ++e) {
+    if (!n_atom_element[e])
+      continue;
+    bool split = false;
+    for (int k = 0; k < n_terms; ++k) {
+      if (elements[e].weight[k] == 0.0)
+        continue;
+      const double variance = elements[e].variance[k] + m_min_atom_variance;
+      if (variance < 2.0 * m_spread_variance) {
+        m_narrow[e * n_terms + k] = true;
+      } else {
+        m_wide.push_back({e, k, variance - m_spread_variance});
+        split = true;
+      }
+    }
+    if (split)
+      m_wide_elements.push_back(e);
+  }
+
+  for (int a = 0; a < 3; ++a) {
+    m_pad[a] = (int) std::ceil(params.cutoff / h[a]) + 1;
+    m_fft_dim[a] = params.dim[a] + 2 * m_pad[a];
+    if (!m_wide.empty()) {
+      m_fft_dim[a] = pocketfft::detail::util::good_size_real(m_fft_dim[a]);
+    }
+  }
+
+  // slabs along the first axis, twice as wide as the largest stencil, so
+  // that every other slab can be processed in parallel
+  double max_radius2 = 0.0;
+  for (const auto& atom : atoms) {
+    const auto& element = elements[atom.element];
+    if (!m_wide_elements.empty() &&
+        std::find(m_wide_elements.begin(), m_wide_elements.end(),
+            atom.element) != m_wide_elements.end()) {
+      max_radius2 = std::max(
+          max_radius2, 2.0 * spreadVariance(atom) * SpreadElim);
+    }
+    for (int k = 0; k < n_terms; ++k) {
+      if (m_narrow[atom.element * n_terms + k]) {
+        const double variance = element.variance[k] + atom.variance;
+        const double amp =
+            atom.occup * element.weight[k] * gaussianNorm(variance);
+        max_radius2 = std::max(max_radius2, stencilRadius2(variance, amp));
+      }
+    }
+  }
+
+  m_slab_width =
+      std::max(1, (int) std::ceil(2.0 * std::sqrt(max_radius2) / h[0]));
+  m_n_slab = m_fft_dim[0] / m_slab_width + 1;
+
+  m_atom_slab.resize(atoms.size());
+  for (std::size_t i = 0; i != atoms.size(); ++i) {
+    float u[3];
+    gridCoords(atoms[i], u);
+    m_atom_slab[i] = -1;
+    if (u[0] >= 0.0F && u[1] >= 0.0F && u[2] >= 0.0F &&
+        u[0] <= m_fft_dim[0] - 1 && u[1] <= m_fft_dim[1] - 1 &&
+        u[2] <= m_fft_dim[2] - 1) {
+      m_atom_slab[i] = (int) u[0] / m_slab_width;
+    }
+  }
+}
+
+/**
+ * Position of the atom in the padded grid
+ */
+void GaussianMapFFT::gridCoords(const GaussianMapAtom& atom, float* u) const
+{
+  for (int a = 0; a < 3; ++a) {
+    u[a] = (atom.pos[a] - m_params.origin[a]) / m_params.spacing[a] +
+           m_pad[a];
+  }
+}
+
+/**
+ * Variance of the splatted part of the split terms
+ */
+double GaussianMapFFT::spreadVariance(const GaussianMapAtom& atom) const
+{
+  return m_spread_variance + (atom.variance - m_min_atom_variance);
+}
+
+/**
+ * Squared distance at which a Gaussian with peak `amp` falls below
+ * `exp(-elim)`
+ */
+double GaussianMapFFT::stencilRadius2(double variance, double amp) const
+{
+  const double log_amp = std::log(std::max(std::fabs(amp), 1e-10));
+  return 2.0 * variance * std::max(0.0, m_params.elim + log_amp);
+}
+
+double GaussianMapFFT::cost() const
+{
+  const auto n_terms = GaussianMapElement::NTerms;
+  double cost = 0.0;
+
+  for (std::size_t i = 0; i != m_atoms.size(); ++i) {
+    if (m_atom_slab[i] < 0)
+      continue;
+    const auto& atom = m_atoms[i];
+    const auto& element = m_elements[atom.element];
+    bool split = false;
+    for (int k = 0; k < n_terms; ++k) {
+      if (m_narrow[atom.element * n_terms + k]) {
+        const double variance = element.variance[k] + atom.variance;
+        const double amp =
+            atom.occup * element.weight[k] * gaussianNorm(variance);
+        cost += boxVolume(m_params.spacing, stencilRadius2(variance, amp));
+      } else if (element.weight[k] != 0.0) {
+        split = true;
+      }
+    }
+    if (split) {
+      cost += boxVolume(
+          m_params.spacing, 2.0 * spreadVariance(atom) * SpreadElim);
+    }
+  }
+
+  if (!m_wide.empty()) {
+    const double n =
+        double(m_fft_dim[0]) * double(m_fft_dim[1]) * double(m_fft_dim[2]);
+    cost += (m_wide_elements.size() + 1) * n *
+            (FFTCostFactor * std::log2(n) + 1.0);
+    cost += m_wide.size() * n / 2;
+  }
+
+  return cost;
+}
+
+void GaussianMapFFT::compute(CField* data, const int* offset) const
+{
+  const auto n_terms = GaussianMapElement::NTerms;
+  const int n_thread = std::max(1, m_params.n_thread);
+  const int* n = m_fft_dim;
+  const int n2c = n[2] / 2 + 1;
+  const std::size_t n_real = std::size_t(n[0]) * n[1] * n[2];
+  const std::size_t n_complex = std::size_t(n[0]) * n[1] * n2c;
+
+  std::vector<float> grid(n_real, 0.0F);
+
+  // atoms per slab
+  std::vector<int> slab_start(m_n_slab + 1, 0);
+  for (int slab : m_atom_slab) {
+    if (slab >= 0)
+      ++slab_start[slab + 1];
+  }
+  for (int s = 0; s < m_n_slab; ++s) {
+    slab_start[s + 1] += slab_start[s];
+  }
+  std::vector<int> slab_atoms(slab_start[m_n_slab]);
+  {
+    auto next = slab_start;
+    for (int i = 0; i != int(m_atoms.size()); ++i) {
+      if (m_atom_slab[i] >= 0)
+        slab_atoms[next[m_atom_slab[i]]++] = i;
+    }
+  }
+
+  // stencils of every other slab don't overlap
+  auto splatSlabs = [&](auto&& func) {
+    for (int phase = 0; phase < 2; ++phase) {
+#pragma omp parallel if (n_thread > 1) num_threads(n_thread)
+      {
+        Splatter splat;
+#pragma omp for schedule(dynamic, 1)
+        for (int s = phase; s < m_n_slab; s += 2) {
+          for (int j = slab_start[s]; j < slab_start[s + 1]; ++j) {
+            const int i = slab_atoms[j];
+            float u[3];
+            gridCoords(m_atoms[i], u);
+            func(splat, m_atoms[i], u);
+          }
+        }
+      }
+    }
+  };
+
+  if (!m_wide.empty()) {
+    std::vector<std::complex<float>> spectrum(n_complex);
+    std::vector<std::complex<float>> accum(n_complex, 0.0F);
+
+    const pocketfft::shape_t shape{std::size_t(n[0]), std::size_t(n[1]),
+        std::size_t(n[2])};
+    const pocketfft::stride_t stride_real{
+        std::ptrdiff_t(sizeof(float)) * n[1] * n[2],
+        std::ptrdiff_t(sizeof(float)) * n[2], std::ptrdiff_t(sizeof(float))};
+    const pocketfft::stride_t stride_complex{
+        std::ptrdiff_t(sizeof(std::complex<float>)) * n[1] * n2c,
+        std::ptrdiff_t(sizeof(std::complex<float>)) * n2c,
+        std::ptrdiff_t(sizeof(std::complex<float>))};
+    const pocketfft::shape_t axes{0, 1, 2};
+
+    for (int e : m_wide_elements) {
+      std::fill(grid.begin(), grid.end(), 0.0F);
+
+      splatSlabs([&](Splatter& splat, const GaussianMapAtom& atom,
+                     const float* u) {
+        if (atom.element != e)
+          return;
+        const double variance = spreadVariance(atom);
+        splat(grid.data(), n, m_params.spacing, u,
+            atom.occup * gaussianNorm(variance), variance,
+            2.0 * variance * SpreadElim);
+      });
+
+      pocketfft::r2c(shape, stride_real, stride_complex, axes,
+          pocketfft::FORWARD, grid.data(), spectrum.data(), 1.0F, n_thread);
+
+      // separable remainder kernels
+      std::vector<double> weights;
+      std::vector<std::vector<float>> tables[3];
+      for (const auto& term : m_wide) {
+        if (term.element != e)
+          continue;
+        weights.push_back(m_elements[e].weight[term.k]);
+        for (int a = 0; a < 3; ++a) {
+          const int n_a = (a == 2) ? n2c : n[a];
+          const double f_scale = 1.0 / (n[a] * m_params.spacing[a]);
+          std::vector<float> table(n_a);
+          for (int i = 0; i < n_a; ++i) {
+            const double f = frequency(i, n[a]) * f_scale;
+            table[i] =
+                (float) std::exp(-2.0 * cPI * cPI * term.variance * f * f);
+          }
+          tables[a].push_back(std::move(table));
+        }
+      }
+
+#pragma omp parallel for if (n_thread > 1) num_threads(n_thread)
+      for (int i = 0; i < n[0]; ++i) {
+        for (int j = 0; j < n[1]; ++j) {
+          const std::size_t row = (std::size_t(i) * n[1] + j) * n2c;
+          for (int k = 0; k < n2c; ++k) {
+            float m = 0.0F;
+            for (std::size_t t = 0; t != weights.size(); ++t) {
+              m += (float) weights[t] * tables[0][t][i] * tables[1][t][j] *
+                   tables[2][t][k];
+            }
+            accum[row + k] += spectrum[row + k] * m;
+          }
+        }
+      }
+    }
+
+    pocketfft::c2r(shape, stride_complex, stride_real, axes,
+        pocketfft::BACKWARD, accum.data(), grid.data(), 1.0F / n_real,
+        n_thread);
+  }
+
+  // narrow terms directly
+  splatSlabs([&](Splatter& splat, const GaussianMapAtom& atom,
+                 const float* u) {
+    const auto& element = m_elements[atom.element];
+    for (int k = 0; k < n_terms; ++k) {
+      if (!m_narrow[atom.element * n_terms + k])
+        continue;
+      const double variance = element.variance[k] + atom.variance;
+      const double amp =
+          atom.occup * element.weight[k] * gaussianNorm(variance);
+      splat(grid.data(), n, m_params.spacing, u, amp, variance,
+          stencilRadius2(variance, amp));
+    }
+  });
+
+  const int* dim = m_params.dim;
+  for (int a = 0; a < dim[0]; ++a) {
+    for (int b = 0; b < dim[1]; ++b) {
+      const float* src =
+          grid.data() +
+          (std::size_t(a + m_pad[0]) * n[1] + (b + m_pad[1])) * n[2] +
+          m_pad[2];
+      std::copy_n(src, dim[2],
+          data->ptr<float>(a + offset[0], b + offset[1], offset[2]));
+    }
+  }
+}
@@ -0,0 +1,103 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Gaussian (simulated density) maps by splatting and FFT convolution.
+ */
+
+#pragma once
+
+#include <vector>
+
+#include "PyMOLGlobals.h"
+
+struct CField;
+
+/**
+ * Density model of one element: the sum of `NTerms` normalized 3D Gaussians
+ * with `weight[k]` (integral) and per-axis variance `variance[k]` plus the
+ * variance of the atom.
+ */
+struct GaussianMapElement {
+  static constexpr int NTerms = 5;
+  double weight[NTerms];
+  double variance[NTerms];
+};
+
+struct GaussianMapAtom {
+  float pos[3];
+  int element;    ///< index into the elements
+  float occup;    ///< scales all terms
+  float variance; ///< per-axis variance added to all terms (B-factor)
+};
+
+/**
+ * Parameters for GaussianMapFFT
+ */
+struct GaussianMapParams {
+  /// Coordinates of grid point (0, 0, 0)
+  float origin[3];
+  /// Orthogonal grid spacing in Angstrom
+  float spacing[3];
+  /// Number of grid points
+  int dim[3];
+  /// Distance beyond which contributions are negligible
+  float cutoff = 0.0F;
+  /// Terms are truncated where they fall below `exp(-elim)`
+  double elim = 7.0;
+  int n_thread = 1;
+};
+
+/**
+ * Gaussian map on an orthogonal grid with costs that only grow linearly with
+ * the number of atoms.
+ *
+ * All Gaussians which are wide compared to the grid spacing get split into a
+ * narrow per-atom Gaussian, splatted onto a padded grid per element, and a
+ * per-element remainder which is applied in reciprocal space (one FFT per
+ * element plus one inverse FFT). The remaining narrow terms are evaluated
+ * directly with separable weights. Splatting runs in parallel over
+ * alternating slabs of the grid.
+ */
+class GaussianMapFFT
+{
+public:
+  GaussianMapFFT(const GaussianMapParams& params,
+      const std::vector<GaussianMapElement>& elements,
+      const std::vector<GaussianMapAtom>& atoms);
+
+  /**
+   * Estimated number of multiply-add operations for `compute`
+   */
+  double cost() const;
+
+  /**
+   * Write the map values to `data` at index `offset` and up
+   */
+  void compute(CField* data, const int* offset) const;
+
+private:
+  struct Term {
+    int element;
+    int k;
+    double variance; ///< remainder, applied in reciprocal space
+  };
+
+  GaussianMapParams m_params;
+  const std::vector<GaussianMapElement>& m_elements;
+  const std::vector<GaussianMapAtom>& m_atoms;
+
+  int m_pad[3];
+  int m_fft_dim[3];
+  double m_spread_variance;
+  float m_min_atom_variance;
+  std::vector<Term> m_wide;           ///< split terms
+  std::vector<bool> m_narrow;         ///< element * NTerms + k
+  std::vector<int> m_wide_elements;   ///< elements with split terms
+  std::vector<int> m_atom_slab;       ///< slab index per atom (-1: outside)
+  int m_slab_width;
+  int m_n_slab;
+
+  void gridCoords(const GaussianMapAtom& atom, float* u) const;
+  double spreadVariance(const GaussianMapAtom& atom) const;
+  double stencilRadius2(double variance, double amp) const;
+};
@@ -16,7 +16,12 @@ I* Additional authors of this source file include:
 Z* -------------------------------------------------------------------
 */
 
+#include <algorithm>
+#include <array>
+#include <cfloat>
+#include <mutex>
 #include <random>
+#include <vector>
 
 #include"os_python.h"
 #include"os_predef.h"
@@ -336,6 +341,311 @@ void IsofieldComputeGradients(PyMOLGlobals * G, Isofield * field)
 }
 
 
+/*===========================================================================*/
+IsofieldBlockRange::IsofieldBlockRange(PyMOLGlobals * G, const CField * data)
+{
+  const int B = block_size;
+  const int F = level_factor;
+
+  Level level0;
+  level0.size = B;
+  for(int a = 0; a < 3; a++) {
+    dim[a] = data->dim[a];
+    level0.n_block[a] = std::max(1, (dim[a] - 2) / B + 1);
+  }
+
+  if(!count()) {
+    std::fill_n(dim, 3, 0);
+    std::fill_n(level0.n_block, 3, 1);
+    level0.min.assign(1, 0.0F);
+    level0.max.assign(1, 0.0F);
+    levels.push_back(std::move(level0));
+    return;
+  }
+
+  const int* n_block = level0.n_block;
+  const int n_total = n_block[0] * n_block[1] * n_block[2];
+  level0.min.resize(n_total);
+  level0.max.resize(n_total);
+
+  // per-slab sums, added up in order below for reproducible results
+  std::vector<double> slab_sum(n_block[0]), slab_sumsq(n_block[0]);
+
+  const int n_thread = std::max(1, SettingGetGlobal_i(G, cSetting_max_threads));
+
+#pragma omp parallel for if (n_thread > 1) num_threads(n_thread) schedule(dynamic, 1)
+  for(int bi = 0; bi < n_block[0]; bi++) {
+    const int a0 = bi * B, a1 = std::min(a0 + B + 1, dim[0]);
+    for(int bj = 0; bj < n_block[1]; bj++) {
+      const int b0 = bj * B, b1 = std::min(b0 + B + 1, dim[1]);
+      for(int bk = 0; bk < n_block[2]; bk++) {
+        const int c0 = bk * B, c1 = std::min(c0 + B + 1, dim[2]);
+        float mn = data->get<float>(a0, b0, c0);
+        float mx = mn;
+        for(int a = a0; a < a1; a++) {
+          for(int b = b0; b < b1; b++) {
+            const float* v = data->ptr<float>(a, b, c0);
+            for(int c = c0; c < c1; c++, v++) {
+              if(mn > *v)
+                mn = *v;
+              if(mx < *v)
+                mx = *v;
+            }
+          }
+        }
+        const int idx = (bi * n_block[1] + bj) * n_block[2] + bk;
+        level0.min[idx] = mn;
+        level0.max[idx] = mx;
+      }
+    }
+
+    // points owned by this slab
+    const int a_stop = (bi == n_block[0] - 1) ? dim[0] : a0 + B;
+    double s = 0.0, ss = 0.0;
+    for(int a = a0; a < a_stop; a++) {
+      for(int b = 0; b < dim[1]; b++) {
+        const float* v = data->ptr<float>(a, b, 0);
+        for(int c = 0; c < dim[2]; c++, v++) {
+          s += *v;
+          ss += (double) *v * *v;
+        }
+      }
+    }
+    slab_sum[bi] = s;
+    slab_sumsq[bi] = ss;
+  }
+
+  for(int bi = 0; bi < n_block[0]; bi++) {
+    sum += slab_sum[bi];
+    sumsq += slab_sumsq[bi];
+  }
+
+  levels.push_back(std::move(level0));
+
+  // coarser levels, merged from the level below
+  while(levels.back().n_block[0] > 1 || levels.back().n_block[1] > 1 ||
+      levels.back().n_block[2] > 1) {
+    const Level& fine = levels.back();
+    Level coarse;
+    coarse.size = fine.size * F;
+    for(int a = 0; a < 3; a++) {
+      coarse.n_block[a] = (fine.n_block[a] - 1) / F + 1;
+    }
+    const int* n = coarse.n_block;
+    coarse.min.resize(n[0] * n[1] * n[2]);
+    coarse.max.resize(n[0] * n[1] * n[2]);
+
+    for(int bi = 0; bi < n[0]; bi++) {
+      const int i1 = std::min(bi * F + F, fine.n_block[0]);
+      for(int bj = 0; bj < n[1]; bj++) {
+        const int j1 = std::min(bj * F + F, fine.n_block[1]);
+        for(int bk = 0; bk < n[2]; bk++) {
+          const int k1 = std::min(bk * F + F, fine.n_block[2]);
+          const int first =
+              ((bi * F) * fine.n_block[1] + bj * F) * fine.n_block[2] + bk * F;
+          float mn = fine.min[first];
+          float mx = fine.max[first];
+          for(int i = bi * F; i < i1; i++) {
+            for(int j = bj * F; j < j1; j++) {
+              for(int k = bk * F; k < k1; k++) {
+                const int idx = (i * fine.n_block[1] + j) * fine.n_block[2] + k;
+                if(mn > fine.min[idx])
+                  mn = fine.min[idx];
+                if(mx < fine.max[idx])
+                  mx = fine.max[idx];
+              }
+            }
+          }
+          const int idx = (bi * n[1] + bj) * n[2] + bk;
+          coarse.min[idx] = mn;
+          coarse.max[idx] = mx;
+        }
+      }
+    }
+    levels.push_back(std::move(coarse));
+  }
+}
+
+/**
+ * Range of grid points owned by block `b` of level `l` (`stop` exclusive)
+ */
+void IsofieldBlockRange::owned(int l, const int* b, int* start, int* stop) const
+{
+  const Level& L = levels[l];
+  for(int a = 0; a < 3; a++) {
+    start[a] = b[a] * L.size;
+    stop[a] = (b[a] == L.n_block[a] - 1) ? dim[a] : start[a] + L.size;
+  }
+}
+
+/**
+ * True if the grid points `lo` to `hi` (exclusive) may have values on both
+ * sides of `level` (some `<= level` and some `> level`), i.e. if a contour at
+ * `level` may pass through them.
+ */
+bool IsofieldBlockRange::straddles(const int* lo, const int* hi, float level) const
+{
+  for(int a = 0; a < 3; a++) {
+    if(hi[a] <= lo[a])
+      return false;
+  }
+
+  const int top[3] = {0, 0, 0};
+  bool below = false, above = false;
+  straddles(levels.size() - 1, top, lo, hi, level, below, above);
+  return below && above;
+}
+
+void IsofieldBlockRange::straddles(int l, const int* b, const int* lo,
+    const int* hi, float level, bool& below, bool& above) const
+{
+  const Level& L = levels[l];
+  int start[3], stop[3];
+  owned(l, b, start, stop);
+
+  bool inside = true;
+  for(int a = 0; a < 3; a++) {
+    if(stop[a] <= lo[a] || start[a] >= hi[a])
+      return;
+    if(start[a] < lo[a] || std::min(start[a] + L.size, dim[a] - 1) >= hi[a])
+      inside = false;
+  }
+
+  const int idx = (b[0] * L.n_block[1] + b[1]) * L.n_block[2] + b[2];
+  const bool has_below = L.min[idx] <= level;
+  const bool has_above = L.max[idx] > level;
+
+  if(inside || l == 0) {
+    below = below || has_below;
+    above = above || has_above;
+    return;
+  }
+
+  // nothing to gain from the children
+  if((below || !has_below) && (above || !has_above))
+    return;
+
+  const Level& child = levels[l - 1];
+  int c[3];
+  for(c[0] = b[0] * level_factor;
+      c[0] < std::min((b[0] + 1) * level_factor, child.n_block[0]); c[0]++) {
+    for(c[1] = b[1] * level_factor;
+        c[1] < std::min((b[1] + 1) * level_factor, child.n_block[1]); c[1]++) {
+      for(c[2] = b[2] * level_factor;
+          c[2] < std::min((b[2] + 1) * level_factor, child.n_block[2]); c[2]++) {
+        straddles(l - 1, c, lo, hi, level, below, above);
+        if(below && above)
+          return;
+      }
+    }
+  }
+}
+
+/**
+ * Histogram of all field values with `n_points` bins from `min_his` to
+ * `max_his`, added to `his + 4` (same layout as
+ * ObjectMapStateGetHistogram). Blocks which fall entirely into one bin, or
+ * outside of the range, are counted without visiting their points.
+ */
+void IsofieldBlockRange::histogram(const CField* data, float min_his,
+    float max_his, int n_points, float* his) const
+{
+  const float irange = (float) (n_points - 1) / (max_his - min_his);
+
+  if(!(irange > 0.0F && irange < FLT_MAX)) {
+    for(int a = 0; a < dim[0]; a++) {
+      for(int b = 0; b < dim[1]; b++) {
+        for(int c = 0; c < dim[2]; c++) {
+          const double f_val = data->get<float>(a, b, c);
+          const int pos = (int) (irange * (f_val - min_his));
+          if((pos >= 0) && (pos < n_points)) {
+            his[pos + 4] += 1.0;
+          }
+        }
+      }
+    }
+    return;
+  }
+
+  const int top[3] = {0, 0, 0};
+  histogram(levels.size() - 1, top, data, min_his, irange, n_points, his);
+}
+
+void IsofieldBlockRange::histogram(int l, const int* b, const CField* data,
+    float min_his, float irange, int n_points, float* his) const
+{
+  const Level& L = levels[l];
+  const int idx = (b[0] * L.n_block[1] + b[1]) * L.n_block[2] + b[2];
+  const int pos_min = (int) (irange * ((double) L.min[idx] - min_his));
+  const int pos_max = (int) (irange * ((double) L.max[idx] - min_his));
+
+  if(pos_max < 0 || pos_min >= n_points)
+    return;
+
+  int start[3], stop[3];
+  owned(l, b, start, stop);
+
+  if(pos_min == pos_max) {
+    his[pos_min + 4] += (float) (stop[0] - start[0]) *
+                              (stop[1] - start[1]) * (stop[2] - start[2]);
+    return;
+  }
+
+  if(l == 0) {
+    for(int a = start[0]; a < stop[0]; a++) {
+      for(int b = start[1]; b < stop[1]; b++) {
+        const float* v = data->ptr<float>(a, b, start[2]);
+        for(int c = start[2]; c < stop[2]; c++, v++) {
+          const int pos = (int) (irange * ((double) *v - min_his));
+          if((pos >= 0) && (pos < n_points)) {
+            his[pos + 4] += 1.0;
+          }
+        }
+      }
+    }
+    return;
+  }
+
+  const Level& child = levels[l - 1];
+  int c[3];
+  for(c[0] = b[0] * level_factor;
+      c[0] < std::min((b[0] + 1) * level_factor, child.n_block[0]); c[0]++) {
+    for(c[1] = b[1] * level_factor;
+        c[1] < std::min((b[1] + 1) * level_factor, child.n_block[1]); c[1]++) {
+      for(c[2] = b[2] * level_factor;
+          c[2] < std::min((b[2] + 1) * level_factor, child.n_block[2]); c[2]++) {
+        histogram(l - 1, c, data, min_his, irange, n_points, his);
+      }
+    }
+  }
+}
+
+/**
+ * Get the per-block min/max index of the field data, build it if missing.
+ * The index is kept until the field is copied or IsofieldInvalidate is called.
+ */
+const IsofieldBlockRange& IsofieldGetBlockRange(PyMOLGlobals * G, Isofield * field)
+{
+  // meshes and surfaces of the same map may update concurrently
+  static std::mutex mutex;
+  std::lock_guard<std::mutex> lock(mutex);
+
+  if(!field->block_range) {
+    field->block_range.reset(new IsofieldBlockRange(G, field->data.get()));
+  }
+  return *field->block_range;
+}
+
+/**
+ * Drop data derived from the field values (gradients, min/max index). Must be
+ * called after modifying `field->data` in place.
+ */
+void IsofieldInvalidate(Isofield * field)
+{
+  field->gradients.reset();
+  field->block_range.reset();
+}
+
 /*===========================================================================*/
 Isofield::Isofield(PyMOLGlobals * G, const int * const dims)
 {
@@ -788,6 +1098,126 @@ int IsosurfGetRange(PyMOLGlobals * G, Isofield * field,
 }
 
 
+/*===========================================================================*/
+namespace {
+/**
+ * Geometry of a single contoured block, in the same layout as the
+ * IsosurfVolume output (without the terminating segment).
+ */
+struct IsosurfBlockOutput {
+  pymol::vla<int> num;
+  pymol::vla<float> line;
+  int n_line = 0;
+  int n_seg = 0;
+  int ok = true;
+};
+}
+
+/**
+ * Contours the block which starts at grid index `offset` into `out`, using
+ * the scratch fields of `I`.
+ */
+static int IsosurfContourBlock(CIsosurf * I, const int *offset,
+                               const int *range, cIsomeshMode mode,
+                               IsosurfBlockOutput & out)
+{
+  int ok = true;
+  int c;
+
+  out.num = pymol::vla<int>(100);
+  out.line = pymol::vla<float>(300);
+
+  I->Num = std::addressof(out.num);
+  I->Line = std::addressof(out.line);
+  I->NLine = 0;
+  I->NSeg = 0;
+  (*I->Num)[I->NSeg] = I->NLine;
+
+  for(c = 0; c < 3; c++) {
+    I->CurOff[c] = offset[c];
+    I->Max[c] = range[3 + c] - I->CurOff[c];
+    if(I->Max[c] > (IsosurfSubSize + 1))
+      I->Max[c] = (IsosurfSubSize + 1);
+  }
+#ifdef Trace
+  for(c = 0; c < 3; c++)
+    printf(" IsosurfVolume: c: %i CurOff[c]: %i Max[c] %i\n", c,
+           I->CurOff[c], I->Max[c]);
+#endif
+
+  switch (mode) {
+  case cIsomeshMode::isomesh:      /* standard mode - want lines */
+    ok = IsosurfCurrent(I);
+    break;
+  case cIsomeshMode::isodot:      /* point mode - just want points on the isosurface */
+    ok = IsosurfPoints(I);
+    break;
+  }
+  if(I->G->Interrupt) {
+    ok = false;
+  }
+
+  out.n_line = I->NLine;
+  out.n_seg = I->NSeg;
+  out.ok = ok;
+  I->Num = nullptr;
+  I->Line = nullptr;
+  return (ok);
+}
+
+/**
+ * Contours the blocks at `offsets` with up to `max_threads` threads. Every
+ * thread has its own scratch fields and every block its own output, so the
+ * result does not depend on scheduling.
+ */
+static int IsosurfContourBlocks(PyMOLGlobals * G, const CIsosurf * base,
+                                const int *range, cIsomeshMode mode,
+                                const std::vector<std::array<int, 3>> & offsets,
+                                std::vector<IsosurfBlockOutput> & outputs)
+{
+  const int n_block = offsets.size();
+  int n_thread = std::max(1, SettingGetGlobal_i(G, cSetting_max_threads));
+  if(n_thread > n_block)
+    n_thread = n_block;
+
+  outputs.resize(n_block);
+
+#pragma omp parallel if (n_thread > 1) num_threads(n_thread)
+  {
+    CIsosurf *T = IsosurfNew(G);
+    int ok = (T != nullptr);
+    if(ok) {
+      std::copy_n(base->AbsDim, 3, T->AbsDim);
+      std::copy_n(base->CurDim, 3, T->CurDim);
+      T->Skip = base->Skip;
+      T->Coord = base->Coord;
+      T->Data = base->Data;
+      T->Level = base->Level;
+      ok = IsosurfAlloc(G, T);
+    }
+
+#pragma omp for schedule(dynamic, 1)
+    for(int b = 0; b < n_block; b++) {
+      if(ok) {
+        IsosurfContourBlock(T, offsets[b].data(), range, mode, outputs[b]);
+      } else {
+        outputs[b].ok = false;
+      }
+    }
+
+    if(T) {
+      IsosurfPurge(T);
+      _IsosurfFree(T);
+    }
+  }
+
+  for(auto const& out : outputs) {
+    if(!out.ok)
+      return false;
+  }
+  return true;
+}
+
 /*===========================================================================*/
 int IsosurfVolume(PyMOLGlobals* G, CSetting* set1, CSetting* set2,
     Isofield* field, float level, pymol::vla<int>& num, pymol::vla<float>& vert,
@@ -804,7 +1234,6 @@ int IsosurfVolume(PyMOLGlobals* G, CSetting* set1, CSetting* set2,
   {
     int Steps[3];
     int c, i, j, k;
-    int x, y, z;
     int range_store[6];
     I->Num = std::addressof(num);
     I->Line = std::addressof(vert);
@@ -829,8 +1258,6 @@ int IsosurfVolume(PyMOLGlobals* G, CSetting* set1, CSetting* set2,
     I->Coord = field->points.get();
     I->Data = field->data.get();
     I->Level = level;
-    if(ok)
-      ok = IsosurfAlloc(G, I);
 
     I->NLine = 0;
     I->NSeg = 0;
@@ -841,53 +1268,56 @@ int IsosurfVolume(PyMOLGlobals* G, CSetting* set1, CSetting* set2,
       switch (mode) {
       case cIsomeshMode::gradient:
         ok = IsosurfGradients(G, set1, set2, I, field, range, level, alt_level);
-        IsosurfPurge(I);
         break;
       default:
-        for(i = 0; i < Steps[0]; i++) {
-          for(j = 0; j < Steps[1]; j++) {
-            for(k = 0; k < Steps[2]; k++) {
-              if(ok) {
-                I->CurOff[0] = IsosurfSubSize * i;
-                I->CurOff[1] = IsosurfSubSize * j;
-                I->CurOff[2] = IsosurfSubSize * k;
-                for(c = 0; c < 3; c++)
-                  I->CurOff[c] += range[c];
-                for(c = 0; c < 3; c++) {
-                  I->Max[c] = range[3 + c] - I->CurOff[c];
-                  if(I->Max[c] > (IsosurfSubSize + 1))
-                    I->Max[c] = (IsosurfSubSize + 1);
-                }
-                if(!(i || j || k)) {
-                  for(x = 0; x < I->Max[0]; x++)
-                    for(y = 0; y < I->Max[1]; y++)
-                      for(z = 0; z < I->Max[2]; z++)
-                        for(c = 0; c < 3; c++)
-                          EdgePt(I->Point, x, y, z, c).NLink = 0;
-                }
-#ifdef Trace
+        {
+          /* only blocks with values on both sides of the level can
+             contribute, everything else is skipped with the min/max index */
+          const auto& block_range = IsofieldGetBlockRange(G, field);
+          std::vector<std::array<int, 3>> offsets;
+          std::vector<IsosurfBlockOutput> outputs;
+
+          for(i = 0; i < Steps[0]; i++) {
+            for(j = 0; j < Steps[1]; j++) {
+              for(k = 0; k < Steps[2]; k++) {
+                std::array<int, 3> offset = {
+                  range[0] + IsosurfSubSize * i,
+                  range[1] + IsosurfSubSize * j,
+                  range[2] + IsosurfSubSize * k,
+                };
+                int stop[3];
                 for(c = 0; c < 3; c++)
-                  printf(" IsosurfVolume: c: %i CurOff[c]: %i Max[c] %i\n", c,
-                         I->CurOff[c], I->Max[c]);
-#endif
-
-                if(ok)
-                  switch (mode) {
-                  case cIsomeshMode::isomesh:      /* standard mode - want lines */
-                    ok = IsosurfCurrent(I);
-                    break;
-                  case cIsomeshMode::isodot:      /* point mode - just want points on the isosurface */
-                    ok = IsosurfPoints(I);
-                    break;
-                  }
-                if(G->Interrupt) {
-                  ok = false;
-                }
+                  stop[c] = std::min(offset[c] + IsosurfSubSize + 1, range[3 + c]);
+                if(block_range.straddles(offset.data(), stop, level))
+                  offsets.push_back(offset);
               }
             }
           }
+
+          PRINTFD(G, FB_Isosurface)
+            " IsosurfVolume: contouring %d of %d blocks\n",
+            (int) offsets.size(), Steps[0] * Steps[1] * Steps[2]
+            ENDFD;
+
+          if(!offsets.empty())
+            ok = IsosurfContourBlocks(G, I, range, mode, offsets, outputs);
+
+          /* concatenate in block order */
+          for(auto& out : outputs) {
+            if(!ok)
+              break;
+            if(!out.n_line)
+              continue;
+            I->Line->check(3 * (I->NLine + out.n_line) - 1);
+            std::copy_n(out.line.data(), 3 * out.n_line,
+                I->Line->data() + 3 * I->NLine);
+            I->Num->check(I->NSeg + out.n_seg);
+            std::copy_n(out.num.data(), out.n_seg, I->Num->data() + I->NSeg);
+            I->NLine += out.n_line;
+            I->NSeg += out.n_seg;
+            (*I->Num)[I->NSeg] = I->NLine;
+          }
         }
-        IsosurfPurge(I);
         break;
       }
     }
@@ -910,6 +1340,9 @@ int IsosurfVolume(PyMOLGlobals* G, CSetting* set1, CSetting* set2,
     I->Num->resize(I->NSeg + 1);
     (*I->Num)[I->NSeg] = 0;        /* important - must terminate the segment list */
 
+    I->Num = nullptr;
+    I->Line = nullptr;
+
     if(!PIsGlutThread()) {
       _IsosurfFree(I);
     }
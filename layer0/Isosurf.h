@@ -27,12 +27,56 @@ Z* -------------------------------------------------------------------
 #include"PyMOLEnums.h"
 #include"Setting.h"
 
+#include <vector>
+
+/**
+ * Hierarchical min/max index of the field data.
+ *
+ * Level 0 has blocks of `block_size` grid cells per axis, every coarser level
+ * merges `level_factor` blocks per axis, up to a single block. Block `b` along
+ * an axis spans the points `b * size` to `(b + 1) * size` (inclusive), so
+ * blocks share their boundary planes, like contouring cells. For counting,
+ * each point is owned by exactly one block per level (half-open ranges, the
+ * last block owns the rest of the axis).
+ */
+struct IsofieldBlockRange {
+  static constexpr int block_size = 8;
+  static constexpr int level_factor = 4;
+
+  struct Level {
+    int size;
+    int n_block[3];
+    std::vector<float> min, max;
+  };
+
+  int dim[3]{};
+  std::vector<Level> levels; //!< finest first
+  double sum = 0.0;          //!< sum of all values
+  double sumsq = 0.0;        //!< sum of all squared values
+
+  IsofieldBlockRange(PyMOLGlobals* G, const CField* data);
+  bool straddles(const int* lo, const int* hi, float level) const;
+  int count() const { return dim[0] * dim[1] * dim[2]; }
+  float minValue() const { return levels.back().min[0]; }
+  float maxValue() const { return levels.back().max[0]; }
+  void histogram(const CField* data, float min_his, float max_his,
+      int n_points, float* his) const;
+
+private:
+  void straddles(int l, const int* b, const int* lo, const int* hi,
+      float level, bool& below, bool& above) const;
+  void histogram(int l, const int* b, const CField* data, float min_his,
+      float irange, int n_points, float* his) const;
+  void owned(int l, const int* b, int* start, int* stop) const;
+};
+
 struct Isofield {
   int dimensions[3]{};
   int save_points = true;
   pymol::copyable_ptr<CField> points;
   pymol::copyable_ptr<CField> data;
   pymol::cache_ptr<CField> gradients;
+  pymol::cache_ptr<IsofieldBlockRange> block_range;
   Isofield() = default;
   Isofield(PyMOLGlobals * G, const int * const dims);
 };
@@ -53,6 +97,8 @@ void IsosurfFree(PyMOLGlobals * G);
 /* isofield operations -- not part of Isosurf */
 
 void IsofieldComputeGradients(PyMOLGlobals * G, Isofield * field);
+const IsofieldBlockRange& IsofieldGetBlockRange(PyMOLGlobals * G, Isofield * field);
+void IsofieldInvalidate(Isofield * field);
 PyObject *IsosurfAsPyList(PyMOLGlobals *G, Isofield * I);
 Isofield *IsosurfNewFromPyList(PyMOLGlobals * G, PyObject * list);
 
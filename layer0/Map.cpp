@@ -53,23 +53,27 @@ MapType::~MapType()
 
 int MapCacheInit(MapCache * M, MapType * I, int group_id, int block_base)
 {
-  PyMOLGlobals *G = I->G;
+  int ok = MapCacheInitSize(M, I->G, I->NVert, group_id, block_base);
+  M->block_base = I->block_base;
+  return ok;
+}
+
+int MapCacheInitSize(MapCache * M, PyMOLGlobals * G, int n, int group_id,
+                     int block_base)
+{
   int ok = true;
 
   M->G = G;
-  M->block_base = I->block_base;
+  M->block_base = block_base;
   M->Cache =
-    CacheCalloc(G, int, I->NVert, group_id, block_base + cCache_map_cache_offset);
+    CacheCalloc(G, int, n, group_id, block_base + cCache_map_cache_offset);
   CHECKOK(ok, M->Cache);
   if (ok)
     M->CacheLink =
-      CacheAlloc(G, int, I->NVert, group_id, block_base + cCache_map_cache_link_offset);
+      CacheAlloc(G, int, n, group_id, block_base + cCache_map_cache_link_offset);
   CHECKOK(ok, M->CacheLink);
   M->CacheStart = -1;
   return ok;
-  /*  p=M->Cache;
-     for(a=0;a<I->NVert;a++)
-     *(p++) = 0; */
 }
 
 void MapCacheReset(MapCache * M)
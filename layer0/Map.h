@@ -80,6 +80,9 @@ int *MapLocusEStart(MapType * map, const float *v);
 #define MapCached(m,a) ((m)->Cache[a])
 
 int MapCacheInit(MapCache * M, MapType * I, int group_id, int block_base);
+/* cache for indices below n, when there is no map (e.g. with a BasisBVH) */
+int MapCacheInitSize(MapCache * M, PyMOLGlobals * G, int n, int group_id,
+                     int block_base);
 void MapCacheReset(MapCache * M);
 void MapCacheFree(MapCache * M, int group_id, int block_base);
 
@@ -0,0 +1,123 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Read-only memory-mapped files.
+ */
+
+#include "MappedFile.h"
+#include "File.h"
+
+#include <cerrno>
+#include <cstring>
+#include <utility>
+
+#ifdef _WIN32
+#include <io.h>
+#include <Windows.h>
+#else
+#include <sys/mman.h>
+#include <sys/stat.h>
+#endif
+
+namespace pymol
+{
+
+mapped_file::mapped_file(mapped_file&& other) noexcept
+{
+  *this = std::move(other);
+}
+
+mapped_file& mapped_file::operator=(mapped_file&& other) noexcept
+{
+  if (this != &other) {
+    unmap();
+    std::swap(m_data, other.m_data);
+    std::swap(m_size, other.m_size);
+#ifdef _WIN32
+    std::swap(m_handle, other.m_handle);
+#endif
+  }
+  return *this;
+}
+
+void mapped_file::unmap()
+{
+#ifdef _WIN32
+  if (m_data) {
+    UnmapViewOfFile(m_data);
+  }
+  if (m_handle) {
+    CloseHandle(m_handle);
+    m_handle = nullptr;
+  }
+#else
+  if (m_data) {
+    munmap(const_cast<char*>(m_data), m_size);
+  }
+#endif
+  m_data = nullptr;
+  m_size = 0;
+}
+
+Result<mapped_file> mapped_file::open(zstring_view filename)
+{
+  FILE* fp = pymol_fopen(filename.c_str(), "rb");
+  if (!fp) {
+    return make_error("Cannot open '", filename, "': ", strerror(errno));
+  }
+  auto result = open(fp);
+  fclose(fp);
+  return result;
+}
+
+Result<mapped_file> mapped_file::open(FILE* fp)
+{
+  mapped_file map;
+
+#ifdef _WIN32
+  auto fh = reinterpret_cast<HANDLE>(_get_osfhandle(_fileno(fp)));
+  LARGE_INTEGER filesize;
+  if (fh == INVALID_HANDLE_VALUE || !GetFileSizeEx(fh, &filesize)) {
+    return make_error("Cannot determine file size");
+  }
+
+  if (filesize.QuadPart == 0) {
+    return map;
+  }
+
+  map.m_handle = CreateFileMappingW(fh, nullptr, PAGE_READONLY, 0, 0, nullptr);
+  if (!map.m_handle) {
+    return make_error("CreateFileMapping failed");
+  }
+
+  map.m_data = static_cast<const char*>(
+      MapViewOfFile(map.m_handle, FILE_MAP_READ, 0, 0, 0));
+  if (!map.m_data) {
+    return make_error("MapViewOfFile failed");
+  }
+
+  map.m_size = filesize.QuadPart;
+#else
+  int fd = fileno(fp);
+  struct stat st;
+  if (fd < 0 || fstat(fd, &st) != 0) {
+    return make_error("Cannot determine file size: ", strerror(errno));
+  }
+
+  if (st.st_size == 0) {
+    return map;
+  }
+
+  void* addr = mmap(nullptr, st.st_size, PROT_READ, MAP_SHARED, fd, 0);
+  if (addr == MAP_FAILED) {
+    return make_error("mmap failed: ", strerror(errno));
+  }
+
+  map.m_data = static_cast<const char*>(addr);
+  map.m_size = st.st_size;
+#endif
+
+  return map;
+}
+
+} // namespace pymol
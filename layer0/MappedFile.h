@@ -0,0 +1,65 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Read-only memory-mapped files.
+ */
+
+#pragma once
+
+#include <cstddef>
+#include <cstdio>
+
+#include "Result.h"
+#include "pymol/zstring_view.h"
+
+namespace pymol
+{
+
+/**
+ * Read-only memory mapping of an entire file. Move-only, unmaps on
+ * destruction.
+ *
+ * Example:
+ *
+ *     auto map = pymol::mapped_file::open("big.map");
+ *     if (!map) { ... map.error() ... }
+ *     auto bytes = map->data();
+ */
+class mapped_file
+{
+  const char* m_data = nullptr;
+  std::size_t m_size = 0;
+#ifdef _WIN32
+  void* m_handle = nullptr;
+#endif
+
+  void unmap();
+
+public:
+  mapped_file() = default;
+  ~mapped_file() { unmap(); }
+
+  mapped_file(const mapped_file&) = delete;
+  mapped_file& operator=(const mapped_file&) = delete;
+
+  mapped_file(mapped_file&& other) noexcept;
+  mapped_file& operator=(mapped_file&& other) noexcept;
+
+  /**
+   * Map the file with the given (UTF-8) name.
+   */
+  static Result<mapped_file> open(zstring_view filename);
+
+  /**
+   * Map the file behind an open file pointer. The file pointer may be closed
+   * after this call, the mapping stays valid.
+   * @pre All buffered writes to `fp` have been flushed
+   */
+  static Result<mapped_file> open(FILE* fp);
+
+  const char* data() const { return m_data; }
+  std::size_t size() const { return m_size; }
+  bool empty() const { return m_size == 0; }
+};
+
+} // namespace pymol
@@ -77,6 +77,9 @@ struct CText;
 struct CWizard;
 struct CAtomInfo;
 typedef struct _CSculptCache CSculptCache;
+typedef struct _CSurfaceCache CSurfaceCache;
+typedef struct _CRepBuildStats CRepBuildStats;
+typedef struct _CRepBuildQueue CRepBuildQueue;
 typedef struct _CVFont CVFont;
 typedef struct _CEditor CEditor;
 struct CExecutive;
@@ -155,6 +158,9 @@ struct PyMOLGlobals {
   CWizard *Wizard;
   CAtomInfo *AtomInfo;
   CSculptCache *SculptCache;
+  CSurfaceCache *SurfaceCache;
+  CRepBuildStats *RepBuildStats;
+  CRepBuildQueue *RepBuildQueue;
   CVFont *VFont;
   CEditor *Editor;
   CExecutive *Executive;
@@ -0,0 +1,858 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Molecular surfaces from distance fields on a grid.
+ */
+
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <unordered_map>
+
+#include "SurfaceGrid.h"
+#include "marching_cubes.h"
+
+namespace
+{
+
+/// Number of grid cells per block and axis
+constexpr int BlockSize = 32;
+
+/// Upper bound for the number of grid points, the spacing gets increased
+/// for larger molecules
+constexpr double MaxGridPoints = 1 << 28;
+
+constexpr float Far = 1e10F;
+
+enum : std::uint8_t {
+  MaskExterior = 0, ///< probe center allowed
+  MaskInterior = 1, ///< inside the solvent accessible surface (or cavity)
+  MaskVisited = 2,  ///< flood fill marker
+};
+
+struct Grid {
+  float origin[3];
+  float spacing;
+  int dim[3];
+
+  std::size_t index(int x, int y, int z) const
+  {
+    return (std::size_t(z) * dim[1] + y) * dim[0] + x;
+  }
+
+  std::size_t size() const { return index(0, 0, dim[2]); }
+};
+
+/// Sub-range of the grid, with its own storage layout
+struct Box {
+  int min[3];
+  int max[3]; ///< exclusive
+
+  int dim(int k) const { return max[k] - min[k]; }
+
+  std::size_t size() const
+  {
+    return std::size_t(dim(0)) * dim(1) * dim(2);
+  }
+
+  /// Local index from global grid coordinates
+  std::size_t index(int x, int y, int z) const
+  {
+    return (std::size_t(z - min[2]) * dim(1) + (y - min[1])) * dim(0) +
+           (x - min[0]);
+  }
+};
+
+/**
+ * Range of grid points within `r` of `c`, clamped to `box`
+ * @return False if empty
+ */
+bool SphereRange(const Grid& grid, const Box& box, const float* c, float r,
+    int* lo, int* hi)
+{
+  for (int k = 0; k < 3; ++k) {
+    lo[k] = std::max(box.min[k],
+        int(std::ceil((c[k] - r - grid.origin[k]) / grid.spacing)));
+    hi[k] = std::min(box.max[k] - 1,
+        int(std::floor((c[k] + r - grid.origin[k]) / grid.spacing)));
+    if (lo[k] > hi[k]) {
+      return false;
+    }
+  }
+  return true;
+}
+
+/**
+ * Rasterize the solvent accessible volume, and fill enclosed cavities which
+ * have fewer than `cavity_cull` probe positions.
+ */
+std::vector<std::uint8_t> MakeMask(const Grid& grid, const float* coord,
+    const float* radius, int n, float probe_radius, int cavity_cull)
+{
+  std::vector<std::uint8_t> mask(grid.size(), MaskExterior);
+  Box const all = {{0, 0, 0}, {grid.dim[0], grid.dim[1], grid.dim[2]}};
+
+  for (int i = 0; i < n; ++i) {
+    const float* c = coord + i * 3;
+    float const r = radius[i] + probe_radius;
+    float const r2 = r * r;
+    int lo[3], hi[3];
+    if (!SphereRange(grid, all, c, r, lo, hi)) {
+      continue;
+    }
+    for (int z = lo[2]; z <= hi[2]; ++z) {
+      float const dz = grid.origin[2] + z * grid.spacing - c[2];
+      for (int y = lo[1]; y <= hi[1]; ++y) {
+        float const dy = grid.origin[1] + y * grid.spacing - c[1];
+        float const dyz2 = dy * dy + dz * dz;
+        auto* row = mask.data() + grid.index(0, y, z);
+        for (int x = lo[0]; x <= hi[0]; ++x) {
+          float const dx = grid.origin[0] + x * grid.spacing - c[0];
+          if (dx * dx + dyz2 < r2) {
+            row[x] = MaskInterior;
+          }
+        }
+      }
+    }
+  }
+
+  // flood fill from the grid border (always exterior, see padding)
+  std::vector<std::size_t> stack;
+  auto const fill = [&](std::size_t start, std::uint8_t value,
+                        std::vector<std::size_t>* component) {
+    stack.push_back(start);
+    mask[start] = value;
+    while (!stack.empty()) {
+      auto const idx = stack.back();
+      stack.pop_back();
+      if (component) {
+        component->push_back(idx);
+      }
+      int const x = int(idx % grid.dim[0]);
+      int const y = int(idx / grid.dim[0] % grid.dim[1]);
+      int const z = int(idx / grid.dim[0] / grid.dim[1]);
+      std::size_t const neighbors[6] = {
+          x > 0 ? idx - 1 : idx,
+          x + 1 < grid.dim[0] ? idx + 1 : idx,
+          y > 0 ? idx - grid.dim[0] : idx,
+          y + 1 < grid.dim[1] ? idx + grid.dim[0] : idx,
+          z > 0 ? idx - std::size_t(grid.dim[0]) * grid.dim[1] : idx,
+          z + 1 < grid.dim[2] ? idx + std::size_t(grid.dim[0]) * grid.dim[1]
+                              : idx,
+      };
+      for (auto nb : neighbors) {
+        if (mask[nb] == MaskExterior) {
+          mask[nb] = value;
+          stack.push_back(nb);
+        }
+      }
+    }
+  };
+
+  fill(0, MaskVisited, nullptr);
+
+  if (cavity_cull > 0) {
+    std::vector<std::size_t> component;
+    for (std::size_t idx = 0; idx < mask.size(); ++idx) {
+      if (mask[idx] != MaskExterior) {
+        continue;
+      }
+      component.clear();
+      fill(idx, MaskVisited, &component);
+      if (component.size() < std::size_t(cavity_cull)) {
+        for (auto c : component) {
+          mask[c] = MaskInterior;
+        }
+      }
+    }
+  }
+
+  for (auto& m : mask) {
+    if (m == MaskVisited) {
+      m = MaskExterior;
+    }
+  }
+
+  return mask;
+}
+
+/**
+ * 1D squared Euclidean distance transform with nearest feature, by the lower
+ * envelope of parabolas (Felzenszwalb & Huttenlocher).
+ *
+ * @param f Input squared distances (`Far` for none), with stride
+ * @param feat Input nearest features, with stride
+ * @param v, z Scratch space for n and n + 1 values
+ */
+void DistanceTransform1D(float* f, int* feat, int n, std::size_t stride,
+    std::vector<int>& v, std::vector<float>& z, std::vector<float>& f_in,
+    std::vector<int>& feat_in)
+{
+  for (int q = 0; q < n; ++q) {
+    f_in[q] = f[q * stride];
+    feat_in[q] = feat[q * stride];
+  }
+
+  int k = -1;
+  for (int q = 0; q < n; ++q) {
+    if (f_in[q] >= Far) {
+      continue;
+    }
+    float s = -Far;
+    while (k >= 0) {
+      int const p = v[k];
+      s = ((f_in[q] + float(q) * q) - (f_in[p] + float(p) * p)) /
+          (2.F * (q - p));
+      if (s > z[k]) {
+        break;
+      }
+      --k;
+    }
+    ++k;
+    v[k] = q;
+    z[k] = (k == 0) ? -Far : s;
+    z[k + 1] = Far;
+  }
+
+  if (k < 0) {
+    return; // no features on this line, leave as is
+  }
+
+  for (int q = 0, j = 0; q < n; ++q) {
+    while (z[j + 1] < q) {
+      ++j;
+    }
+    int const p = v[j];
+    f[q * stride] = float(q - p) * (q - p) + f_in[p];
+    feat[q * stride] = feat_in[p];
+  }
+}
+
+struct Ball {
+  const float* c;
+  float r;
+};
+
+float Dist(const float* a, const float* b)
+{
+  float const d[3] = {a[0] - b[0], a[1] - b[1], a[2] - b[2]};
+  return std::sqrt(d[0] * d[0] + d[1] * d[1] + d[2] * d[2]);
+}
+
+/**
+ * Distance from `p` to the nearest point outside of all `balls`, if that
+ * point is within `max_dist` of `hint`.
+ *
+ * The nearest point is either the projection onto one sphere, the nearest
+ * point on the intersection circle of two spheres, or an intersection point
+ * of three spheres (the faces, edges and vertices of the reduced surface).
+ *
+ * @return Distance or a negative value if no such point was found
+ */
+float ExteriorDistance(const float* p, const std::vector<Ball>& balls,
+    const float* hint, float max_dist)
+{
+  float best = -1.F;
+  auto const n = balls.size();
+
+  auto const consider = [&](const float* s, std::size_t i0, std::size_t i1,
+                            std::size_t i2) {
+    if (Dist(s, hint) > max_dist) {
+      return;
+    }
+    for (std::size_t b = 0; b < n; ++b) {
+      if (b != i0 && b != i1 && b != i2 &&
+          Dist(s, balls[b].c) < balls[b].r - 1e-4F) {
+        return;
+      }
+    }
+    float const d = Dist(p, s);
+    if (best < 0.F || d < best) {
+      best = d;
+    }
+  };
+
+  for (std::size_t i = 0; i < n; ++i) {
+    // projection onto a single sphere
+    auto const& a = balls[i];
+    float const len = Dist(p, a.c);
+    if (len > 1e-6F) {
+      float s[3];
+      for (int k = 0; k < 3; ++k) {
+        s[k] = a.c[k] + (p[k] - a.c[k]) * (a.r / len);
+      }
+      consider(s, i, i, i);
+    }
+
+    for (std::size_t j = i + 1; j < n; ++j) {
+      // nearest point on the intersection circle
+      auto const& b = balls[j];
+      float const dist = Dist(a.c, b.c);
+      if (dist >= a.r + b.r || dist <= std::fabs(a.r - b.r)) {
+        continue;
+      }
+      float u[3];
+      for (int k = 0; k < 3; ++k) {
+        u[k] = (b.c[k] - a.c[k]) / dist;
+      }
+      float const x = (dist * dist + a.r * a.r - b.r * b.r) / (2.F * dist);
+      float const rho = std::sqrt(std::max(a.r * a.r - x * x, 0.F));
+      float m[3], w[3];
+      float pu = 0.F;
+      for (int k = 0; k < 3; ++k) {
+        m[k] = a.c[k] + u[k] * x;
+        pu += (p[k] - m[k]) * u[k];
+      }
+      for (int k = 0; k < 3; ++k) {
+        w[k] = p[k] - m[k] - pu * u[k];
+      }
+      float const wlen = std::sqrt(w[0] * w[0] + w[1] * w[1] + w[2] * w[2]);
+      if (wlen > 1e-6F) {
+        float s[3];
+        for (int k = 0; k < 3; ++k) {
+          s[k] = m[k] + w[k] * (rho / wlen);
+        }
+        consider(s, i, j, j);
+      }
+
+      for (std::size_t l = j + 1; l < n; ++l) {
+        // intersection points of three spheres
+        auto const& c = balls[l];
+        float ey[3], ez[3], ac[3];
+        float ii = 0.F;
+        for (int k = 0; k < 3; ++k) {
+          ac[k] = c.c[k] - a.c[k];
+          ii += u[k] * ac[k];
+        }
+        for (int k = 0; k < 3; ++k) {
+          ey[k] = ac[k] - ii * u[k];
+        }
+        float const jj = std::sqrt(ey[0] * ey[0] + ey[1] * ey[1] + ey[2] * ey[2]);
+        if (jj < 1e-6F) {
+          continue;
+        }
+        for (int k = 0; k < 3; ++k) {
+          ey[k] /= jj;
+        }
+        ez[0] = u[1] * ey[2] - u[2] * ey[1];
+        ez[1] = u[2] * ey[0] - u[0] * ey[2];
+        ez[2] = u[0] * ey[1] - u[1] * ey[0];
+        float const y =
+            (a.r * a.r - c.r * c.r + ii * ii + jj * jj) / (2.F * jj) -
+            ii / jj * x;
+        float const z2 = a.r * a.r - x * x - y * y;
+        if (z2 < 0.F) {
+          continue;
+        }
+        float const z = std::sqrt(z2);
+        for (float sign : {-1.F, 1.F}) {
+          float s[3];
+          for (int k = 0; k < 3; ++k) {
+            s[k] = a.c[k] + u[k] * x + ey[k] * y + ez[k] * (sign * z);
+          }
+          consider(s, i, j, l);
+        }
+      }
+    }
+  }
+
+  return best;
+}
+
+/**
+ * Distance field of one block, as seen by marching cubes
+ */
+class BlockField : public mc::Field
+{
+public:
+  const Grid* grid;
+  Box box;     ///< field values, one point larger than the vertex range
+  int core[3]; ///< first vertex
+  int dims[3]; ///< number of vertices
+  std::vector<float> values;
+
+  std::size_t xDim() const override { return dims[0]; }
+  std::size_t yDim() const override { return dims[1]; }
+  std::size_t zDim() const override { return dims[2]; }
+
+  float value(int x, int y, int z) const
+  {
+    x = std::min(std::max(x, box.min[0]), box.max[0] - 1);
+    y = std::min(std::max(y, box.min[1]), box.max[1] - 1);
+    z = std::min(std::max(z, box.min[2]), box.max[2] - 1);
+    return values[box.index(x, y, z)];
+  }
+
+  float get(std::size_t x, std::size_t y, std::size_t z) const override
+  {
+    return value(core[0] + int(x), core[1] + int(y), core[2] + int(z));
+  }
+
+  mc::Point get_point(std::size_t x, std::size_t y, std::size_t z) const override
+  {
+    return {
+        grid->origin[0] + (core[0] + int(x)) * grid->spacing,
+        grid->origin[1] + (core[1] + int(y)) * grid->spacing,
+        grid->origin[2] + (core[2] + int(z)) * grid->spacing,
+    };
+  }
+
+  /// Outward normal at an arbitrary position, by trilinear interpolation of
+  /// central differences
+  void normal(const float* pos, float* n) const
+  {
+    float g[3];
+    int i[3];
+    float t[3];
+    for (int k = 0; k < 3; ++k) {
+      g[k] = (pos[k] - grid->origin[k]) / grid->spacing;
+      i[k] = int(std::floor(g[k]));
+      t[k] = g[k] - i[k];
+      n[k] = 0.F;
+    }
+    for (int c = 0; c < 8; ++c) {
+      int const x = i[0] + (c & 1);
+      int const y = i[1] + ((c >> 1) & 1);
+      int const z = i[2] + ((c >> 2) & 1);
+      float const w = ((c & 1) ? t[0] : 1.F - t[0]) *
+                      (((c >> 1) & 1) ? t[1] : 1.F - t[1]) *
+                      (((c >> 2) & 1) ? t[2] : 1.F - t[2]);
+      // field is positive inside, so the outward normal is the negative
+      // gradient
+      n[0] -= w * (value(x + 1, y, z) - value(x - 1, y, z));
+      n[1] -= w * (value(x, y + 1, z) - value(x, y - 1, z));
+      n[2] -= w * (value(x, y, z + 1) - value(x, y, z - 1));
+    }
+    float const len = std::sqrt(n[0] * n[0] + n[1] * n[1] + n[2] * n[2]);
+    if (len > 0.F) {
+      n[0] /= len;
+      n[1] /= len;
+      n[2] /= len;
+    }
+  }
+};
+
+struct BlockMesh {
+  std::vector<float> vertices;
+  std::vector<float> normals;
+  std::vector<std::uint64_t> keys; ///< grid edge of vertex, 0 if not shared
+  std::vector<int> triangles;
+};
+
+/**
+ * Contour one block of the grid.
+ *
+ * @param spheres Indices of spheres which may influence this block
+ */
+void ProcessBlock(const Grid& grid, const std::vector<std::uint8_t>& mask,
+    const float* coord, const float* radius, const std::vector<int>& spheres,
+    const SurfaceGridParams& params, const int* c0, const int* c1, int halo,
+    BlockMesh& out)
+{
+  float const h = grid.spacing;
+  float const probe = params.probe_radius;
+
+  // skip blocks without any interior or exterior grid points
+  {
+    bool interior = false, exterior = false;
+    for (int z = c0[2]; z <= c1[2]; ++z) {
+      for (int y = c0[1]; y <= c1[1]; ++y) {
+        auto const* row = mask.data() + grid.index(0, y, z);
+        for (int x = c0[0]; x <= c1[0]; ++x) {
+          (row[x] == MaskExterior ? exterior : interior) = true;
+        }
+      }
+    }
+    if (!interior) {
+      return;
+    }
+    if (!exterior && params.solvent_accessible) {
+      return;
+    }
+  }
+
+  Box region;
+  for (int k = 0; k < 3; ++k) {
+    region.min[k] = std::max(0, c0[k] - halo);
+    region.max[k] = std::min(grid.dim[k], c1[k] + 1 + halo);
+  }
+
+  std::size_t const size = region.size();
+
+  // analytic distances near the spheres
+  std::vector<float> sas(size, Far);  // distance to SAS, negative inside
+  std::vector<float> vdw(size, -Far); // distance to vdW, positive inside
+  std::vector<int> nearest(size, -1); // sphere with the smallest SAS distance
+
+  for (int i : spheres) {
+    const float* c = coord + i * 3;
+    float const r_vdw = radius[i];
+    float const r_sas = r_vdw + probe;
+    int lo[3], hi[3];
+    if (!SphereRange(grid, region, c, r_sas + 2.F * h, lo, hi)) {
+      continue;
+    }
+    for (int z = lo[2]; z <= hi[2]; ++z) {
+      float const dz = grid.origin[2] + z * h - c[2];
+      for (int y = lo[1]; y <= hi[1]; ++y) {
+        float const dy = grid.origin[1] + y * h - c[1];
+        float const dyz2 = dy * dy + dz * dz;
+        auto const offset = region.index(region.min[0], y, z) - region.min[0];
+        for (int x = lo[0]; x <= hi[0]; ++x) {
+          float const dx = grid.origin[0] + x * h - c[0];
+          float const d = std::sqrt(dx * dx + dyz2);
+          auto& s = sas[offset + x];
+          auto& v = vdw[offset + x];
+          if (d - r_sas < s) {
+            s = d - r_sas;
+            nearest[offset + x] = i;
+          }
+          v = std::max(v, r_vdw - d);
+        }
+      }
+    }
+  }
+
+  // distance transform of the probe accessible region
+  std::vector<float> dist2;
+  std::vector<int> feature;
+
+  if (!params.solvent_accessible) {
+    dist2.assign(size, Far);
+    feature.assign(size, -1);
+
+    for (int z = region.min[2]; z < region.max[2]; ++z) {
+      for (int y = region.min[1]; y < region.max[1]; ++y) {
+        for (int x = region.min[0]; x < region.max[0]; ++x) {
+          if (mask[grid.index(x, y, z)] == MaskExterior) {
+            auto const idx = region.index(x, y, z);
+            dist2[idx] = 0.F;
+            feature[idx] = int(idx);
+          }
+        }
+      }
+    }
+
+    int const nmax = std::max({region.dim(0), region.dim(1), region.dim(2)});
+    std::vector<int> v(nmax);
+    std::vector<float> zz(nmax + 1);
+    std::vector<float> f_in(nmax);
+    std::vector<int> feat_in(nmax);
+
+    std::size_t const stride[3] = {
+        1,
+        std::size_t(region.dim(0)),
+        std::size_t(region.dim(0)) * region.dim(1),
+    };
+
+    for (int axis = 0; axis < 3; ++axis) {
+      int const a1 = (axis + 1) % 3;
+      int const a2 = (axis + 2) % 3;
+      for (int j2 = 0; j2 < region.dim(a2); ++j2) {
+        for (int j1 = 0; j1 < region.dim(a1); ++j1) {
+          auto const offset = j1 * stride[a1] + j2 * stride[a2];
+          DistanceTransform1D(dist2.data() + offset, feature.data() + offset,
+              region.dim(axis), stride[axis], v, zz, f_in, feat_in);
+        }
+      }
+    }
+  }
+
+  // field values (positive inside), one extra point on each side for the
+  // normals
+  BlockField field;
+  field.grid = &grid;
+  for (int k = 0; k < 3; ++k) {
+    field.box.min[k] = std::max(region.min[k], c0[k] - 1);
+    field.box.max[k] = std::min(region.max[k], c1[k] + 2);
+    field.core[k] = c0[k];
+    field.dims[k] = c1[k] - c0[k] + 1;
+  }
+  field.values.resize(field.box.size());
+
+  std::vector<Ball> balls;
+
+  for (int z = field.box.min[2]; z < field.box.max[2]; ++z) {
+    for (int y = field.box.min[1]; y < field.box.max[1]; ++y) {
+      for (int x = field.box.min[0]; x < field.box.max[0]; ++x) {
+        auto const idx = region.index(x, y, z);
+        float value;
+        if (params.solvent_accessible) {
+          value = -sas[idx];
+        } else if (mask[grid.index(x, y, z)] == MaskExterior) {
+          // probe fits here, so the SES is at least one probe radius away
+          value = -(probe + std::max(sas[idx], 0.F));
+        } else if (feature[idx] < 0) {
+          value = Far; // deep inside
+        } else {
+          // distance to the nearest probe position, refined by the
+          // analytic distance from that grid point to the SAS
+          int const q = feature[idx];
+          float const q_sas = std::min(std::max(sas[q], 0.F), 2.F * h);
+          float d = std::sqrt(dist2[idx]) * h - q_sas;
+
+          // near the surface: exact distance to the spheres around the
+          // nearest probe position
+          if (std::fabs(d - probe) < 2.F * h && d - probe > vdw[idx]) {
+            int const qx = region.min[0] + int(q % region.dim(0));
+            int const qy = region.min[1] + int(q / region.dim(0) % region.dim(1));
+            int const qz = region.min[2] + int(q / region.dim(0) / region.dim(1));
+            balls.clear();
+            for (int nz = std::max(qz - 1, region.min[2]);
+                 nz <= std::min(qz + 1, region.max[2] - 1); ++nz) {
+              for (int ny = std::max(qy - 1, region.min[1]);
+                   ny <= std::min(qy + 1, region.max[1] - 1); ++ny) {
+                for (int nx = std::max(qx - 1, region.min[0]);
+                     nx <= std::min(qx + 1, region.max[0] - 1); ++nx) {
+                  int const i = nearest[region.index(nx, ny, nz)];
+                  if (i >= 0 && std::none_of(balls.begin(), balls.end(),
+                                    [&](const Ball& ball) {
+                                      return ball.c == coord + i * 3;
+                                    })) {
+                    balls.push_back({coord + i * 3, radius[i] + probe});
+                  }
+                }
+              }
+            }
+            float const pos[3] = {grid.origin[0] + x * h,
+                grid.origin[1] + y * h, grid.origin[2] + z * h};
+            float const qpos[3] = {grid.origin[0] + qx * h,
+                grid.origin[1] + qy * h, grid.origin[2] + qz * h};
+            float const exact = ExteriorDistance(pos, balls, qpos, 3.F * h);
+            if (exact >= 0.F) {
+              d = std::min(d, exact);
+            }
+          }
+
+          value = std::max(vdw[idx], d - probe);
+        }
+        // keep vertices away from grid points, so they can be identified by
+        // their grid edge
+        if (std::fabs(value) < 1e-3F * h) {
+          value = (value < 0.F) ? -1e-3F * h : 1e-3F * h;
+        }
+        field.values[field.box.index(x, y, z)] = value;
+      }
+    }
+  }
+
+  auto const mesh = mc::march(field, 0.F, false);
+
+  out.vertices.resize(mesh.vertexCount * 3);
+  out.normals.resize(mesh.vertexCount * 3);
+  out.keys.resize(mesh.vertexCount);
+
+  for (std::size_t i = 0; i < mesh.vertexCount; ++i) {
+    float* pos = out.vertices.data() + i * 3;
+    for (int k = 0; k < 3; ++k) {
+      pos[k] = mesh.vertices[i][k];
+    }
+    field.normal(pos, out.normals.data() + i * 3);
+
+    // identify the grid edge, so vertices on block boundaries can be merged
+    float g[3];
+    int axis = 0;
+    float max_res = -1.F;
+    for (int k = 0; k < 3; ++k) {
+      g[k] = (pos[k] - grid.origin[k]) / h;
+      float const res = std::fabs(g[k] - std::round(g[k]));
+      if (res > max_res) {
+        max_res = res;
+        axis = k;
+      }
+    }
+
+    int e[3];
+    bool shared = false;
+    for (int k = 0; k < 3; ++k) {
+      e[k] = int(k == axis ? std::floor(g[k]) : std::round(g[k]));
+      e[k] = std::min(std::max(e[k], 0), grid.dim[k] - 1);
+      if (k != axis && (e[k] == c0[k] || e[k] == c1[k])) {
+        shared = true;
+      }
+    }
+
+    out.keys[i] = shared ? grid.index(e[0], e[1], e[2]) * 3 + axis + 1 : 0;
+  }
+
+  out.triangles.resize(mesh.faceCount * 3);
+  for (std::size_t i = 0; i < mesh.faceCount * 3; ++i) {
+    out.triangles[i] = int(mesh.faces[i]);
+  }
+}
+
+} // namespace
+
+bool SurfaceGridCompute(PyMOLGlobals* G, const float* coord,
+    const float* radius, int n, const SurfaceGridParams& params,
+    SurfaceGridMesh& mesh)
+{
+  mesh = SurfaceGridMesh();
+
+  if (n < 1) {
+    return true;
+  }
+
+  // grid with exterior padding of more than one block halo
+  float const probe = std::max(params.probe_radius, 0.F);
+  float max_radius = 0.F;
+  float lo[3], hi[3];
+  for (int k = 0; k < 3; ++k) {
+    lo[k] = hi[k] = coord[k];
+  }
+  for (int i = 0; i < n; ++i) {
+    max_radius = std::max(max_radius, radius[i]);
+    for (int k = 0; k < 3; ++k) {
+      lo[k] = std::min(lo[k], coord[i * 3 + k]);
+      hi[k] = std::max(hi[k], coord[i * 3 + k]);
+    }
+  }
+
+  Grid grid;
+  grid.spacing = std::max(params.spacing, 0.05F);
+
+  for (;;) {
+    float const pad = max_radius + probe + 3.F * grid.spacing;
+    double points = 1.0;
+    for (int k = 0; k < 3; ++k) {
+      grid.origin[k] = lo[k] - pad;
+      grid.dim[k] = int(std::ceil((hi[k] - lo[k] + 2.F * pad) / grid.spacing)) + 1;
+      points *= grid.dim[k];
+    }
+    if (points <= MaxGridPoints) {
+      break;
+    }
+    grid.spacing *= float(std::cbrt(points / MaxGridPoints)) * 1.01F;
+  }
+
+  float const h = grid.spacing;
+  int const halo = int(std::ceil((probe + 2.F * h) / h)) + 1;
+
+  SurfaceGridParams block_params = params;
+  block_params.probe_radius = probe;
+
+  auto const mask = MakeMask(grid, coord, radius, n, probe,
+      params.solvent_accessible ? 0 : params.cavity_cull);
+
+  if (G && G->Interrupt) {
+    return false;
+  }
+
+  // blocks and the spheres which influence them
+  int nblock[3];
+  for (int k = 0; k < 3; ++k) {
+    nblock[k] = (grid.dim[k] - 2) / BlockSize + 1;
+  }
+  int const n_blocks = nblock[0] * nblock[1] * nblock[2];
+  std::vector<std::vector<int>> block_spheres(n_blocks);
+
+  for (int i = 0; i < n; ++i) {
+    float const reach = radius[i] + probe + 2.F * h;
+    int b_lo[3], b_hi[3];
+    for (int k = 0; k < 3; ++k) {
+      int const v_lo =
+          int(std::floor((coord[i * 3 + k] - reach - grid.origin[k]) / h));
+      int const v_hi =
+          int(std::ceil((coord[i * 3 + k] + reach - grid.origin[k]) / h));
+      b_lo[k] = std::max(0, (v_lo - halo - BlockSize) / BlockSize);
+      b_hi[k] = std::min(nblock[k] - 1, (v_hi + halo) / BlockSize);
+    }
+    for (int bz = b_lo[2]; bz <= b_hi[2]; ++bz) {
+      for (int by = b_lo[1]; by <= b_hi[1]; ++by) {
+        for (int bx = b_lo[0]; bx <= b_hi[0]; ++bx) {
+          block_spheres[(bz * nblock[1] + by) * nblock[0] + bx].push_back(i);
+        }
+      }
+    }
+  }
+
+  std::vector<BlockMesh> block_meshes(n_blocks);
+
+  int const n_thread = std::max(params.n_thread, 1);
+
+#pragma omp parallel for schedule(dynamic, 1) num_threads(n_thread)
+  for (int b = 0; b < n_blocks; ++b) {
+    if (G && G->Interrupt) {
+      continue;
+    }
+    int const bidx[3] = {
+        b % nblock[0], b / nblock[0] % nblock[1], b / nblock[0] / nblock[1]};
+    int c0[3], c1[3];
+    for (int k = 0; k < 3; ++k) {
+      c0[k] = bidx[k] * BlockSize;
+      c1[k] = std::min(c0[k] + BlockSize, grid.dim[k] - 1);
+    }
+    ProcessBlock(grid, mask, coord, radius, block_spheres[b], block_params, c0,
+        c1, halo, block_meshes[b]);
+    block_spheres[b] = std::vector<int>();
+  }
+
+  if (G && G->Interrupt) {
+    return false;
+  }
+
+  // merge blocks
+  std::unordered_map<std::uint64_t, int> shared;
+  std::vector<int> local2global;
+  long long winding_vote = 0;
+
+  for (auto& block : block_meshes) {
+    local2global.resize(block.keys.size());
+    for (std::size_t i = 0; i < block.keys.size(); ++i) {
+      int const next = int(mesh.vertices.size() / 3);
+      if (block.keys[i]) {
+        auto const it = shared.emplace(block.keys[i], next);
+        if (!it.second) {
+          local2global[i] = it.first->second;
+          continue;
+        }
+      }
+      local2global[i] = next;
+      mesh.vertices.insert(mesh.vertices.end(), block.vertices.begin() + i * 3,
+          block.vertices.begin() + i * 3 + 3);
+      mesh.normals.insert(mesh.normals.end(), block.normals.begin() + i * 3,
+          block.normals.begin() + i * 3 + 3);
+    }
+
+    for (std::size_t t = 0; t + 2 < block.triangles.size(); t += 3) {
+      int const i0 = local2global[block.triangles[t]];
+      int const i1 = local2global[block.triangles[t + 1]];
+      int const i2 = local2global[block.triangles[t + 2]];
+      if (i0 == i1 || i1 == i2 || i2 == i0) {
+        continue;
+      }
+
+      // winding relative to the normals
+      const float* v0 = mesh.vertices.data() + i0 * 3;
+      const float* v1 = mesh.vertices.data() + i1 * 3;
+      const float* v2 = mesh.vertices.data() + i2 * 3;
+      float const e1[3] = {v1[0] - v0[0], v1[1] - v0[1], v1[2] - v0[2]};
+      float const e2[3] = {v2[0] - v0[0], v2[1] - v0[1], v2[2] - v0[2]};
+      float const cross[3] = {e1[1] * e2[2] - e1[2] * e2[1],
+          e1[2] * e2[0] - e1[0] * e2[2], e1[0] * e2[1] - e1[1] * e2[0]};
+      float dot = 0.F;
+      for (int k = 0; k < 3; ++k) {
+        dot += cross[k] * (mesh.normals[i0 * 3 + k] + mesh.normals[i1 * 3 + k] +
+                              mesh.normals[i2 * 3 + k]);
+      }
+      winding_vote += (dot < 0.F) ? -1 : 1;
+
+      mesh.triangles.push_back(i0);
+      mesh.triangles.push_back(i1);
+      mesh.triangles.push_back(i2);
+    }
+
+    block = BlockMesh();
+  }
+
+  // marching cubes winding is consistent, flip all triangles (not
+  // individual ones, normals can be poor in narrow crevices) to make them
+  // counter-clockwise
+  if (winding_vote < 0) {
+    for (std::size_t t = 0; t + 2 < mesh.triangles.size(); t += 3) {
+      std::swap(mesh.triangles[t + 1], mesh.triangles[t + 2]);
+    }
+  }
+
+  return true;
+}
@@ -0,0 +1,58 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Molecular surfaces from distance fields on a grid.
+ */
+
+#pragma once
+
+#include <vector>
+
+#include "PyMOLGlobals.h"
+
+/**
+ * Parameters for SurfaceGridCompute
+ */
+struct SurfaceGridParams {
+  float probe_radius = 1.4F;
+  /// Grid spacing in Angstrom
+  float spacing = 0.5F;
+  /// Solvent accessible surface (SAS) instead of solvent excluded (SES)
+  bool solvent_accessible = false;
+  /// Fill enclosed cavities with fewer than this many probe positions
+  int cavity_cull = 0;
+  int n_thread = 1;
+};
+
+/**
+ * Triangle mesh with per-vertex normals. Triangles are counter-clockwise
+ * when seen from the outside (along the normals).
+ */
+struct SurfaceGridMesh {
+  std::vector<float> vertices; ///< xyz per vertex
+  std::vector<float> normals;  ///< xyz per vertex, pointing outwards
+  std::vector<int> triangles;  ///< 3 vertex indices per triangle
+};
+
+/**
+ * Triangulate the solvent excluded (or accessible) surface of a set of
+ * spheres.
+ *
+ * The probe accessible region is rasterized to a grid, and enclosed
+ * cavities are filled according to `cavity_cull`. The distance to that
+ * region is then computed with an exact Euclidean distance transform, which
+ * gives the SES as the iso-surface at the probe radius, refined with the
+ * analytic sphere distances near the surface. Contouring uses marching
+ * cubes. The grid is processed in independent blocks (with overlap), so the
+ * memory use doesn't grow with the cube of the molecule size and blocks can
+ * run in parallel.
+ *
+ * @param G For interrupt checking, may be nullptr
+ * @param coord Sphere centers, 3 * n floats
+ * @param radius Sphere radii, n floats
+ * @param[out] mesh Result
+ * @return False if interrupted
+ */
+bool SurfaceGridCompute(PyMOLGlobals* G, const float* coord,
+    const float* radius, int n, const SurfaceGridParams& params,
+    SurfaceGridMesh& mesh);
@@ -30,6 +30,10 @@ Z* -------------------------------------------------------------------
 #include"Feedback.h"
 #include"P.h"
 
+#include <algorithm>
+#include <array>
+#include <vector>
+
 #define Trace_OFF
 
 #define O3(field,P1,P2,P3,offs) ((field)->get<float>(P1+offs[0],P2+offs[1],P3+offs[2]))
@@ -510,6 +514,87 @@ void TetsurfGetRange(PyMOLGlobals * G,
 }
 
 
+/*===========================================================================*/
+namespace {
+/**
+ * Geometry of a single block, in the same layout as the TetsurfVolume output
+ * (without the sentinel strip).
+ */
+struct TetsurfBlockOutput {
+  pymol::vla<int> num;
+  pymol::vla<float> vert;
+  int n_strip = 0;
+  int n_vert = 0;
+  int n_prim = 0;
+};
+}
+
+/**
+ * Polygonizes the blocks at `offsets` with up to `max_threads` threads. Every
+ * thread has its own scratch fields and every block its own output, so the
+ * result does not depend on scheduling.
+ */
+static int TetsurfBlocks(PyMOLGlobals * G, const CTetsurf * base, const int *range,
+                         const std::vector<std::array<int, 3>> & offsets,
+                         cIsosurfaceMode mode, const CarveHelper * carvehelper,
+                         cIsosurfaceSide side,
+                         std::vector<TetsurfBlockOutput> & outputs)
+{
+  const int n_block = offsets.size();
+  int n_thread = std::max(1, SettingGetGlobal_i(G, cSetting_max_threads));
+  if(n_thread > n_block)
+    n_thread = n_block;
+
+  outputs.resize(n_block);
+  int n_failed = 0;
+
+#pragma omp parallel if (n_thread > 1) num_threads(n_thread) reduction(+ : n_failed)
+  {
+    CTetsurf *T = TetsurfNew(G);
+    int ok = (T != nullptr);
+    if(ok) {
+      std::copy_n(base->AbsDim, 3, T->AbsDim);
+      std::copy_n(base->CurDim, 3, T->CurDim);
+      T->Coord = base->Coord;
+      T->Grad = base->Grad;
+      T->Data = base->Data;
+      T->Level = base->Level;
+      ok = TetsurfAlloc(T);
+    }
+
+#pragma omp for schedule(dynamic, 1)
+    for(int b = 0; b < n_block; b++) {
+      if(!ok) {
+        n_failed++;
+        continue;
+      }
+      auto& out = outputs[b];
+      int c;
+      for(c = 0; c < 3; c++) {
+        T->CurOff[c] = offsets[b][c];
+        T->Max[c] = (range[3 + c] - T->CurOff[c]);
+        if(T->Max[c] > (TetsurfSubSize + 1))
+          T->Max[c] = (TetsurfSubSize + 1);
+      }
+      T->TotPrim = 0;
+      if(TetsurfCodeVertices(T)) {
+        out.num = pymol::vla<int>(10);
+        out.vert = pymol::vla<float>(300);
+        out.n_vert = TetsurfFindActiveBoxes(T, mode, out.n_strip, 0, out.num,
+                                            out.vert, carvehelper, side);
+        out.n_prim = T->TotPrim;
+      }
+    }
+
+    if(T) {
+      TetsurfPurge(T);
+      _TetsurfFree(T);
+    }
+  }
+
+  return !n_failed;
+}
+
 /*===========================================================================*/
 /**
  * Compute an isosurface using the "marching tetrahedra" algorithm.
@@ -575,46 +660,58 @@ int TetsurfVolume(PyMOLGlobals* G, Isofield* field, float level,
       }
     }
 
-    /*   for(c=0;c<3;c++) {
-       printf("range %d %d %d\n",c,range[c],range[c+3]);
-       printf("steps %d\n",Steps[c]);
-       }
-     */
-
     I->Coord = field->points.get();
     I->Grad = field->gradients.get();
     I->Data = field->data.get();
     I->Level = level;
-    if(ok)
-      ok = TetsurfAlloc(I);
 
-    if(ok) {
+    {
+      /* only blocks with values on both sides of the level can
+         contribute, everything else is skipped with the min/max index */
+      const auto& block_range = IsofieldGetBlockRange(G, field);
+      std::vector<std::array<int, 3>> offsets;
+      std::vector<TetsurfBlockOutput> outputs;
 
       for(i = 0; i < Steps[0]; i++)
         for(j = 0; j < Steps[1]; j++)
           for(k = 0; k < Steps[2]; k++) {
-            I->CurOff[0] = TetsurfSubSize * i;
-            I->CurOff[1] = TetsurfSubSize * j;
-            I->CurOff[2] = TetsurfSubSize * k;
+            std::array<int, 3> offset = {
+              range[0] + TetsurfSubSize * i,
+              range[1] + TetsurfSubSize * j,
+              range[2] + TetsurfSubSize * k,
+            };
+            int stop[3];
             for(c = 0; c < 3; c++)
-              I->CurOff[c] += range[c];
-            for(c = 0; c < 3; c++) {
-              I->Max[c] = (range[3 + c] - I->CurOff[c]);
-              if(I->Max[c] > (TetsurfSubSize + 1))
-                I->Max[c] = (TetsurfSubSize + 1);
-            }
-            /*         
-               for(c=0;c<3;c++)
-               printf(" TetsurfVolume: c: %i I->CurOff[c]: %i I->Max[c] %i\n",c,I->CurOff[c],I->Max[c]); 
-             */
-
-            if(ok) {
-              if(TetsurfCodeVertices(I))
-                n_vert = TetsurfFindActiveBoxes(I, mode, n_strip, n_vert, num, vert,
-                                                carvehelper, side);
-            }
+              stop[c] = std::min(offset[c] + TetsurfSubSize + 1, range[3 + c]);
+            if(block_range.straddles(offset.data(), stop, level))
+              offsets.push_back(offset);
           }
-      TetsurfPurge(I);
+
+      if(!offsets.empty())
+        ok = TetsurfBlocks(G, I, range, offsets, mode, carvehelper, side, outputs);
+
+      /* concatenate in block order */
+      for(auto& out : outputs) {
+        if(!ok)
+          break;
+        if(out.n_vert) {
+          vert.check(3 * (n_vert + out.n_vert) - 1);
+          std::copy_n(out.vert.data(), 3 * out.n_vert, vert.data() + 3 * n_vert);
+          n_vert += out.n_vert;
+        }
+        if(out.n_strip) {
+          num.check(n_strip + out.n_strip - 1);
+          std::copy_n(out.num.data(), out.n_strip, num.data() + n_strip);
+          n_strip += out.n_strip;
+        }
+        I->TotPrim += out.n_prim;
+      }
+
+      if(!ok) {
+        n_vert = 0;
+        n_strip = 0;
+        I->TotPrim = 0;
+      }
     }
 
     if(Feedback(G, FB_Isosurface, FB_Blather)) {
@@ -34,6 +34,8 @@
 #include "os_python.h"
 #include "os_std.h"
 
+#include <algorithm>
+
 #include "ce_types.h"
 
 #include "tnt/tnt.h"
@@ -52,34 +54,53 @@ TA2<double> transpose(const TA2<double>& v);
 /////////////////////////////////////////////////////////////////////////////
 // CE Specific
 /////////////////////////////////////////////////////////////////////////////
-double** calcDM(pcePoint coords, int len)
+ceMatrix calcDM(const std::vector<cePoint>& coords)
 {
-  int i = 0;
-
-  double** dm = (double**) malloc(sizeof(double*)*len);
-  for (i = 0; i < len; i++)
-    dm[i] = (double*) malloc( sizeof(double)*len);
-
-  int row=0, col=0;
-  for (row = 0; row < len; row++) {
-    for (col = 0; col < len; col++) {
-      dm[row][col] = sqrt(pow(coords[row].x - coords[col].x,2) +
-			  pow(coords[row].y - coords[col].y,2) +
-			  pow(coords[row].z - coords[col].z,2) );
+  const int len = coords.size();
+  ceMatrix dm(len, len);
+
+  // symmetric, only calculate the upper triangle
+  for (int row = 0; row < len; row++) {
+    for (int col = row + 1; col < len; col++) {
+      double dx = coords[row].x - coords[col].x;
+      double dy = coords[row].y - coords[col].y;
+      double dz = coords[row].z - coords[col].z;
+      dm[row][col] = dm[col][row] = sqrt(dx * dx + dy * dy + dz * dz);
     }
   }
   return dm;
 }
 
-double** calcS(double** d1, double** d2, int lenA, int lenB, int wSize)
+/*
+ * Pack the distances which are compared between two windows (see calcS)
+ * into one column per window: packed[k][i] is the k-th distance of the
+ * window starting at residue i.
+ */
+static ceMatrix packWindows(const ceMatrix& d, int wSize)
+{
+  const int nWin = d.rows - wSize + 1;
+  const int nPairs = (wSize - 1) * (wSize - 2) / 2;
+  ceMatrix packed(nPairs, std::max(nWin, 0));
+
+  int k = 0;
+  for (int row = 0; row < wSize - 2; row++) {
+    for (int col = row + 2; col < wSize; col++, k++) {
+      double* out = packed[k];
+      for (int i = 0; i < nWin; i++)
+        out[i] = d[i + row][i + col];
+    }
+  }
+  return packed;
+}
+
+ceMatrix calcS(const ceMatrix& d1, const ceMatrix& d2, int wSize, int nThread)
 {
-  int i;
+  const int lenA = d1.rows;
+  const int lenB = d2.rows;
   double winSize = (double) wSize;
   // initialize the 2D similarity matrix
-  double** S = (double**) malloc(sizeof(double*)*lenA);
-  for (i = 0; i < lenA; i++)
-    S[i] = (double*) malloc( sizeof(double)*lenB);
-  
+  ceMatrix S(lenA, lenB, -1.0);
+
   double sumSize = (winSize-1.0)*(winSize-2.0) / 2.0;
   //
   // This is where the magic of CE comes out.  In the similarity matrix,
@@ -87,67 +108,54 @@ double** calcS(double** d1, double** d2, int lenA, int lenB, int wSize)
   // i - i+winSize in protein A, match to residues j - j+winSize in protein
   // B.  A value of 0 means absolute match; a value >> 1 means bad match.
   //
-  int iA, iB, row, col;
-  for (iA = 0; iA < lenA; iA++) {
-    for (iB = 0; iB < lenB; iB++) {
-      S[iA][iB] = -1.0;
-      if (iA > lenA - wSize || iB > lenB - wSize)
-	continue;
-		
-      double score = 0.0;
-
-      //
-      // We always skip the calculation of the distance from THIS
-      // residue, to the next residue.  This is a time-saving heur-
-      // istic decision.  Almost all alpha carbon bonds of neighboring
-      // residues is 3.8 Angstroms.  Due to entropy, S = -k ln pi * pi,
-      // this tell us nothing, so it doesn't help so ignore it.
-      //
-      for (row = 0; row <  wSize - 2; row++) {
-	for (col = row + 2; col <  wSize; col++) {
-	  score += fabs( d1[iA+row][iA+col] - d2[iB+row][iB+col] );
-	}
-      }
-
-      S[iA][iB] = score / sumSize;
+  // We always skip the calculation of the distance from THIS
+  // residue, to the next residue.  This is a time-saving heur-
+  // istic decision.  Almost all alpha carbon bonds of neighboring
+  // residues is 3.8 Angstroms.  Due to entropy, S = -k ln pi * pi,
+  // this tell us nothing, so it doesn't help so ignore it.
+  //
+  const int nA = lenA - wSize + 1;
+  const int nB = lenB - wSize + 1;
+  if (nA < 1 || nB < 1)
+    return S;
+
+  const ceMatrix packedA = packWindows(d1, wSize);
+  const ceMatrix packedB = packWindows(d2, wSize);
+  const int nPairs = packedB.rows;
+
+  // the inner loop runs over contiguous windows of B, so it vectorizes
+  // without reordering the per-element sums
+#pragma omp parallel for if (nThread > 1) num_threads(nThread) schedule(static)
+  for (int iA = 0; iA < nA; iA++) {
+    double* score = S[iA];
+    std::fill_n(score, nB, 0.0);
+
+    for (int k = 0; k < nPairs; k++) {
+      const double a = packedA[k][iA];
+      const double* b = packedB[k];
+      for (int iB = 0; iB < nB; iB++)
+        score[iB] += fabs(a - b[iB]);
     }
+
+    for (int iB = 0; iB < nB; iB++)
+      score[iB] /= sumSize;
   }
   return S;
 }
 
 
 
-pcePoint getCoords(PyObject* L, int length)
+std::vector<cePoint> getCoords(PyObject* L, int length)
 {
-  // make space for the current coords
-  pcePoint coords = (pcePoint) malloc(sizeof(cePoint)*length);
-
-  if (!coords)
-    return nullptr;
+  std::vector<cePoint> coords(length);
 
   // loop through the arguments, pulling out the
   // XYZ coordinates.
-  int i;
-  for ( i = 0; i < length; i++ ) {
-    PyObject* curCoord = PyList_GetItem(L,i);
-    Py_INCREF(curCoord);
-
-    PyObject* curVal = PyList_GetItem(curCoord,0);
-    Py_INCREF(curVal);
-    coords[i].x = PyFloat_AsDouble(curVal);
-    Py_DECREF(curVal);
-
-    curVal = PyList_GetItem(curCoord,1);
-    Py_INCREF(curVal);
-    coords[i].y = PyFloat_AsDouble(curVal);
-    Py_DECREF(curVal);
-
-    curVal = PyList_GetItem(curCoord,2);
-    Py_INCREF(curVal);
-    coords[i].z = PyFloat_AsDouble(curVal);
-    Py_DECREF(curVal);
-
-    Py_DECREF(curCoord);
+  for (int i = 0; i < length; i++) {
+    PyObject* curCoord = PyList_GetItem(L, i);
+    coords[i].x = PyFloat_AsDouble(PyList_GetItem(curCoord, 0));
+    coords[i].y = PyFloat_AsDouble(PyList_GetItem(curCoord, 1));
+    coords[i].z = PyFloat_AsDouble(PyList_GetItem(curCoord, 2));
   }
 
   return coords;
@@ -155,11 +163,14 @@ pcePoint getCoords(PyObject* L, int length)
 
 
 
-pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, float D0, float D1, int winSize, int gapMax, int * bufferSize )
+std::vector<cePath> findPath(const ceMatrix& S, const ceMatrix& dA, const ceMatrix& dB, float D0, float D1, int winSize, int gapMax)
 {
   // CE-specific cutoffs
   const int MAX_KEPT = 20;
 
+  const int lenA = S.rows;
+  const int lenB = S.cols;
+
   // the best Path's score
   double bestPathScore = 1e6;
   int bestPathLength = 0;
@@ -168,77 +179,58 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
   int smaller = ( lenA < lenB ) ? lenA : lenB;
   int winSum = (winSize-1)*(winSize-2)/2;
 
-  path bestPath = (path) malloc(sizeof(afp)*smaller);
-
-  // index variable for below
-  int i, j;
-  for ( i = 0; i < smaller; i++ ) {
-    bestPath[i].first = -1;
-    bestPath[i].second = -1;
-  }
+  cePath bestPath;
 
   //======================================================================
   // for storing the best 20 paths
-  int bufferIndex = 0; //, bufferSize = 0;
+  int bufferIndex = 0, bufferSize = 0;
   int lenBuffer[MAX_KEPT];
   double scoreBuffer[MAX_KEPT];
-  pathCache pathBuffer = (pathCache) malloc(sizeof(path*)*MAX_KEPT);
+  std::vector<cePath> pathBuffer(MAX_KEPT);
 
-  for ( i = 0; i < MAX_KEPT; i++ ) {
+  for (int i = 0; i < MAX_KEPT; i++) {
     // initialize the paths
     scoreBuffer[i] = 1e6;
     lenBuffer[i] = 0;
-    pathBuffer[i] = 0;
   }
 
   // winCache
   // this array stores a list of residues seen.  We use it to calculate the
   // total score of a path from 1..M and then add it to M+1..N.
-  int* winCache = (int*) malloc(sizeof(int)*smaller);
-  for ( i = 0; i < smaller; i++ )
+  std::vector<int> winCache(smaller);
+  for (int i = 0; i < smaller; i++)
     winCache[i] = (i+1)*i*winSize/2 + (i+1)*winSum;
 
   // allScoreBuffer
   // this 2D array keeps track of all partial gapped scores
-  double** allScoreBuffer = (double**) malloc(sizeof(double*)*smaller);
-  for ( i = 0; i < smaller; i++ ) {
-    allScoreBuffer[i] = (double*) malloc( (gapMax*2+1) * sizeof(double));
-    // initialize the ASB
-    for ( j = 0; j < gapMax*2+1; j++ )
-      allScoreBuffer[i][j] = 1e6;
-  }
-	
-  int* tIndex = (int*) malloc(sizeof(int)*smaller);
+  ceMatrix allScoreBuffer(smaller, gapMax * 2 + 1, 1e6);
+
+  std::vector<int> tIndex(smaller);
   int gapBestIndex = -1;
 
+  // reused for every start point, only [0, curPathLength] is valid
+  cePath curPath(smaller);
+
   //======================================================================
   // Start the search through the CE matrix.
   //
-  int iA, iB;
-  for ( iA = 0; iA < lenA; iA++ ) {
+  for (int iA = 0; iA < lenA; iA++) {
     if ( iA > lenA - winSize*(bestPathLength-1) )
       break;
 
-    for ( iB = 0; iB < lenB; iB++ ) {
+    for (int iB = 0; iB < lenB; iB++) {
       if ( S[iA][iB] >= D0 )
 	continue;
-			
+
       if ( S[iA][iB] == -1.0 )
 	continue;
-			
+
       if ( iB > lenB - winSize*(bestPathLength-1) )
 	break;
 
       //
       // Restart curPath here.
       //
-      path curPath = (path) malloc( sizeof(afp)*smaller );
-
-      int i;
-      for ( i = 0; i < smaller; i++ ) {
-	curPath[i].first = -1;
-	curPath[i].second = -1;
-      }
       curPath[0].first = iA;
       curPath[0].second = iB;
       int curPathLength = 1;
@@ -252,12 +244,11 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
       while ( ! done ) {
 	double gapBestScore = 1e6;
 	gapBestIndex = -1;
-	int g;
 
 	//
 	// Check all possible gaps [1..gapMax] from here
 	//
-	for ( g = 0; g < (gapMax*2)+1; g++ ) {
+	for (int g = 0; g < (gapMax*2)+1; g++) {
 	  int jA = curPath[curPathLength-1].first + winSize;
 	  int jB = curPath[curPathLength-1].second + winSize;
 
@@ -272,7 +263,7 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
 	  // Following are three heuristics to ensure high quality
 	  // long paths and make sure we don't run over the end of
 	  // the S, matrix.
-					
+
 	  // 1st: If jA and jB are at the end of the matrix
 	  if ( jA > lenA-winSize || jB > lenB-winSize ){
 	    // FIXME, was: jA > lenA-winSize-1 || jB > lenB-winSize-1
@@ -284,26 +275,35 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
 	  // 3rd: if too close to end, ignore it.
 	  if ( S[jA][jB] == -1.0 )
 	    continue;
-					
+
+	  // all terms are positive, so the partial sum can only grow. Stop as
+	  // soon as it's clear that this gap is rejected by one of the
+	  // tests below.
+	  const double curNorm = (double) winSize * (double) curPathLength;
+	  const double curLimit = std::min((double) D1, gapBestScore);
+
 	  double curScore = 0.0;
-	  int s;
-	  for ( s = 0; s < curPathLength; s++ ) {
-	    curScore += fabs( dA[curPath[s].first][jA] - dB[curPath[s].second][jB] );
-	    curScore += fabs( dA[curPath[s].first  + (winSize-1)][jA+(winSize-1)] - 
-			      dB[curPath[s].second + (winSize-1)][jB+(winSize-1)] );
-	    int k;
-	    for ( k = 1; k < winSize-1; k++ )
-	      curScore += fabs( dA[curPath[s].first  + k][ jA + (winSize-1) - k ] - 
-				dB[curPath[s].second + k][ jB + (winSize-1) - k ] );
+	  for (int s = 0; s < curPathLength; s++) {
+	    if (s > 0 && curScore / curNorm >= curLimit)
+	      break;
+
+	    const int pA = curPath[s].first;
+	    const int pB = curPath[s].second;
+	    curScore += fabs( dA[pA][jA] - dB[pB][jB] );
+	    curScore += fabs( dA[pA + (winSize-1)][jA+(winSize-1)] -
+			      dB[pB + (winSize-1)][jB+(winSize-1)] );
+	    for (int k = 1; k < winSize-1; k++)
+	      curScore += fabs( dA[pA + k][ jA + (winSize-1) - k ] -
+				dB[pB + k][ jB + (winSize-1) - k ] );
 	  }
-					
-	  curScore /= (double) winSize * (double) curPathLength;
+
+	  curScore /= curNorm;
 
 	  if ( curScore >= D1 ) {
 	    continue;
 	  }
 
-	  // store GAPPED best					
+	  // store GAPPED best
 	  if ( curScore < gapBestScore ) {
 	    curPath[curPathLength].first = jA;
 	    curPath[curPathLength].second = jB;
@@ -312,7 +312,7 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
 	    allScoreBuffer[curPathLength-1][g] = curScore;
 	  }
 	} /// ROF -- END GAP SEARCHING
-				
+
 	//
 	// DONE GAPPING:
 	//
@@ -321,7 +321,7 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
 	curTotalScore = 0.0;
 	int jGap, gA, gB;
 	double score1=0.0, score2=0.0;
-				
+
 	if ( gapBestIndex != -1 ) {
 	  jGap = (gapBestIndex + 1 ) / 2;
 	  if ((gapBestIndex + 1 ) % 2 == 0) {
@@ -340,7 +340,7 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
 	  // perfect
 	  score2 = ((curPathLength > 1 ? (allScoreBuffer[curPathLength-2][tIndex[curPathLength-1]])
 		     : S[iA][iB])
-		    * winCache[curPathLength-1] 
+		    * winCache[curPathLength-1]
 		    + score1 * (winCache[curPathLength] - winCache[curPathLength-1]))
 	    / winCache[curPathLength];
 
@@ -368,7 +368,7 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
 	//
 	// test this gapped path against the best seen
 	// starting from iA, iB
-	// 
+	//
 
 	// if our currently best gapped path from iA and iB is LONGER
 	// than the current best; or, it's equal length and the score's
@@ -377,17 +377,7 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
 	     (curPathLength == bestPathLength && curTotalScore < bestPathScore )) {
 	  bestPathLength = curPathLength;
 	  bestPathScore = curTotalScore;
-	  // deep copy curPath
-	  path tempPath = (path) malloc( sizeof(afp)*smaller );
-
-	  int i;
-	  for ( i = 0; i < smaller; i++ ) {
-	    tempPath[i].first = curPath[i].first;
-	    tempPath[i].second = curPath[i].second;
-	  }
-
-	  free(bestPath);
-	  bestPath = tempPath;
+	  bestPath.assign(curPath.begin(), curPath.begin() + curPathLength);
 	}
       } /// END WHILE
 
@@ -401,236 +391,258 @@ pathCache findPath( double** S, double** dA, double** dB, int lenA, int lenB, fl
 	// we're going to add an entry to the ring-buffer.
 	// Adjust maxSize values and curIndex accordingly.
 	bufferIndex = ( bufferIndex == MAX_KEPT-1 ) ? 0 : bufferIndex+1;
-	*bufferSize = ( *bufferSize < MAX_KEPT ) ? (*bufferSize)+1 : MAX_KEPT;
-	path pathCopy = (path) malloc( sizeof(afp)*smaller );
-
-	int i;
-	for ( i = 0; i < smaller; i++ ) {
-	  pathCopy[i].first = bestPath[i].first;
-	  pathCopy[i].second = bestPath[i].second;
-	}
+	bufferSize = ( bufferSize < MAX_KEPT ) ? bufferSize+1 : MAX_KEPT;
 
-	if ( bufferIndex == 0 && (*bufferSize) == MAX_KEPT ) {
-	  if ( pathBuffer[MAX_KEPT-1] )
-	    free(pathBuffer[MAX_KEPT-1]); 
-	  pathBuffer[MAX_KEPT-1] = pathCopy;
-	  scoreBuffer[MAX_KEPT-1] = bestPathScore;
-	  lenBuffer[MAX_KEPT-1] = bestPathLength;
-	}
-	else {	
-	  if ( pathBuffer[bufferIndex-1] )
-	    free(pathBuffer[bufferIndex-1]);
-	  pathBuffer[bufferIndex-1] = pathCopy;
-	  scoreBuffer[bufferIndex-1] = bestPathScore;
-	  lenBuffer[bufferIndex-1] = bestPathLength;
-	}
+	int slot = ( bufferIndex == 0 && bufferSize == MAX_KEPT ) ?
+	  MAX_KEPT-1 : bufferIndex-1;
+	pathBuffer[slot] = bestPath;
+	scoreBuffer[slot] = bestPathScore;
+	lenBuffer[slot] = bestPathLength;
       }
-      free(curPath); curPath=0;
     } // ROF -- end for iB
   } // ROF -- end for iA
 
-  // free memory
-  for ( i = 0; i < smaller; i++ )
-    free(allScoreBuffer[i]);
-  free(allScoreBuffer);
-  free(tIndex);
-  free(winCache);
-  free(bestPath);
-
+  pathBuffer.resize(bufferSize);
   return pathBuffer;
 }
 
 
 
 
-PyObject* findBest( pcePoint coordsA, pcePoint coordsB, pathCache paths, int bufferSize, int smaller, int winSize )
+bool findBest(const std::vector<cePoint>& coordsA, const std::vector<cePoint>& coordsB, const std::vector<cePath>& paths, int winSize, ceResult& result)
 {
+  const int n = 3;
+  const int smaller = std::min(coordsA.size(), coordsB.size());
+
   // keep the best values
   double bestRMSD = 1e6;
   TA2<double> bestU;
-  TA1<double> bestCOM1, bestCOM2;
+  double bestCOM1[n], bestCOM2[n];
   int bestLen = 0;
   int bestO = -1;
-	
+
   // loop through the buffer
-  for ( int o = 0; o < bufferSize; o++ ) {
-
-    // grab the current path
-    TA2<double> c1(smaller, 3, 0.0);
-    TA2<double> c2(smaller, 3, 0.0);
-    int curLen = 0;
-	
-    int j = 0; int it = 0;
-    while ( j < smaller ) {
-			
-      // rebuild the coordinate lists for this path
-      if ( paths[o][j].first != -1 )
-	{
-	  for ( int k = 0; k < winSize; k++ )
-	    {
-	      double t1[] = { coordsA[ paths[o][j].first +k ].x, 
-			      coordsA[ paths[o][j].first +k ].y, 
-			      coordsA[ paths[o][j].first +k ].z };
-
-	      double t2[] = { coordsB[ paths[o][j].second+k ].x, 
-			      coordsB[ paths[o][j].second+k ].y, 
-			      coordsB[ paths[o][j].second+k ].z };
-
-	      for ( int d = 0; d < c1.dim2(); d++ ) {
-		c1[it][d] =  t1[d];
-		c2[it][d] =  t2[d];
-	      }
-	      it++;
-	    }
-	  j++;
-	}
-      else {
-	curLen = it;
-	break;
-      }
-    }
+  for (int o = 0; o < (int) paths.size(); o++) {
+    const cePath& curPath = paths[o];
+
+    // the ring buffer often holds several copies of the same path, which
+    // superimpose identically
+    if (std::find(paths.begin(), paths.begin() + o, curPath) !=
+        paths.begin() + o)
+      continue;
 
     //
     // For convenience, let there be M points of N dimensions
-    //	
-    int m = curLen;
-    int n = c2.dim2();
-	
+    //
+    const int m = curPath.size() * winSize;
+
+    auto pointA = [&](int i) -> const cePoint& {
+      return coordsA[curPath[i / winSize].first + i % winSize];
+    };
+    auto pointB = [&](int i) -> const cePoint& {
+      return coordsB[curPath[i / winSize].second + i % winSize];
+    };
+
     //==========================================================================
-    //	
-    // Superpose the two proteins	
-    //	
+    //
+    // Superpose the two proteins
+    //
     //==========================================================================
-	
-    // centers of mass for c1 and c2
-    TA1<double> c1COM(n,0.0);
-    TA1<double> c2COM(n,0.0);
-		
-    // Calc CsOM	
-    for (int i = 0; i < m; i++ )
-      {
-	for (int j = 0; j < n; j++ )
-	  {
-	    c1COM[j] += (double) c1[i][j] / (double) m;
-	    c2COM[j] += (double) c2[i][j] / (double) m;
-	  }
-      }
 
-    // Move the two vectors to the origin	
-    for (int i = 0; i < m; i++ )
-      {
-	for (int j = 0; j < n; j++ )
-	  {
-	    c1[i][j] -= c1COM[j];
-	    c2[i][j] -= c2COM[j];
-	  }
-      }
+    // centers of mass for c1 and c2
+    double c1COM[n] = {0.0, 0.0, 0.0};
+    double c2COM[n] = {0.0, 0.0, 0.0};
+
+    // Calc CsOM
+    for (int i = 0; i < m; i++) {
+      const cePoint& a = pointA(i);
+      const cePoint& b = pointB(i);
+      c1COM[0] += a.x / (double) m;
+      c1COM[1] += a.y / (double) m;
+      c1COM[2] += a.z / (double) m;
+      c2COM[0] += b.x / (double) m;
+      c2COM[1] += b.y / (double) m;
+      c2COM[2] += b.z / (double) m;
+    }
 
     //==========================================================================
-    //	
-    // Calculate U and RMSD.  This is broken down to the super-silly-easy	
-    // math of: U = Wt * V, where Wt and V are NxN matrices from the SVD of 	
-    // R, the correlation matrix between the two origin-based vector sets.	
-    //	
-    //==========================================================================	
-		
-    // Calculate the initial residual, E0	
-    // E0 = sum( Yn*Yn + Xn*Xn ) -- sum of squares	
+    //
+    // Calculate U and RMSD.  This is broken down to the super-silly-easy
+    // math of: U = Wt * V, where Wt and V are NxN matrices from the SVD of
+    // R, the correlation matrix between the two origin-based vector sets.
+    //
+    // Both the initial residual and the correlation matrix are accumulated
+    // directly from the origin-based coordinates, without copying them.
+    //
+    //==========================================================================
+
+    // E0 = sum( Yn*Yn + Xn*Xn ) -- sum of squares
     double E0 = 0.0;
-    for (int i = 0; i < m; i++ )
-      {
-	for (int j = 0; j < n; j++ )
-	  {
-	    E0 += (c1[i][j]*c1[i][j])+(c2[i][j]*c2[i][j]);
-	  }
+    // R = c2' * c1
+    TA2<double> R(n, n, 0.0);
+
+    for (int i = 0; i < m; i++) {
+      const cePoint& a = pointA(i);
+      const cePoint& b = pointB(i);
+      const double c1[n] = {a.x - c1COM[0], a.y - c1COM[1], a.z - c1COM[2]};
+      const double c2[n] = {b.x - c2COM[0], b.y - c2COM[1], b.z - c2COM[2]};
+
+      for (int j = 0; j < n; j++) {
+        E0 += (c1[j]*c1[j])+(c2[j]*c2[j]);
+        for (int k = 0; k < n; k++)
+          R[j][k] += c2[j] * c1[k];
       }
-		
-    //		
-    // SVD is the SVD of the correlation matrix Xt*Y	
-    // R = c2' * c1 = W * S * Vt	
-    JAMA::SVD<double> svd = JAMA::SVD<double>( TNT::matmult(transpose(c2), c1 ) );
-	
+    }
+
+    //
+    // SVD is the SVD of the correlation matrix Xt*Y
+    // R = c2' * c1 = W * S * Vt
+    JAMA::SVD<double> svd = JAMA::SVD<double>(R);
+
     // left singular vectors
     TA2<double> W = TA2<double>(n,n);
     // right singular vectors
     TA2<double> Vt = TA2<double>(n,n);
-    // singular values		
+    // singular values
     TA1<double> sigmas = TA1<double>(n);
-		
+
     svd.getU(W);
     svd.getV(Vt);
     Vt = transpose(Vt);
     svd.getSingularValues(sigmas);
-		
-    //	
-    // Check any reflections before rotation of the points;			
-    // if det(W)*det(V) == -1 then we just reflect		
-    // the principal axis corresponding to the smallest eigenvalue by -1	
-    //		
+
+    //
+    // Check any reflections before rotation of the points;
+    // if det(W)*det(V) == -1 then we just reflect
+    // the principal axis corresponding to the smallest eigenvalue by -1
+    //
     JAMA::LU<double> LU_Vt(Vt);
     JAMA::LU<double> LU_W(W);
-		
+
     if ( LU_W.det() * LU_Vt.det() < 0.0 )
       {
-	//std::cout << "_________REFLECTION_________" << std::endl;	
-			
-	// revese the smallest axes and last sigma	
-			
+	// revese the smallest axes and last sigma
+
 	for ( int i = 0; i < n; i++ )
 	  W[n-1][i] = -W[n-1][i];
-			
+
 	sigmas[n-1] = -sigmas[n-1];
       }
-		
-    // calculate the rotation matrix, U.	
-    // U = W * Vt	
+
+    // calculate the rotation matrix, U.
+    // U = W * Vt
     TA2<double> U = TA2<double>(TNT::matmult(W, Vt));
 
-    //	
-    // Now calculate the RMSD	
-    //	
+    //
+    // Now calculate the RMSD
+    //
     double sig = 0.0;
     for ( int i = 0; i < (int) n; i++ )
       sig += sigmas[i];
-		
+
     double curRMSD = sqrt(fabs((E0 - 2*sig) / (double) m ));
 
     //
     // Save the best
     //
-    if ( curRMSD < bestRMSD || ( curRMSD == bestRMSD && c1.dim1() > bestLen )) {
+    if ( curRMSD < bestRMSD || ( curRMSD == bestRMSD && smaller > bestLen )) {
       bestU = U.copy();
       bestRMSD = curRMSD;
-      bestCOM1 = c1COM.copy();
-      bestCOM2 = c2COM.copy();
-      bestLen = curLen;
+      std::copy_n(c1COM, n, bestCOM1);
+      std::copy_n(c2COM, n, bestCOM2);
+      bestLen = m;
       bestO = o;
     }
   }
 
   if ( bestRMSD == 1e6 ) {
     std::cout << "ERROR: Best RMSD found was 1e6.  Broken.\n";
-    return nullptr;
+    return false;
   }
 
-  PyObject* pyU = Py_BuildValue( "[f,f,f,f, f,f,f,f, f,f,f,f, f,f,f,f]",
-				 bestU[0][0], bestU[1][0], bestU[2][0], bestCOM1[0],
-				 bestU[0][1], bestU[1][1], bestU[2][1], bestCOM1[1],
-				 bestU[0][2], bestU[1][2], bestU[2][2], bestCOM1[2],
-				 -bestCOM2[0], -bestCOM2[1], -bestCOM2[2], 1.);
-	
-  PyObject* pyPathA = PyList_New(0);
-  PyObject* pyPathB = PyList_New(0);
-  for (int j = 0; j < smaller && paths[bestO][j].first != -1; j++) {
-    PyObject* v = Py_BuildValue("i", paths[bestO][j].first);
-    PyList_Append(pyPathA, v);
-    Py_DECREF(v);
-    v = Py_BuildValue("i", paths[bestO][j].second);
-    PyList_Append(pyPathB, v);
-    Py_DECREF(v);
+  const double ttt[16] = {
+    bestU[0][0], bestU[1][0], bestU[2][0], bestCOM1[0],
+    bestU[0][1], bestU[1][1], bestU[2][1], bestCOM1[1],
+    bestU[0][2], bestU[1][2], bestU[2][2], bestCOM1[2],
+    -bestCOM2[0], -bestCOM2[1], -bestCOM2[2], 1.};
+
+  result.length = bestLen;
+  result.rmsd = bestRMSD;
+  std::copy_n(ttt, 16, result.ttt);
+  result.pathA.clear();
+  result.pathB.clear();
+  for (const auto& item : paths[bestO]) {
+    result.pathA.push_back(item.first);
+    result.pathB.push_back(item.second);
   }
 
-  return Py_BuildValue("[ifNNN]", bestLen, bestRMSD, pyU, pyPathA, pyPathB);
+  return true;
+}
+
+
+bool ceAlign(const std::vector<cePoint>& coordsA, const std::vector<cePoint>& coordsB, float D0, float D1, int winSize, int gapMax, int nThread, ceResult& result)
+{
+  /* calculate the distance matrix for each protein */
+  auto dmA = calcDM(coordsA);
+  auto dmB = calcDM(coordsB);
+
+  /* calculate the CE Similarity matrix */
+  auto S = calcS(dmA, dmB, winSize, nThread);
+
+  /* find the best path through the CE Sim. matrix */
+  auto paths = findPath(S, dmA, dmB, D0, D1, winSize, gapMax);
+
+  /* Get the optimal superposition here... */
+  return findBest(coordsA, coordsB, paths, winSize, result);
+}
+
+
+double ceTMScore(const std::vector<cePoint>& coordsA, const std::vector<cePoint>& coordsB, const ceResult& result, int winSize, int lengthNorm)
+{
+  if (lengthNorm < 1)
+    return 0.0;
+
+  // TM-score distance scale
+  double d0 = 1.24 * cbrt(lengthNorm - 15.0) - 1.8;
+  if (!(d0 > 0.5))
+    d0 = 0.5;
+
+  const double* ttt = result.ttt;
+  double sum = 0.0;
+
+  for (int j = 0; j < (int) result.pathA.size(); j++) {
+    for (int k = 0; k < winSize; k++) {
+      const cePoint& a = coordsA[result.pathA[j] + k];
+      const cePoint& b = coordsB[result.pathB[j] + k];
+
+      // apply the TTT matrix to the mobile coordinate
+      const double v[3] = {b.x + ttt[12], b.y + ttt[13], b.z + ttt[14]};
+      const double dx = ttt[0] * v[0] + ttt[1] * v[1] + ttt[2] * v[2] + ttt[3] - a.x;
+      const double dy = ttt[4] * v[0] + ttt[5] * v[1] + ttt[6] * v[2] + ttt[7] - a.y;
+      const double dz = ttt[8] * v[0] + ttt[9] * v[1] + ttt[10] * v[2] + ttt[11] - a.z;
+
+      sum += 1.0 / (1.0 + (dx * dx + dy * dy + dz * dz) / (d0 * d0));
+    }
+  }
+
+  return sum / lengthNorm;
+}
+
+
+PyObject* ceResultAsPyList(const ceResult& result)
+{
+  PyObject* pyU = PyList_New(16);
+  for (int i = 0; i < 16; i++)
+    PyList_SET_ITEM(pyU, i, PyFloat_FromDouble(result.ttt[i]));
+
+  PyObject* pyPathA = PyList_New(result.pathA.size());
+  PyObject* pyPathB = PyList_New(result.pathB.size());
+  for (int j = 0; j < (int) result.pathA.size(); j++) {
+    PyList_SET_ITEM(pyPathA, j, PyLong_FromLong(result.pathA[j]));
+    PyList_SET_ITEM(pyPathB, j, PyLong_FromLong(result.pathB[j]));
+  }
+
+  return Py_BuildValue("[ifNNN]", result.length, result.rmsd, pyU, pyPathA, pyPathB);
 }
 
 
@@ -638,13 +650,13 @@ TA2<double> transpose(const TA2<double>& v)
 {
   int m = (int) v.dim1();
   int n = (int) v.dim2();
-	
+
   TA2<double> rVal(n,m);
-	
+
   for ( int i = 0; i < m; i++ )
     for ( int j = 0; j < n; j++ )
       rVal[j][i] = v[i][j];
-		
+
   return rVal;
 }
 #endif
@@ -3,6 +3,8 @@
 
 #include"os_python.h"
 
+#include <vector>
+
 /*
 // Typical XYZ point and array of points
 */
@@ -20,22 +22,72 @@ typedef struct {
 	int second;
 } afp, *path, **pathCache;
 
+inline bool operator==(const afp& lhs, const afp& rhs)
+{
+  return lhs.first == rhs.first && lhs.second == rhs.second;
+}
+
+/*
+// Contiguous row-major matrix, indexed as m[row][col]
+*/
+struct ceMatrix {
+  int rows = 0;
+  int cols = 0;
+  std::vector<double> data;
+
+  ceMatrix() = default;
+  ceMatrix(int rows_, int cols_, double value = 0.0)
+      : rows(rows_), cols(cols_), data(std::size_t(rows_) * cols_, value)
+  {
+  }
+
+  double* operator[](int row) { return data.data() + std::size_t(row) * cols; }
+  const double* operator[](int row) const
+  {
+    return data.data() + std::size_t(row) * cols;
+  }
+};
+
+/*
+// List of AFPs, each of them spans "winSize" residues
+*/
+typedef std::vector<afp> cePath;
+
+/*
+// Superposition of the best path
+*/
+struct ceResult {
+  int length = 0; // number of aligned residues
+  double rmsd = 0.0;
+  double ttt[16]{}; // TTT matrix, as expected by cmd.transform_object
+  std::vector<int> pathA, pathB; // first residue of every AFP
+};
+
 /////////////////////////////////////////////////////////////////////////////
 // Function Declarations
 /////////////////////////////////////////////////////////////////////////////
 // Calculates the CE Similarity Matrix
-double** calcS(double** d1, double** d2, int lenA, int lenB, int wSize);
+ceMatrix calcS(const ceMatrix& d1, const ceMatrix& d2, int wSize, int nThread = 1);
 
 // calculates a simple distance matrix
-double** calcDM(pcePoint coords, int len);
+ceMatrix calcDM(const std::vector<cePoint>& coords);
 
 // Converter: Python Object -> C Structs
-pcePoint getCoords( PyObject* L, int len );
+std::vector<cePoint> getCoords( PyObject* L, int len );
 
 // Optimal path finding algorithm (CE).
-pathCache findPath(double** S, double** dA, double**dB, int lenA, int lenB, float D0, float D1, int winSize, int gapMax, int* bufferSize);
+std::vector<cePath> findPath(const ceMatrix& S, const ceMatrix& dA, const ceMatrix& dB, float D0, float D1, int winSize, int gapMax);
 
 // filter through the results and find the best
-PyObject* findBest( pcePoint coordsA, pcePoint coordsB, pathCache paths, int bufferSize, int smaller, int winSize );
+bool findBest(const std::vector<cePoint>& coordsA, const std::vector<cePoint>& coordsB, const std::vector<cePath>& paths, int winSize, ceResult& result);
+
+// all of the above
+bool ceAlign(const std::vector<cePoint>& coordsA, const std::vector<cePoint>& coordsB, float D0, float D1, int winSize, int gapMax, int nThread, ceResult& result);
+
+// TM-score of the superimposed aligned residues, normalized by "lengthNorm"
+double ceTMScore(const std::vector<cePoint>& coordsA, const std::vector<cePoint>& coordsB, const ceResult& result, int winSize, int lengthNorm);
+
+// Converter: C Structs -> Python Object
+PyObject* ceResultAsPyList(const ceResult& result);
 
 #endif
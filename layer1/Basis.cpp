@@ -21,11 +21,13 @@ Z* -------------------------------------------------------------------
 #include"MemoryDebug.h"
 #include"Base.h"
 #include"Basis.h"
+#include"BasisBVH.h"
 #include"Err.h"
 #include"Feedback.h"
 #include"Util.h"
 #include"MemoryCache.h"
 #include"Character.h"
+#include"Setting.h"
 
 static const float kR_SMALL4 = 0.0001F;
 static const float kR_SMALL5 = 0.0001F;
@@ -1500,20 +1502,28 @@ int BasisHitPerspective(BasisCallRec * BC)
 {
   CBasis *BI = BC->Basis;
   MapType *map = BI->Map;
-  int iMin0 = map->iMin[0];
-  int iMin1 = map->iMin[1];
-  int iMin2 = map->iMin[2];
-  int iMax0 = map->iMax[0];
-  int iMax1 = map->iMax[1];
-  int iMax2 = map->iMax[2];
+  BasisBVH *bvh = BI->BVH;
+  int iMin0 = 0, iMin1 = 0, iMin2 = 0;
+  int iMax0 = 0, iMax1 = 0, iMax2 = 0;
   int a, b, c;
 
-  float iDiv = map->recipDiv;
-  float base0, base1, base2;
-
-  float min0 = map->Min[0] * iDiv;
-  float min1 = map->Min[1] * iDiv;
-  float min2 = map->Min[2] * iDiv;
+  float iDiv = 0.0F;
+  float base0 = 0.0F, base1 = 0.0F, base2 = 0.0F;
+
+  float min0 = 0.0F, min1 = 0.0F, min2 = 0.0F;
+
+  if(!bvh) {
+    iMin0 = map->iMin[0];
+    iMin1 = map->iMin[1];
+    iMin2 = map->iMin[2];
+    iMax0 = map->iMax[0];
+    iMax1 = map->iMax[1];
+    iMax2 = map->iMax[2];
+    iDiv = map->recipDiv;
+    min0 = map->Min[0] * iDiv;
+    min1 = map->Min[1] * iDiv;
+    min2 = map->Min[2] * iDiv;
+  }
 
   int new_ray = !BC->pass;
   RayInfo *r = BC->rr;
@@ -1524,7 +1534,7 @@ int BasisHitPerspective(BasisCallRec * BC)
 
   CPrimitive *r_prim = nullptr;
 
-  if(new_ray) {                 /* see if we can eliminate this ray right away using the mask */
+  if(new_ray && !bvh) {         /* see if we can eliminate this ray right away using the mask */
 
     base0 = (r->base[0] * iDiv) - min0;
     base1 = (r->base[1] * iDiv) - min1;
@@ -1551,26 +1561,29 @@ int BasisHitPerspective(BasisCallRec * BC)
     int allow_break;
     int minIndex = -1;
 
-    float step0, step1, step2;
+    float step0 = 0.0F, step1 = 0.0F, step2 = 0.0F;
     float back_dist = BC->back_dist;
 
     const float _0 = 0.0F, _1 = 1.0F;
     float r_tri1 = _0, r_tri2 = _0, r_dist, dist;       /* zero inits to suppress compiler warnings */
     float r_sphere0 = _0, r_sphere1 = _0, r_sphere2 = _0;
-    int h, *ip;
+    int h;
+    const int *ip;
     int excl_trans_flag;
-    int *elist, local_iflag = false;
+    int *elist = nullptr, local_iflag = false;
     int terminal = -1;
-    int *ehead = map->EHead;
-    int d1d2 = map->D1D2;
-    int d2 = map->Dim[2];
+    int *ehead = nullptr;
+    int d1d2 = 0;
+    int d2 = 0;
+    int n_eElem = 0;
+    int new_min_index;
     const int *vert2prim = BC->vert2prim;
     const float excl_trans = BC->excl_trans;
     const float BasisFudge0 = BC->fudge0;
     const float BasisFudge1 = BC->fudge1;
     int v2p;
     int i, ii;
-    int n_vert = BI->NVertex, n_eElem = map->NEElem;
+    int n_vert = BI->NVertex;
     int except1 = BC->except1;
     int except2 = BC->except2;
     int check_interior_flag = BC->check_interior && !BC->pass;
@@ -1584,7 +1597,13 @@ int BasisHitPerspective(BasisCallRec * BC)
     float *BI_Radius2 = BI->Radius2;
     copy3f(r->base, vt);
 
-    elist = map->EList;
+    if(!bvh) {
+      elist = map->EList;
+      ehead = map->EHead;
+      d1d2 = map->D1D2;
+      d2 = map->Dim[2];
+      n_eElem = map->NEElem;
+    }
 
     r_dist = FLT_MAX;
 
@@ -1597,242 +1616,294 @@ int BasisHitPerspective(BasisCallRec * BC)
 
     MapCacheReset(cache);
 
-    {                           /* take steps with a Z-size equil to the grid spacing */
+    if(!bvh) {                  /* take steps with a Z-size equil to the grid spacing */
       float div = iDiv * (-MapGetDiv(BI->Map) / r->dir[2]);
       step0 = r->dir[0] * div;
       step1 = r->dir[1] * div;
       step2 = r->dir[2] * div;
+
+      base0 = (r->skip[0] * iDiv) - min0;
+      base1 = (r->skip[1] * iDiv) - min1;
+      base2 = (r->skip[2] * iDiv) - min2;
     }
 
-    base0 = (r->skip[0] * iDiv) - min0;
-    base1 = (r->skip[1] * iDiv) - min1;
-    base2 = (r->skip[2] * iDiv) - min2;
+    /* with a BVH, visit the leaves along the ray front-to-back instead of
+       walking through the grid, until they are behind the nearest hit */
+    BasisBVH::Cursor cursor(bvh, r->base, r->dir);
 
     allow_break = false;
     while(1) {
       int inside_code;
       int clamped;
 
-      a = ((int) base0);
-      b = ((int) base1);
-      c = ((int) base2);
+      ip = nullptr;
+
+      if(bvh) {
+        ip = cursor.next((r_dist < back_dist) ? r_dist : back_dist);
+        if(!ip)
+          break;
+      } else {
+
+        a = ((int) base0);
+        b = ((int) base1);
+        c = ((int) base2);
 
-      inside_code = 1;
-      clamped = false;
+        inside_code = 1;
+        clamped = false;
 
-      a += MapBorder;
-      b += MapBorder;
-      c += MapBorder;
+        a += MapBorder;
+        b += MapBorder;
+        c += MapBorder;
 #define EDGE_ALLOWANCE 1
 
-      if(a < iMin0) {
-        if(((iMin0 - a) > EDGE_ALLOWANCE) && allow_break)
-          break;
-        else {
-          a = iMin0;
-          clamped = true;
-        }
-      } else if(a > iMax0) {
-        if(((a - iMax0) > EDGE_ALLOWANCE) && allow_break)
-          break;
-        else {
-          a = iMax0;
-          clamped = true;
-        }
-      }
-      if(b < iMin1) {
-        if(((iMin1 - b) > EDGE_ALLOWANCE) && allow_break)
-          break;
-        else {
-          b = iMin1;
-          clamped = true;
+        if(a < iMin0) {
+          if(((iMin0 - a) > EDGE_ALLOWANCE) && allow_break)
+            break;
+          else {
+            a = iMin0;
+            clamped = true;
+          }
+        } else if(a > iMax0) {
+          if(((a - iMax0) > EDGE_ALLOWANCE) && allow_break)
+            break;
+          else {
+            a = iMax0;
+            clamped = true;
+          }
         }
-      } else if(b > iMax1) {
-        if(((b - iMax1) > EDGE_ALLOWANCE) && allow_break)
-          break;
-        else {
-          b = iMax1;
-          clamped = true;
+        if(b < iMin1) {
+          if(((iMin1 - b) > EDGE_ALLOWANCE) && allow_break)
+            break;
+          else {
+            b = iMin1;
+            clamped = true;
+          }
+        } else if(b > iMax1) {
+          if(((b - iMax1) > EDGE_ALLOWANCE) && allow_break)
+            break;
+          else {
+            b = iMax1;
+            clamped = true;
+          }
         }
-      }
-      if(c < iMin2) {
-        if((iMin2 - c) > EDGE_ALLOWANCE)
-          break;
-        else {
-          c = iMin2;
-          clamped = true;
+        if(c < iMin2) {
+          if((iMin2 - c) > EDGE_ALLOWANCE)
+            break;
+          else {
+            c = iMin2;
+            clamped = true;
+          }
+        } else if(c > iMax2) {
+          if((c - iMax2) > EDGE_ALLOWANCE)
+            inside_code = 0;
+          else {
+            c = iMax2;
+            clamped = true;
+          }
         }
-      } else if(c > iMax2) {
-        if((c - iMax2) > EDGE_ALLOWANCE)
-          inside_code = 0;
-        else {
-          c = iMax2;
-          clamped = true;
+        if(inside_code && (((a != last_a) || (b != last_b) || (c != last_c)))) {
+          h = *(ehead + (d1d2 * a) + (d2 * b) + c);
+
+          if(!clamped)            /* don't discard a ray until it has hit the objective at least once */
+            allow_break = true;
+
+          if((terminal > 0) && (last_c != c)) {
+            if(!terminal--)
+              break;
+          }
+          if((h > 0) && (h < n_eElem)) {
+            ip = elist + h;
+            last_a = a;
+            last_b = b;
+            last_c = c;
+          }
         }
       }
-      if(inside_code && (((a != last_a) || (b != last_b) || (c != last_c)))) {
-        int new_min_index;
-        h = *(ehead + (d1d2 * a) + (d2 * b) + c);
+
+      if(ip) {
+        int do_loop;
 
         new_min_index = -1;
+        i = *(ip++);
+        do_loop = ((i >= 0) && (i < n_vert));
 
-        if(!clamped)            /* don't discard a ray until it has hit the objective at least once */
-          allow_break = true;
+        while(do_loop) {      /* n_vert checking is a bug workaround */
+          CPrimitive *prm;
+          v2p = vert2prim[i];
+          ii = *(ip++);
+          prm = BC_prim + v2p;
+          do_loop = ((ii >= 0) && (ii < n_vert));
+          /*            if((v2p != except1) && (v2p != except2) && (!MapCached(cache, v2p))) { */
+          if((v2p != except1) && (v2p != except2) && (!cache_cache[v2p])) {
+            int prm_type = prm->type;
 
-        if((terminal > 0) && (last_c != c)) {
-          if(!terminal--)
-            break;
-        }
-        if((h > 0) && (h < n_eElem)) {
-          int do_loop;
+            /*MapCache(cache,v2p); */
+            cache_cache[v2p] = 1;
+            cache_CacheLink[v2p] = cache->CacheStart;
+            cache->CacheStart = v2p;
 
-          ip = elist + h;
-          last_a = a;
-          i = *(ip++);
-          last_b = b;
-          do_loop = ((i >= 0) && (i < n_vert));
-          last_c = c;
-
-          while(do_loop) {      /* n_vert checking is a bug workaround */
-            CPrimitive *prm;
-            v2p = vert2prim[i];
-            ii = *(ip++);
-            prm = BC_prim + v2p;
-            do_loop = ((ii >= 0) && (ii < n_vert));
-            /*            if((v2p != except1) && (v2p != except2) && (!MapCached(cache, v2p))) { */
-            if((v2p != except1) && (v2p != except2) && (!cache_cache[v2p])) {
-              int prm_type = prm->type;
-
-              /*MapCache(cache,v2p); */
-              cache_cache[v2p] = 1;
-              cache_CacheLink[v2p] = cache->CacheStart;
-              cache->CacheStart = v2p;
-
-              switch (prm_type) {
-              case cPrimTriangle:
-              case cPrimCharacter:
-                {
-                  float *dir = r->dir;
-                  float *d10 = BI_Precomp + BI_Vert2Normal[i] * 3;
-                  float *d20 = d10 + 3;
-                  float *v0;
-                  float det, inv_det;
-                  float pvec0, pvec1, pvec2;
-                  float dir0 = dir[0], dir1 = dir[1], dir2 = dir[2];
-                  float d20_0 = d20[0], d20_1 = d20[1], d20_2 = d20[2];
-                  float d10_0 = d10[0], d10_1 = d10[1], d10_2 = d10[2];
-
-                  /* cross_product3f(dir, d20, pvec); */
-
-                  pvec0 = dir1 * d20_2 - dir2 * d20_1;
-                  pvec1 = dir2 * d20_0 - dir0 * d20_2;
-                  pvec2 = dir0 * d20_1 - dir1 * d20_0;
-
-                  /* det = dot_product3f(pvec, d10); */
-
-                  det = pvec0 * d10_0 + pvec1 * d10_1 + pvec2 * d10_2;
-
-                  v0 = BI_Vertex + prm->vert * 3;
-                  if((det >= EPSILON) || (det <= -EPSILON)) {
-                    float tvec0, tvec1, tvec2;
-                    float qvec0, qvec1, qvec2;
-
-                    inv_det = _1 / det;
-
-                    /* subtract3f(vt,v0,tvec); */
-
-                    tvec0 = vt[0] - v0[0];
-                    tvec1 = vt[1] - v0[1];
-                    tvec2 = vt[2] - v0[2];
-
-                    /* dot_product3f(tvec,pvec) * inv_det; */
-                    tri1 = (tvec0 * pvec0 + tvec1 * pvec1 + tvec2 * pvec2) * inv_det;
-
-                    /* cross_product3f(tvec,d10,qvec); */
-
-                    qvec0 = tvec1 * d10_2 - tvec2 * d10_1;
-                    qvec1 = tvec2 * d10_0 - tvec0 * d10_2;
-
-                    if((tri1 >= BasisFudge0) && (tri1 <= BasisFudge1)) {
-                      qvec2 = tvec0 * d10_1 - tvec1 * d10_0;
-
-                      /* dot_product3f(dir, qvec) * inv_det; */
-                      tri2 = (dir0 * qvec0 + dir1 * qvec1 + dir2 * qvec2) * inv_det;
-
-                      /* dot_product3f(d20, qvec) * inv_det; */
-                      dist = (d20_0 * qvec0 + d20_1 * qvec1 + d20_2 * qvec2) * inv_det;
-
-                      if((tri2 >= BasisFudge0) && (tri2 <= BasisFudge1)
-                         && ((tri1 + tri2) <= BasisFudge1)) {
-                        if((dist < r_dist) && (dist >= _0) && (dist <= back_dist)
-                           && (prm->trans != _1)) {
-                          new_min_index = prm->vert;
-                          r_tri1 = tri1;
-                          r_tri2 = tri2;
-                          r_dist = dist;
-                        }
+            switch (prm_type) {
+            case cPrimTriangle:
+            case cPrimCharacter:
+              {
+                float *dir = r->dir;
+                float *d10 = BI_Precomp + BI_Vert2Normal[i] * 3;
+                float *d20 = d10 + 3;
+                float *v0;
+                float det, inv_det;
+                float pvec0, pvec1, pvec2;
+                float dir0 = dir[0], dir1 = dir[1], dir2 = dir[2];
+                float d20_0 = d20[0], d20_1 = d20[1], d20_2 = d20[2];
+                float d10_0 = d10[0], d10_1 = d10[1], d10_2 = d10[2];
+
+                /* cross_product3f(dir, d20, pvec); */
+
+                pvec0 = dir1 * d20_2 - dir2 * d20_1;
+                pvec1 = dir2 * d20_0 - dir0 * d20_2;
+                pvec2 = dir0 * d20_1 - dir1 * d20_0;
+
+                /* det = dot_product3f(pvec, d10); */
+
+                det = pvec0 * d10_0 + pvec1 * d10_1 + pvec2 * d10_2;
+
+                v0 = BI_Vertex + prm->vert * 3;
+                if((det >= EPSILON) || (det <= -EPSILON)) {
+                  float tvec0, tvec1, tvec2;
+                  float qvec0, qvec1, qvec2;
+
+                  inv_det = _1 / det;
+
+                  /* subtract3f(vt,v0,tvec); */
+
+                  tvec0 = vt[0] - v0[0];
+                  tvec1 = vt[1] - v0[1];
+                  tvec2 = vt[2] - v0[2];
+
+                  /* dot_product3f(tvec,pvec) * inv_det; */
+                  tri1 = (tvec0 * pvec0 + tvec1 * pvec1 + tvec2 * pvec2) * inv_det;
+
+                  /* cross_product3f(tvec,d10,qvec); */
+
+                  qvec0 = tvec1 * d10_2 - tvec2 * d10_1;
+                  qvec1 = tvec2 * d10_0 - tvec0 * d10_2;
+
+                  if((tri1 >= BasisFudge0) && (tri1 <= BasisFudge1)) {
+                    qvec2 = tvec0 * d10_1 - tvec1 * d10_0;
+
+                    /* dot_product3f(dir, qvec) * inv_det; */
+                    tri2 = (dir0 * qvec0 + dir1 * qvec1 + dir2 * qvec2) * inv_det;
+
+                    /* dot_product3f(d20, qvec) * inv_det; */
+                    dist = (d20_0 * qvec0 + d20_1 * qvec1 + d20_2 * qvec2) * inv_det;
+
+                    if((tri2 >= BasisFudge0) && (tri2 <= BasisFudge1)
+                       && ((tri1 + tri2) <= BasisFudge1)) {
+                      if((dist < r_dist) && (dist >= _0) && (dist <= back_dist)
+                         && (prm->trans != _1)) {
+                        new_min_index = prm->vert;
+                        r_tri1 = tri1;
+                        r_tri2 = tri2;
+                        r_dist = dist;
                       }
                     }
                   }
                 }
-                break;
-              case cPrimSphere:
-                {
-                  if(LineClipPoint(r->base, r->dir,
-                                   BI_Vertex + i * 3, &dist,
-                                   BI_Radius[i], BI_Radius2[i])) {
-                    if((dist < r_dist) && (prm->trans != _1)) {
-                      if((dist >= _0) && (dist <= back_dist)) {
-                        new_min_index = prm->vert;
-                        r_dist = dist;
-                      } else if(check_interior_flag && (dist <= back_dist)) {
-                        if(diffsq3f(vt, BI_Vertex + i * 3) < BI_Radius2[i]) {
+              }
+              break;
+            case cPrimSphere:
+              {
+                if(LineClipPoint(r->base, r->dir,
+                                 BI_Vertex + i * 3, &dist,
+                                 BI_Radius[i], BI_Radius2[i])) {
+                  if((dist < r_dist) && (prm->trans != _1)) {
+                    if((dist >= _0) && (dist <= back_dist)) {
+                      new_min_index = prm->vert;
+                      r_dist = dist;
+                    } else if(check_interior_flag && (dist <= back_dist)) {
+                      if(diffsq3f(vt, BI_Vertex + i * 3) < BI_Radius2[i]) {
 
-                          local_iflag = true;
-                          r_prim = prm;
-                          r_dist = _0;
+                        local_iflag = true;
+                        r_prim = prm;
+                        r_dist = _0;
+                        new_min_index = prm->vert;
+                      }
+                    }
+                  }
+                }
+              }
+              break;
+            case cPrimEllipsoid:
+              {
+                if(LineClipPoint(r->base, r->dir,
+                                 BI_Vertex + i * 3, &dist,
+                                 BI_Radius[i], BI_Radius2[i])) {
+                  if((dist < r_dist) && (prm->trans != _1)) {
+                    float *n1 = BI_Normal + BI_Vert2Normal[i] * 3;
+                    if(LineClipEllipsoidPoint(r->base, r->dir,
+                                              BI_Vertex + i * 3, &dist,
+                                              BI_Radius[i], BI_Radius2[i],
+                                              prm->n0, n1, n1 + 3, n1 + 6)) {
+                      if(dist < r_dist) {
+                        if((dist >= _0) && (dist <= back_dist)) {
                           new_min_index = prm->vert;
+                          r_dist = dist;
                         }
                       }
                     }
                   }
                 }
-                break;
-              case cPrimEllipsoid:
-                {
-                  if(LineClipPoint(r->base, r->dir,
-                                   BI_Vertex + i * 3, &dist,
-                                   BI_Radius[i], BI_Radius2[i])) {
-                    if((dist < r_dist) && (prm->trans != _1)) {
-                      float *n1 = BI_Normal + BI_Vert2Normal[i] * 3;
-                      if(LineClipEllipsoidPoint(r->base, r->dir,
-                                                BI_Vertex + i * 3, &dist,
-                                                BI_Radius[i], BI_Radius2[i],
-                                                prm->n0, n1, n1 + 3, n1 + 6)) {
-                        if(dist < r_dist) {
-                          if((dist >= _0) && (dist <= back_dist)) {
-                            new_min_index = prm->vert;
-                            r_dist = dist;
-                          }
-                        }
+              }
+              break;
+
+            case cPrimCylinder:
+              if(LineToSphereCapped(r->base, r->dir, BI_Vertex + i * 3,
+                                    BI_Normal + BI_Vert2Normal[i] * 3,
+                                    BI_Radius[i], prm->l1, sph, &tri1,
+                                    prm->cap1, prm->cap2)) {
+                if(LineClipPoint
+                   (r->base, r->dir, sph, &dist, BI_Radius[i], BI_Radius2[i])) {
+                  if((dist < r_dist) && (prm->trans != _1)) {
+                    if((dist >= _0) && (dist <= back_dist)) {
+                      if(prm->l1 > kR_SMALL4)
+                        r_tri1 = tri1 / prm->l1;
+
+                      r_sphere0 = sph[0];
+                      r_sphere1 = sph[1];
+                      r_sphere2 = sph[2];
+                      new_min_index = prm->vert;
+                      r_dist = dist;
+                    } else if(check_interior_flag && (dist <= back_dist)) {
+                      if(FrontToInteriorSphereCapped(vt,
+                                                     BI_Vertex + i * 3,
+                                                     BI_Normal + BI_Vert2Normal[i] * 3,
+                                                     BI_Radius[i],
+                                                     BI_Radius2[i],
+                                                     prm->l1, prm->cap1, prm->cap2)) {
+                        local_iflag = true;
+                        r_prim = prm;
+                        r_dist = _0;
+
+                        new_min_index = prm->vert;
                       }
                     }
                   }
                 }
-                break;
+              }
+              break;
+            case cPrimCone:
+              {
+                float sph_rad, sph_rad_sq;
+                if(ConeLineToSphereCapped(r->base, r->dir, BI_Vertex + i * 3,
+                                          BI_Normal + BI_Vert2Normal[i] * 3,
+                                          BI_Radius[i], prm->r2, prm->l1, sph, &tri1,
+                                          &sph_rad, &sph_rad_sq,
+                                          prm->cap1, prm->cap2)) {
 
-              case cPrimCylinder:
-                if(LineToSphereCapped(r->base, r->dir, BI_Vertex + i * 3,
-                                      BI_Normal + BI_Vert2Normal[i] * 3,
-                                      BI_Radius[i], prm->l1, sph, &tri1,
-                                      prm->cap1, prm->cap2)) {
-                  if(LineClipPoint
-                     (r->base, r->dir, sph, &dist, BI_Radius[i], BI_Radius2[i])) {
+                  if(LineClipPoint(r->base, r->dir, sph, &dist, sph_rad, sph_rad_sq)) {
                     if((dist < r_dist) && (prm->trans != _1)) {
                       if((dist >= _0) && (dist <= back_dist)) {
                         if(prm->l1 > kR_SMALL4)
-                          r_tri1 = tri1 / prm->l1;
-
+                          r_tri1 = tri1 / prm->l1;    /* color blending */
                         r_sphere0 = sph[0];
                         r_sphere1 = sph[1];
                         r_sphere2 = sph[2];
@@ -1841,148 +1912,112 @@ int BasisHitPerspective(BasisCallRec * BC)
                       } else if(check_interior_flag && (dist <= back_dist)) {
                         if(FrontToInteriorSphereCapped(vt,
                                                        BI_Vertex + i * 3,
-                                                       BI_Normal + BI_Vert2Normal[i] * 3,
-                                                       BI_Radius[i],
-                                                       BI_Radius2[i],
+                                                       BI_Normal +
+                                                       BI_Vert2Normal[i] * 3,
+                                                       BI_Radius[i], BI_Radius2[i],
                                                        prm->l1, prm->cap1, prm->cap2)) {
                           local_iflag = true;
                           r_prim = prm;
                           r_dist = _0;
-
                           new_min_index = prm->vert;
                         }
                       }
                     }
                   }
                 }
-                break;
-              case cPrimCone:
-                {
-                  float sph_rad, sph_rad_sq;
-                  if(ConeLineToSphereCapped(r->base, r->dir, BI_Vertex + i * 3,
-                                            BI_Normal + BI_Vert2Normal[i] * 3,
-                                            BI_Radius[i], prm->r2, prm->l1, sph, &tri1,
-                                            &sph_rad, &sph_rad_sq,
-                                            prm->cap1, prm->cap2)) {
-
-                    if(LineClipPoint(r->base, r->dir, sph, &dist, sph_rad, sph_rad_sq)) {
-                      if((dist < r_dist) && (prm->trans != _1)) {
-                        if((dist >= _0) && (dist <= back_dist)) {
-                          if(prm->l1 > kR_SMALL4)
-                            r_tri1 = tri1 / prm->l1;    /* color blending */
-                          r_sphere0 = sph[0];
-                          r_sphere1 = sph[1];
-                          r_sphere2 = sph[2];
-                          new_min_index = prm->vert;
-                          r_dist = dist;
-                        } else if(check_interior_flag && (dist <= back_dist)) {
-                          if(FrontToInteriorSphereCapped(vt,
-                                                         BI_Vertex + i * 3,
-                                                         BI_Normal +
-                                                         BI_Vert2Normal[i] * 3,
-                                                         BI_Radius[i], BI_Radius2[i],
-                                                         prm->l1, prm->cap1, prm->cap2)) {
-                            local_iflag = true;
-                            r_prim = prm;
-                            r_dist = _0;
-                            new_min_index = prm->vert;
-                          }
-                        }
-                      }
-                    }
-                  }
-                }
-                break;
-              case cPrimSausage:
-                if(LineToSphere(r->base, r->dir,
-                                BI_Vertex + i * 3, BI_Normal + BI_Vert2Normal[i] * 3,
-                                BI_Radius[i], prm->l1, sph, &tri1)) {
+              }
+              break;
+            case cPrimSausage:
+              if(LineToSphere(r->base, r->dir,
+                              BI_Vertex + i * 3, BI_Normal + BI_Vert2Normal[i] * 3,
+                              BI_Radius[i], prm->l1, sph, &tri1)) {
 
-                  if(LineClipPoint
-                     (r->base, r->dir, sph, &dist, BI_Radius[i], BI_Radius2[i])) {
+                if(LineClipPoint
+                   (r->base, r->dir, sph, &dist, BI_Radius[i], BI_Radius2[i])) {
 
-                    int tmp_flag = false;
-                    if((dist < r_dist) && (prm->trans != _1)) {
-                      if((dist >= _0) && (dist <= back_dist)) {
-                        tmp_flag = true;
-                        if(excl_trans_flag) {
-                          if((prm->trans > _0) && (dist < excl_trans))
-                            tmp_flag = false;
-                        }
-                        if(tmp_flag) {
+                  int tmp_flag = false;
+                  if((dist < r_dist) && (prm->trans != _1)) {
+                    if((dist >= _0) && (dist <= back_dist)) {
+                      tmp_flag = true;
+                      if(excl_trans_flag) {
+                        if((prm->trans > _0) && (dist < excl_trans))
+                          tmp_flag = false;
+                      }
+                      if(tmp_flag) {
 
-                          if(prm->l1 > kR_SMALL4)
-                            r_tri1 = tri1 / prm->l1;
+                        if(prm->l1 > kR_SMALL4)
+                          r_tri1 = tri1 / prm->l1;
 
-                          r_sphere0 = sph[0];
-                          r_sphere1 = sph[1];
-                          r_sphere2 = sph[2];
-                          new_min_index = prm->vert;
-                          r_dist = dist;
+                        r_sphere0 = sph[0];
+                        r_sphere1 = sph[1];
+                        r_sphere2 = sph[2];
+                        new_min_index = prm->vert;
+                        r_dist = dist;
 
-                        }
-                      } else if(check_interior_flag && (dist <= back_dist)) {
-                        if(FrontToInteriorSphere(vt, BI_Vertex + i * 3,
-                                                 BI_Normal + BI_Vert2Normal[i] * 3,
-                                                 BI_Radius[i], BI_Radius2[i], prm->l1)) {
-                          local_iflag = true;
-                          r_prim = prm;
-                          r_dist = _0;
-                          new_min_index = prm->vert;
-                        }
+                      }
+                    } else if(check_interior_flag && (dist <= back_dist)) {
+                      if(FrontToInteriorSphere(vt, BI_Vertex + i * 3,
+                                               BI_Normal + BI_Vert2Normal[i] * 3,
+                                               BI_Radius[i], BI_Radius2[i], prm->l1)) {
+                        local_iflag = true;
+                        r_prim = prm;
+                        r_dist = _0;
+                        new_min_index = prm->vert;
                       }
                     }
                   }
                 }
-                break;
-              }                 /* end of switch */
-            }
-            /* end of if */
-            i = ii;
-
-          }                     /* end of while */
+              }
+              break;
+            }                 /* end of switch */
+          }
+          /* end of if */
+          i = ii;
 
-          if(local_iflag) {
-            r->prim = r_prim;
-            r->dist = r_dist;
+        }                     /* end of while */
 
-            break;
-          }
+        if(local_iflag) {
+          r->prim = r_prim;
+          r->dist = r_dist;
 
-          if(new_min_index > -1) {
+          break;
+        }
 
-            minIndex = new_min_index;
+        if(new_min_index > -1) {
 
-            r_prim = BC_prim + vert2prim[minIndex];
+          minIndex = new_min_index;
 
-            if((r_prim->type == cPrimSphere) || (r_prim->type == cPrimEllipsoid)) {
-              const float *vv = BI->Vertex + minIndex * 3;
-              r_sphere0 = vv[0];
-              r_sphere1 = vv[1];
-              r_sphere2 = vv[2];
-            }
+          r_prim = BC_prim + vert2prim[minIndex];
 
-            BC->interior_flag = local_iflag;
-            r->tri1 = r_tri1;
-            r->tri2 = r_tri2;
-            r->prim = r_prim;
-            r->dist = r_dist;
-            r->sphere[0] = r_sphere0;
-            r->sphere[1] = r_sphere1;
-            r->sphere[2] = r_sphere2;
+          if((r_prim->type == cPrimSphere) || (r_prim->type == cPrimEllipsoid)) {
+            const float *vv = BI->Vertex + minIndex * 3;
+            r_sphere0 = vv[0];
+            r_sphere1 = vv[1];
+            r_sphere2 = vv[2];
           }
-        }                       /* if -- h valid */
-      }
-      /* end of if */
-      if(minIndex > -1) {
-        if(terminal < 0)
-          terminal = EDGE_ALLOWANCE + 1;
+
+          BC->interior_flag = local_iflag;
+          r->tri1 = r_tri1;
+          r->tri2 = r_tri2;
+          r->prim = r_prim;
+          r->dist = r_dist;
+          r->sphere[0] = r_sphere0;
+          r->sphere[1] = r_sphere1;
+          r->sphere[2] = r_sphere2;
+        }
       }
 
-      base0 += step0;
-      base1 += step1;
-      base2 += step2;
-      /* advance through the map one block at a time -- note that this is a crappy way to walk through the map... */
+      if(!bvh) {
+        if(minIndex > -1) {
+          if(terminal < 0)
+            terminal = EDGE_ALLOWANCE + 1;
+        }
+
+        base0 += step0;
+        base1 += step1;
+        base2 += step2;
+        /* advance through the map one block at a time -- note that this is a crappy way to walk through the map... */
+      }
     }
 
     BC->interior_flag = local_iflag;
@@ -1994,24 +2029,25 @@ int BasisHitOrthoscopic(BasisCallRec * BC)
 {
   const float _0 = 0.0F, _1 = 1.0F;
   float oppSq, dist = _0, sph[3], vt[3], tri1, tri2;
-  int a, b, c, h, *ip;
+  int a, b, c, h;
+  const int *ip;
   int excl_trans_flag;
   int check_interior_flag;
-  int *elist, local_iflag = false;
+  int *elist = nullptr, local_iflag = false;
   float minusZ[3] = { 0.0F, 0.0F, -1.0F };
 
   CBasis *BI = BC->Basis;
   RayInfo *r = BC->rr;
 
-  if(MapInsideXY(BI->Map, r->base, &a, &b, &c)) {
+  if(BI->BVH || MapInsideXY(BI->Map, r->base, &a, &b, &c)) {
     int minIndex = -1;
     int v2p;
     int i, ii;
-    int *xxtmp;
+    int *xxtmp = nullptr;
     int do_loop;
     int except1 = BC->except1;
     int except2 = BC->except2;
-    int n_vert = BI->NVertex, n_eElem = BI->Map->NEElem;
+    int n_vert = BI->NVertex, n_eElem = 0;
     const int *vert2prim = BC->vert2prim;
     const float front = BC->front;
     const float back = BC->back;
@@ -2041,16 +2077,32 @@ int BasisHitOrthoscopic(BasisCallRec * BC)
 
     r_dist = FLT_MAX;
 
-    xxtmp = BI->Map->EHead + (a * BI->Map->D1D2) + (b * BI->Map->Dim[2]) + c;
+    /* with a BVH, visit the leaves along the ray front-to-back instead of
+       walking down the column of voxels */
+    BasisBVH::Cursor cursor(BI->BVH, r->base, minusZ);
 
-    MapCacheReset(cache);
+    if(!BI->BVH) {
+      n_eElem = BI->Map->NEElem;
+      xxtmp = BI->Map->EHead + (a * BI->Map->D1D2) + (b * BI->Map->Dim[2]) + c;
+      elist = BI->Map->EList;
+    }
 
-    elist = BI->Map->EList;
+    MapCacheReset(cache);
 
-    while(c >= MapBorder) {
-      h = *xxtmp;
-      if((h > 0) && (h < n_eElem)) {
-        ip = elist + h;
+    while(1) {
+      ip = nullptr;
+      if(BI->BVH) {
+        ip = cursor.next((r_dist < back) ? r_dist : back);
+        if(!ip)
+          break;
+      } else {
+        if(c < MapBorder)
+          break;
+        h = *xxtmp;
+        if((h > 0) && (h < n_eElem))
+          ip = elist + h;
+      }
+      if(ip) {
         i = *(ip++);
         do_loop = ((i >= 0) && (i < n_vert));
         while(do_loop) {
@@ -2266,6 +2318,9 @@ int BasisHitOrthoscopic(BasisCallRec * BC)
       if(local_iflag)
         break;
 
+      if(BI->BVH)
+        continue;
+
       /* we've processed all primitives associated with this voxel, 
          so if an intersection has been found which occurs in front of
          the next voxel, then we can stop */
@@ -2317,22 +2372,23 @@ int BasisHitShadow(BasisCallRec * BC)
   const float _1 = 1.0F;
   float oppSq, dist = _0, tri1, tri2;
   float sph[3], vt[3];
-  int h, *ip;
+  int h;
+  const int *ip;
   int a, b, c;
-  int *elist, local_iflag = false;
+  int *elist = nullptr, local_iflag = false;
   float minusZ[3] = { 0.0F, 0.0F, -1.0F };
   /* local copies (eliminate these extra copies later on) */
 
   CBasis *BI = BC->Basis;
   RayInfo *r = BC->rr;
 
-  if(MapInsideXY(BI->Map, r->base, &a, &b, &c)) {
+  if(BI->BVH || MapInsideXY(BI->Map, r->base, &a, &b, &c)) {
     int minIndex = -1;
     int v2p;
     int i, ii;
-    int *xxtmp;
+    int *xxtmp = nullptr;
 
-    int n_vert = BI->NVertex, n_eElem = BI->Map->NEElem;
+    int n_vert = BI->NVertex, n_eElem = 0;
     int except1 = BC->except1;
     int except2 = BC->except2;
     const int *vert2prim = BC->vert2prim;
@@ -2363,17 +2419,35 @@ int BasisHitShadow(BasisCallRec * BC)
     r_trans = _1;
     r_dist = FLT_MAX;
 
-    xxtmp = BI->Map->EHead + (a * BI->Map->D1D2) + (b * BI->Map->Dim[2]) + c;
+    /* with a BVH, visit the leaves along the ray front-to-back instead of
+       walking down the column of voxels */
+    BasisBVH::Cursor cursor(BI->BVH, r->base, minusZ);
 
-    MapCacheReset(cache);
+    if(!BI->BVH) {
+      n_eElem = BI->Map->NEElem;
+      xxtmp = BI->Map->EHead + (a * BI->Map->D1D2) + (b * BI->Map->Dim[2]) + c;
+      elist = BI->Map->EList;
+    }
 
-    elist = BI->Map->EList;
+    MapCacheReset(cache);
 
-    while(c >= MapBorder) {
-      h = *xxtmp;
-      if((h > 0) && (h < n_eElem)) {
+    while(1) {
+      ip = nullptr;
+      if(BI->BVH) {
+        /* transparent shadows accumulate along the whole ray, only the
+           nearest opaque shadow allows to skip what's behind it */
+        ip = cursor.next((nearest_shadow && (r_trans == _0)) ? r_dist : FLT_MAX);
+        if(!ip)
+          break;
+      } else {
+        if(c < MapBorder)
+          break;
+        h = *xxtmp;
+        if((h > 0) && (h < n_eElem))
+          ip = elist + h;
+      }
+      if(ip) {
         int do_loop;
-        ip = elist + h;
         i = *(ip++);
         do_loop = ((i >= 0) && (i < n_vert));
         while(do_loop) {
@@ -2765,6 +2839,9 @@ int BasisHitShadow(BasisCallRec * BC)
       if(local_iflag)
         break;
 
+      if(BI->BVH)
+        continue;
+
       /* we've processed all primitives associated with this voxel, 
          so if an intersection has been found which occurs in front of
          the next voxel, then we can stop */
@@ -2848,6 +2925,17 @@ int BasisMakeMap(CBasis * I, int *vert2prim, CPrimitive * prim, int n_prim,
     I->Vertex[0], I->Vertex[1], I->Vertex[2]
     ENDFD;
 
+  if(SettingGetGlobal_i(I->G, cSetting_ray_acceleration) == 1) {
+    /* bounding volume hierarchy instead of the uniform grid */
+    float fudge = SettingGetGlobal_f(I->G, cSetting_ray_triangle_fudge);
+    delete I->BVH;
+    I->BVH = BasisBVH::build(I, vert2prim, prim, fudge).release();
+    PRINTFB(I->G, FB_Ray, FB_Debugging)
+      " BasisMakeMap: BVH with %d nodes, depth %d\n", (int) I->BVH->size(),
+      I->BVH->depth() ENDFB(I->G);
+    return ok;
+  }
+
   sep = I->MinVoxel;
   if(sep == _0) {
     remapMode = false;
@@ -3590,6 +3678,7 @@ int BasisInit(PyMOLGlobals * G, CBasis * I, int group_id)
     I->Precomp = VLACacheAlloc(I->G, float, 1, group_id, cCache_basis_precomp);
   CHECKOK(ok, I->Precomp);
   I->Map = nullptr;
+  I->BVH = nullptr;
   I->NVertex = 0;
   I->NNormal = 0;
   return ok;
@@ -3603,6 +3692,8 @@ void BasisFinish(CBasis * I, int group_id)
     MapFree(I->Map);
     I->Map = nullptr;
   }
+  delete I->BVH;
+  I->BVH = nullptr;
   VLACacheFreeP(I->G, I->Radius2, group_id, cCache_basis_radius2, false);
   VLACacheFreeP(I->G, I->Radius, group_id, cCache_basis_radius, false);
   VLACacheFreeP(I->G, I->Vertex, group_id, cCache_basis_vertex, false);
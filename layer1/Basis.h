@@ -28,6 +28,8 @@ Z* -------------------------------------------------------------------
 #define cPrimEllipsoid 6
 #define cPrimCone 7
 
+class BasisBVH;
+
 
 /* proposed 
 
@@ -84,6 +86,7 @@ typedef struct {
 typedef struct {
   PyMOLGlobals *G;
   MapType *Map;
+  BasisBVH *BVH;                /* alternative to Map, see ray_acceleration */
   float *Vertex, *Normal, *Precomp;
   float *Radius, *Radius2, MaxRadius, MinVoxel;
   int *Vert2Normal;
@@ -0,0 +1,365 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Bounding volume hierarchy for ray-primitive intersection.
+ */
+
+#include <algorithm>
+#include <cfloat>
+#include <cmath>
+
+#include "BasisBVH.h"
+
+namespace
+{
+
+/// Maximum number of primitives in a leaf
+constexpr int MaxLeafSize = 4;
+
+/// Number of bins per axis for the SAH split search
+constexpr int NumBins = 12;
+
+/// Cost of a ray-box test relative to a ray-primitive test
+constexpr float TraversalCost = 1.0F;
+
+/// Tolerance for hits slightly behind the ray origin
+constexpr float BehindOrigin = 1e-4F;
+
+struct Box {
+  float min[3] = {FLT_MAX, FLT_MAX, FLT_MAX};
+  float max[3] = {-FLT_MAX, -FLT_MAX, -FLT_MAX};
+
+  void add(const float* v, float pad = 0.0F)
+  {
+    for (int k = 0; k < 3; ++k) {
+      min[k] = std::min(min[k], v[k] - pad);
+      max[k] = std::max(max[k], v[k] + pad);
+    }
+  }
+
+  void add(const Box& other)
+  {
+    for (int k = 0; k < 3; ++k) {
+      min[k] = std::min(min[k], other.min[k]);
+      max[k] = std::max(max[k], other.max[k]);
+    }
+  }
+
+  bool empty() const { return min[0] > max[0]; }
+
+  float area() const
+  {
+    if (empty()) {
+      return 0.0F;
+    }
+    float const dx = max[0] - min[0];
+    float const dy = max[1] - min[1];
+    float const dz = max[2] - min[2];
+    return dx * dy + dy * dz + dz * dx;
+  }
+};
+
+struct Item {
+  Box box;
+  float center[3];
+  int vert;
+};
+
+/**
+ * Bounding box of a primitive, in the basis frame
+ */
+Box PrimitiveBox(
+    const CBasis* basis, const CPrimitive* prm, int vert, float fudge)
+{
+  Box box;
+  const float* v = basis->Vertex + vert * 3;
+
+  switch (prm->type) {
+  case cPrimTriangle:
+  case cPrimCharacter: {
+    box.add(v);
+    box.add(v + 3);
+    box.add(v + 6);
+    // ray_triangle_fudge extends the triangles beyond their edges
+    float pad = 0.0F;
+    for (int k = 0; k < 3; ++k) {
+      pad = std::max(pad, box.max[k] - box.min[k]);
+    }
+    pad = pad * fudge + BehindOrigin;
+    for (int k = 0; k < 3; ++k) {
+      box.min[k] -= pad;
+      box.max[k] += pad;
+    }
+  } break;
+  case cPrimCone:
+  case cPrimCylinder:
+  case cPrimSausage: {
+    const float* n = basis->Normal + basis->Vert2Normal[vert] * 3;
+    float const radius = (prm->type == cPrimCone)
+                             ? std::max(basis->Radius[vert], prm->r2)
+                             : basis->Radius[vert];
+    float v2[3];
+    for (int k = 0; k < 3; ++k) {
+      v2[k] = v[k] + n[k] * prm->l1;
+    }
+    box.add(v, radius);
+    box.add(v2, radius);
+  } break;
+  default: // spheres and ellipsoids
+    box.add(v, basis->Radius[vert]);
+    break;
+  }
+
+  return box;
+}
+
+} // namespace
+
+std::unique_ptr<BasisBVH> BasisBVH::build(
+    const CBasis* basis, const int* vert2prim, const CPrimitive* prim, float fudge)
+{
+  std::unique_ptr<BasisBVH> bvh(new BasisBVH);
+  std::vector<Item> items;
+
+  // one item per primitive, referenced by its first vertex
+  for (int a = 0; a < basis->NVertex; ++a) {
+    const CPrimitive* prm = prim + vert2prim[a];
+    if (prm->vert != a) {
+      continue;
+    }
+    Item item;
+    item.box = PrimitiveBox(basis, prm, a, fudge);
+    for (int k = 0; k < 3; ++k) {
+      item.center[k] = 0.5F * (item.box.min[k] + item.box.max[k]);
+    }
+    item.vert = a;
+    items.push_back(item);
+  }
+
+  if (items.empty()) {
+    return bvh;
+  }
+
+  struct Task {
+    int node;
+    int begin, end;
+    int depth;
+  };
+
+  std::vector<Task> tasks;
+  bvh->m_nodes.push_back({});
+  tasks.push_back({0, 0, int(items.size()), 1});
+
+  while (!tasks.empty()) {
+    auto const task = tasks.back();
+    tasks.pop_back();
+
+    Box box, centers;
+    for (int i = task.begin; i < task.end; ++i) {
+      box.add(items[i].box);
+      centers.add(items[i].center);
+    }
+
+    {
+      auto& node = bvh->m_nodes[task.node];
+      std::copy_n(box.min, 3, node.min);
+      std::copy_n(box.max, 3, node.max);
+    }
+
+    bvh->m_depth = std::max(bvh->m_depth, task.depth);
+
+    int const count = task.end - task.begin;
+    int mid = task.begin;
+
+    if (count > MaxLeafSize && task.depth < MaxDepth) {
+      // binned SAH split search
+      float best_cost = FLT_MAX;
+      int best_axis = -1;
+      int best_bin = 0;
+
+      for (int k = 0; k < 3; ++k) {
+        float const extent = centers.max[k] - centers.min[k];
+        if (!(extent > 0.0F)) {
+          continue;
+        }
+
+        float const scale = NumBins / extent;
+        Box bins[NumBins];
+        int bin_count[NumBins] = {};
+
+        for (int i = task.begin; i < task.end; ++i) {
+          int b = int((items[i].center[k] - centers.min[k]) * scale);
+          b = std::min(b, NumBins - 1);
+          bins[b].add(items[i].box);
+          ++bin_count[b];
+        }
+
+        // sweep from the right to get the costs of the right sides
+        float right_area[NumBins];
+        int right_count[NumBins];
+        Box acc;
+        int acc_count = 0;
+        for (int b = NumBins - 1; b > 0; --b) {
+          acc.add(bins[b]);
+          acc_count += bin_count[b];
+          right_area[b] = acc.area();
+          right_count[b] = acc_count;
+        }
+
+        acc = Box();
+        acc_count = 0;
+        for (int b = 1; b < NumBins; ++b) {
+          acc.add(bins[b - 1]);
+          acc_count += bin_count[b - 1];
+          if (!acc_count || !right_count[b]) {
+            continue;
+          }
+          float const cost =
+              acc.area() * acc_count + right_area[b] * right_count[b];
+          if (cost < best_cost) {
+            best_cost = cost;
+            best_axis = k;
+            best_bin = b;
+          }
+        }
+      }
+
+      float const leaf_cost = box.area() * count;
+
+      if (best_axis != -1 &&
+          TraversalCost * box.area() + best_cost < leaf_cost) {
+        float const scale = NumBins / (centers.max[best_axis] -
+                                          centers.min[best_axis]);
+        auto it = std::partition(items.begin() + task.begin,
+            items.begin() + task.end, [&](const Item& item) {
+              int b = int((item.center[best_axis] - centers.min[best_axis]) *
+                          scale);
+              return std::min(b, NumBins - 1) < best_bin;
+            });
+        mid = int(it - items.begin());
+      } else if (count > 4 * MaxLeafSize) {
+        // SAH says leaf, but that would be too expensive to traverse,
+        // e.g. many primitives with the same center
+        int k = 0;
+        for (int kk = 1; kk < 3; ++kk) {
+          if (box.max[kk] - box.min[kk] > box.max[k] - box.min[k]) {
+            k = kk;
+          }
+        }
+        mid = task.begin + count / 2;
+        std::nth_element(items.begin() + task.begin, items.begin() + mid,
+            items.begin() + task.end, [k](const Item& lhs, const Item& rhs) {
+              return lhs.center[k] < rhs.center[k];
+            });
+      }
+    }
+
+    if (mid == task.begin || mid == task.end) {
+      // leaf
+      auto& node = bvh->m_nodes[task.node];
+      node.first = int(bvh->m_lists.size());
+      node.count = count;
+      for (int i = task.begin; i < task.end; ++i) {
+        bvh->m_lists.push_back(items[i].vert);
+      }
+      bvh->m_lists.push_back(-1);
+      continue;
+    }
+
+    int const first = int(bvh->m_nodes.size());
+    bvh->m_nodes[task.node].first = first;
+    bvh->m_nodes[task.node].count = 0;
+    bvh->m_nodes.resize(first + 2);
+
+    tasks.push_back({first, task.begin, mid, task.depth + 1});
+    tasks.push_back({first + 1, mid, task.end, task.depth + 1});
+  }
+
+  return bvh;
+}
+
+/*========================================================================*/
+
+BasisBVH::Cursor::Cursor(
+    const BasisBVH* bvh, const float* origin, const float* dir)
+    : m_bvh(bvh)
+{
+  if (!bvh) {
+    return;
+  }
+
+  for (int k = 0; k < 3; ++k) {
+    m_origin[k] = origin[k];
+    // avoid infinities (and NaN from 0 * inf) for axis-parallel rays
+    m_inv_dir[k] = (dir[k] != 0.0F) ? 1.0F / dir[k]
+                                     : ((std::signbit(dir[k])) ? -1e30F : 1e30F);
+  }
+
+  float dist;
+  if (!bvh->m_nodes.empty() && intersect(bvh->m_nodes[0], dist)) {
+    m_stack[0] = 0;
+    m_stack_dist[0] = dist;
+    m_depth = 1;
+  }
+}
+
+bool BasisBVH::Cursor::intersect(const Node& node, float& dist) const
+{
+  float tmin = -FLT_MAX;
+  float tmax = FLT_MAX;
+
+  for (int k = 0; k < 3; ++k) {
+    float t0 = (node.min[k] - m_origin[k]) * m_inv_dir[k];
+    float t1 = (node.max[k] - m_origin[k]) * m_inv_dir[k];
+    if (t0 > t1) {
+      std::swap(t0, t1);
+    }
+    tmin = std::max(tmin, t0);
+    tmax = std::min(tmax, t1);
+  }
+
+  dist = tmin;
+  return tmin <= tmax && tmax >= -BehindOrigin;
+}
+
+const int* BasisBVH::Cursor::next(float max_dist)
+{
+  auto const& nodes = m_bvh->m_nodes;
+
+  while (m_depth) {
+    --m_depth;
+
+    if (m_stack_dist[m_depth] > max_dist) {
+      continue;
+    }
+
+    auto const& node = nodes[m_stack[m_depth]];
+
+    if (node.count) {
+      return m_bvh->m_lists.data() + node.first;
+    }
+
+    float dist0, dist1;
+    bool const hit0 = intersect(nodes[node.first], dist0);
+    bool const hit1 = intersect(nodes[node.first + 1], dist1);
+
+    // push the farther child first, so the nearer one gets visited first
+    if (hit0 && hit1 && dist0 < dist1) {
+      m_stack[m_depth] = node.first + 1;
+      m_stack_dist[m_depth++] = dist1;
+      m_stack[m_depth] = node.first;
+      m_stack_dist[m_depth++] = dist0;
+    } else {
+      if (hit0) {
+        m_stack[m_depth] = node.first;
+        m_stack_dist[m_depth++] = dist0;
+      }
+      if (hit1) {
+        m_stack[m_depth] = node.first + 1;
+        m_stack_dist[m_depth++] = dist1;
+      }
+    }
+  }
+
+  return nullptr;
+}
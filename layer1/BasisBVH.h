@@ -0,0 +1,91 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Bounding volume hierarchy for ray-primitive intersection.
+ */
+
+#pragma once
+
+#include <cstddef>
+#include <memory>
+#include <vector>
+
+#include "Basis.h"
+
+/**
+ * Bounding volume hierarchy over the primitives of a CBasis, built with the
+ * surface area heuristic (SAH). Alternative to the uniform grid (MapType)
+ * which doesn't degrade for scenes with very uneven primitive density,
+ * selected with the `ray_acceleration` setting.
+ *
+ * Leaves reference the primitives by their first basis vertex, in the same
+ * -1 terminated list format as the express lists of the grid (MapType::EList),
+ * so the BasisHit* functions can process them with the same code.
+ */
+class BasisBVH
+{
+public:
+  struct Node {
+    float min[3];
+    float max[3];
+    /// Leaf: offset into the vertex lists, inner node: index of the first
+    /// child (the second child follows it)
+    int first;
+    /// Number of primitives for leaves, 0 for inner nodes
+    int count;
+  };
+
+  /// Maximum tree depth, bounds the traversal stack
+  static constexpr int MaxDepth = 60;
+
+  /**
+   * Front-to-back traversal of the leaves which are hit by a ray.
+   */
+  class Cursor
+  {
+    const BasisBVH* m_bvh;
+    float m_origin[3];
+    float m_inv_dir[3];
+    int m_stack[MaxDepth + 2];
+    float m_stack_dist[MaxDepth + 2];
+    int m_depth = 0;
+
+    bool intersect(const Node& node, float& dist) const;
+
+  public:
+    /**
+     * @param bvh Hierarchy to traverse, the cursor is empty if nullptr
+     * @param dir Ray direction, doesn't need to be normalized if distances
+     * are measured in units of `dir`
+     */
+    Cursor(const BasisBVH* bvh, const float* origin, const float* dir);
+
+    /**
+     * Get the vertex list of the next leaf which the ray enters at or before
+     * `max_dist`.
+     * @return -1 terminated vertex list or nullptr if there are no more
+     * leaves
+     */
+    const int* next(float max_dist);
+  };
+
+  /**
+   * Build the hierarchy for the primitives of a basis (in the coordinate
+   * frame of the basis).
+   * @param fudge Tolerance of the triangle intersection test
+   * (ray_triangle_fudge)
+   */
+  static std::unique_ptr<BasisBVH> build(const CBasis* basis,
+      const int* vert2prim, const CPrimitive* prim, float fudge);
+
+  /// Number of nodes
+  std::size_t size() const { return m_nodes.size(); }
+
+  /// Depth of the tree
+  int depth() const { return m_depth; }
+
+private:
+  std::vector<Node> m_nodes;
+  std::vector<int> m_lists;
+  int m_depth = 0;
+};
@@ -4319,6 +4319,68 @@ CGO* CGOOptimizeSpheresToVBONonIndexed(
   return (cgo);
 }
 
+/**
+ * Updates the sphere centers and radii of a CGO from
+ * CGOOptimizeSpheresToVBONonIndexed() in place (with glBufferSubData), after
+ * the CGO_SPHERE operations of the input CGO have been modified. Colors and
+ * pick colors are kept. Requires a current GL context.
+ * @param[in,out] I optimized CGO
+ * @param[in] input CGO which `I` was generated from
+ * @return false if `I` doesn't match `input` and needs to be regenerated
+ */
+bool CGOUpdateSpheresVBONonIndexed(CGO* I, const CGO* input)
+{
+  cgo::draw::sphere_buffers* sp = nullptr;
+  float* bbox = nullptr;
+
+  for (auto it = I->begin(); !it.is_stop(); ++it) {
+    switch (it.op_code()) {
+    case CGO_DRAW_SPHERE_BUFFERS:
+      if (sp)
+        return false;
+      sp = it.cast<cgo::draw::sphere_buffers>();
+      break;
+    case CGO_BOUNDING_BOX:
+      bbox = it.data();
+      break;
+    }
+  }
+
+  if (!sp)
+    return false;
+
+  std::vector<float> vert;
+  vert.reserve(sp->num_spheres * VerticesPerSphere() * 4);
+  float min[3] = {FLT_MAX, FLT_MAX, FLT_MAX};
+  float max[3] = {-FLT_MAX, -FLT_MAX, -FLT_MAX};
+
+  for (auto it = input->begin(); !it.is_stop(); ++it) {
+    if (it.op_code() != CGO_SPHERE)
+      continue;
+    const auto pc = it.data();
+    for (int vv = 0; vv < VerticesPerSphere(); ++vv) {
+      vert.insert(vert.end(), pc, pc + 4);
+    }
+    set_min_max(min, max, pc);
+  }
+
+  if (vert.size() != std::size_t(sp->num_spheres) * VerticesPerSphere() * 4)
+    return false;
+
+  auto vbo = I->G->ShaderMgr->getGPUBuffer<VertexBuffer>(sp->vboid);
+  if (!vbo)
+    return false;
+
+  vbo->bufferSubData(0, sizeof(float) * vert.size(), vert.data());
+
+  if (bbox) {
+    copy3f(min, bbox);
+    copy3f(max, bbox + 3);
+  }
+
+  return true;
+}
+
 CGO* CGOOptimizeBezier(const CGO* I)
 {
   auto cgo = std::make_unique<CGO>(I->G);
@@ -970,6 +970,7 @@ CGO* CGOOptimizeToVBONotIndexed(
 
 CGO *CGOOptimizeSpheresToVBONonIndexed(const CGO * I, int est=0, bool addshaders=false, CGO *leftOverCGO=nullptr);
 #define CGOOptimizeSpheresToVBONonIndexedNoShader(I, est) CGOOptimizeSpheresToVBONonIndexed(I, est, false, nullptr)
+bool CGOUpdateSpheresVBONonIndexed(CGO* I, const CGO* input);
 
 /**
  * Creates a VBO-based Bezier CGO.
@@ -991,6 +991,73 @@ int MovieFrameToIndex(PyMOLGlobals * G, int frame)
     return (frame);
   }
 }
+/*========================================================================*/
+/**
+ * Mark a cached image as used, for least-recently-used eviction
+ */
+static void MovieTouchImage(CMovie * I, int index)
+{
+  VecCheck(I->ImageLastUse, index);
+  I->ImageLastUse[index] = ++I->ImageUseCounter;
+}
+
+static std::size_t MovieImageBytes(const pymol::Image& image)
+{
+  return image.getSizeInBytes() * (image.isStereo() ? 2 : 1);
+}
+
+/**
+ * Memory of the cached images in bytes
+ */
+static std::size_t MovieImageBytes(const CMovie * I, std::size_t * count = nullptr)
+{
+  std::size_t bytes = 0, n = 0;
+  for (auto const& image : I->Image) {
+    if (image) {
+      bytes += MovieImageBytes(*image);
+      ++n;
+    }
+  }
+  if (count)
+    *count = n;
+  return bytes;
+}
+
+/**
+ * Evict least recently used images (except `keep`) until the cache fits
+ * into cache_frames_size.
+ */
+static void MovieTrimImages(PyMOLGlobals * G, int keep)
+{
+  CMovie *I = G->Movie;
+  std::size_t const capacity =
+      std::size_t(SettingGetGlobal_i(G, cSetting_cache_frames_size)) << 20;
+
+  if (!capacity)
+    return;
+
+  VecCheck(I->ImageLastUse, I->Image.size());
+
+  std::size_t bytes = MovieImageBytes(I);
+  while (bytes > capacity) {
+    int oldest = -1;
+    for (int i = 0, n = I->Image.size(); i < n; ++i) {
+      if (i != keep && I->Image[i] &&
+          (oldest < 0 || I->ImageLastUse[i] < I->ImageLastUse[oldest])) {
+        oldest = i;
+      }
+    }
+    if (oldest < 0)
+      break;
+
+    bytes -= MovieImageBytes(*I->Image[oldest]);
+    I->Image[oldest] = nullptr;
+
+    PRINTFB(G, FB_Movie, FB_Blather)
+      " MovieTrimImages: evicted movie image %d\n", oldest + 1 ENDFB(G);
+  }
+}
+
 /*========================================================================*/
 void MovieSetImage(PyMOLGlobals * G, int index, std::shared_ptr<pymol::Image> image)
 {
@@ -1003,6 +1070,23 @@ void MovieSetImage(PyMOLGlobals * G, int index, std::shared_ptr<pymol::Image> im
   I->Image[index] = image;
   if(I->NImage < (index + 1))
     I->NImage = index + 1;
+
+  MovieTouchImage(I, index);
+  MovieTrimImages(G, index);
+}
+
+/*========================================================================*/
+MovieCacheStats MovieGetCacheStats(PyMOLGlobals * G, bool reset)
+{
+  CMovie *I = G->Movie;
+  auto stats = I->CacheStats;
+  stats.bytes = MovieImageBytes(I, &stats.size);
+  stats.capacity =
+      std::size_t(SettingGetGlobal_i(G, cSetting_cache_frames_size)) << 20;
+  if (reset) {
+    I->CacheStats = {};
+  }
+  return stats;
 }
 
 int MovieSeekScene(PyMOLGlobals * G, int loop)
@@ -1392,10 +1476,13 @@ void MovieAppendCommand(PyMOLGlobals * G, int frame, const char* command)
 std::shared_ptr<pymol::Image> MovieGetImage(PyMOLGlobals * G, int index)
 {
   CMovie *I = G->Movie;
-  if((index >= 0) && (index < I->NImage))
+  if((index >= 0) && (index < I->NImage) && I->Image[index]) {
+    ++I->CacheStats.hits;
+    MovieTouchImage(I, index);
     return I->Image[index];
-  else
-    return nullptr;
+  }
+  ++I->CacheStats.misses;
+  return nullptr;
 }
 
 
@@ -1424,6 +1511,7 @@ int MovieGetLength(PyMOLGlobals * G)
 void MovieClearImages(PyMOLGlobals * G, CMovie* I)
 {
   I->Image.clear();
+  I->ImageLastUse.clear();
   I->NImage = 0;
   SceneInvalidate(G);
   SceneSuppressMovieFrame(G);
@@ -52,8 +52,22 @@ struct CMovieModal {
   std::string fname;
 };
 
+/**
+ * Statistics of the movie frame image cache (cache_frames)
+ */
+struct MovieCacheStats {
+  std::size_t hits = 0;
+  std::size_t misses = 0;
+  std::size_t size = 0;     ///< number of cached images
+  std::size_t bytes = 0;    ///< memory of cached images
+  std::size_t capacity = 0; ///< cache_frames_size in bytes, 0 = unlimited
+};
+
 struct CMovie : public Block {
   std::vector<std::shared_ptr<pymol::Image>> Image;
+  std::vector<unsigned> ImageLastUse; //!< LRU stamps, parallel to Image
+  unsigned ImageUseCounter {};
+  MovieCacheStats CacheStats {};
   pymol::vla<int> Sequence;
   std::vector<std::string> Cmd;
   int NImage { 0 }, NFrame { 0 };
@@ -128,6 +142,7 @@ void MovieClearImages(PyMOLGlobals * G);
 //Return copy of Image
 std::shared_ptr<pymol::Image> MovieGetImage(PyMOLGlobals * G, int index);
 void MovieSetImage(PyMOLGlobals * G, int index, std::shared_ptr<pymol::Image> image);
+MovieCacheStats MovieGetCacheStats(PyMOLGlobals * G, bool reset);
 
 int MovieGetLength(PyMOLGlobals * G);
 int MovieGetPanelHeight(PyMOLGlobals * G);
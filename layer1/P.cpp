@@ -24,6 +24,7 @@ the initialization functions for these libraries on startup.
 
 */
 #include"os_python.h"
+#include"os_numpy.h"
 
 #include"os_predef.h"
 #include"os_std.h"
@@ -824,6 +825,29 @@ static PyMethodDef wrapperMethods[] = {
     {nullptr},
 };
 
+/**
+ * Update dependent fields after assigning an atom property
+ */
+static void AtomPropertyChanged(PyMOLGlobals* G, AtomInfoType* ai, int id)
+{
+  switch (id) {
+  case ATOM_PROP_ELEM:
+    ai->protons = 0;
+    ai->vdw = 0;
+    AtomInfoAssignParameters(G, ai);
+    break;
+  case ATOM_PROP_RESV:
+    ai->inscode = '\0';
+    break;
+  case ATOM_PROP_SS:
+    ai->ssType[0] = toupper(ai->ssType[0]);
+    break;
+  case ATOM_PROP_FORMAL_CHARGE:
+    ai->chemFlag = false;
+    break;
+  }
+}
+
 /**
  * iterate-family namespace implementation: assignment
  *
@@ -964,22 +988,7 @@ int WrapperObjectAssignSubScript(PyObject *obj, PyObject *key, PyObject *val){
     }
 
     if (changed) {
-      switch (ap->id) {
-      case ATOM_PROP_ELEM:
-        wobj->atomInfo->protons = 0;
-        wobj->atomInfo->vdw = 0;
-        AtomInfoAssignParameters(wobj->G, wobj->atomInfo);
-        break;
-      case ATOM_PROP_RESV:
-        wobj->atomInfo->inscode = '\0';
-        break;
-      case ATOM_PROP_SS:
-        wobj->atomInfo->ssType[0] = toupper(wobj->atomInfo->ssType[0]);
-        break;
-      case ATOM_PROP_FORMAL_CHARGE:
-        wobj->atomInfo->chemFlag = false;
-        break;
-      }
+      AtomPropertyChanged(G, wobj->atomInfo, ap->id);
     }
   } else {
     /* if not an atom property, then its a local variable, store it */
@@ -992,6 +1001,370 @@ int WrapperObjectAssignSubScript(PyObject *obj, PyObject *key, PyObject *val){
   return 0; /* 0 success, -1 failure */
 }
 
+#ifdef _PYMOL_NUMPY
+/**
+ * Python str objects for a sequence of C strings. Reuses the previous object
+ * for repeated values, consecutive atoms often share chain, resn, etc.
+ */
+class PStrCache
+{
+  std::string m_str;
+  unique_PyObject_ptr m_obj;
+
+public:
+  /// @return New reference
+  PyObject* get(const char* str)
+  {
+    if (!m_obj || m_str != str) {
+      m_str = str;
+      m_obj.reset(PyUnicode_FromString(str));
+    }
+    Py_XINCREF(m_obj.get());
+    return m_obj.get();
+  }
+};
+
+/**
+ * New 1D numpy array with one value per atom
+ * @param get Value getter with signature `T(const ObjectMolecule*, int atm)`
+ */
+template <typename T, typename F>
+static PyObject* PAtomPropertyArray(int typenum, const PAtomRefs& atoms, F&& get)
+{
+  npy_intp dims[1] = {npy_intp(atoms.size())};
+  auto arr = PyArray_SimpleNew(1, dims, typenum);
+  if (arr) {
+    auto data = static_cast<T*>(PyArray_DATA((PyArrayObject*) arr));
+    for (size_t i = 0; i != atoms.size(); ++i) {
+      data[i] = get(atoms[i].first, atoms[i].second);
+    }
+  }
+  return arr;
+}
+
+/**
+ * New 1D numpy object array with one str per atom
+ * @param get Value getter with signature `const char*(const ObjectMolecule*, int atm)`
+ */
+template <typename F>
+static PyObject* PAtomPropertyStrArray(const PAtomRefs& atoms, F&& get)
+{
+  PStrCache cache;
+  return PAtomPropertyArray<PyObject*>(NPY_OBJECT, atoms,
+      [&](const ObjectMolecule* obj, int atm) {
+        return cache.get(get(obj, atm));
+      });
+}
+
+/**
+ * Assign one value per atom (or the same value to all atoms if `arr` is
+ * zero-dimensional)
+ * @param set Value setter with signature `void(AtomInfoType*, T)`
+ */
+template <typename T, typename F>
+static void PAtomPropertyAssign(
+    const PAtomRefs& atoms, PyArrayObject* arr, F&& set)
+{
+  auto data = static_cast<const T*>(PyArray_DATA(arr));
+  size_t const stride = PyArray_NDIM(arr) ? 1 : 0;
+  for (size_t i = 0; i != atoms.size(); ++i) {
+    set(atoms[i].first->AtomInfo + atoms[i].second, data[i * stride]);
+  }
+}
+#endif
+
+/**
+ * Get atom properties as numpy arrays. Columnar alternative to `iterate`
+ * without evaluating Python code per atom.
+ *
+ * @param atoms Atoms in output order
+ * @param names Property names, same as in the `iterate` namespace
+ * @return Dictionary with one array per name. String properties are object
+ * arrays of str.
+ */
+pymol::Result<PyObject*> PGetAtomPropertyArrays(PyMOLGlobals* G,
+    const PAtomRefs& atoms, const std::vector<std::string>& names)
+{
+#ifndef _PYMOL_NUMPY
+  return pymol::make_error("numpy support not available");
+#else
+  import_array1(pymol::Error());
+
+  unique_PyObject_ptr dict(PyDict_New());
+
+  for (auto const& name : names) {
+    auto const ap = PyMOL_GetAtomPropertyInfo(G->PyMOL, name.c_str());
+    if (!ap) {
+      return pymol::make_error("Unknown atom property '", name, "'");
+    }
+
+    auto const offset = ap->offset;
+    PyObject* arr = nullptr;
+
+    switch (ap->Ptype) {
+    case cPType_string:
+      arr = PAtomPropertyStrArray(atoms, [&](const ObjectMolecule* obj, int atm) {
+        return get_member_pointer<char>(obj->AtomInfo + atm, offset);
+      });
+      break;
+    case cPType_int_as_string:
+      arr = PAtomPropertyStrArray(atoms, [&](const ObjectMolecule* obj, int atm) {
+        return LexStr(G,
+            *get_member_pointer<lexborrow_t>(obj->AtomInfo + atm, offset));
+      });
+      break;
+    case cPType_char_as_type:
+      arr = PAtomPropertyStrArray(atoms, [](const ObjectMolecule* obj, int atm) {
+        return obj->AtomInfo[atm].hetatm ? "HETATM" : "ATOM";
+      });
+      break;
+    case cPType_model:
+      arr = PAtomPropertyStrArray(atoms,
+          [](const ObjectMolecule* obj, int) { return obj->Name; });
+      break;
+    case cPType_float:
+      arr = PAtomPropertyArray<float>(NPY_FLOAT32, atoms,
+          [&](const ObjectMolecule* obj, int atm) {
+            return *get_member_pointer<float>(obj->AtomInfo + atm, offset);
+          });
+      break;
+    case cPType_schar:
+      arr = PAtomPropertyArray<int32_t>(NPY_INT32, atoms,
+          [&](const ObjectMolecule* obj, int atm) {
+            return *get_member_pointer<signed char>(obj->AtomInfo + atm, offset);
+          });
+      break;
+    case cPType_int:
+    case cPType_int_custom_type:
+      arr = PAtomPropertyArray<int32_t>(NPY_INT32, atoms,
+          [&](const ObjectMolecule* obj, int atm) {
+            return *get_member_pointer<int>(obj->AtomInfo + atm, offset);
+          });
+      break;
+    case cPType_uint32:
+      arr = PAtomPropertyArray<uint32_t>(NPY_UINT32, atoms,
+          [&](const ObjectMolecule* obj, int atm) {
+            return *get_member_pointer<uint32_t>(obj->AtomInfo + atm, offset);
+          });
+      break;
+    case cPType_index:
+      arr = PAtomPropertyArray<int32_t>(NPY_INT32, atoms,
+          [](const ObjectMolecule*, int atm) { return atm + 1; });
+      break;
+    case cPType_xyz_float:
+      return pymol::make_error(
+          "'", name, "' not supported, use get_coords instead");
+    default:
+      switch (ap->id) {
+      case ATOM_PROP_RESI: {
+        char resi[16];
+        arr = PAtomPropertyStrArray(atoms, [&](const ObjectMolecule* obj, int atm) {
+          AtomResiFromResv(resi, sizeof(resi), obj->AtomInfo + atm);
+          return resi;
+        });
+      } break;
+      case ATOM_PROP_STEREO:
+        arr = PAtomPropertyStrArray(atoms, [](const ObjectMolecule* obj, int atm) {
+          return AtomInfoGetStereoAsStr(obj->AtomInfo + atm);
+        });
+        break;
+      case ATOM_PROP_ONELETTER: {
+        char abbr[2] = {};
+        arr = PAtomPropertyStrArray(atoms, [&](const ObjectMolecule* obj, int atm) {
+          abbr[0] = SeekerGetAbbr(G, LexStr(G, obj->AtomInfo[atm].resn), 'O', 'X');
+          return abbr;
+        });
+      } break;
+      case ATOM_PROP_EXPLICIT_DEGREE:
+        arr = PAtomPropertyArray<int32_t>(NPY_INT32, atoms,
+            [](const ObjectMolecule* obj, int atm) {
+              return int32_t(getExplicitDegree(obj, atm));
+            });
+        break;
+      case ATOM_PROP_EXPLICIT_VALENCE:
+        arr = PAtomPropertyArray<int32_t>(NPY_INT32, atoms,
+            [](const ObjectMolecule* obj, int atm) {
+              return int32_t(getExplicitValence(obj, atm));
+            });
+        break;
+      default:
+        return pymol::make_error("'", name, "' not supported");
+      }
+    }
+
+    if (!arr || PyErr_Occurred() ||
+        PyDict_SetItemString(dict.get(), name.c_str(), arr) != 0) {
+      Py_XDECREF(arr);
+      return pymol::Error();
+    }
+
+    Py_DECREF(arr);
+  }
+
+  return dict.release();
+#endif
+}
+
+/**
+ * Set atom properties from arrays. Columnar alternative to `alter` without
+ * evaluating Python code per atom.
+ *
+ * @param atoms Atoms in input order
+ * @param values Dictionary with property names as keys (same as in the
+ * `alter` namespace) and arrays (one value per atom) or scalars as values.
+ */
+pymol::Result<> PSetAtomPropertyArrays(
+    PyMOLGlobals* G, const PAtomRefs& atoms, PyObject* values)
+{
+#ifndef _PYMOL_NUMPY
+  return pymol::make_error("numpy support not available");
+#else
+  import_array1(pymol::Error());
+
+  if (!PyDict_Check(values)) {
+    return pymol::make_error("values must be a dictionary");
+  }
+
+  std::vector<std::pair<const AtomPropertyInfo*, unique_PyObject_ptr>> columns;
+
+  PyObject *key, *val;
+  Py_ssize_t pos = 0;
+
+  // validate and convert all columns before modifying any atoms
+  while (PyDict_Next(values, &pos, &key, &val)) {
+    auto const keyobj = unique_PyObject_ptr(PyObject_Str(key));
+    if (!keyobj) {
+      return pymol::Error();
+    }
+
+    auto const name = PyString_AS_STRING(keyobj.get());
+    auto const ap = PyMOL_GetAtomPropertyInfo(G->PyMOL, name);
+    if (!ap) {
+      return pymol::make_error("Unknown atom property '", name, "'");
+    }
+
+    int typenum = NPY_OBJECT;
+
+    switch (ap->Ptype) {
+    case cPType_float:
+      typenum = NPY_FLOAT32;
+      break;
+    case cPType_schar:
+    case cPType_int:
+    case cPType_int_custom_type:
+      typenum = NPY_INT32;
+      break;
+    case cPType_uint32:
+      typenum = NPY_UINT32;
+      break;
+    case cPType_string:
+    case cPType_int_as_string:
+    case cPType_char_as_type:
+      break;
+    default:
+      switch (ap->id) {
+      case ATOM_PROP_RESI:
+      case ATOM_PROP_STEREO:
+        break;
+      default:
+        return pymol::make_error("'", name, "' is read-only");
+      }
+    }
+
+    auto arr = unique_PyObject_ptr(PyArray_FROMANY(
+        val, typenum, 0, 1, NPY_ARRAY_CARRAY_RO | NPY_ARRAY_FORCECAST));
+    if (!arr) {
+      return pymol::Error();
+    }
+
+    auto const arrobj = (PyArrayObject*) arr.get();
+    if (PyArray_NDIM(arrobj) == 1 &&
+        size_t(PyArray_DIM(arrobj, 0)) != atoms.size()) {
+      return pymol::make_error("Number of values for '", name, "' (",
+          PyArray_DIM(arrobj, 0), ") does not match atom count (",
+          atoms.size(), ")");
+    }
+
+    columns.emplace_back(ap, std::move(arr));
+  }
+
+  for (auto const& column : columns) {
+    auto const ap = column.first;
+    auto const offset = ap->offset;
+    auto const arr = (PyArrayObject*) column.second.get();
+
+    switch (ap->Ptype) {
+    case cPType_float:
+      PAtomPropertyAssign<float>(atoms, arr, [&](AtomInfoType* ai, float v) {
+        *get_member_pointer<float>(ai, offset) = v;
+      });
+      break;
+    case cPType_schar:
+      PAtomPropertyAssign<int32_t>(atoms, arr, [&](AtomInfoType* ai, int32_t v) {
+        *get_member_pointer<signed char>(ai, offset) = v;
+      });
+      break;
+    case cPType_int:
+    case cPType_int_custom_type:
+      PAtomPropertyAssign<int32_t>(atoms, arr, [&](AtomInfoType* ai, int32_t v) {
+        *get_member_pointer<int>(ai, offset) = v;
+      });
+      break;
+    case cPType_uint32:
+      PAtomPropertyAssign<uint32_t>(atoms, arr, [&](AtomInfoType* ai, uint32_t v) {
+        *get_member_pointer<uint32_t>(ai, offset) = v;
+      });
+      break;
+    default:
+      // str conversion of Python objects
+      PAtomPropertyAssign<PyObject*>(atoms, arr, [&](AtomInfoType* ai, PyObject* v) {
+        if (ap->id == ATOM_PROP_RESI && PConvPyIntToInt(v, &ai->resv)) {
+          ai->inscode = '\0';
+          return;
+        }
+
+        auto const valobj = unique_PyObject_ptr(PyObject_Str(v));
+        if (!valobj) {
+          return;
+        }
+
+        auto const valstr = PyString_AS_STRING(valobj.get());
+
+        switch (ap->Ptype) {
+        case cPType_string: {
+          auto dest = get_member_pointer<char>(ai, offset);
+          strncpy(dest, valstr, ap->maxlen);
+          dest[ap->maxlen] = '\0';
+        } break;
+        case cPType_int_as_string:
+          LexAssign(G, *get_member_pointer<lexidx_t>(ai, offset), valstr);
+          break;
+        case cPType_char_as_type:
+          ai->hetatm = (valstr[0] == 'h' || valstr[0] == 'H');
+          break;
+        default:
+          if (ap->id == ATOM_PROP_RESI) {
+            ai->setResi(valstr);
+          } else {
+            AtomInfoSetStereo(ai, valstr);
+          }
+        }
+      });
+    }
+
+    if (PyErr_Occurred()) {
+      return pymol::Error();
+    }
+
+    for (auto const& atom : atoms) {
+      AtomPropertyChanged(G, atom.first->AtomInfo + atom.second, ap->id);
+    }
+  }
+
+  return {};
+#endif
+}
+
 /* BEGIN PROPRIETARY CODE SEGMENT (see disclaimer in "os_proprietary.h") */
 #ifdef WIN32
 static PyObject *P_time = nullptr;
@@ -24,6 +24,11 @@ Z* -------------------------------------------------------------------
 #include"PyMOLGlobals.h"
 
 #include "pymol/zstring_view.h"
+#include "Result.h"
+
+#include <string>
+#include <utility>
+#include <vector>
 
 #define cLockAPI 1
 #define cLockInbox 2
@@ -147,6 +152,14 @@ int PAlterAtomState(PyMOLGlobals * G, PyObject *expr_co, int read_only,
                     ObjectMolecule *obj, CoordSet *cs, int atm, int idx,
                     int state, PyObject * space);
 
+/// Atoms as (object, atom index) pairs
+using PAtomRefs = std::vector<std::pair<ObjectMolecule*, int>>;
+
+pymol::Result<PyObject*> PGetAtomPropertyArrays(PyMOLGlobals* G,
+    const PAtomRefs& atoms, const std::vector<std::string>& names);
+pymol::Result<> PSetAtomPropertyArrays(
+    PyMOLGlobals* G, const PAtomRefs& atoms, PyObject* values);
+
 void PLog(PyMOLGlobals * G, pymol::zstring_view str, int lf);
 void PLogFlush(PyMOLGlobals * G);
 
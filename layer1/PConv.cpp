@@ -525,9 +525,10 @@ int PConvPyListToFloatArrayImpl(PyObject * obj, float **f, bool as_vla)
   if(!obj) {
     *f = nullptr;
     ok = false;
-  } else if (PyBytes_Check(obj)){
+  } else if (PConvIsBinaryDump(obj)){
     // binary_dump
-    int slen = PyBytes_Size(obj);
+    auto strval = PConvBinaryDumpAsSomeString(obj);
+    int slen = strval.length();
     l = slen / sizeof(float);
 
     if (as_vla) {
@@ -536,7 +537,6 @@ int PConvPyListToFloatArrayImpl(PyObject * obj, float **f, bool as_vla)
       (*f) = pymol::malloc<float>(l);
     }
 
-    auto strval = PyBytes_AsSomeString(obj);
     memcpy(*f, strval.data(), slen);
   } else if(!PyList_Check(obj)) {
     *f = nullptr;
@@ -663,9 +663,10 @@ int PConvPyListToIntArrayImpl(PyObject * obj, int **f, bool as_vla)
   if(!obj) {
     *f = nullptr;
     ok = false;
-  } else if (PyBytes_Check(obj)){
+  } else if (PConvIsBinaryDump(obj)){
     // binary_dump
-    int slen = PyBytes_Size(obj);
+    auto strval = PConvBinaryDumpAsSomeString(obj);
+    int slen = strval.length();
     l = slen / sizeof(int);
 
     if (as_vla) {
@@ -674,7 +675,6 @@ int PConvPyListToIntArrayImpl(PyObject * obj, int **f, bool as_vla)
       (*f) = pymol::malloc<int>(l);
     }
 
-    auto strval = PyBytes_AsSomeString(obj);
     memcpy(*f, strval.data(), slen);
   } else if(!PyList_Check(obj)) {
     *f = nullptr;
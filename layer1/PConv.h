@@ -86,6 +86,31 @@ Z* -------------------------------------------------------------------
 
 #define CPythonVal_IsNone(PYOBJECT)                     (PYOBJECT == Py_None)
 
+/**
+ * True if `obj` holds a pse_binary_dump array. This is either a bytes object
+ * (pickled sessions) or a C-contiguous memoryview (binary session files,
+ * which reference their arrays directly in the memory-mapped file).
+ */
+inline bool PConvIsBinaryDump(PyObject* obj)
+{
+  return obj && (PyBytes_Check(obj) ||
+                    (PyMemoryView_Check(obj) &&
+                        PyBuffer_IsContiguous(PyMemoryView_GET_BUFFER(obj), 'C')));
+}
+
+/**
+ * Data and size of a binary dump.
+ * @pre PConvIsBinaryDump(obj)
+ */
+inline SomeString PConvBinaryDumpAsSomeString(PyObject* obj)
+{
+  if (PyMemoryView_Check(obj)) {
+    auto view = PyMemoryView_GET_BUFFER(obj);
+    return SomeString(static_cast<const char*>(view->buf), view->len);
+  }
+  return PyBytes_AsSomeString(obj);
+}
+
 /* == error-checking routines: true = success, false = failure. */
 
 
@@ -366,9 +391,10 @@ inline bool PConvFromPyObject(PyMOLGlobals *, PyObject * obj, float * out) {
 
 template <class T>
 bool PConvFromPyObject(PyMOLGlobals * G, PyObject * obj, std::vector<T> &out) {
-  if (PyBytes_Check(obj)) {
+  if (PConvIsBinaryDump(obj)) {
     // binary_dump
-    size_t slen = PyBytes_Size(obj);
+    auto strval = PConvBinaryDumpAsSomeString(obj);
+    size_t slen = strval.length();
 
     if (slen % sizeof(T)) {
       return false;
@@ -376,7 +402,6 @@ bool PConvFromPyObject(PyMOLGlobals * G, PyObject * obj, std::vector<T> &out) {
 
     out.resize(slen / sizeof(T));
 
-    auto strval = PyBytes_AsSomeString(obj);
     std::copy_n(strval.data(), slen, reinterpret_cast<char*>(out.data()));
     return true;
   }
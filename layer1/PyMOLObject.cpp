@@ -41,6 +41,8 @@ Z* -------------------------------------------------------------------
 #include"vla.h"
 #include"pymol/type_traits.h"
 
+#include <atomic>
+
 void ObjectPurgeSettings(pymol::CObject * I)
 {
   I->Setting.reset();
@@ -50,6 +52,7 @@ void ObjectMotionTrim(pymol::CObject *I, int n_frame)
 {
   if(I->ViewElem) {
     VLASize(I->ViewElem,CViewElem,n_frame);
+    I->markChanged();
   }
 }
 
@@ -88,6 +91,7 @@ int ObjectMotionModify(pymol::CObject *I, ViewElemAction action, int index, int
     ok = ExecutiveGroupMotionModify(I->G,I,action,index,count,target,freeze);
   } else {
     ok = ViewElemModify(I->G, &I->ViewElem,action,index,count,target);
+    I->markChanged();
     if(ok && I->ViewElem) {
       int size = VLAGetSize(I->ViewElem);
       int n_frame = MovieGetLength(I->G);
@@ -147,6 +151,9 @@ int ObjectMotion(pymol::CObject * I, MViewAction action, int first,
     int frame;
     int nFrame = MovieGetLength(I->G);
 
+    // object motions are saved with the session
+    I->markChanged();
+
     if(wrap<0) {
       wrap = SettingGet_b(I->G,NULL, I->Setting.get(), cSetting_movie_loop);
     }
@@ -805,6 +812,7 @@ void ObjectCombineTTT(pymol::CObject * I, const float *ttt, int reverse_order, i
     ExecutiveGroupCombineTTT(I->G, I, ttt, reverse_order,store);
   } else {
     float cpy[16];
+    I->markChanged();
     if(!I->TTTFlag) {
       I->TTTFlag = true;
       initializeTTT44f(cpy);
@@ -838,6 +846,7 @@ void ObjectTranslateTTT(pymol::CObject * I, const float *v, int store)
   if(I->type == cObjectGroup) {
     ExecutiveGroupTranslateTTT(I->G, I, v, store);
   } else {
+    I->markChanged();
     if(!I->TTTFlag) {
       I->TTTFlag = true;
       initializeTTT44f(I->TTT);
@@ -869,6 +878,7 @@ void ObjectTranslateTTT(pymol::CObject * I, const float *v, int store)
 void ObjectSetTTT(pymol::CObject * I, const float *ttt, int state, int store)
 {
   if(state < 0) {
+    I->markChanged();
     if(ttt) {
       UtilCopyMem(I->TTT, ttt, sizeof(float) * 16);
       I->TTTFlag = true;
@@ -915,7 +925,7 @@ int ObjectGetTTT(pymol::CObject * I, const float **ttt, int state)
 /*========================================================================*/
 void ObjectResetTTT(pymol::CObject * I,int store)
 {
-  
+  I->markChanged();
   I->TTTFlag = false;
   if(store<0) 
     store = SettingGet_i(I->G, I->Setting.get(), nullptr, cSetting_movie_auto_store);
@@ -1057,6 +1067,8 @@ void ObjectSetTTTOrigin(pymol::CObject * I, float *origin)
   float *dst;
   float post[3];
 
+  I->markChanged();
+
   if(!I->TTTFlag) {
     I->TTTFlag = true;
     initializeTTT44f(I->TTT);
@@ -1098,14 +1110,17 @@ std::string pymol::CObject::describeElement(int index) const
 /*========================================================================*/
 void ObjectToggleRepVis(pymol::CObject * I, int rep)
 {
-  if((rep >= 0) && (rep < cRepCnt))
+  if((rep >= 0) && (rep < cRepCnt)) {
     I->visRep ^= (1 << rep);
+    I->markChanged();
+  }
 }
 
 
 /*========================================================================*/
 void ObjectSetRepVisMask(pymol::CObject * I, int repmask, int value)
 {
+  I->markChanged();
   switch (value) {
     case cVis_HIDE:
       I->visRep &= ~repmask;
@@ -1205,6 +1220,16 @@ pymol::CObject::CObject(PyMOLGlobals * G) : G(G)
 {
   OrthoRemoveSplash(G);         /* HMM... this seems like an inappropriate sideeffect */
   visRep = cRepBitmask & ~(cRepCellBit | cRepExtentBit);
+  markChanged();
+}
+
+/*========================================================================*/
+void pymol::CObject::markChanged()
+{
+  // unique across all objects, so that a deleted and re-created object
+  // never has the same stamp as its predecessor
+  static std::atomic<std::size_t> s_stamp{0};
+  ChangeStamp = ++s_stamp;
 }
 
 /*========================================================================*/
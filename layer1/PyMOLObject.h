@@ -90,6 +90,8 @@ struct CObject {
   int grid_slot = 0;
   CGO* gridSlotSelIndicatorsCGO = nullptr;
   int Grabbed = 0;
+  /// Changes with every modification, see markChanged()
+  std::size_t ChangeStamp = 0;
 
   // methods
   StateIndex_t getCurrentState() const;
@@ -127,9 +129,19 @@ public:
    */
   void setName(pymol::zstring_view name);
 
+  /**
+   * Record a modification of the object, so that incremental session saving
+   * serializes it again. Called by invalidate() and by modifications which
+   * don't need a representation update (TTT, object settings, ...).
+   */
+  void markChanged();
+
   virtual void update() {}
   virtual void render(RenderInfo* info);
-  virtual void invalidate(cRep_t rep, cRepInv_t level, int state) {}
+  virtual void invalidate(cRep_t rep, cRepInv_t level, int state)
+  {
+    markChanged();
+  }
   virtual int getNFrame() const { return 1; }
   virtual std::string describeElement(int index) const;
   virtual char* getCaption(char* ch, int len) const { return nullptr; };
@@ -208,8 +220,10 @@ void SettingSet(
     int index, V value, pymol::CObject* obj, StateIndex_t state = cStateAll)
 {
     auto handle = obj->getSettingHandle(state);
-    if (handle)
+    if (handle) {
       SettingSet(obj->G, *handle, index, value);
+      obj->markChanged();
+    }
 }
 
 template <typename V>
@@ -44,6 +44,9 @@ Z* -------------------------------------------------------------------
 #define SettingGetfv SettingGetGlobal_3fv
 
 #include"Basis.h"
+#include"BasisBVH.h"
+
+#include "pymol/work_stealing_queue.h"
 
 #ifndef RAY_SMALL
 #define RAY_SMALL 0.00001
@@ -63,6 +66,10 @@ Z* -------------------------------------------------------------------
 typedef float float3[3];
 typedef float float4[4];
 
+/* edge length of the square image tiles which threads pick up from the
+   work queue */
+#define cRayTileSize 32
+
 struct _CRayThreadInfo {
   CRay *ray;
   int width, height;
@@ -77,6 +84,9 @@ struct _CRayThreadInfo {
   int phase, n_thread;
   int x_start, x_stop;
   int y_start, y_stop;
+  pymol::work_stealing_queue *tiles; /* cRayTileSize tiles of the x/y range */
+  int sample_step; /* if > 1, only trace every n-th pixel in x and y */
+  int skip_step; /* if > 1, don't trace the pixels of a sample_step pass */
   unsigned int *edging;
   unsigned int edging_cutoff;
   int perspective;
@@ -113,6 +123,7 @@ struct _CRayAntiThreadInfo {
   unsigned int width, height;
   int mag;
   int phase, n_thread;
+  pymol::work_stealing_queue *tiles; /* blocks of cRayTileSize rows */
   CRay *ray;
 };
 
@@ -3166,7 +3177,7 @@ static void RayPrimGetColorRamped(PyMOLGlobals * G, float *matrix, RayInfo * r,
 int RayTraceThread(CRayThreadInfo * T)
 {
   CRay *I = T->ray;
-  int x, y, yy;
+  int x, y;
   float excess = 0.0F;
   float dotgle;
   float bright, direct_cmp, reflect_cmp, fc[4];
@@ -3214,8 +3225,8 @@ int RayTraceThread(CRayThreadInfo * T)
   float invWdthRange, vol0;
   float vol2;
   CBasis *bp1, *bp2;
-  int render_height;
-  int offset = 0;
+  int tiles_x;
+  std::size_t tile;
   BasisCallRec BasisCall[MAX_BASIS];
   float border_offset;
   int edge_sampling = false;
@@ -3451,12 +3462,7 @@ int RayTraceThread(CRayThreadInfo * T)
   else
     bp2 = nullptr;
 
-  render_height = T->y_stop - T->y_start;
-
-  if(render_height) {
-    offset = (T->phase * render_height / T->n_thread);
-    offset = offset - (offset % T->n_thread) + T->phase;
-  }
+  tiles_x = (T->x_stop - T->x_start + cRayTileSize - 1) / cRayTileSize;
   if((interior_color != -1) || I->CheckInterior) {
 
     if(interior_color != -1)
@@ -3489,7 +3495,12 @@ int RayTraceThread(CRayThreadInfo * T)
   BasisCall[0].fudge0 = BasisFudge0;
   BasisCall[0].fudge1 = BasisFudge1;
 
-  MapCacheInit(&BasisCall[0].cache, I->Basis[1].Map, T->phase, cCache_map_scene_cache);
+  if(I->Basis[1].Map) {
+    MapCacheInit(&BasisCall[0].cache, I->Basis[1].Map, T->phase, cCache_map_scene_cache);
+  } else {
+    MapCacheInitSize(&BasisCall[0].cache, I->G, I->Basis[1].NVertex, T->phase,
+                     cCache_map_scene_cache);
+  }
 
   if(shadows && (n_basis > 2)) {
     int bc;
@@ -3508,8 +3519,13 @@ int RayTraceThread(CRayThreadInfo * T)
       BasisCall[bc].fudge0 = BasisFudge0;
       BasisCall[bc].fudge1 = BasisFudge1;
       BasisCall[bc].label_shadow_mode = label_shadow_mode;
-      MapCacheInit(&BasisCall[bc].cache, I->Basis[bc].Map, T->phase,
-                   cCache_map_shadow_cache);
+      if(I->Basis[bc].Map) {
+        MapCacheInit(&BasisCall[bc].cache, I->Basis[bc].Map, T->phase,
+                     cCache_map_shadow_cache);
+      } else {
+        MapCacheInitSize(&BasisCall[bc].cache, I->G, I->Basis[bc].NVertex,
+                         T->phase, cCache_map_shadow_cache);
+      }
     }
   }
 
@@ -3528,15 +3544,38 @@ int RayTraceThread(CRayThreadInfo * T)
 	back_mask = 0xFF000000;
     }
   }
-  for(yy = T->y_start; (yy < T->y_stop); yy++) {
+  /* tiles keep the threads busy on scenes with uneven complexity */
+  while(T->tiles->pop(T->phase, tile)) {
+  const int tile_x = T->x_start + (int) (tile % tiles_x) * cRayTileSize;
+  const int tile_y = T->y_start + (int) (tile / tiles_x) * cRayTileSize;
+  const int tile_x_stop = std::min(tile_x + cRayTileSize, T->x_stop);
+  const int tile_y_stop = std::min(tile_y + cRayTileSize, T->y_stop);
+
+  if(I->G->Interrupt)
+    break;
+
+  if(!T->phase) {
+    int progress = (int) (T->height * T->tiles->popped() / T->tiles->size());
+    if(T->edging_cutoff) {
+      if(T->edging) {
+        OrthoBusyFast(I->G, (int) (2.5F * T->height / 3 + 0.5F * progress), 4 * T->height / 3);
+      } else {
+        OrthoBusyFast(I->G, (int) (T->height / 3 + 0.5F * progress), 4 * T->height / 3);
+      }
+    } else {
+      OrthoBusyFast(I->G, T->height / 3 + progress, 4 * T->height / 3);
+    }
+  }
+
+  for(y = tile_y; (y < tile_y_stop); y++) {
     float perc, bkrd[4] = {0.f, 0.f, 0.f, 1.f};
     unsigned int bkrd_value = 0;
     short isOutsideInY = 0;
+    const bool skip_row = (T->skip_step > 1) && !(y % T->skip_step);
 
     if(I->G->Interrupt)
       break;
 
-    y = T->y_start + ((yy - T->y_start) + offset) % (render_height);    /* make sure threads write to different pages */
     if (T->bkrd_data){
       switch (bg_image_mode){
       case 1: // isCentered
@@ -3585,23 +3624,19 @@ int RayTraceThread(CRayThreadInfo * T)
 	bkrd[3] = 0.f;
       }
     }
-    if((!T->phase) && !(yy & 0xF)) {    /* don't slow down rendering too much */
-      if(T->edging_cutoff) {
-        if(T->edging) {
-          OrthoBusyFast(I->G, (int) (2.5F * T->height / 3 + 0.5F * y), 4 * T->height / 3);
-        } else {
-          OrthoBusyFast(I->G, (int) (T->height / 3 + 0.5F * y), 4 * T->height / 3);
-        }
-      } else {
-        OrthoBusyFast(I->G, T->height / 3 + y, 4 * T->height / 3);
-      }
-    }
-    pixel = T->image + (T->width * y) + T->x_start;
+    pixel = T->image + (T->width * y) + tile_x;
 
-    if((y % T->n_thread) == T->phase) { /* this is my scan line */
+    if((T->sample_step <= 1) || !(y % T->sample_step)) {
       pixel_base[1] = ((y + 0.5F + border_offset) * invHgtRange) + vol2;
 
-      for(x = T->x_start; (x < T->x_stop); x++) {
+      for(x = tile_x; (x < tile_x_stop); x++) {
+        /* progressive passes: the first pass samples a sparse grid, the
+           second one traces everything else */
+        if((T->sample_step > 1) ? (x % T->sample_step) :
+           (skip_row && !(x % T->skip_step))) {
+          pixel++;
+          continue;
+        }
 	if (T->bkrd_data){
 	  // Need to compute background for every pixel if image-based
 	  unsigned char bkrd_uc[4];
@@ -4502,6 +4537,7 @@ int RayTraceThread(CRayThreadInfo * T)
     }
     /* end of if */
   }                             /* end of for */
+  }                             /* end of tile while */
   /*  if(T->n_thread>1) 
      printf(" Ray: Thread %d: Complete.\n",T->phase+1); */
   MapCacheFree(&BasisCall[0].cache, T->phase, cCache_map_scene_cache);
@@ -4625,9 +4661,9 @@ int RayAntiThread(CRayAntiThreadInfo * T)
   /*   unsigned int m00FF=0x00FF,mFF00=0xFF00,mFFFF=0xFFFF; */
   int width;
   int height;
-  int x, y, yy;
+  int x, y;
   unsigned int *p;
-  int offset = 0;
+  std::size_t block;
   CRay *I = T->ray;
 
   OrthoBusyFast(I->G, 9, 10);
@@ -4636,13 +4672,10 @@ int RayAntiThread(CRayAntiThreadInfo * T)
 
   src_row_pixels = T->width;
 
-  offset = (T->phase * height) / T->n_thread;
-  offset = offset - (offset % T->n_thread) + T->phase;
+  while(T->tiles->pop(T->phase, block)) {
+    int y_stop = std::min((int) (block + 1) * cRayTileSize, height);
 
-  for(yy = 0; yy < height; yy++) {
-    y = (yy + offset) % height; /* make sure threads write to different pages */
-
-    if((y % T->n_thread) == T->phase) { /* this is my scan line */
+    for(y = (int) block * cRayTileSize; y < y_stop; y++) {
       unsigned long c1, c2, c3, c4, a;
       unsigned char *c;
 
@@ -5522,6 +5555,83 @@ extern int n_skipped;
 float *rayDepthPixels = nullptr;
 int rayVolume = 0, rayWidth = 0, rayHeight = 0;
 
+/*========================================================================*/
+/*
+ * Trace all tiles of the x/y range of the thread infos, threads pick up
+ * tiles from a shared work stealing queue.
+ *
+ * sample_step, skip_step: see CRayThreadInfo
+ */
+static void RayTracePass(CRayThreadInfo * rt, int n_thread,
+                         int sample_step, int skip_step)
+{
+  int tiles_x = (rt->x_stop - rt->x_start + cRayTileSize - 1) / cRayTileSize;
+  int tiles_y = (rt->y_stop - rt->y_start + cRayTileSize - 1) / cRayTileSize;
+  pymol::work_stealing_queue tiles(
+      std::max(tiles_x, 0) * std::max(tiles_y, 0), n_thread);
+  int a;
+
+  for(a = 0; a < n_thread; a++) {
+    rt[a].tiles = &tiles;
+    rt[a].sample_step = sample_step;
+    rt[a].skip_step = skip_step;
+  }
+
+#ifndef _PYMOL_NOPY
+  if(n_thread > 1)
+    RayTraceSpawn(rt, n_thread);
+  else
+#endif
+    RayTraceThread(rt);
+
+  for(a = 0; a < n_thread; a++) {
+    rt[a].tiles = nullptr;
+  }
+}
+
+/*========================================================================*/
+/*
+ * Pass a preview of the (not yet antialiased) image to the preview callback,
+ * scaled down to the final image size.
+ *
+ * rt: thread info of the pass (image, width, traced x/y range)
+ * mag: antialiasing magnification
+ * step: if > 1, only every step-th pixel in x and y has been traced
+ */
+static void RayDeliverPreview(CRay * I, const CRayThreadInfo * rt,
+                              int mag, int step)
+{
+  pymol::Image preview(I->Width, I->Height);
+  std::uint32_t *dst = preview.pixels();
+  const unsigned int *image = rt->image;
+  const int width = rt->width;
+  const int border = (mag > 1) ? mag : 0;
+
+  /* nearest traced sample, pixels outside of the traced range are
+     background */
+  auto const traced = [step](int s, int start, int stop) {
+    if(step <= 1 || s < start || s >= stop)
+      return s;
+    s -= s % step;
+    if(s < start) {
+      const int first = start + (step - start % step) % step;
+      if(first < stop)
+        s = first;
+    }
+    return s;
+  };
+
+  for(int y = 0; y < I->Height; y++) {
+    const int sy = traced(y * mag + border, rt->y_start, rt->y_stop);
+    for(int x = 0; x < I->Width; x++) {
+      const int sx = traced(x * mag + border, rt->x_start, rt->x_stop);
+      *(dst++) = image[sy * width + sx];
+    }
+  }
+
+  I->PreviewCallback(preview);
+}
+
 /*========================================================================*/
 void RayRender(CRay * I, unsigned int *image, double timing,
                float angle, int antialias, unsigned int *return_bg)
@@ -5967,7 +6077,11 @@ void RayRender(CRay * I, unsigned int *image, double timing,
     OrthoBusyFast(I->G, 5, 20);
     now = UtilGetSeconds(I->G) - timing;
 
-    if (ok){
+    if (ok && I->Basis[1].BVH) {
+      PRINTFB(I->G, FB_Ray, FB_Blather)
+        " Ray: BVH: %d nodes, depth %d, %4.2f sec.\n",
+        (int) I->Basis[1].BVH->size(), I->Basis[1].BVH->depth(), now ENDFB(I->G);
+    } else if (ok){
       if(shadows) {
 	PRINTFB(I->G, FB_Ray, FB_Blather)
 	  " Ray: voxels: [%4.2f:%dx%dx%d], [%4.2f:%dx%dx%d], %4.2f sec.\n",
@@ -6072,6 +6186,9 @@ void RayRender(CRay * I, unsigned int *image, double timing,
       if(y_stop > height)
         y_stop = height;
 
+      int progressive = I->PreviewCallback ?
+        SettingGetGlobal_i(I->G, cSetting_ray_progressive) : 0;
+
       for(a = 0; a < n_thread; a++) {
         rt[a].ray = I;
         rt[a].width = width;
@@ -6110,12 +6227,20 @@ void RayRender(CRay * I, unsigned int *image, double timing,
         rt[a].bkrd_data = I->bkgrd_data ? I->bkgrd_data->bits() : nullptr;
       }
 
-#ifndef _PYMOL_NOPY
-      if(n_thread > 1)
-        RayTraceSpawn(rt, n_thread);
-      else
-#endif
-        RayTraceThread(rt);
+      if(progressive > 1) {
+        /* sparse pass first, then fill in the remaining pixels */
+        RayTracePass(rt, n_thread, progressive, 0);
+        if(!I->G->Interrupt)
+          RayDeliverPreview(I, rt, mag, progressive);
+        RayTracePass(rt, n_thread, 0, progressive);
+      } else {
+        RayTracePass(rt, n_thread, 0, 0);
+      }
+
+      if(I->PreviewCallback && (oversample_cutoff || mag > 1) &&
+         !I->G->Interrupt) {
+        RayDeliverPreview(I, rt, mag, 1);
+      }
 
       if(oversample_cutoff) {   /* perform edge oversampling, if requested */
         unsigned int *edging;
@@ -6128,12 +6253,7 @@ void RayRender(CRay * I, unsigned int *image, double timing,
           rt[a].edging = edging;
         }
 
-#ifndef _PYMOL_NOPY
-        if(n_thread > 1)
-          RayTraceSpawn(rt, n_thread);
-        else
-#endif
-          RayTraceThread(rt);
+        RayTracePass(rt, n_thread, 0, 0);
 
         CacheFreeP(I->G, edging, 0, cCache_ray_edging_buffer, false);
       }
@@ -6506,6 +6626,9 @@ void RayRender(CRay * I, unsigned int *image, double timing,
   if(ok && antialias > 1) {
     /* now spawn threads as needed */
     CRayAntiThreadInfo *rt = pymol::calloc<CRayAntiThreadInfo>(n_thread);
+    int anti_height = (int) (height / mag) - 2;
+    pymol::work_stealing_queue blocks(
+        (std::max(anti_height, 0) + cRayTileSize - 1) / cRayTileSize, n_thread);
 
     for(a = 0; a < n_thread; a++) {
       rt[a].width = width;
@@ -6515,6 +6638,7 @@ void RayRender(CRay * I, unsigned int *image, double timing,
       rt[a].phase = a;
       rt[a].mag = mag;          /* fold magnification */
       rt[a].n_thread = n_thread;
+      rt[a].tiles = &blocks;
       rt[a].ray = I;
     }
 
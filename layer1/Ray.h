@@ -17,6 +17,7 @@ Z* -------------------------------------------------------------------
 #ifndef _H_Ray
 #define _H_Ray
 
+#include <functional>
 #include <memory>
 #include <vector>
 #include <glm/vec3.hpp>
@@ -176,6 +177,10 @@ struct _CRay {
   glm::vec3 Pos;
   std::shared_ptr<pymol::Image> bkgrd_data;
 
+  /* If set, RayRender delivers low-sample previews (at the final image
+     size) before the final image is done, see ray_progressive */
+  std::function<void(const pymol::Image&)> PreviewCallback;
+
 private:
   int cylinder3fv(const float *v1, const float *v2, float r, const float *c1, const float *c2,
                   const float alpha1, const float alpha2);
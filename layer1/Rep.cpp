@@ -29,6 +29,9 @@ Z* -------------------------------------------------------------------
 #include"Util.h"
 #include"Scene.h"
 
+#include <algorithm>
+#include <mutex>
+
 /*========================================================================*/
 /**
  * Delete this instance and return a newly created instance.
@@ -61,11 +64,27 @@ Rep* Rep::rebuild()
  * Rebuild if necessary (according to invalidation status). Returns either this
  * instance, or deletes this instance and returns a new one, or nullptr if the rep
  * became empty/inactive.
+ *
+ * @param[out] rebuilt Set to true if the geometry was built from scratch (not
+ * for recoloring or in-place coordinate updates)
+ * @param[out] deferred If not null, don't build from scratch but set to true,
+ * the caller then builds a new instance in the background (see
+ * RepBuildQueue). This instance stays as a placeholder, unless atoms or bonds
+ * changed (picking would refer to the wrong atoms), then it gets deleted
+ * and nullptr is returned.
  */
-Rep* Rep::update()
+Rep* Rep::update(bool* rebuilt, bool* deferred)
 {
   assert(cs);
 
+  if (rebuilt) {
+    *rebuilt = false;
+  }
+
+  if (deferred) {
+    *deferred = false;
+  }
+
   if (MaxInvalid == cRepInvNone) {
     return this;
   }
@@ -94,8 +113,22 @@ Rep* Rep::update()
     // nothing to do
   } else if (MaxInvalid == cRepInvColor) {
     I = recolor();
+  } else if (MaxInvalid == cRepInvCoord &&
+             m_max_invalid_noncoord < cRepInvPick && updateCoords()) {
+    // geometry patched in place (e.g. trajectory playback with load_coords)
   } else if (MaxInvalid > cRepInvVisib || !sameVis()) {
+    if (deferred) {
+      *deferred = true;
+      if (MaxInvalid >= cRepInvBonds) {
+        delete this;
+        return nullptr;
+      }
+      return this;
+    }
     I = rebuild();
+    if (rebuilt) {
+      *rebuilt = (I != this);
+    }
   } else if (!sameColor()) {
     I = recolor();
   }
@@ -107,6 +140,7 @@ Rep* Rep::update()
 
   if (I) {
     I->MaxInvalid = cRepInvNone;
+    I->m_max_invalid_noncoord = cRepInvNone;
   }
 
   return I;
@@ -124,6 +158,8 @@ void Rep::invalidate(cRepInv_t level)
   SceneInvalidatePicking(I->G); // for now, if anything invalidated, then invalidate picking
   if(level > I->MaxInvalid)
     I->MaxInvalid = level;
+  if (level != cRepInvCoord && level > m_max_invalid_noncoord)
+    m_max_invalid_noncoord = level;
 }
 
 /**
@@ -138,6 +174,49 @@ cRepBitmask_t RepGetAutoShowMask(PyMOLGlobals * G)
   return mask;
 }
 
+/**
+ * Build times per representation type. Reps of different coordinate sets
+ * and of different types are built concurrently with async_builds, hence
+ * the mutex.
+ */
+struct _CRepBuildStats {
+  std::mutex m_mutex;
+  std::vector<RepBuildStats> m_stats = std::vector<RepBuildStats>(cRepCnt);
+};
+
+int RepBuildStatsInit(PyMOLGlobals* G)
+{
+  G->RepBuildStats = new CRepBuildStats();
+  return 1;
+}
+
+void RepBuildStatsFree(PyMOLGlobals* G)
+{
+  delete G->RepBuildStats;
+  G->RepBuildStats = nullptr;
+}
+
+void RepBuildStatsAdd(PyMOLGlobals* G, cRep_t rep, double seconds)
+{
+  CRepBuildStats* I = G->RepBuildStats;
+  std::lock_guard<std::mutex> lock(I->m_mutex);
+  auto& stats = I->m_stats[rep];
+  stats.count += 1;
+  stats.time += seconds;
+  stats.max_time = std::max(stats.max_time, seconds);
+}
+
+std::vector<RepBuildStats> RepBuildStatsGet(PyMOLGlobals* G, bool reset)
+{
+  CRepBuildStats* I = G->RepBuildStats;
+  std::lock_guard<std::mutex> lock(I->m_mutex);
+  auto stats = I->m_stats;
+  if (reset) {
+    std::fill(I->m_stats.begin(), I->m_stats.end(), RepBuildStats());
+  }
+  return stats;
+}
+
 /*========================================================================*/
 /**
  * Derived classes should overrride this method.
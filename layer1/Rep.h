@@ -18,6 +18,7 @@ Z* -------------------------------------------------------------------
 #define _H_Rep
 
 #include <cassert>
+#include <vector>
 
 #include "Picking.h"
 
@@ -225,10 +226,20 @@ private:
   virtual bool sameVis() const { return false; }
   virtual bool sameColor() const { return false; }
 
+  /**
+   * Update the geometry in place after a coordinate-only change (same atoms,
+   * visibility, colors and settings).
+   * @return false if not supported, the rep then gets rebuilt
+   */
+  virtual bool updateCoords() { return false; }
+
   bool m_has_transparency = false;
 
+  //! Like MaxInvalid, but ignoring cRepInvCoord
+  cRepInv_t m_max_invalid_noncoord = cRepInvNone;
+
 public:
-  Rep* update();
+  Rep* update(bool* rebuilt = nullptr, bool* deferred = nullptr);
 
   /** Pointer to static factory function (Only used with molecular
    * representations, DistSet e.g. doesn't use it)
@@ -242,6 +253,21 @@ public:
 
 cRepBitmask_t RepGetAutoShowMask(PyMOLGlobals * G);
 
+/**
+ * Build time statistics for one representation type
+ */
+struct RepBuildStats {
+  int count = 0;         ///< number of (re)builds
+  double time = 0.0;     ///< total time in seconds
+  double max_time = 0.0; ///< slowest build in seconds
+};
+
+int RepBuildStatsInit(PyMOLGlobals* G);
+void RepBuildStatsFree(PyMOLGlobals* G);
+void RepBuildStatsAdd(PyMOLGlobals* G, cRep_t rep, double seconds);
+std::vector<RepBuildStats> RepBuildStatsGet(
+    PyMOLGlobals* G, bool reset = false);
+
 class RepIterator {
   int end;
 
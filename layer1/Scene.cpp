@@ -62,6 +62,7 @@ Z* -------------------------------------------------------------------
 #include "ShaderMgr.h"
 #include "Feedback.h"
 #include "GFXManager.h"
+#include "RepBuildQueue.h"
 
 #ifdef _PYMOL_OPENVR
 #include"OpenVRMode.h"
@@ -2032,19 +2033,31 @@ int SceneCopyExternal(PyMOLGlobals * G, int width, int height,
   return (result);
 }
 
+/**
+ * Get the current image for writing to a file (see ScenePNG), with stereo
+ * images interlaced.
+ * @param prior_only Don't capture a new image from the OpenGL window
+ * @return nullptr if there is no image
+ */
+std::shared_ptr<pymol::Image> SceneGetImageForSave(
+    PyMOLGlobals* G, bool prior_only)
+{
+  CScene *I = G->Scene;
+  SceneImagePrepare(G, prior_only);
+  if(I->Image && I->Image->isStereo()) {
+    return std::make_shared<pymol::Image>(I->Image->interlace());
+  }
+  return I->Image;
+}
+
 bool ScenePNG(PyMOLGlobals* G, pymol::zstring_view png, float dpi, int quiet,
     int prior_only, int format, png_outbuf_t* outbuf)
 {
   CScene *I = G->Scene;
-  SceneImagePrepare(G, prior_only);
-  if(I->Image) {
+  auto saveImage = SceneGetImageForSave(G, prior_only);
+  if(saveImage) {
     int width, height;
     std::tie(width, height) = I->Image->getSize();
-    auto saveImage = I->Image;
-    if(I->Image->isStereo()) {
-      saveImage = std::make_shared<pymol::Image>();
-      *(saveImage) = I->Image->interlace();
-    }
     if(dpi < 0.0F)
       dpi = SettingGetGlobal_f(G, cSetting_image_dots_per_inch);
     auto screen_gamma = SettingGetGlobal_f(G, cSetting_png_screen_gamma);
@@ -2417,6 +2430,45 @@ static void SceneUpdateCameraRock(PyMOLGlobals * G, int dirty)
 }
 
 
+/*========================================================================*/
+/**
+ * During movie playback, build the representations of the states of the next
+ * "movie_prefetch" frames in the background, so that they are ready when the
+ * frames are shown. Follows the movie frame to state mapping, also for
+ * reversed or repeated states.
+ */
+static void ScenePrefetchMovieStates(PyMOLGlobals * G)
+{
+  CScene *I = G->Scene;
+  int n_prefetch = SettingGetGlobal_i(G, cSetting_movie_prefetch);
+
+  if(n_prefetch < 1 || I->NFrame < 2)
+    return;
+
+  int loop = SettingGetGlobal_b(G, cSetting_movie_loop);
+  int frame = SceneGetFrame(G);
+
+  /* states of the upcoming frames, in playback order */
+  std::vector<int> states;
+  for(int a = 1; a <= n_prefetch && a < I->NFrame; ++a) {
+    int next = frame + a;
+    if(next >= I->NFrame) {
+      if(!loop)
+        break;
+      next -= I->NFrame;
+    }
+    int state = MovieFrameToIndex(G, next);
+    if(std::find(states.begin(), states.end(), state) == states.end())
+      states.push_back(state);
+  }
+
+  for (auto& obj : I->Obj) {
+    if(obj->type == cObjectMolecule) {
+      ObjectMoleculePrefetchStates(static_cast<ObjectMolecule*>(obj), states);
+    }
+  }
+}
+
 /*========================================================================*/
 void SceneIdle(PyMOLGlobals * G)
 {
@@ -2437,6 +2489,13 @@ void SceneIdle(PyMOLGlobals * G)
       OrthoDirty(G);            /* force an update */
     }
   }
+
+  /* representations built in the background, see background_builds */
+  if(RepBuildQueueCollect(G)) {
+    SceneInvalidatePicking(G);
+    SceneInvalidate(G);
+  }
+
   if(!OrthoDeferredWaiting(G)) {
     if(MoviePlaying(G)) {
       renderTime = UtilGetSeconds(G) - I->LastFrameTime;
@@ -2484,6 +2543,8 @@ void SceneIdle(PyMOLGlobals * G)
       } else {
         SceneSetFrame(G, 5, 1);
       }
+      if(MoviePlaying(G))
+        ScenePrefetchMovieStates(G);
       PyMOL_NeedRedisplay(G->PyMOL);
     }
   }
@@ -2629,6 +2690,7 @@ int SceneObjectAdd(PyMOLGlobals * G, pymol::CObject * obj)
 {
   CScene *I = G->Scene;
   obj->Enabled = true;
+  obj->markChanged();
   I->Obj.push_back(obj);
   if(obj->type == cObjectGadget) {
     I->GadgetObjs.push_back(obj);
@@ -2680,6 +2742,7 @@ int SceneObjectDel(PyMOLGlobals * G, pymol::CObject * obj, int allow_purge)
         (*it)->invalidate(cRepAll, cRepInvPurge, -1);
       }
       obj->Enabled = false;
+      obj->markChanged();
       I->Obj.erase(it);
     }
   }
@@ -4672,6 +4735,13 @@ void SceneUpdate(PyMOLGlobals * G, int force)
     }
   }
 
+  /* level of detail depends on the view, may invalidate representations */
+  for (auto& obj : I->Obj) {
+    if (obj->type == cObjectMolecule) {
+      ObjectMoleculeUpdateLevelOfDetail(static_cast<ObjectMolecule*>(obj));
+    }
+  }
+
   if(force || I->ChangedFlag || ((cur_state != I->LastStateBuilt) &&
                                  (defer_builds_mode > 0))) {
 
@@ -4739,7 +4809,13 @@ void SceneUpdate(PyMOLGlobals * G, int force)
               for (auto& NonGadgetObj : I->NonGadgetObjs) {
                 thread_info[cnt++].obj = NonGadgetObj;
               }
+              /* the pick color manager is not thread safe, invalidate
+                 picking once after all objects are updated */
+              I->DeferPickingInvalidation = true;
               SceneObjectUpdateSpawn(G, thread_info, n_thread, cnt);
+              I->DeferPickingInvalidation = false;
+              if(I->PickingInvalidationPending.exchange(false))
+                SceneInvalidatePicking(G);
               FreeP(thread_info);
             }
           }
@@ -5651,6 +5727,10 @@ float GetFovWidth(PyMOLGlobals * G)
 
 void SceneInvalidatePicking(PyMOLGlobals * G){
   CScene *I = G->Scene;
+  if (I->DeferPickingInvalidation) {
+    I->PickingInvalidationPending = true;
+    return;
+  }
   I->pickmgr.invalidate();
 }
 
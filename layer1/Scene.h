@@ -105,6 +105,8 @@ int SceneValidateImageMode(PyMOLGlobals * G, int mode, bool defaultdraw);
 
 bool ScenePNG(PyMOLGlobals* G, pymol::zstring_view png, float dpi, int quiet,
     int prior_only, int format, std::vector<unsigned char>* outbuf = nullptr);
+std::shared_ptr<pymol::Image> SceneGetImageForSave(
+    PyMOLGlobals* G, bool prior_only);
 int SceneCopyExternal(PyMOLGlobals * G, int width, int height, int rowbytes,
                       unsigned char *dest, int mode);
 
@@ -30,6 +30,8 @@ Z* -------------------------------------------------------------------
 #include"Rect.h"
 #include "Camera.h"
 #include "Spatial.h"
+#include<atomic>
+#include<functional>
 #include<list>
 #include<vector>
 
@@ -105,6 +107,8 @@ class CScene : public Block {
   int NFrame { 0 };
   int HasMovie { 0 };
   std::shared_ptr<pymol::Image> Image { nullptr };
+  /// Progressive preview callback for the built-in ray tracer (see CRay)
+  std::function<void(const pymol::Image&)> RayPreviewCallback;
   bool MovieFrameFlag{};
   double LastRender{}, RenderTime{}, LastFrameTime{}, LastFrameAdjust{};
   double LastSweep{}, LastSweepTime{};
@@ -174,6 +178,11 @@ class CScene : public Block {
   float vp_width_scale{};
   PickColorManager pickmgr;
 
+  //! Set while objects are updated on worker threads (see SceneUpdate),
+  //! SceneInvalidatePicking then only records the request
+  bool DeferPickingInvalidation = false;
+  std::atomic<bool> PickingInvalidationPending{false};
+
   CScene(PyMOLGlobals * G) : Block(G), m_ScrollBar(G, false) {}
 
   virtual int click(int button, int x, int y, int mod) override;
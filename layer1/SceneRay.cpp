@@ -214,6 +214,9 @@ bool SceneRay(PyMOLGlobals * G,
       if(!ray)
         break;
 
+      if(!I->grid.active)
+        ray->PreviewCallback = I->RayPreviewCallback;
+
       SceneRaySetRayView(G, I, stereo_hand, rayView, &angle, shift);
 
       /* define the viewing volume */
@@ -1885,6 +1885,9 @@ void SettingGenerateSideEffects(PyMOLGlobals * G, int index, const char *sele, i
     return;
   }
 
+  // settings like ignore_case change the meaning of selection expressions
+  SelectorCacheInvalidate(G);
+
   // range check for int (global only)
   if (rec.type == cSetting_int && rec.hasMinMax() && !(sele && sele[0])) {
     int value = SettingGetGlobal_i(G, index);
@@ -1929,6 +1932,8 @@ void SettingGenerateSideEffects(PyMOLGlobals * G, int index, const char *sele, i
     ExecutiveInvalidateGroups(G, false);
     SceneChanged(G);
     break;
+  case cSetting_lod_distance:
+  case cSetting_lod_atom_count:
   case cSetting_grid_max:
     SceneChanged(G);
     break;
@@ -2542,6 +2547,7 @@ void SettingGenerateSideEffects(PyMOLGlobals * G, int index, const char *sele, i
     break;
 
   case cSetting_surface_quality:
+  case cSetting_surface_engine:
   case cSetting_surface_mode:
   case cSetting_surface_normal:
   case cSetting_surface_type:
@@ -905,6 +905,19 @@ enum {
   REC_f( 795, salt_bridge_distance                        , global    , 5.0f ),
   REC_b( 796, use_tessellation_shaders                , global    , true ),
   REC_c( 797, cell_color                              , ostate    , "-1" ),
+  REC_i( 798, selection_cache_size                    , global    , 64, 0, 100000 ),
+  REC_i( 799, traj_cache_size                         , object    , 256, 0, 1000000 ),
+  REC_b( 800, session_incremental                     , global    , 0 ),
+  REC_i( 801, ray_progressive                         , global    , 8, 0, 64 ),
+  REC_i( 802, ray_acceleration                        , global    , 0, 0, 1 ),
+  REC_i( 803, surface_cache_size                      , global    , 64, 0, 1000000 ),
+  REC_i( 804, surface_engine                          , ostate    , 0, 0, 1 ),
+  REC_f( 805, lod_distance                            , object    , 0.0f, 0.0f, 1e6f ),
+  REC_i( 806, lod_atom_count                          , object    , 0, 0, 2000000000 ),
+  REC_i( 807, cache_frames_size                       , global    , 0, 0, 1000000 ),
+  REC_i( 808, movie_prefetch                          , global    , 0, 0, 10000 ),
+  REC_i( 809, gaussian_fft                            , global    , -1, -1, 1 ),
+  REC_b( 810, background_builds                       , object    , 0 ),
 
 #ifdef SETTINGINFO_IMPLEMENTATION
 #undef SETTINGINFO_IMPLEMENTATION
@@ -27,6 +27,10 @@
 #include <msgpack.hpp>
 #endif
 
+#ifdef PYMOL_OPENMP
+#include <omp.h>
+#endif
+
 namespace pymol {
 namespace _cif_detail {
 
@@ -105,6 +109,205 @@ static void tolowerinplace(char *p) {
   }
 }
 
+// tokenizer
+
+/// Token sink which appends to vectors and null-terminates tokens in place
+struct cif_token_vectors {
+  std::vector<char*>& tokens;
+  std::vector<char>& keypossible;
+
+  void push(char* token, bool key) {
+    tokens.push_back(token);
+    keypossible.push_back(key);
+  }
+  void terminate(char* p) { *p = 0; }
+};
+
+/// Token sink which only counts tokens and leaves the input unmodified
+struct cif_token_counter {
+  size_t count = 0;
+
+  void push(char*, bool) { ++count; }
+  void terminate(char*) {}
+};
+
+/// Token sink which writes to preallocated arrays and null-terminates tokens
+struct cif_token_writer {
+  char** tokens;
+  char* keypossible;
+
+  void push(char* token, bool key) {
+    *(tokens++) = token;
+    *(keypossible++) = key;
+  }
+  void terminate(char* p) { *p = 0; }
+};
+
+/**
+ * Split CIF text into tokens. Values '.' (inapplicable) and '?' (unknown)
+ * are reported as null-pointers.
+ *
+ * @param p Begin of text
+ * @param end End of text, there must be no null character in [p, end)
+ * @param prev Character preceding `p`, or '\0' at the beginning of the text
+ * @param sink Receives the tokens
+ * @param open_ok If false, fail if `end` is reached inside a quoted or
+ * multi-line token
+ * @return False if `open_ok` is false and a token is open at `end`
+ */
+template <typename Sink>
+static bool cif_tokenize(
+    char* p, char* const end, char prev, Sink& sink, bool open_ok = true)
+{
+  char quote;
+
+  while (true) {
+    while (p != end && iswhitespace(*p))
+      prev = *(p++);
+
+    if (p == end)
+      break;
+
+    if (*p == '#') {
+      while (++p != end && !islinefeed(*p));
+      prev = (p != end) ? *p : '\0';
+    } else if (isquote(*p)) { // will nullptr the closing quote
+      quote = *p;
+      sink.push(p + 1, false);
+      while (++p != end &&
+             !(*p == quote && (p + 1 == end || iswhitespace0(p[1]))));
+      if (p != end) {
+        sink.terminate(p++);
+      } else if (!open_ok) {
+        return false;
+      }
+      prev = (p != end) ? *p : '\0';
+    } else if (*p == ';' && islinefeed(prev)) {
+      // multi-line tokens start with ";" and end with "\n;"
+      // multi-line tokens cannot be keys, only values.
+      char* token = p + 1;
+      sink.push(token, false);
+      // advance until `\n;`
+      while (++p != end && !(islinefeed(*p) && p + 1 != end && p[1] == ';'));
+      // step to next line and null the line feed
+      if (p != end) {
+        sink.terminate(p);
+        // \r\n on Windows)
+        if (p - 1 > token && *(p - 1) == '\r') {
+          sink.terminate(p - 1);
+        }
+        p += 2;
+      } else if (!open_ok) {
+        return false;
+      }
+      prev = ';';
+    } else { // will null the whitespace
+      char * q = p++;
+      while (p != end && !iswhitespace0(*p)) ++p;
+      prev = (p != end) ? *p : '\0';
+      if (p - q == 1 && (*q == '?' || *q == '.')) {
+        // store values '.' (inapplicable) and '?' (unknown) as null-pointers
+        sink.push(nullptr, false);
+      } else {
+        if (p != end)
+          sink.terminate(p++);
+        sink.push(q, true);
+      }
+    }
+  }
+
+  return true;
+}
+
+#ifdef PYMOL_OPENMP
+/// Minimum number of bytes per thread for parallel tokenization
+static const size_t CIF_PARALLEL_MIN_CHUNK = 1 << 20;
+
+/**
+ * Split [begin, end) into up to `n` chunks of similar size. Chunks start at
+ * the beginning of a line which is not inside a multi-line text field.
+ * @return Chunk boundaries, including `begin` and `end`
+ */
+static std::vector<char*> cif_chunk_bounds(char* begin, char* end, size_t n)
+{
+  std::vector<char*> bounds = {begin};
+  size_t const chunk_size = (end - begin) / n;
+  char* target = begin + chunk_size;
+  bool in_field = false;
+
+  for (char* p = begin; bounds.size() < n;) {
+    p = static_cast<char*>(memchr(p, '\n', end - p));
+    if (!p || ++p == end)
+      break;
+
+    if (*p == ';') {
+      in_field = !in_field;
+    } else if (!in_field && p >= target) {
+      bounds.push_back(p);
+      target = p + chunk_size;
+    }
+  }
+
+  bounds.push_back(end);
+  return bounds;
+}
+
+/**
+ * Tokenize large inputs in parallel chunks. Every chunk is first scanned
+ * without modification to count its tokens and to verify that no token
+ * spans a chunk boundary, then all chunks are tokenized into their slice of
+ * the output arrays. Chunks other than the first one start after a newline
+ * (see cif_chunk_bounds), the preceding byte is not read since the previous
+ * chunk's thread may null it.
+ * @param max_threads Maximum number of threads
+ * @return False if the input is too small or can't be split, in which case
+ * the input is not modified
+ */
+static bool cif_tokenize_parallel(char* begin, char* end,
+    std::vector<char*>& tokens, std::vector<char>& keypossible, int max_threads)
+{
+  size_t const n_thread = std::min<size_t>(
+      std::max(1, max_threads), (end - begin) / CIF_PARALLEL_MIN_CHUNK);
+
+  if (n_thread < 2)
+    return false;
+
+  auto const bounds = cif_chunk_bounds(begin, end, n_thread);
+  int const n_chunk = bounds.size() - 1;
+
+  if (n_chunk < 2)
+    return false;
+
+  std::vector<size_t> offsets(n_chunk + 1, 0);
+  std::vector<char> chunk_ok(n_chunk, false);
+
+#pragma omp parallel for schedule(static, 1) num_threads(n_chunk)
+  for (int k = 0; k < n_chunk; ++k) {
+    cif_token_counter counter;
+    chunk_ok[k] = cif_tokenize(bounds[k], bounds[k + 1],
+        k ? '\n' : '\0', counter, k + 1 == n_chunk);
+    offsets[k + 1] = counter.count;
+  }
+
+  if (std::find(chunk_ok.begin(), chunk_ok.end(), false) != chunk_ok.end())
+    return false;
+
+  std::partial_sum(offsets.begin(), offsets.end(), offsets.begin());
+  tokens.resize(offsets.back());
+  keypossible.resize(offsets.back());
+
+#pragma omp parallel for schedule(static, 1) num_threads(n_chunk)
+  for (int k = 0; k < n_chunk; ++k) {
+    cif_token_writer writer{
+        tokens.data() + offsets[k], keypossible.data() + offsets[k]};
+    cif_tokenize(bounds[k], bounds[k + 1], k ? '\n' : '\0', writer);
+    assert(writer.tokens == tokens.data() + offsets[k + 1]);
+  }
+
+  return true;
+}
+#endif
+
 // CIF stuff
 
 static const cif_array EMPTY_ARRAY(nullptr);
@@ -299,62 +502,16 @@ bool cif_file::parse(char*&& p) {
   }
 
   auto& tokens = m_tokens;
-  char quote;
-  char prev = '\0';
-
-  std::vector<bool> keypossible;
+  std::vector<char> keypossible;
+  char* const end = p + strlen(p);
 
   // tokenize
-  while (true) {
-    while (iswhitespace(*p))
-      prev = *(p++);
-
-    if (!*p)
-      break;
-
-    if (*p == '#') {
-      while (!(islinefeed0(*++p)));
-      prev = *p;
-    } else if (isquote(*p)) { // will nullptr the closing quote
-      quote = *p;
-      keypossible.push_back(false);
-      tokens.push_back(p + 1);
-      while (*++p && !(*p == quote && iswhitespace0(p[1])));
-      if (*p)
-        *(p++) = 0;
-      prev = *p;
-    } else if (*p == ';' && islinefeed(prev)) {
-      // multi-line tokens start with ";" and end with "\n;"
-      // multi-line tokens cannot be keys, only values.
-      keypossible.push_back(false);
-      tokens.push_back(p + 1);
-      // advance until `\n;`
-      while (*++p && !(islinefeed(*p) && p[1] == ';'));
-      // step to next line and null the line feed
-      if (*p) {
-        *p = 0;
-        // \r\n on Windows)
-        if (p - 1 > tokens.back() && *(p - 1) == '\r') {
-          *(p - 1) = 0;
-        }
-        p += 2;
-      }
-      prev = ';';
-    } else { // will null the whitespace
-      char * q = p++;
-      while (!iswhitespace0(*p)) ++p;
-      prev = *p;
-      if (p - q == 1 && (*q == '?' || *q == '.')) {
-        // store values '.' (inapplicable) and '?' (unknown) as null-pointers
-        q = nullptr;
-        keypossible.push_back(false);
-      } else {
-        if (*p)
-          *(p++) = 0;
-        keypossible.push_back(true);
-      }
-      tokens.push_back(q);
-    }
+#ifdef PYMOL_OPENMP
+  if (!cif_tokenize_parallel(p, end, tokens, keypossible, m_n_thread))
+#endif
+  {
+    cif_token_vectors sink{tokens, keypossible};
+    cif_tokenize(p, end, '\0', sink);
   }
 
   cif_detail::cif_str_data* current_frame = nullptr;
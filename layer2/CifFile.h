@@ -96,6 +96,7 @@ class cif_file {
   std::vector<char*> m_tokens;
   std::map<std::string, cif_data> m_datablocks;
   std::unique_ptr<char, pymol::default_free> m_contents;
+  int m_n_thread = 1;
 
   /**
    * Parse CIF string
@@ -119,6 +120,9 @@ public:
   */
   bool parse_bcif(const char* bytes, std::size_t size);
 
+  /// Number of threads for tokenizing large inputs (max_threads setting)
+  void set_n_thread(int n_thread) { m_n_thread = n_thread; }
+
 protected:
   /// Report a parsing error
   virtual void error(const char*);
@@ -1043,6 +1043,29 @@ public:
   }
 };
 
+/**
+ * Convert a numeric column to doubles. Large columns are converted with
+ * multiple threads (max_threads setting).
+ * @param d Default value for missing values
+ */
+static std::vector<double> cif_array_to_doubles(
+    PyMOLGlobals* G, const cif_array* arr, int nrows, double d = 0.)
+{
+  std::vector<double> values(nrows);
+
+#ifdef PYMOL_OPENMP
+  int const n_thread = (nrows >= 10000)
+                           ? std::max(1, SettingGetGlobal_i(G, cSetting_max_threads))
+                           : 1;
+#pragma omp parallel for if (n_thread > 1) num_threads(n_thread)
+#endif
+  for (int i = 0; i < nrows; ++i) {
+    values[i] = arr->as_d(i, d);
+  }
+
+  return values;
+}
+
 /**
  * Read ATOM_SITE
  *
@@ -1163,6 +1186,13 @@ static CoordSet** read_atom_site(PyMOLGlobals* G, const pymol::cif_data* data,
     cset->IdxToAtm.resize(it->second);
   }
 
+  // floating point parsing dominates for large files, do it up front
+  auto const coords_x = cif_array_to_doubles(G, arr_x, nrows);
+  auto const coords_y = cif_array_to_doubles(G, arr_y, nrows);
+  auto const coords_z = cif_array_to_doubles(G, arr_z, nrows);
+  auto const b_factors = cif_array_to_doubles(G, arr_u ? arr_u : arr_b, nrows);
+  auto const occupancies = cif_array_to_doubles(G, arr_q, nrows, 1.0);
+
   // mm_atom_site_label -> atom index (1-indexed)
   std::map<std::string, int> name_dict;
 
@@ -1180,9 +1210,9 @@ static CoordSet** read_atom_site(PyMOLGlobals* G, const pymol::cif_data* data,
     cset = csets[mod_num - 1];
     int idx = cset->NIndex++;
     float * coord = cset->coordPtr(idx);
-    coord[0] = arr_x->as_d(i);
-    coord[1] = arr_y->as_d(i);
-    coord[2] = arr_z->as_d(i);
+    coord[0] = coords_x[i];
+    coord[1] = coords_y[i];
+    coord[2] = coords_z[i];
 
     if (!discrete && ncsets > 1) {
       // mm_atom_site_label aggregate
@@ -1216,9 +1246,9 @@ static CoordSet** read_atom_site(PyMOLGlobals* G, const pymol::cif_data* data,
 
     ai->id = arr_ID->as_i(i);
     ai->b = (arr_u != nullptr) ?
-             arr_u->as_d(i) * 78.95683520871486 : // B = U * 8 * pi^2
-             arr_b->as_d(i);
-    ai->q = arr_q->as_d(i, 1.0);
+             b_factors[i] * 78.95683520871486 : // B = U * 8 * pi^2
+             b_factors[i];
+    ai->q = occupancies[i];
 
     strncpy_alpha(ai->elem, arr_symbol->as_s(i), cElemNameLen);
 
@@ -3254,6 +3284,7 @@ pymol::Result<ObjectMolecule*> ObjectMoleculeReadCifStr(PyMOLGlobals * G, Object
   }
 
   auto cif = std::make_shared<cif_file_with_error_capture>();
+  cif->set_n_thread(SettingGet<int>(G, cSetting_max_threads));
   if (!cif->parse_string(st)) {
     return pymol::make_error("Parsing CIF file failed: ", cif->m_error_msg);
   }
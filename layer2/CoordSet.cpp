@@ -46,11 +46,13 @@ Z* -------------------------------------------------------------------
 #include"RepNonbonded.h"
 #include"RepNonbondedSphere.h"
 #include"RepEllipsoid.h"
+#include "RepBuildQueue.h"
 #include"Symmetry.h"
 
 #include"PyMOLGlobals.h"
 #include"PyMOLObject.h"
 #include "Executive.h"
+#include "Selector.h"
 #include "Lex.h"
 
 #ifdef _PYMOL_IP_PROPERTIES
@@ -1146,6 +1148,26 @@ PyObject *CoordSetAtomToChemPyAtom(PyMOLGlobals * G, AtomInfoType * ai, ObjectMo
 /*========================================================================*/
 void CoordSet::invalidateRep(cRep_t type, cRepInv_t level)
 {
+  // results of running builds would be stale
+  RepBuildQueueDiscard(G, this, type);
+
+  if (Obj && level >= cRepInvCoord) {
+    SelectorTouchObject(Obj);
+  }
+
+  if (level >= cRepInvCoord) {
+    LodSphere[3] = -1.f;
+  }
+
+  // modified coordinates or atoms of a lazy trajectory state must survive
+  // eviction, so it becomes a regular state
+  if (Obj && Obj->LazyStates) {
+    auto const level_base = level & ~cRepInvPurgeMask;
+    if (level_base == cRepInvCoord || level_base >= cRepInvAtoms) {
+      Obj->LazyStates->forget(this);
+    }
+  }
+
   if(level >= cRepInvVisib) {
     if (Obj)
       Obj->RepVisCacheValid = false;
@@ -1206,6 +1228,16 @@ void CoordSet::invalidateRep(cRep_t type, cRepInv_t level)
     }
     if(eff_level >= cRepInvVisib)     /* make active if visibility has changed */
       Active[a] = true;
+    for (auto& rep : LodRep[a]) {
+      if (rep) {
+        if (eff_level < cRepInvPurge) {
+          rep->invalidate(eff_level);
+        } else {
+          delete rep;
+          rep = nullptr;
+        }
+      }
+    }
     if (Rep[a]) {
       if (eff_level < cRepInvPurge) {
         Rep[a]->invalidate(eff_level);
@@ -1238,48 +1270,265 @@ void CoordSet::invalidateRep(cRep_t type, cRepInv_t level)
 
 
 /*========================================================================*/
+/**
+ * Change the level of detail of cartoon and surface. The representations of
+ * the previous level are kept and a representation which was already built
+ * for the new level is swapped in, so that moving back and forth across a
+ * distance threshold doesn't rebuild them. Kept representations receive the
+ * same invalidations as the displayed ones (see invalidateRep).
+ */
+void CoordSet::setLevelOfDetail(int level)
+{
+  assert(0 <= level && level < int(std::size(LodRep[0])));
+
+  if (level == LevelOfDetail)
+    return;
+
+  RepBuildQueueDiscard(G, this);
+
+  for (auto rep : {cRepCartoon, cRepSurface}) {
+    if (!Rep[rep])
+      continue;
 
-#define RepUpdateMacro(rep, new_fn, state)                                     \
-  {                                                                            \
-    if (Active[rep] && !G->Interrupt) {                                        \
-      if (Rep[rep]) {                                                          \
-        assert(Rep[rep]->cs == this);                                          \
-        assert(Rep[rep]->getState() == state);                                 \
-        Rep[rep] = Rep[rep]->update();                                         \
-      } else {                                                                 \
-        Rep[rep] = new_fn(this, state);                                        \
-        if (Rep[rep]) {                                                        \
-          Rep[rep]->fNew = new_fn;                                             \
-          SceneInvalidatePicking(G);                                           \
-        } else {                                                               \
-          Active[rep] = false;                                                 \
-        }                                                                      \
-      }                                                                        \
-    }                                                                          \
-    OrthoBusyFast(G, rep, cRepCnt);                                            \
+    auto& kept = LodRep[rep];
+    delete kept[LevelOfDetail];
+    kept[LevelOfDetail] = Rep[rep];
+    Rep[rep] = kept[level];
+    kept[level] = nullptr;
+
+    // without a kept representation, CoordSet::update builds a new one
+    Active[rep] = true;
+    SceneInvalidatePicking(G);
   }
 
+  LevelOfDetail = level;
+  SceneChanged(G);
+}
+
 /*========================================================================*/
-void CoordSet::update(int state)
+
+namespace
+{
+/// Molecular representations and their factory functions, in update order
+const struct {
+  cRep_t rep;
+  ::Rep* (*fNew)(CoordSet* cs, int state);
+} CoordSetRepFactories[] = {
+    {cRepLine, RepWireBondNew},
+    {cRepCyl, RepCylBondNew},
+    {cRepDot, RepDotNew},
+    {cRepMesh, RepMeshNew},
+    {cRepSphere, RepSphereNew},
+    {cRepRibbon, RepRibbonNew},
+    {cRepCartoon, RepCartoonNew},
+    {cRepSurface, RepSurfaceNew},
+    {cRepLabel, RepLabelNew},
+    {cRepNonbonded, RepNonbondedNew},
+    {cRepNonbondedSphere, RepNonbondedSphereNew},
+    {cRepEllipsoid, RepEllipsoidNew},
+};
+} // namespace
+
+struct _CRepUpdateThreadInfo {
+  CoordSet* cs;
+  int state;
+  cRep_t rep;
+  ::Rep* (*fNew)(CoordSet* cs, int state);
+  bool created;
+};
+
+/**
+ * True if this representation can be built in the background, while the
+ * render thread keeps drawing. Excluded are representations which evaluate
+ * selections (carving, labels) or are cheap to build anyway.
+ */
+static bool CoordSetRepBuildInBackground(const CoordSet* cs, cRep_t rep)
+{
+  switch (rep) {
+  case cRepCyl:
+  case cRepSphere:
+  case cRepRibbon:
+  case cRepCartoon:
+  case cRepDot:
+  case cRepEllipsoid:
+  case cRepNonbondedSphere:
+    return true;
+  case cRepSurface:
+    return SettingGet<float>(*cs, cSetting_surface_carve_cutoff) <= 0.f &&
+           SettingGet<float>(*cs, cSetting_surface_clear_cutoff) <= 0.f;
+  default:
+    return false;
+  }
+}
+
+/**
+ * Build or update one representation, and record the build time if it
+ * was built from scratch (not for recoloring).
+ *
+ * @param background Build from scratch in the background (RepBuildQueue),
+ * keep the previous representation as a placeholder until the new one is
+ * collected
+ * @return true if a new representation was created (picking must be
+ * invalidated, not done here since this may run on a worker thread)
+ */
+static bool CoordSetUpdateRep(CoordSet* I, int state, cRep_t rep,
+    ::Rep* (*new_fn)(CoordSet* cs, int state), bool background = false)
+{
+  PyMOLGlobals* G = I->G;
+
+  if (!I->Active[rep] || G->Interrupt)
+    return false;
+
+  if (background && RepBuildQueueHas(G, I, rep))
+    return false;
+
+  double const start = UtilGetSeconds(G);
+  bool built = false;
+  bool created = false;
+  bool deferred = false;
+
+  if (auto const* old = I->Rep[rep]) {
+    assert(old->cs == I);
+    assert(old->getState() == state);
+    I->Rep[rep] = I->Rep[rep]->update(&built, background ? &deferred : nullptr);
+  } else if (background) {
+    deferred = true;
+  } else {
+    I->Rep[rep] = new_fn(I, state);
+    if (I->Rep[rep]) {
+      I->Rep[rep]->fNew = new_fn;
+      built = created = true;
+    } else {
+      I->Active[rep] = false;
+    }
+  }
+
+  if (deferred) {
+    RepBuildQueueSubmit(G, I, state, rep, new_fn);
+    // a dropped placeholder changes picking
+    return !I->Rep[rep];
+  }
+
+  if (built && I->Rep[rep]) {
+    RepBuildStatsAdd(G, rep, UtilGetSeconds(G) - start);
+  }
+
+  return created;
+}
+
+/**
+ * Build the representations of a state which is about to be displayed in
+ * the background (see movie_prefetch). Representations which can't be built
+ * in the background are built when the state gets displayed.
+ *
+ * @return true if a representation was dropped (picking must be invalidated)
+ */
+bool CoordSetPrefetch(CoordSet* I, int state)
+{
+  bool changed = false;
+
+  // lazily computed, not thread safe
+  I->Obj->getNeighborArray();
+
+  for (auto const& item : CoordSetRepFactories) {
+    if (CoordSetRepBuildInBackground(I, item.rep)) {
+      changed |= CoordSetUpdateRep(I, state, item.rep, item.fNew, true);
+    }
+  }
+
+  return changed;
+}
+
+void CoordSetRepUpdateThread(CRepUpdateThreadInfo* T)
+{
+  T->created = CoordSetUpdateRep(T->cs, T->state, T->rep, T->fNew);
+}
+
+#ifndef _PYMOL_NOPY
+/**
+ * Build the representations of one coordinate set concurrently (one task
+ * per representation type), see async_builds
+ */
+static void CoordSetRepUpdateSpawn(
+    PyMOLGlobals* G, CRepUpdateThreadInfo* Thread, int n_thread, int n_total)
+{
+  if (n_total == 1) {
+    CoordSetRepUpdateThread(Thread);
+  } else if (n_total) {
+    int blocked = PAutoBlock(G);
+
+    PRINTFB(G, FB_Scene, FB_Blather)
+      " Scene: updating representations with %d threads...\n", n_thread ENDFB(G);
+    PyObject* info_list = PyList_New(n_total);
+    for (int a = 0; a < n_total; a++) {
+      PyList_SetItem(info_list, a, PyCapsule_New(Thread + a, nullptr, nullptr));
+    }
+    PXDecRef(PYOBJECT_CALLMETHOD(
+        G->P_inst->cmd, "_rep_update_spawn", "Oi", info_list, n_thread));
+    Py_DECREF(info_list);
+    PAutoUnblock(G, blocked);
+  }
+}
+#endif
+
+/*========================================================================*/
+/**
+ * @param n_thread Number of threads for building the representations of
+ * this coordinate set concurrently
+ * @return true if new representations were created. The caller must
+ * invalidate picking (SceneInvalidatePicking), this may run on a worker
+ * thread (async_builds).
+ */
+bool CoordSet::update(int state, int n_thread)
 {
   assert(G == Obj->G);
 
+  // interactive drawing, see background_builds
+  bool const background = RepBuildQueueEnabled(G) &&
+                          SettingGet<bool>(G, Setting.get(),
+                              Obj->Setting.get(), cSetting_background_builds);
+
+  if (background) {
+    // lazily computed, not thread safe
+    Obj->getNeighborArray();
+  }
+
+  // install finished background builds, or finish them now
+  bool created = RepBuildQueueCollect(G, this, !background) > 0;
+
   OrthoBusyFast(G, 0, cRepCnt);
-  RepUpdateMacro(cRepLine, RepWireBondNew, state);
-  RepUpdateMacro(cRepCyl, RepCylBondNew, state);
-  RepUpdateMacro(cRepDot, RepDotNew, state);
-  RepUpdateMacro(cRepMesh, RepMeshNew, state);
-  RepUpdateMacro(cRepSphere, RepSphereNew, state);
-  RepUpdateMacro(cRepRibbon, RepRibbonNew, state);
-  RepUpdateMacro(cRepCartoon, RepCartoonNew, state);
-  RepUpdateMacro(cRepSurface, RepSurfaceNew, state);
-  RepUpdateMacro(cRepLabel, RepLabelNew, state);
-  RepUpdateMacro(cRepNonbonded, RepNonbondedNew, state);
-  RepUpdateMacro(cRepNonbondedSphere, RepNonbondedSphereNew, state);
-  RepUpdateMacro(cRepEllipsoid, RepEllipsoidNew, state);
+
+#ifndef _PYMOL_NOPY
+  if (n_thread > 1) {
+    std::vector<CRepUpdateThreadInfo> thread_info;
+    for (auto const& item : CoordSetRepFactories) {
+      if (background && CoordSetRepBuildInBackground(this, item.rep)) {
+        created |=
+            CoordSetUpdateRep(this, state, item.rep, item.fNew, background);
+      } else if (Active[item.rep] && item.rep != cRepMesh) {
+        // mesh and surface both may evaluate carve selections (updates the
+        // selector table), so the mesh is built afterwards
+        thread_info.push_back({this, state, item.rep, item.fNew, false});
+      }
+    }
+    CoordSetRepUpdateSpawn(
+        G, thread_info.data(), n_thread, int(thread_info.size()));
+    for (auto const& info : thread_info) {
+      created |= info.created;
+    }
+    created |= CoordSetUpdateRep(this, state, cRepMesh, RepMeshNew);
+  } else
+#endif
+  {
+    for (auto const& item : CoordSetRepFactories) {
+      created |= CoordSetUpdateRep(this, state, item.rep, item.fNew,
+          background && CoordSetRepBuildInBackground(this, item.rep));
+      OrthoBusyFast(G, item.rep, cRepCnt);
+    }
+  }
 
   for (int a = 0; a < cRepCnt; ++a) {
-    if (!Rep[a])
+    if (!Rep[a] && !(background && RepBuildQueueHas(G, this, cRep_t(a))))
       Active[a] = false;
   }
 
@@ -1307,6 +1556,8 @@ void CoordSet::update(int state)
 
   SceneInvalidate(G);
   OrthoBusyFast(G, 1, 1);
+
+  return created;
 }
 
 
@@ -1626,6 +1877,8 @@ void CoordSet::enumIndices()
 /*========================================================================*/
 CoordSet::~CoordSet()
 {
+  RepBuildQueueDiscard(G, this);
+
 #ifdef _PYMOL_IP_PROPERTIES
 #endif
 
@@ -1639,6 +1892,9 @@ CoordSet::~CoordSet()
 
   for (int a = 0; a < cRepCnt; ++a) {
     delete Rep[a];
+    for (auto* rep : LodRep[a]) {
+      delete rep;
+    }
   }
 
   MapFree(Coord2Idx);
@@ -47,11 +47,12 @@ struct CoordSet : CObjectState {
   };
 
   // methods
-  void update(int state);
+  bool update(int state, int n_thread = 1);
   void render(RenderInfo * info);
   void enumIndices();
   int extendIndices(int nAtom);
   void invalidateRep(cRep_t type, cRepInv_t level);
+  void setLevelOfDetail(int level);
   int atmToIdx(int atm) const;
   void setNIndex(unsigned nindex);
   void updateNonDiscreteAtmToIdx(unsigned);
@@ -142,6 +143,16 @@ struct CoordSet : CObjectState {
   /* temporary / optimization */
 
   int objMolOpInvalidated = 0;
+
+  /// Level of detail for cartoon and surface, 0 = full detail,
+  /// see ObjectMoleculeUpdateLevelOfDetail
+  int LevelOfDetail = 0;
+  /// Representations built for the other levels of detail, swapped back in
+  /// when the level changes (see setLevelOfDetail)
+  ::Rep* LodRep[cRepCnt][3] = {};
+  /// Bounding sphere (center, radius) for the level of detail, radius < 0
+  /// if not up to date
+  float LodSphere[4] = {0.f, 0.f, 0.f, -1.f};
 #ifdef _PYMOL_IP_EXTRAS
   mmpymolx_prop_state_t validMMStereo = MMPYMOLX_PROP_STATE_NULL;
   mmpymolx_prop_state_t validTextType = MMPYMOLX_PROP_STATE_NULL;
@@ -227,6 +238,12 @@ typedef struct _CCoordSetUpdateThreadInfo CCoordSetUpdateThreadInfo;
 
 void CoordSetUpdateThread(CCoordSetUpdateThreadInfo * T);
 
+typedef struct _CRepUpdateThreadInfo CRepUpdateThreadInfo;
+
+void CoordSetRepUpdateThread(CRepUpdateThreadInfo* T);
+
+bool CoordSetPrefetch(CoordSet* I, int state);
+
 void LabPosTypeCopy(const LabPosType * src, LabPosType * dst);
 void RefPosTypeCopy(const RefPosType * src, RefPosType * dst);
 
@@ -0,0 +1,420 @@
+/*
+ * Map arithmetic
+ *
+ * (c) Schrodinger, Inc.
+ */
+
+#include <algorithm>
+#include <cctype>
+#include <cmath>
+#include <cstdlib>
+#include <cstring>
+
+#include "MapExpression.h"
+#include "Feedback.h"
+#include "Setting.h"
+
+namespace
+{
+
+/// Number of points per block, small enough for the stack to stay in cache
+constexpr int BlockSize = 4096;
+
+bool isNameChar(char c)
+{
+  return std::isalnum((unsigned char) c) || c == '_' || c == '.';
+}
+
+/**
+ * Recursive descent parser, emits reverse polish notation
+ */
+class Parser
+{
+  const char* m_p;
+  MapExpression& m_expr;
+  std::vector<std::string>& m_names;
+
+  void skipSpace()
+  {
+    while (std::isspace((unsigned char) *m_p))
+      ++m_p;
+  }
+
+  bool accept(char c)
+  {
+    skipSpace();
+    if (*m_p != c)
+      return false;
+    ++m_p;
+    return true;
+  }
+
+  pymol::Result<> expect(char c)
+  {
+    if (!accept(c))
+      return pymol::make_error("Expected '", c, "' at '", m_p, "'");
+    return {};
+  }
+
+  pymol::Result<> primary()
+  {
+    skipSpace();
+
+    if (accept('(')) {
+      auto ok = expression();
+      if (!ok)
+        return ok;
+      return expect(')');
+    }
+
+    if (std::isdigit((unsigned char) *m_p) ||
+        (*m_p == '.' && std::isdigit((unsigned char) m_p[1]))) {
+      char* end = nullptr;
+      float value = std::strtof(m_p, &end);
+      m_p = end;
+      m_expr.push(MapExpression::Op::Constant, 0, value);
+      return {};
+    }
+
+    // quoted map name, for names with operator characters like "2fofc-map"
+    if (*m_p == '"' || *m_p == '\'') {
+      const char quote = *m_p;
+      const char* begin = ++m_p;
+      while (*m_p && *m_p != quote)
+        ++m_p;
+      if (!*m_p)
+        return pymol::make_error("Missing closing ", quote, " at '", begin, "'");
+      if (m_p == begin)
+        return pymol::make_error("Empty map name");
+      return load(std::string(begin, m_p++));
+    }
+
+    if (!isNameChar(*m_p))
+      return pymol::make_error("Unexpected '", m_p, "'");
+
+    const char* begin = m_p;
+    while (isNameChar(*m_p))
+      ++m_p;
+    std::string name(begin, m_p);
+
+    if (accept('(')) {
+      MapExpression::Op op;
+      if (name == "min") {
+        op = MapExpression::Op::Minimum;
+      } else if (name == "max") {
+        op = MapExpression::Op::Maximum;
+      } else if (name == "abs") {
+        op = MapExpression::Op::Abs;
+      } else {
+        return pymol::make_error("Unknown function '", name, "'");
+      }
+
+      int n_arg = 0;
+      do {
+        auto ok = expression();
+        if (!ok)
+          return ok;
+        if (n_arg++ && op != MapExpression::Op::Abs)
+          m_expr.push(op);
+      } while (accept(','));
+
+      if (op == MapExpression::Op::Abs) {
+        if (n_arg != 1)
+          return pymol::make_error("abs() takes one argument");
+        m_expr.push(op);
+      } else if (n_arg < 2) {
+        return pymol::make_error(name, "() takes two or more arguments");
+      }
+
+      return expect(')');
+    }
+
+    return load(name);
+  }
+
+  pymol::Result<> load(const std::string& name)
+  {
+    auto it = std::find(m_names.begin(), m_names.end(), name);
+    if (it == m_names.end()) {
+      m_names.push_back(name);
+      it = m_names.end() - 1;
+    }
+    m_expr.push(MapExpression::Op::Load, int(it - m_names.begin()));
+    return {};
+  }
+
+  pymol::Result<> unary()
+  {
+    if (accept('-')) {
+      auto ok = unary();
+      if (!ok)
+        return ok;
+      m_expr.push(MapExpression::Op::Negate);
+      return {};
+    }
+    accept('+');
+    return primary();
+  }
+
+  pymol::Result<> term()
+  {
+    auto ok = unary();
+    while (ok) {
+      if (accept('*')) {
+        ok = unary();
+        m_expr.push(MapExpression::Op::Multiply);
+      } else if (accept('/')) {
+        ok = unary();
+        m_expr.push(MapExpression::Op::Divide);
+      } else {
+        break;
+      }
+    }
+    return ok;
+  }
+
+public:
+  Parser(const char* p, MapExpression& expr, std::vector<std::string>& names)
+      : m_p(p)
+      , m_expr(expr)
+      , m_names(names)
+  {
+  }
+
+  pymol::Result<> expression()
+  {
+    auto ok = term();
+    while (ok) {
+      if (accept('+')) {
+        ok = term();
+        m_expr.push(MapExpression::Op::Add);
+      } else if (accept('-')) {
+        ok = term();
+        m_expr.push(MapExpression::Op::Subtract);
+      } else {
+        break;
+      }
+    }
+    return ok;
+  }
+
+  pymol::Result<> finish()
+  {
+    skipSpace();
+    if (*m_p)
+      return pymol::make_error("Unexpected '", m_p, "'");
+    return {};
+  }
+};
+
+} // namespace
+
+pymol::Result<MapExpression> MapExpression::parse(const char* expr)
+{
+  MapExpression result;
+  std::vector<std::string> names;
+  Parser parser(expr, result, names);
+
+  auto ok = parser.expression();
+  if (ok)
+    ok = parser.finish();
+  if (!ok)
+    return pymol::make_error("Invalid map expression: ", ok.error().what());
+
+  result.m_names = std::move(names);
+  result.m_maps.resize(result.m_names.size(), nullptr);
+  return result;
+}
+
+int MapExpression::addMap(ObjectMap* obj)
+{
+  m_maps.push_back(obj);
+  return m_maps.size() - 1;
+}
+
+void MapExpression::push(Op op, int index, float value)
+{
+  m_code.push_back({op, index, value});
+}
+
+/**
+ * Maximum number of values on the stack during evaluation
+ */
+int MapExpression::stackDepth() const
+{
+  int depth = 0, max_depth = 0;
+  for (const auto& instr : m_code) {
+    switch (instr.op) {
+    case Op::Load:
+    case Op::Constant:
+      max_depth = std::max(max_depth, ++depth);
+      break;
+    case Op::Negate:
+    case Op::Abs:
+      break;
+    default:
+      --depth;
+    }
+  }
+  return max_depth;
+}
+
+bool ObjectMapStateSameGrid(
+    const ObjectMapState* ms, const ObjectMapState* other)
+{
+  if (ms == other)
+    return true;
+
+  for (int a = 0; a < 3; ++a) {
+    if (ms->FDim[a] != other->FDim[a])
+      return false;
+  }
+
+  if (!ms->Field || !other->Field || ObjectStateGetInvMatrix(other))
+    return false;
+
+  // map grids are affine in the point index, the corners decide
+  const auto* points = ms->Field->points.get();
+  const auto* other_points = other->Field->points.get();
+  const int* dim = ms->FDim;
+
+  for (int corner = 0; corner < 8; ++corner) {
+    const int a = (corner & 1) ? dim[0] - 1 : 0;
+    const int b = (corner & 2) ? dim[1] - 1 : 0;
+    const int c = (corner & 4) ? dim[2] - 1 : 0;
+    for (int d = 0; d < 3; ++d) {
+      const float v = points->get<float>(a, b, c, d);
+      const float w = other_points->get<float>(a, b, c, d);
+      if (std::fabs(v - w) > R_SMALL4 * (1.0F + std::fabs(v)))
+        return false;
+    }
+  }
+
+  return true;
+}
+
+pymol::Result<> MapExpression::evaluate(PyMOLGlobals* G,
+    const ObjectMapState* target, int state, float* result) const
+{
+  const auto* points = target->Field->points.get();
+  const int n_pnt = (points->size() / points->base_size) / 3;
+  const float* pnt = points->ptr<float>(0, 0, 0, 0);
+
+  // operands on the target grid are read directly
+  std::vector<const float*> direct(m_maps.size(), nullptr);
+  for (std::size_t i = 0; i != m_maps.size(); ++i) {
+    const ObjectMapState* ms = ObjectMapGetState(m_maps[i], state);
+    if (!ms || !ms->Active || !ms->Field) {
+      return pymol::make_error("Map '", m_maps[i]->Name, "' has no state ",
+          state + 1);
+    }
+    if (ObjectMapStateSameGrid(target, ms)) {
+      direct[i] = ms->Field->data->ptr<float>(0, 0, 0);
+    } else {
+      PRINTFB(G, FB_ObjectMap, FB_Blather)
+        " %s: interpolating '%s'\n", __func__, m_maps[i]->Name ENDFB(G);
+
+      // interpolation fills these caches lazily, not thread safe
+      ObjectStateGetInvMatrix(ms);
+      if (ms->Symmetry)
+        ms->Symmetry->Crystal.realToFrac();
+    }
+  }
+
+  const int depth = std::max(1, stackDepth());
+  const int n_block = (n_pnt + BlockSize - 1) / BlockSize;
+  const int n_thread = std::max(1, SettingGet<int>(G, cSetting_max_threads));
+
+#pragma omp parallel if (n_thread > 1) num_threads(n_thread)
+  {
+    std::vector<float> buffer(std::size_t(depth) * BlockSize);
+    std::vector<const float*> stack(depth);
+    std::vector<int> inside(BlockSize);
+
+#pragma omp for schedule(dynamic, 1)
+    for (int block = 0; block < n_block; ++block) {
+      const int start = block * BlockSize;
+      const int n = std::min(BlockSize, n_pnt - start);
+      int sp = 0;
+
+      for (const auto& instr : m_code) {
+        float* top = buffer.data() + std::size_t(sp) * BlockSize;
+
+        switch (instr.op) {
+        case Op::Load:
+          if (direct[instr.index]) {
+            stack[sp++] = direct[instr.index] + start;
+          } else {
+            ObjectMapInterpolate(m_maps[instr.index], state,
+                pnt + 3 * std::size_t(start), top, inside.data(), n);
+            stack[sp++] = top;
+          }
+          continue;
+        case Op::Constant:
+          std::fill_n(top, n, instr.value);
+          stack[sp++] = top;
+          continue;
+        case Op::Negate:
+        case Op::Abs: {
+          const float* x = stack[sp - 1];
+          float* out = top - BlockSize;
+          if (instr.op == Op::Negate) {
+            for (int j = 0; j < n; ++j)
+              out[j] = -x[j];
+          } else {
+            for (int j = 0; j < n; ++j)
+              out[j] = std::fabs(x[j]);
+          }
+          stack[sp - 1] = out;
+          continue;
+        }
+        default:
+          break;
+        }
+
+        // binary operators, result replaces the left operand
+        const float* x = stack[sp - 2];
+        const float* y = stack[sp - 1];
+        float* out = top - 2 * BlockSize;
+
+        switch (instr.op) {
+        case Op::Add:
+          for (int j = 0; j < n; ++j)
+            out[j] = x[j] + y[j];
+          break;
+        case Op::Subtract:
+          for (int j = 0; j < n; ++j)
+            out[j] = x[j] - y[j];
+          break;
+        case Op::Multiply:
+          for (int j = 0; j < n; ++j)
+            out[j] = x[j] * y[j];
+          break;
+        case Op::Divide:
+          for (int j = 0; j < n; ++j)
+            out[j] = x[j] / y[j];
+          break;
+        case Op::Minimum:
+          for (int j = 0; j < n; ++j)
+            out[j] = (x[j] > y[j]) ? y[j] : x[j];
+          break;
+        case Op::Maximum:
+          for (int j = 0; j < n; ++j)
+            out[j] = (x[j] < y[j]) ? y[j] : x[j];
+          break;
+        default:
+          break;
+        }
+        stack[--sp - 1] = out;
+      }
+
+      if (sp) {
+        std::copy_n(stack[0], n, result + start);
+      } else {
+        std::fill_n(result + start, n, 0.0F);
+      }
+    }
+  }
+
+  return {};
+}
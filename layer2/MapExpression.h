@@ -0,0 +1,87 @@
+/*
+ * Map arithmetic
+ *
+ * (c) Schrodinger, Inc.
+ */
+
+#pragma once
+
+#include <string>
+#include <vector>
+
+#include "ObjectMap.h"
+#include "Result.h"
+
+/**
+ * Arithmetic expression over maps, evaluated at all points of a target map
+ * state in a single pass (no intermediate maps).
+ *
+ * Operands on the same grid as the target are read directly, all others are
+ * interpolated. The points are processed in blocks, in parallel.
+ */
+class MapExpression
+{
+public:
+  enum class Op {
+    Load,     ///< push map `index`
+    Constant, ///< push `value`
+    Add,
+    Subtract,
+    Multiply,
+    Divide,
+    Minimum,
+    Maximum,
+    Negate,
+    Abs,
+  };
+
+  struct Instr {
+    Op op;
+    int index = 0;
+    float value = 0.0F;
+  };
+
+  /**
+   * Parse an expression like "(half1 + half2) / 2 - model". Supports
+   * numbers, map names, + - * /, parentheses, and the functions min(),
+   * max() (two or more arguments) and abs().
+   */
+  static pymol::Result<MapExpression> parse(const char* expr);
+
+  /**
+   * Names of the maps referenced by the expression, in order of first use.
+   * Resolve them with `setMap`.
+   */
+  const std::vector<std::string>& names() const { return m_names; }
+
+  void setMap(int index, ObjectMap* obj) { m_maps[index] = obj; }
+
+  /// Append a map operand and return its index
+  int addMap(ObjectMap* obj);
+
+  /// Append an instruction (reverse polish notation)
+  void push(Op op, int index = 0, float value = 0.0F);
+
+  bool empty() const { return m_code.empty(); }
+
+  /**
+   * Evaluate at all points of `target`, using `state` of all operands.
+   * @param[out] result One value per point of `target`
+   */
+  pymol::Result<> evaluate(PyMOLGlobals* G, const ObjectMapState* target,
+      int state, float* result) const;
+
+private:
+  std::vector<Instr> m_code;
+  std::vector<ObjectMap*> m_maps;
+  std::vector<std::string> m_names;
+
+  int stackDepth() const;
+};
+
+/**
+ * True if both states have the same grid points, so that values can be
+ * used without interpolation
+ */
+bool ObjectMapStateSameGrid(
+    const ObjectMapState* ms, const ObjectMapState* other);
@@ -1148,6 +1148,7 @@ void ObjectAlignment::render(RenderInfo * info)
 
 void ObjectAlignment::invalidate(cRep_t rep, cRepInv_t level, int state)
 {
+  markChanged();
   if((rep == cRepAll) || (rep == cRepCGO)) {
     for(StateIterator iter(G, Setting.get(), state, getNFrame()); iter.next();) {
       ObjectAlignmentState& sobj = State[iter.state];
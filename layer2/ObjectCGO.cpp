@@ -194,6 +194,7 @@ void ObjectCGORecomputeExtent(ObjectCGO * I)
 /*========================================================================*/
 void ObjectCGO::invalidate(cRep_t rep, cRepInv_t level, int state)
 {
+  markChanged();
   auto I = this;
   ObjectCGOState *sobj = nullptr;
 
@@ -372,6 +372,7 @@ glm::vec3 ObjectCurve::getNormalizedDirection(float t) const
 
 void ObjectCurve::invalidate(cRep_t rep, cRepInv_t level, int state)
 {
+  markChanged();
   for (auto& state : m_states) {
     state.rawCGO = nullptr;
     state.renderCGO = nullptr;
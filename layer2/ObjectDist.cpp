@@ -305,6 +305,7 @@ static CSetting **ObjectDistGetSettingHandle(ObjectDist * I, int state)
 #endif
 
 void ObjectDist::invalidate(cRep_t rep, cRepInv_t level, int state){
+  markChanged();
   auto I = this;
   for(StateIterator iter(I->G, I->Setting.get(), state, I->DSet.size());
       iter.next();) {
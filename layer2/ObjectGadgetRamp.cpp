@@ -1033,6 +1033,7 @@ ObjectGadgetRamp *ObjectGadgetRampMolNewAsDefined(PyMOLGlobals * G,
 void ObjectGadgetRamp::invalidate(cRep_t rep, cRepInv_t level,
                                        int state)
 {
+  markChanged();
 }
 
 
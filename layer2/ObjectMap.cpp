@@ -46,6 +46,7 @@ Z* -------------------------------------------------------------------
 #include"Executive.h"
 #include"Field.h"
 #include "Feedback.h"
+#include "MappedFile.h"
 
 #define n_space_group_numbers 231
 static const char * space_group_numbers[] = {
@@ -173,7 +174,13 @@ int ObjectMapStateGetExcludedStats(PyMOLGlobals * G, ObjectMapState * ms, float
   if(list_size)
     voxelmap = MapNew(G, -cutoff, vert_vla, list_size, nullptr);
 
-  if(voxelmap || (!list_size)) {
+  if(!list_size && ms->Field->data->size()) {
+    // no exclusion, all points count
+    const auto& index = IsofieldGetBlockRange(G, ms->Field.get());
+    cnt = index.count();
+    sum = index.sum;
+    sumsq = index.sumsq;
+  } else if(voxelmap || (!list_size)) {
     int a, b, c;
     int h, k, l, i, j;
     const int *fdim = ms->FDim;
@@ -251,20 +258,13 @@ int ObjectMapStateGetExcludedStats(PyMOLGlobals * G, ObjectMapState * ms, float
 int ObjectMapStateGetDataRange(PyMOLGlobals * G, ObjectMapState * ms, float *min,
                                float *max)
 {
-float max_val = 0.0F, min_val = 0.0F;
+  float max_val = 0.0F, min_val = 0.0F;
   CField *data = ms->Field->data.get();
   int cnt = data->dim[0] * data->dim[1] * data->dim[2];
-  float *raw_data = (float *) data->data.data();
   if(cnt) {
-    int a;
-    min_val = (max_val = *(raw_data++));
-    for(a = 1; a < cnt; a++) {
-      double f_val = *(raw_data++);
-      if(min_val > f_val)
-        min_val = f_val;
-      if(max_val < f_val)
-        max_val = f_val;
-    }
+    const auto& index = IsofieldGetBlockRange(G, ms->Field.get());
+    min_val = index.minValue();
+    max_val = index.maxValue();
   }
   *min = min_val;
   *max = max_val;
@@ -292,29 +292,16 @@ int ObjectMapStateGetHistogram(PyMOLGlobals * G, ObjectMapState * ms,
                                float min_arg, float max_arg)
 {
   float max_val = 0.0f, min_val = 0.0f;
-  float sum = 0.0f, sumsq = 0.0f;
-  float min_his, max_his, irange, mean, stdev;
-  int pos;
+  float min_his, max_his, mean, stdev;
   CField *data = ms->Field->data.get();
   int cnt = data->dim[0] * data->dim[1] * data->dim[2];
-  float *raw_data = (float *) data->data.data();
   if(cnt) {
-    int a;
-
-    // compute min/max/mean/stdev
-    sum = min_val = (max_val = *(raw_data++));
-    sumsq = sum*sum;
-    for(a = 1; a < cnt; a++) {
-      double f_val = *(raw_data++);
-      if(min_val > f_val)
-        min_val = f_val;
-      if(max_val < f_val)
-        max_val = f_val;
-      sum += f_val;
-      sumsq += f_val*f_val;
-    }
-    mean = (float) (sum / cnt);
-    stdev = (float) sqrt1d((sumsq - (sum * sum / cnt)) / (cnt));
+    // min/max/mean/stdev from the (cached) min/max index
+    const auto& index = IsofieldGetBlockRange(G, ms->Field.get());
+    min_val = index.minValue();
+    max_val = index.maxValue();
+    mean = (float) (index.sum / cnt);
+    stdev = (float) sqrt1d((index.sumsq - (index.sum * index.sum / cnt)) / (cnt));
 
     // adjust min/max to limit
     if (min_arg != max_arg) {
@@ -334,17 +321,8 @@ int ObjectMapStateGetHistogram(PyMOLGlobals * G, ObjectMapState * ms,
 
     // Compute the histogram
     if(n_points > 0) {
-      irange = (float)(n_points-1) / (max_his - min_his);
-      for (a = 0; a < n_points; a++)
-        histogram[a+4] = 0.0f;
-      raw_data = (float *) data->data.data();
-      for (a = 0; a < cnt; a++) {
-        double f_val = *(raw_data++);
-        pos = (int)(irange * (f_val-min_his));
-        if (pos >= 0 && pos < n_points) {
-          histogram[pos+4] += 1.0;
-        }
-      }
+      std::fill_n(histogram + 4, n_points, 0.0f);
+      index.histogram(data, min_his, max_his, n_points, histogram);
     }
     histogram[0] = min_his;
     histogram[1] = max_his;
@@ -1609,6 +1587,7 @@ void ObjectMapStateClamp(ObjectMapState * I, float clamp_floor, float clamp_ceil
         else if(*fp > clamp_ceiling)
           *fp = clamp_ceiling;
       }
+  IsofieldInvalidate(I->Field.get());
 }
 
 int ObjectMapStateSetBorder(ObjectMapState * I, float level)
@@ -1636,6 +1615,7 @@ int ObjectMapStateSetBorder(ObjectMapState * I, float level)
       F3(I->Field->data, a, 0, c) = level;
       F3(I->Field->data, a, b, c) = level;
     }
+  IsofieldInvalidate(I->Field.get());
   return (result);
 }
 
@@ -1666,10 +1646,18 @@ void ObjectMap::update()
 
 void ObjectMap::invalidate(cRep_t rep, cRepInv_t level, int state)
 {
+  markChanged();
   auto I = this;
   if(level >= cRepInvExtents) {
     I->ExtentFlag = false;
   }
+  if(level >= cRepInvAll) {
+    // data may have been modified in place, e.g. through a numpy view
+    for(int a = 0; a < I->State.size(); a++) {
+      if((state < 0 || state == a) && I->State[a].Field)
+        IsofieldInvalidate(I->State[a].Field.get());
+    }
+  }
   if((rep < 0) || (rep == cRepDot)) {
     int a;
     for(a = 0; a < I->State.size(); a++) {
@@ -1849,20 +1837,13 @@ void ObjectMap::render(RenderInfo * info)
 
       if((I->visRep & cRepDotBit)) {
         if(!ms->have_range) {
-          double sum = 0.0, sumsq = 0.0;
           CField *data = ms->Field->data.get();
           int cnt = data->dim[0] * data->dim[1] * data->dim[2];
-          float *raw_data = (float *) data->data.data();
-          int a;
-          for(a = 0; a < cnt; a++) {
-            double f_val = *(raw_data++);
-            sum += f_val;
-            sumsq += (f_val * f_val);
-          }
           if(cnt) {
+            const auto& index = IsofieldGetBlockRange(G, ms->Field.get());
             float mean, stdev;
-            mean = (float) (sum / cnt);
-            stdev = (float) sqrt1d((sumsq - (sum * sum / cnt)) / (cnt));
+            mean = (float) (index.sum / cnt);
+            stdev = (float) sqrt1d((index.sumsq - (index.sum * index.sum / cnt)) / (cnt));
             ms->high_cutoff = mean + stdev;
             ms->low_cutoff = mean - stdev;
             ms->have_range = true;
@@ -2212,23 +2193,6 @@ ObjectMapState *ObjectMapNewStateFromDesc(PyMOLGlobals * G, ObjectMap * I,
 
 
 /*========================================================================*/
-static float ccp4_next_value(char ** pp, int mode) {
-  char * p = *pp;
-  switch(mode) {
-    case 0:
-      *pp += 1;
-      return (float) *((int8_t *) p);
-    case 1:
-      *pp += 2;
-      return (float) *((int16_t *) p);
-    case 2:
-      *pp += 4;
-      return *((float *) p);
-  }
-  printf("ERROR unsupported mode\n");
-  return 0.f;
-}
-
 /* swaps n*width bytes in memory starting at p */
 static void swap_endian(char * p, int n, int width) {
   char tmp, *q, *pstop = p + (n - 1) * width + 1;
@@ -2240,6 +2204,77 @@ static void swap_endian(char * p, int n, int width) {
   }
 }
 
+/*
+ * Reads one value from a (possibly read-only and unaligned) buffer and
+ * advances *pp. Reverse endian values are swapped on the fly, so the
+ * buffer can be a memory mapped file.
+ */
+static float ccp4_next_value(const char ** pp, int mode, bool swap) {
+  switch(mode) {
+    case 0:
+      return (float) (int8_t) *((*pp)++);
+    case 1: {
+      int16_t value;
+      memcpy(&value, *pp, sizeof(value));
+      if(swap)
+        swap_endian((char *) &value, 1, sizeof(value));
+      *pp += sizeof(value);
+      return (float) value;
+    }
+    case 2: {
+      float value;
+      memcpy(&value, *pp, sizeof(value));
+      if(swap)
+        swap_endian((char *) &value, 1, sizeof(value));
+      *pp += sizeof(value);
+      return value;
+    }
+  }
+  printf("ERROR unsupported mode\n");
+  return 0.f;
+}
+
+/*
+ * Grid index window of a map state which covers the given box (min and max
+ * corner, in model space).
+ *
+ * lo, hi: inclusive index range per axis, relative to ms->Min
+ * return: false if the box does not overlap the map
+ */
+static bool ObjectMapStateGetBoxWindow(const ObjectMapState * ms,
+                                       const float * box, int * lo, int * hi)
+{
+  auto const& cryst = ms->Symmetry->Crystal;
+  auto inv_matrix = ObjectStateGetInvMatrix(ms);
+  float frac_mn[3], frac_mx[3];
+
+  for(int a = 0; a < 8; a++) {
+    float tst[3], frac_tst[3];
+    tst[0] = box[(a & 0x1) ? 0 : 3];
+    tst[1] = box[(a & 0x2) ? 1 : 4];
+    tst[2] = box[(a & 0x4) ? 2 : 5];
+    if(inv_matrix)
+      transform44d3f(inv_matrix, tst, tst);
+    transform33f3f(cryst.realToFrac(), tst, frac_tst);
+    for(int b = 0; b < 3; b++) {
+      if(!a || frac_mn[b] > frac_tst[b])
+        frac_mn[b] = frac_tst[b];
+      if(!a || frac_mx[b] < frac_tst[b])
+        frac_mx[b] = frac_tst[b];
+    }
+  }
+
+  for(int b = 0; b < 3; b++) {
+    lo[b] = std::max(0, (int) floorf(frac_mn[b] * ms->Div[b]) - ms->Min[b]);
+    hi[b] = std::min(ms->FDim[b] - 1,
+                     (int) ceilf(frac_mx[b] * ms->Div[b]) - ms->Min[b]);
+    if(lo[b] > hi[b])
+      return false;
+  }
+
+  return true;
+}
+
 static bool validateCCP4LoadType(int& format)
 {
   switch (format) {
@@ -2260,14 +2295,23 @@ static bool validateCCP4LoadType(int& format)
   }
 }
 
-static int ObjectMapCCP4StrToMap(ObjectMap * I, char *CCP4Str, int bytes, int state,
-                                 int quiet, int format)
+/*
+ * CCP4Str: file contents, read-only (may be a memory mapping)
+ * box: if not nullptr, only materialize the grid points inside this box
+ * (min and max corner, in model space)
+ */
+static int ObjectMapCCP4StrToMap(ObjectMap * I, const char *CCP4Str, size_t bytes,
+                                 int state, int quiet, int format,
+                                 const float *box)
 {
   auto G = I->G;
-  char *p;
+  const char *p;
+  int header[256];
   int *i;
   size_t bytes_per_pt;
-  char *q;
+  const char *q;
+  bool swap;
+  int lo[3] = {0, 0, 0}, hi[3];
   float dens;
   int a, b, c, d, e;
   float v[3], vr[3], maxd, mind;
@@ -2283,12 +2327,12 @@ static int ObjectMapCCP4StrToMap(ObjectMap * I, char *CCP4Str, int bytes, int st
   int sym_skip;
   int mapc, mapr, maps;
   int cc[3];
-  int n_pts;
+  size_t n_pts;
   double sum, sumsq;
   float mean, stdev;
   int normalize;
   ObjectMapState *ms;
-  int expectation;
+  size_t expectation;
 
   if (!validateCCP4LoadType(format)) {
     ErrMessage(G, __func__, "wrong format");
@@ -2310,21 +2354,24 @@ static int ObjectMapCCP4StrToMap(ObjectMap * I, char *CCP4Str, int bytes, int st
   }
   ms = &I->State[state];
 
-  normalize = SettingGetGlobal_b(I->G, cSetting_normalize_ccp4_maps);
+  normalize = SettingGetGlobal_i(I->G, cSetting_normalize_ccp4_maps);
 
   p = CCP4Str;
   little_endian = *((char *) &little_endian);
   map_endian = (*p || *(p + 1)); // NOTE: this assumes 0x0 < NC < 0x10000
 
+  // the buffer is read-only, work on a copy of the header
+  memcpy(header, p, sizeof(header));
+
   if(little_endian != map_endian) {
     if(!quiet) {
       PRINTFB(I->G, FB_ObjectMap, FB_Blather)
         " ObjectMapCCP4: Map appears to be reverse endian, swapping...\n" ENDFB(I->G);
     }
-    swap_endian(p, 256, sizeof(int));
+    swap_endian((char *) header, 256, sizeof(int));
   }
 
-  i = (int *) p;
+  i = header;
   nc = *(i++);                  /* columns */
   nr = *(i++);                  /* rows */
   ns = *(i++);                  /* sections */
@@ -2480,7 +2527,7 @@ static int ObjectMapCCP4StrToMap(ObjectMap * I, char *CCP4Str, int bytes, int st
       " ObjectMapCCP4: AMIN %f AMAX %f AMEAN %f ARMS %f\n", mind, maxd, mean, stdev ENDFB(I->G);
   }
 
-  n_pts = nc * ns * nr;
+  n_pts = (size_t) nc * ns * nr;
 
   /* at least one EM map encountered lacks NZ, so we'll try to guess it */
 
@@ -2498,7 +2545,7 @@ static int ObjectMapCCP4StrToMap(ObjectMap * I, char *CCP4Str, int bytes, int st
 
   if(!quiet) {
     PRINTFB(I->G, FB_ObjectMap, FB_Blather)
-      " ObjectMapCCP4: sym_skip %d bytes %d expectation %d\n",
+      " ObjectMapCCP4: sym_skip %d bytes %zu expectation %zu\n",
       sym_skip, bytes, expectation ENDFB(I->G);
   }
 
@@ -2522,18 +2569,33 @@ static int ObjectMapCCP4StrToMap(ObjectMap * I, char *CCP4Str, int bytes, int st
   }
 
   q = p + (sizeof(int) * 256) + sym_skip;
+  swap = little_endian != map_endian && bytes_per_pt > 1;
 
-  if(little_endian != map_endian && bytes_per_pt > 1) {
-    swap_endian(q, n_pts, bytes_per_pt);
+  // a region load must not read the entire file for the statistics, use the
+  // header values (like normalize == 2) unless they are missing
+  if(box && normalize == 1) {
+    if(stdev > R_SMALL8) {
+      normalize = 2;
+    } else {
+      PRINTFB(I->G, FB_ObjectMap, FB_Warnings)
+        " ObjectMapCCP4-Warning: Header has no RMS, reading the entire map"
+        " for normalization.\n" ENDFB(I->G);
+    }
+  } else if(normalize == 2 && stdev <= R_SMALL8) {
+    PRINTFB(I->G, FB_ObjectMap, FB_Warnings)
+      " ObjectMapCCP4-Warning: Header has no RMS, computing statistics.\n"
+      ENDFB(I->G);
+    normalize = 1;
   }
 
   // with normalize == 2, use mean and stdev from file header
+  // (the statistics always cover the entire map, so that a sub-volume has
+  // the same values as the full map)
   if(normalize == 1 && n_pts > 1) {
-    c = n_pts;
     sum = 0.0;
     sumsq = 0.0;
-    while(c--) {
-      dens = ccp4_next_value(&q, map_mode);
+    for(size_t n = n_pts; n--;) {
+      dens = ccp4_next_value(&q, map_mode, swap);
       sumsq += dens * dens;
       sum += dens;
     }
@@ -2543,7 +2605,6 @@ static int ObjectMapCCP4StrToMap(ObjectMap * I, char *CCP4Str, int bytes, int st
       stdev = 1.0;
   }
 
-  q = p + (sizeof(int) * 256) + sym_skip;
   mapc--;                       /* convert to C indexing... */
   mapr--;
   maps--;
@@ -2590,7 +2651,23 @@ static int ObjectMapCCP4StrToMap(ObjectMap * I, char *CCP4Str, int bytes, int st
   ms->FDim[3] = 3;
   if(!(ms->FDim[0] && ms->FDim[1] && ms->FDim[2]))
     ok = false;
-  else {
+  else if(box) {
+    if(!ObjectMapStateGetBoxWindow(ms, box, lo, hi)) {
+      PRINTFB(I->G, FB_ObjectMap, FB_Errors)
+        " ObjectMapCCP4: Box does not overlap the map -- aborting.\n" ENDFB(I->G);
+      ok = false;
+    } else {
+      for(a = 0; a < 3; a++) {
+        ms->Min[a] += lo[a];
+        ms->FDim[a] = hi[a] - lo[a] + 1;
+        ms->Max[a] = ms->Min[a] + ms->FDim[a] - 1;
+      }
+    }
+  }
+
+  if(ok) {
+    const char *data = p + (sizeof(int) * 256) + sym_skip;
+
     ms->Field.reset(new Isofield(I->G, ms->FDim));
     ms->MapSource = cMapSourceCCP4;
     ms->Field->save_points = false;
@@ -2604,10 +2681,15 @@ static int ObjectMapCCP4StrToMap(ObjectMap * I, char *CCP4Str, int bytes, int st
       for(cc[mapr] = 0; cc[mapr] < ms->FDim[mapr]; cc[mapr]++) {
         v[mapr] = (cc[mapr] + ms->Min[mapr]) / ((float) ms->Div[mapr]);
 
+        // first column of this row inside the window
+        q = data + bytes_per_pt *
+          (((size_t) (cc[maps] + lo[maps]) * nr + (cc[mapr] + lo[mapr])) * nc +
+           lo[mapc]);
+
         for(cc[mapc] = 0; cc[mapc] < ms->FDim[mapc]; cc[mapc]++) {
           v[mapc] = (cc[mapc] + ms->Min[mapc]) / ((float) ms->Div[mapc]);
 
-          dens = ccp4_next_value(&q, map_mode);
+          dens = ccp4_next_value(&q, map_mode, swap);
 
           if(normalize)
             dens = (dens - mean) / stdev;
@@ -4634,9 +4716,9 @@ static ObjectMap *ObjectMapReadXPLORStr(PyMOLGlobals * G, ObjectMap * I, char *X
 
 
 /*========================================================================*/
-static ObjectMap *ObjectMapReadCCP4Str(PyMOLGlobals * G, ObjectMap * I, char *XPLORStr,
-                                       int bytes, int state, int quiet,
-                                       int format)
+static ObjectMap *ObjectMapReadCCP4Str(PyMOLGlobals * G, ObjectMap * I, const char *XPLORStr,
+                                       size_t bytes, int state, int quiet,
+                                       int format, const float *box)
 {
   int ok = true;
   int isNew = true;
@@ -4652,7 +4734,7 @@ static ObjectMap *ObjectMapReadCCP4Str(PyMOLGlobals * G, ObjectMap * I, char *XP
     } else {
       isNew = false;
     }
-    ObjectMapCCP4StrToMap(I, XPLORStr, bytes, state, quiet, format);
+    ObjectMapCCP4StrToMap(I, XPLORStr, bytes, state, quiet, format, box);
     SceneChanged(G);
     SceneCountFrames(G);
   }
@@ -4663,31 +4745,36 @@ static ObjectMap *ObjectMapReadCCP4Str(PyMOLGlobals * G, ObjectMap * I, char *XP
 /*========================================================================*/
 ObjectMap *ObjectMapLoadCCP4(PyMOLGlobals * G, ObjectMap * obj, const char *fname, int state,
                              int is_string, int bytes, int quiet,
-                             int format)
+                             int format, const float *box)
 {
   ObjectMap *I = nullptr;
-  char *buffer;
-  long size;
+  pymol::mapped_file mapping;
+  const char *buffer = nullptr;
+  size_t size = 0;
 
   if(!is_string) {
     if (!quiet)
       PRINTFB(G, FB_ObjectMap, FB_Actions)
         " ObjectMapLoadCCP4File: Loading from '%s'.\n", fname ENDFB(G);
 
-    buffer = FileGetContents(fname, &size);
+    // map the file instead of reading it, only the touched pages (all of
+    // them for normalization, or only the box) get paged in
+    auto res = pymol::mapped_file::open(fname);
 
-    if(!buffer)
+    if(!res) {
       ErrMessage(G, "ObjectMapLoadCCP4File", "Unable to open file!");
+    } else {
+      mapping = std::move(res.result());
+      buffer = mapping.data();
+      size = mapping.size();
+    }
   } else {
-    buffer = (char*) fname;
-    size = (long) bytes;
+    buffer = fname;
+    size = bytes;
   }
 
   if (buffer) {
-    I = ObjectMapReadCCP4Str(G, obj, buffer, size, state, quiet, format);
-
-    if(!is_string)
-      mfree(buffer);
+    I = ObjectMapReadCCP4Str(G, obj, buffer, size, state, quiet, format, box);
 
     if(!quiet) {
       if(state < 0)
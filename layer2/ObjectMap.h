@@ -130,7 +130,8 @@ ObjectMap *ObjectMapLoadXPLOR(PyMOLGlobals * G, ObjectMap * obj, const char *fna
                               int state, int is_file, int quiet);
 
 ObjectMap *ObjectMapLoadCCP4(PyMOLGlobals * G, ObjectMap * obj, const char *fname,
-                             int state, int is_string, int bytes, int quiet, int);
+                             int state, int is_string, int bytes, int quiet, int,
+                             const float *box = nullptr);
 
 ObjectMap *ObjectMapLoadPHI(PyMOLGlobals * G, ObjectMap * obj, const char *fname, int state,
                             int is_string, int bytes, int quiet);
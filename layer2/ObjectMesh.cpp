@@ -337,6 +337,7 @@ void ObjectMeshDump(ObjectMesh* I, const char* fname, int state, int quiet)
 
 void ObjectMesh::invalidate(cRep_t rep, cRepInv_t level, int state)
 {
+  markChanged();
   auto I = this;
   if (level >= cRepInvExtents) {
     I->ExtentFlag = false;
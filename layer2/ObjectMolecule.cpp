@@ -61,6 +61,7 @@ Z* -------------------------------------------------------------------
 #include <algorithm>
 #include <array>
 #include <cassert>
+#include <cfloat>
 #include <set>
 #include <unordered_map>
 #include <vector>
@@ -2626,6 +2627,9 @@ void ObjectGotoState(pymol::CObject* I, int state)
 /*========================================================================*/
 CObjectState* ObjectMolecule::_getObjectState(int state)
 {
+  if (LazyStates && LazyStates->isLazy(state)) {
+    return LazyStates->get(this, state);
+  }
   return CSet[state];
 }
 
@@ -2696,6 +2700,7 @@ pymol::Result<> ObjectMoleculeSetStateTitle(ObjectMolecule * I, int state, const
     return pymol::make_error("Invalid state ", state + 1);
   }
   cs->setTitle(text);
+  I->markChanged();
   return {};
 }
 
@@ -4559,6 +4564,9 @@ void ObjectMoleculePurge(ObjectMolecule * I)
     if (I->CSTmpl) {
       CoordSetAdjustAtmIdx(I->CSTmpl, oldToNew.data());
     }
+    if (I->LazyStates) {
+      I->LazyStates->remapAtoms(oldToNew.data(), oldToNew.size());
+    }
   }
 
   I->updateAtmToIdx();
@@ -7410,7 +7418,7 @@ ObjectMolecule *ObjectMoleculeLoadCoords(PyMOLGlobals * G, ObjectMolecule * I,
     cset->Coord[a] = coords[a];
   }
 
-  cset->invalidateRep(cRepAll, cRepInvRep);
+  cset->invalidateRep(cRepAll, cRepInvCoord);
 
   // include coordinate set
   if (is_new) {
@@ -7514,7 +7522,7 @@ ObjectMolecule *ObjectMoleculeLoadCoords(PyMOLGlobals * G, ObjectMolecule * I,
     ok_assert(2, !PyErr_Occurred());
   }
 
-  cset->invalidateRep(cRepAll, cRepInvRep);
+  cset->invalidateRep(cRepAll, cRepInvCoord);
 
   // include coordinate set
   if (is_new) {
@@ -8997,6 +9005,52 @@ bool ObjectMoleculeSeleOp(ObjectMolecule * I, int sele, ObjectMoleculeOpRec * op
     " %s-DEBUG: sele %d op->code %d\n", __func__, sele, op->code ENDFD;
   if(sele >= 0) {
     const char *errstr = "Alter";
+
+    /* invalidate cached selection results */
+    switch (op->code) {
+    case OMOP_ALTR:
+      if (!op->i2)
+        SelectorTouchObject(I);
+      break;
+    case OMOP_AlterState:
+      if (!op->i3)
+        SelectorTouchObject(I);
+      break;
+    case OMOP_COLR:
+    case OMOP_VISI:
+    case OMOP_LABL:
+    case OMOP_Spectrum:
+    case OMOP_OnOff:
+      SelectorTouchObject(I, true);
+      break;
+    case OMOP_SUMC:
+    case OMOP_VERT:
+    case OMOP_SVRT:
+    case OMOP_MOME:
+    case OMOP_MNMX:
+    case OMOP_CountAtoms:
+    case OMOP_Index:
+    case OMOP_PhiPsi:
+    case OMOP_SingleStateVertices:
+    case OMOP_IdentifyObjects:
+    case OMOP_CSetSumVertices:
+    case OMOP_CSetMoment:
+    case OMOP_CSetMinMax:
+    case OMOP_GetObjects:
+    case OMOP_CSetMaxDistToPt:
+    case OMOP_MaxDistToPt:
+    case OMOP_CameraMinMax:
+    case OMOP_CSetCameraMinMax:
+    case OMOP_GetChains:
+    case OMOP_StateVRT:
+    case OMOP_CheckVis:
+    case OMOP_CSetSumSqDistToPt:
+    case OMOP_ReferenceValidate:
+      break;
+    default:
+      SelectorTouchObject(I);
+    }
+
     /* always run on entry */
     switch (op->code) {
     case OMOP_LABL:
@@ -10507,12 +10561,13 @@ int ObjectMolecule::getNFrame() const
 struct _CCoordSetUpdateThreadInfo {
   CoordSet *cs;
   int a;
+  bool created; /* new representations, see CoordSet::update */
 };
 
 void CoordSetUpdateThread(CCoordSetUpdateThreadInfo * T)
 {
   if(T->cs) {
-    T->cs->update(T->a);
+    T->created = T->cs->update(T->a);
   }
 }
 
@@ -10545,6 +10600,134 @@ static void ObjMolCoordSetUpdateSpawn(PyMOLGlobals * G,
 #endif
 
 
+/*========================================================================*/
+/**
+ * Level of detail for a coordinate set at the given camera distance.
+ * Level 1 starts at `lod_distance`, level 2 at twice that distance. Going
+ * back to a finer level needs 10% closer distance, so that zooming around
+ * a threshold doesn't rebuild the representations on every frame.
+ */
+static int LevelOfDetailForDistance(float dist, float lod_distance, int current)
+{
+  int level_coarser = 0, level_finer = 0;
+  for (float threshold : {lod_distance, 2.f * lod_distance}) {
+    level_coarser += (dist >= threshold);
+    level_finer += (dist >= 0.9f * threshold);
+  }
+  if (level_coarser > current)
+    return level_coarser;
+  if (level_finer < current)
+    return level_finer;
+  return current;
+}
+
+/**
+ * Bounding sphere of a coordinate set (not tight, center is the middle of
+ * the bounding box)
+ */
+static void CoordSetUpdateLodSphere(CoordSet* cs)
+{
+  float mn[3] = {FLT_MAX, FLT_MAX, FLT_MAX};
+  float mx[3] = {-FLT_MAX, -FLT_MAX, -FLT_MAX};
+  for (int idx = 0; idx < cs->NIndex; ++idx) {
+    const float* v = cs->coordPtr(idx);
+    for (int i = 0; i < 3; ++i) {
+      mn[i] = std::min(mn[i], v[i]);
+      mx[i] = std::max(mx[i], v[i]);
+    }
+  }
+  if (!cs->NIndex) {
+    zero3f(mn);
+    zero3f(mx);
+  }
+  average3f(mn, mx, cs->LodSphere);
+  cs->LodSphere[3] = diff3f(mn, mx) / 2.f;
+}
+
+/**
+ * Pick the level of detail for cartoon and surface of the states which are
+ * about to be displayed, from the distance to the camera ("lod_distance")
+ * and the number of atoms ("lod_atom_count"). Coarser levels use lower
+ * sampling and quality (see RepCartoon and RepSurface). Representations
+ * are built once per level and swapped when the level changes.
+ */
+void ObjectMoleculeUpdateLevelOfDetail(ObjectMolecule* I)
+{
+  PyMOLGlobals* G = I->G;
+  float const lod_distance =
+      SettingGet<float>(G, I->Setting.get(), nullptr, cSetting_lod_distance);
+  int const lod_atom_count =
+      SettingGet<int>(G, I->Setting.get(), nullptr, cSetting_lod_atom_count);
+
+  int start = 0;
+  int stop = I->NCSet;
+  ObjectAdjustStateRebuildRange(I, &start, &stop);
+  if (stop > I->NCSet)
+    stop = I->NCSet;
+
+  for (int a = start; a < stop; ++a) {
+    CoordSet* cs = I->CSet[a];
+    if (!cs)
+      continue;
+
+    int level = 0;
+    if (lod_distance > 0.f) {
+      if (cs->LodSphere[3] < 0.f) {
+        CoordSetUpdateLodSphere(cs);
+      }
+      float center[3];
+      copy3f(cs->LodSphere, center);
+      if (I->TTTFlag) {
+        MatrixTransformTTTfN3f(1, center, I->TTT, center);
+      }
+      float const dist =
+          std::max(0.f, SceneGetRawDepth(G, center) - cs->LodSphere[3]);
+      level = LevelOfDetailForDistance(dist, lod_distance, cs->LevelOfDetail);
+    }
+    if (lod_atom_count > 0 && cs->NIndex > lod_atom_count) {
+      level = std::max(level, 1);
+    }
+
+    if (level != cs->LevelOfDetail) {
+      PRINTFB(G, FB_ObjectMolecule, FB_Blather)
+        " ObjectMolecule: level of detail %d for state %d of \"%s\".\n",
+        level, a + 1, I->Name ENDFB(G);
+      cs->setLevelOfDetail(level);
+    }
+  }
+}
+
+/**
+ * Build the representations of the given states in the background, ahead of
+ * being displayed (see movie_prefetch). States which ObjectMolecule::update
+ * builds anyway (all states without defer_builds_mode) are skipped.
+ */
+void ObjectMoleculePrefetchStates(
+    ObjectMolecule* I, const std::vector<int>& states)
+{
+  int start = 0;
+  int stop = I->NCSet;
+  ObjectAdjustStateRebuildRange(I, &start, &stop);
+
+  // not displayed (defer_builds_mode=3)
+  if (start == stop)
+    return;
+
+  bool changed = false;
+
+  for (int state : states) {
+    if (state < 0 || state >= I->NCSet || (start <= state && state < stop))
+      continue;
+    // decodes lazy trajectory states
+    if (auto* cs = I->getCoordSet(state)) {
+      changed |= CoordSetPrefetch(cs, state);
+    }
+  }
+
+  if (changed)
+    SceneInvalidatePicking(I->G);
+}
+
 /*========================================================================*/
 void ObjectMolecule::update()
 {
@@ -10584,8 +10767,15 @@ void ObjectMolecule::update()
     if(stop > I->NCSet)
       stop = I->NCSet;
 
+    /* decode lazy trajectory states which are about to be displayed */
+    if(I->LazyStates) {
+      for(a = start; a < stop; a++)
+        I->getCoordSet(a);
+    }
+
     /* single and multithreaded coord set updates */
     {
+      bool created = false; /* new representations */
 #ifndef _PYMOL_NOPY
       int n_thread = SettingGetGlobal_i(G, cSetting_max_threads);
       int multithread = SettingGetGlobal_i(G, cSetting_async_builds);
@@ -10608,10 +10798,13 @@ void ObjectMolecule::update()
               if((a<I->NCSet) && I->CSet[a]) {
                 thread_info[cnt].cs = I->CSet[a];
                 thread_info[cnt].a = a;
+                thread_info[cnt].created = false;
                 cnt++;
               }
             }
             ObjMolCoordSetUpdateSpawn(G, thread_info, n_thread, cnt);
+            for(a = 0; a < cnt; a++)
+              created |= thread_info[a].created;
             FreeP(thread_info);
           }
 
@@ -10620,6 +10813,15 @@ void ObjectMolecule::update()
       } else
 #endif
       {                         /* single thread */
+        /* a single state can still build its representation types
+           concurrently */
+        int n_rep_thread = 1;
+#ifndef _PYMOL_NOPY
+        if(multithread && (n_thread > 1) && (stop - start) == 1) {
+          n_rep_thread = n_thread;
+          this->getNeighborArray();
+        }
+#endif
         for(a = start; a < stop; a++) {
           if((a<I->NCSet) && I->CSet[a] && (!G->Interrupt)) {
 	    /* status bar */
@@ -10627,10 +10829,14 @@ void ObjectMolecule::update()
             PRINTFB(G, FB_ObjectMolecule, FB_Blather)
               " ObjectMolecule-DEBUG: updating representations for state %d of \"%s\".\n",
               a + 1, I->Name ENDFB(G);
-            I->CSet[a]->update(a);
+            created |= I->CSet[a]->update(a, n_rep_thread);
           }
         }
       }
+
+      /* not thread safe, so only once after all updates */
+      if(created)
+        SceneInvalidatePicking(G);
     }
   } /* end block */
 
@@ -10641,6 +10847,7 @@ void ObjectMolecule::update()
 /*========================================================================*/
 void ObjectMolecule::invalidate(cRep_t rep, cRepInv_t level, int state)
 {
+  markChanged();
   auto I = this;
   int a;
   PRINTFD(I->G, FB_ObjectMolecule)
@@ -10651,6 +10858,8 @@ void ObjectMolecule::invalidate(cRep_t rep, cRepInv_t level, int state)
   // Remove the "purge" bit
   level = static_cast<decltype(level)>(level & ~cRepInvPurgeMask);
 
+  SelectorTouchObject(I, level < cRepInvProp);
+
   if(level >= cRepInvVisib) {
     I->RepVisCacheValid = false;
   }
@@ -11113,6 +11322,7 @@ ObjectMolecule::ObjectMolecule(PyMOLGlobals * G, int discreteFlag) : pymol::CObj
     I->UndoState[a] = -1;
   }
   I->UndoIter = 0;
+  SelectorTouchObject(I);
 }
 
 
@@ -11125,6 +11335,7 @@ void ObjectMoleculeCopyNoAlloc(const ObjectMolecule* obj, ObjectMolecule* I)
   BondType *i0;
   const BondType *i1;
   (*I) = (*obj);
+  SelectorTouchObject(I);
   I->Sculpt = nullptr;
   I->Setting.reset(SettingCopyAll(G, obj->Setting.get(), nullptr));
 
@@ -11200,6 +11411,10 @@ int ObjectMoleculeSetStateOrder(ObjectMolecule * I, int * order, int len) {
   VLAFreeP(I->CSet);
   I->CSet = pymol::vla_take_ownership(csets);
 
+  if (I->LazyStates) {
+    I->LazyStates->setStateOrder(order, len);
+  }
+
   return true;
 ok_except1:
   ErrMessage(I->G, "ObjectMoleculeSetStateOrder", "failed");
@@ -11226,6 +11441,9 @@ pymol::Result<> ObjectMoleculeDeleteStates(ObjectMolecule* I, const std::vector<
     int state = *it;
     DeleteP(CSet[state]);
     CSet.erase(state, 1);
+    if (I->LazyStates) {
+      I->LazyStates->erase(state);
+    }
   }
   I->NCSet -= states.size();
   CSet.resize(I->NCSet);
@@ -32,6 +32,7 @@ Z* -------------------------------------------------------------------
 #include "AtomNeighbors.h"
 
 #include "Sculpt.h"
+#include "TrajectoryCache.h"
 #include <memory>
 
 #ifdef _WEBGL
@@ -75,7 +76,12 @@ struct ObjectMolecule : public pymol::CObject {
   /* proposed, for storing uniform trajectory data more efficiently:
      int *UniformAtmToIdx, *UniformIdxToAtm;  */
   int SeleBase = 0;                 /* for internal usage by  selector & only valid during selection process */
+  /// Stamps for validating cached selection results, see SelectorTouchObject
+  size_t SeleRevision = 0;
+  size_t SeleAppearanceRevision = 0;
   pymol::copyable_ptr<CSymmetry> Symmetry;
+  /// States which are decoded on demand, see PlugIOManagerLoadTraj(lazy=true)
+  pymol::copyable_ptr<TrajectoryCache> LazyStates;
 #if 1
   // legacy undo
   float *UndoCoord[cUndoMask + 1] {};
@@ -380,6 +386,9 @@ int ObjectMoleculeMerge(ObjectMolecule * I, pymol::vla<AtomInfoType>&& ai,
 			struct CoordSet *cs, int bondSearchFlag,
 			int aic_mask, int invalidate);
 void ObjectMoleculeUpdateNonbonded(ObjectMolecule * I);
+void ObjectMoleculeUpdateLevelOfDetail(ObjectMolecule* I);
+void ObjectMoleculePrefetchStates(
+    ObjectMolecule* I, const std::vector<int>& states);
 int ObjectMoleculeMoveAtom(ObjectMolecule * I, int state, int index, const float *v, int mode,
                            int log);
 int ObjectMoleculeMoveAtomLabel(ObjectMolecule * I, int state, int index, float *v, int log, float *diff);
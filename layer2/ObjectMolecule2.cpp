@@ -3013,6 +3013,11 @@ static PyObject *ObjectMoleculeCSetAsPyList(ObjectMolecule * I)
   for(a = 0; a < I->NCSet; a++) {
     if(I->CSet[a]) {
       PyList_SetItem(result, a, CoordSetAsPyList(I->CSet[a]));
+    } else if(I->LazyStates && I->LazyStates->isLazy(a)) {
+      /* decode without disturbing the cache of displayed states */
+      std::unique_ptr<CoordSet> cs(I->LazyStates->decode(I, a));
+      PyList_SetItem(result, a,
+          cs ? CoordSetAsPyList(cs.get()) : PConvAutoNone(Py_None));
     } else {
       PyList_SetItem(result, a, PConvAutoNone(Py_None));
     }
@@ -3121,7 +3126,7 @@ static int ObjectMoleculeBondFromPyList(ObjectMolecule * I, PyObject * list)
     // checking if from pse_binary_dump
     // pse_binary_dump saves 2 values: bondInfo_version, BondType binary
     CPythonVal *val1 = CPythonVal_PyList_GetItem(G, list, 1);
-    pse_binary_dump = PyBytes_Check(val1);
+    pse_binary_dump = PConvIsBinaryDump(val1);
     CPythonVal_Free(val1);
   }
   if (pse_binary_dump){
@@ -3130,7 +3135,7 @@ static int ObjectMoleculeBondFromPyList(ObjectMolecule * I, PyObject * list)
     ok = PConvPyIntToInt(verobj, &bondInfo_version);
 
     CPythonVal *strobj = CPythonVal_PyList_GetItem(G, list, 1);
-    auto strval = PyBytes_AsSomeString(strobj);
+    auto strval = PConvBinaryDumpAsSomeString(strobj);
 
     if(ok)
       ok = bool((I->Bond = pymol::vla<BondType>(I->NBond)));
@@ -3375,7 +3380,7 @@ static int ObjectMoleculeAtomFromPyList(ObjectMolecule * I, PyObject * list)
     // pse_binary_dump saves 3 values: atomInfo_version, AtomInfo binary, and strings array
     CPythonVal *val1 = CPythonVal_PyList_GetItem(G, list, 1);
     CPythonVal *val2 = CPythonVal_PyList_GetItem(G, list, 2);
-    pse_binary_dump = PyBytes_Check(val1) && PyBytes_Check(val2);
+    pse_binary_dump = PConvIsBinaryDump(val1) && PConvIsBinaryDump(val2);
     CPythonVal_Free(val1);
     CPythonVal_Free(val2);
   }
@@ -3385,7 +3390,7 @@ static int ObjectMoleculeAtomFromPyList(ObjectMolecule * I, PyObject * list)
     ok = PConvPyIntToInt(verobj, &atomInfo_version);
 
     CPythonVal *strlookupobj = CPythonVal_PyList_GetItem(G, list, 2);
-    auto strval_1 = PyBytes_AsSomeString(strlookupobj);
+    auto strval_1 = PConvBinaryDumpAsSomeString(strlookupobj);
     int *strval = (int*)strval_1.data();
 
     AtomInfoTypeConverter converter(G, I->NAtom);
@@ -3406,7 +3411,7 @@ static int ObjectMoleculeAtomFromPyList(ObjectMolecule * I, PyObject * list)
     }
 
     CPythonVal *strobj = CPythonVal_PyList_GetItem(G, list, 1);
-    auto strval_2 = PyBytes_AsSomeString(strobj);
+    auto strval_2 = PConvBinaryDumpAsSomeString(strobj);
 
     VLACheck(I->AtomInfo, AtomInfoType, I->NAtom + 1);
     converter.copy(I->AtomInfo.data(), strval_2.data(), atomInfo_version);
@@ -4089,6 +4094,10 @@ int ObjectMoleculeSort(ObjectMolecule * I)
         }
       }
 
+      if (I->LazyStates) {
+        I->LazyStates->remapAtoms(outdex, i_NAtom);
+      }
+
       I->updateAtmToIdx();
 
       ExecutiveUniqueIDAtomDictInvalidate(I->G);
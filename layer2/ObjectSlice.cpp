@@ -205,6 +205,7 @@ PyObject *ObjectSliceAsPyList(ObjectSlice * I)
 
 void ObjectSlice::invalidate(cRep_t rep, cRepInv_t level, int state)
 {
+  markChanged();
   int a;
   int once_flag = true;
   for(a = 0; a < State.size(); a++) {
@@ -273,6 +273,7 @@ void ObjectSurfaceDump(ObjectSurface * I, const char *fname, int state, int quie
 
 void ObjectSurface::invalidate(cRep_t rep, cRepInv_t level, int state)
 {
+  markChanged();
   auto I = this;
   int once_flag = true;
   if(level >= cRepInvExtents) {
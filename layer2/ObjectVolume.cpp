@@ -332,6 +332,7 @@ int ObjectVolumeInvalidateMapName(ObjectVolume * I, const char *name, const char
 
 void ObjectVolume::invalidate(cRep_t rep, cRepInv_t level, int state)
 {
+  markChanged();
   auto I = this;
   int a;
   int once_flag = true;
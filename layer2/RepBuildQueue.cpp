@@ -0,0 +1,404 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Building representations in the background.
+ *
+ * Builds read the object, coordinate set, setting and color state without
+ * holding the API lock, while the render thread keeps drawing. That is safe
+ * as long as nothing modifies this state concurrently:
+ *
+ * - Every API command stops all builds first (RepBuildQueueInterrupt,
+ *   called by APIEnter). Interrupted and queued builds are dropped and get
+ *   resubmitted by the next scene update.
+ * - Invalidating a coordinate set drops its builds, their result would be
+ *   stale (RepBuildQueueDiscard, called by CoordSet::invalidateRep).
+ * - Deleting a coordinate set waits for its builds.
+ *
+ * Finished representations are installed by the thread which owns the
+ * coordinate set (RepBuildQueueCollect).
+ */
+
+#include <algorithm>
+#include <condition_variable>
+#include <list>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+#include "RepBuildQueue.h"
+
+#include "CoordSet.h"
+#include "Feedback.h"
+#include "Movie.h"
+#include "PyMOLGlobals.h"
+#include "Scene.h"
+#include "Setting.h"
+#include "Util.h"
+
+namespace
+{
+struct RepBuildJob {
+  CoordSet* cs;
+  int state;
+  cRep_t rep;
+  ::Rep* (*fNew)(CoordSet* cs, int state);
+  ::Rep* result = nullptr;
+  bool started = false;
+  bool done = false;
+  bool dropped = false;
+
+  bool matches(const CoordSet* cs_, cRep_t rep_) const
+  {
+    return (!cs_ || cs == cs_) && (rep_ == cRepAll || rep == rep_);
+  }
+  bool running() const { return started && !done; }
+};
+} // namespace
+
+struct _CRepBuildQueue {
+  PyMOLGlobals* G;
+  std::mutex m_mutex;
+  std::condition_variable m_wake; ///< workers wait for queued jobs
+  std::condition_variable m_done; ///< waiting for running jobs
+  std::list<RepBuildJob> m_jobs;
+  std::vector<std::thread> m_workers;
+  bool m_stop = false;
+  bool m_interactive = false;
+
+  _CRepBuildQueue(PyMOLGlobals* G_)
+      : G(G_)
+  {
+  }
+
+  void work();
+  bool anyRunning(const CoordSet* cs, cRep_t rep) const;
+  void waitRunning(std::unique_lock<std::mutex>& lock, const CoordSet* cs,
+      cRep_t rep, bool interrupt);
+  std::vector<::Rep*> eraseDropped();
+};
+
+/**
+ * Worker thread main loop
+ */
+void _CRepBuildQueue::work()
+{
+  std::unique_lock<std::mutex> lock(m_mutex);
+
+  for (;;) {
+    auto job = m_jobs.end();
+    m_wake.wait(lock, [&] {
+      job = std::find_if(m_jobs.begin(), m_jobs.end(),
+          [](const RepBuildJob& j) { return !j.started && !j.dropped; });
+      return m_stop || job != m_jobs.end();
+    });
+
+    if (m_stop)
+      return;
+
+    job->started = true;
+    lock.unlock();
+
+    double const start = UtilGetSeconds(G);
+    auto* result = job->fNew(job->cs, job->state);
+    double const seconds = UtilGetSeconds(G) - start;
+
+    lock.lock();
+    job->result = result;
+    job->done = true;
+    if (result && !job->dropped) {
+      RepBuildStatsAdd(G, job->rep, seconds);
+    }
+    m_done.notify_all();
+  }
+}
+
+bool _CRepBuildQueue::anyRunning(const CoordSet* cs, cRep_t rep) const
+{
+  return std::any_of(m_jobs.begin(), m_jobs.end(),
+      [&](const RepBuildJob& j) { return j.running() && j.matches(cs, rep); });
+}
+
+/**
+ * Wait until no matching job is running.
+ * @param interrupt Abort long builds (e.g. surfaces check G->Interrupt)
+ */
+void _CRepBuildQueue::waitRunning(std::unique_lock<std::mutex>& lock,
+    const CoordSet* cs, cRep_t rep, bool interrupt)
+{
+  if (!anyRunning(cs, rep))
+    return;
+
+  auto const interrupt_prev = G->Interrupt;
+  if (interrupt)
+    G->Interrupt = true;
+
+  m_done.wait(lock, [&] { return !anyRunning(cs, rep); });
+
+  G->Interrupt = interrupt_prev;
+}
+
+/**
+ * Remove dropped jobs which are not running.
+ * @return Representations to delete (without holding the lock)
+ */
+std::vector<::Rep*> _CRepBuildQueue::eraseDropped()
+{
+  std::vector<::Rep*> garbage;
+  for (auto it = m_jobs.begin(); it != m_jobs.end();) {
+    if (it->dropped && !it->running()) {
+      if (it->result)
+        garbage.push_back(it->result);
+      it = m_jobs.erase(it);
+    } else {
+      ++it;
+    }
+  }
+  return garbage;
+}
+
+static void RepBuildQueueDelete(std::vector<::Rep*> const& garbage)
+{
+  for (auto* rep : garbage) {
+    delete rep;
+  }
+}
+
+int RepBuildQueueInit(PyMOLGlobals* G)
+{
+  G->RepBuildQueue = new CRepBuildQueue(G);
+  return 1;
+}
+
+void RepBuildQueueFree(PyMOLGlobals* G)
+{
+  auto* I = G->RepBuildQueue;
+  if (!I)
+    return;
+
+  {
+    std::unique_lock<std::mutex> lock(I->m_mutex);
+    for (auto& job : I->m_jobs) {
+      job.dropped = true;
+    }
+    I->waitRunning(lock, nullptr, cRepAll, true);
+    I->m_stop = true;
+  }
+
+  I->m_wake.notify_all();
+  for (auto& worker : I->m_workers) {
+    worker.join();
+  }
+
+  RepBuildQueueDelete(I->eraseDropped());
+
+  delete I;
+  G->RepBuildQueue = nullptr;
+}
+
+/**
+ * Build a representation in the background. The caller shows the previous
+ * representation (or nothing) until RepBuildQueueCollect installs the new
+ * one.
+ */
+void RepBuildQueueSubmit(PyMOLGlobals* G, CoordSet* cs, int state, cRep_t rep,
+    ::Rep* (*fNew)(CoordSet* cs, int state))
+{
+  auto* I = G->RepBuildQueue;
+  assert(I);
+
+  {
+    std::lock_guard<std::mutex> lock(I->m_mutex);
+
+    auto const n_thread = std::max(1, SettingGet<int>(G, cSetting_max_threads));
+    while (int(I->m_workers.size()) < n_thread) {
+      I->m_workers.emplace_back(&CRepBuildQueue::work, I);
+    }
+
+    RepBuildJob job;
+    job.cs = cs;
+    job.state = state;
+    job.rep = rep;
+    job.fNew = fNew;
+    I->m_jobs.push_back(job);
+  }
+
+  I->m_wake.notify_one();
+
+  PRINTFB(G, FB_Scene, FB_Blather)
+    " %s: rep %d of state %d\n", __func__, rep, state + 1 ENDFB(G);
+}
+
+/**
+ * True if this representation is being built in the background (or the
+ * finished build wasn't collected yet)
+ */
+bool RepBuildQueueHas(PyMOLGlobals* G, const CoordSet* cs, cRep_t rep)
+{
+  auto* I = G->RepBuildQueue;
+  if (!I)
+    return false;
+
+  std::lock_guard<std::mutex> lock(I->m_mutex);
+  return std::any_of(I->m_jobs.begin(), I->m_jobs.end(),
+      [&](const RepBuildJob& j) { return !j.dropped && j.matches(cs, rep); });
+}
+
+/**
+ * Install finished representations. Must be called by the thread which
+ * updates the coordinate set(s).
+ *
+ * @param cs Coordinate set, or nullptr for all
+ * @param wait Don't leave any builds for `cs` in the background: wait for
+ * running ones, and drop queued ones (the caller builds them)
+ * @return Number of installed representations (picking must be invalidated)
+ */
+int RepBuildQueueCollect(PyMOLGlobals* G, CoordSet* cs, bool wait)
+{
+  auto* I = G->RepBuildQueue;
+  if (!I)
+    return 0;
+
+  std::list<RepBuildJob> finished;
+  std::vector<::Rep*> garbage;
+
+  {
+    std::unique_lock<std::mutex> lock(I->m_mutex);
+
+    if (I->m_jobs.empty())
+      return 0;
+
+    if (wait) {
+      assert(cs);
+      for (auto& job : I->m_jobs) {
+        if (!job.started && job.matches(cs, cRepAll)) {
+          job.dropped = true;
+        }
+      }
+      I->waitRunning(lock, cs, cRepAll, false);
+    }
+
+    for (auto it = I->m_jobs.begin(); it != I->m_jobs.end();) {
+      auto next = std::next(it);
+      if (it->done && !it->dropped && it->matches(cs, cRepAll)) {
+        finished.splice(finished.end(), I->m_jobs, it);
+      }
+      it = next;
+    }
+
+    garbage = I->eraseDropped();
+  }
+
+  RepBuildQueueDelete(garbage);
+
+  for (auto& job : finished) {
+    auto* target = job.cs;
+    delete target->Rep[job.rep];
+    target->Rep[job.rep] = job.result;
+    if (job.result) {
+      job.result->fNew = job.fNew;
+    } else {
+      target->Active[job.rep] = false;
+    }
+  }
+
+  return int(finished.size());
+}
+
+/**
+ * Drop the builds of a coordinate set, e.g. because it was invalidated or
+ * is about to be deleted. Waits for running builds.
+ */
+void RepBuildQueueDiscard(PyMOLGlobals* G, const CoordSet* cs, cRep_t rep)
+{
+  auto* I = G->RepBuildQueue;
+  if (!I)
+    return;
+
+  std::vector<::Rep*> garbage;
+
+  {
+    std::unique_lock<std::mutex> lock(I->m_mutex);
+
+    if (I->m_jobs.empty())
+      return;
+
+    for (auto& job : I->m_jobs) {
+      if (job.matches(cs, rep)) {
+        job.dropped = true;
+      }
+    }
+
+    I->waitRunning(lock, cs, rep, true);
+    garbage = I->eraseDropped();
+  }
+
+  RepBuildQueueDelete(garbage);
+}
+
+/**
+ * Stop all builds which haven't finished, before objects get modified.
+ * Finished builds are kept, the others are rebuilt on the next scene update.
+ */
+void RepBuildQueueInterrupt(PyMOLGlobals* G)
+{
+  auto* I = G->RepBuildQueue;
+  if (!I)
+    return;
+
+  std::vector<::Rep*> garbage;
+
+  {
+    std::unique_lock<std::mutex> lock(I->m_mutex);
+
+    if (I->m_jobs.empty())
+      return;
+
+    for (auto& job : I->m_jobs) {
+      if (!job.done) {
+        job.dropped = true;
+      }
+    }
+
+    I->waitRunning(lock, nullptr, cRepAll, true);
+    garbage = I->eraseDropped();
+  }
+
+  RepBuildQueueDelete(garbage);
+
+  PRINTFB(G, FB_Scene, FB_Blather)
+    " %s: interrupted background builds\n", __func__ ENDFB(G);
+
+  // rebuild dropped and install finished representations on the next update
+  SceneChanged(G);
+}
+
+/**
+ * True while interactive drawing may use background builds
+ */
+bool RepBuildQueueEnabled(PyMOLGlobals* G)
+{
+  auto* I = G->RepBuildQueue;
+  return I && I->m_interactive;
+}
+
+RepBuildQueueInteractive::RepBuildQueueInteractive(PyMOLGlobals* G)
+    : m_G(G)
+{
+  auto* I = G->RepBuildQueue;
+  if (!I) // shutting down
+    return;
+
+  m_prev = I->m_interactive;
+
+  // cached and ray traced movie frames must be complete
+  I->m_interactive =
+      G->HaveGUI && !(MoviePlaying(G) &&
+                         (SettingGet<bool>(G, cSetting_cache_frames) ||
+                             SettingGet<bool>(G, cSetting_ray_trace_frames)));
+}
+
+RepBuildQueueInteractive::~RepBuildQueueInteractive()
+{
+  if (auto* I = m_G->RepBuildQueue)
+    I->m_interactive = m_prev;
+}
@@ -0,0 +1,43 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Building representations in the background.
+ */
+
+#pragma once
+
+#include "Rep.h"
+
+struct CoordSet;
+struct PyMOLGlobals;
+
+int RepBuildQueueInit(PyMOLGlobals* G);
+void RepBuildQueueFree(PyMOLGlobals* G);
+
+void RepBuildQueueSubmit(PyMOLGlobals* G, CoordSet* cs, int state, cRep_t rep,
+    ::Rep* (*fNew)(CoordSet* cs, int state));
+bool RepBuildQueueHas(PyMOLGlobals* G, const CoordSet* cs, cRep_t rep);
+int RepBuildQueueCollect(
+    PyMOLGlobals* G, CoordSet* cs = nullptr, bool wait = false);
+void RepBuildQueueDiscard(
+    PyMOLGlobals* G, const CoordSet* cs, cRep_t rep = cRepAll);
+void RepBuildQueueInterrupt(PyMOLGlobals* G);
+bool RepBuildQueueEnabled(PyMOLGlobals* G);
+
+/**
+ * Representations which are updated while an instance of this class is in
+ * scope may be built in the background (see "background_builds"). Used for
+ * interactive drawing, images for commands (png, ray, movie export) are
+ * always rendered from complete representations.
+ */
+class RepBuildQueueInteractive
+{
+  PyMOLGlobals* m_G;
+  bool m_prev = false;
+
+public:
+  RepBuildQueueInteractive(PyMOLGlobals* G);
+  ~RepBuildQueueInteractive();
+  RepBuildQueueInteractive(const RepBuildQueueInteractive&) = delete;
+  RepBuildQueueInteractive& operator=(const RepBuildQueueInteractive&) = delete;
+};
@@ -16,6 +16,7 @@ I* Additional authors of this source file include:
 Z* -------------------------------------------------------------------
 */
 
+#include <algorithm>
 #include <set>
 
 #include"os_predef.h"
@@ -2499,6 +2500,16 @@ CGO *GenerateRepCartoonCGO(CoordSet *cs, ObjectMolecule *obj, nuc_acid_data *nda
   loop_quality  = GetCartoonQuality(cs, cSetting_cartoon_loop_quality,   6, 6, 5, 4);
   sampling      = GetCartoonQuality(cs, cSetting_cartoon_sampling,       7, 5, 3, 2, 1);
 
+  if (cs->LevelOfDetail > 0) {
+    /* coarser extrusions for distant or huge objects */
+    int const lod = cs->LevelOfDetail;
+    tube_quality  = std::max(3, tube_quality  - 2 * lod);
+    oval_quality  = std::max(3, oval_quality  - 2 * lod);
+    putty_quality = std::max(3, putty_quality - 2 * lod);
+    loop_quality  = std::max(3, loop_quality  - lod);
+    sampling      = std::max(1, sampling >> lod);
+  }
+
   PRINTFB(G, FB_RepCartoon, FB_Blather)
     " RepCartoon: Use settings tube_quality=%d oval_quality=%d putty_quality=%d loop_quality=%d sampling=%d\n",
     tube_quality, oval_quality, putty_quality, loop_quality, sampling
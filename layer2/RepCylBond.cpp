@@ -35,6 +35,7 @@
 #include "Lex.h"
 
 #include <iostream>
+#include <vector>
 
 struct RepCylBond : Rep {
   using Rep::Rep;
@@ -43,9 +44,26 @@ struct RepCylBond : Rep {
 
   cRep_t type() const override { return cRepCyl; }
   void render(RenderInfo* info) override;
+  bool updateCoords() override;
 
   CGO* primitiveCGO = nullptr;
   CGO* renderCGO = nullptr;
+
+  /**
+   * Coordinate set indices of a cylinder or stick ball in primitiveCGO, and
+   * the section of the bond (0.0 to 1.0) which the cylinder covers.
+   */
+  struct CoordRef {
+    int idx1, idx2;
+    float start, stop;
+  };
+
+  //! One entry per geometry operation in primitiveCGO, in order
+  std::vector<CoordRef> coordRefs;
+
+  //! False if the geometry depends on more than the bond end points (valence,
+  //! zero order bonds, symmetry mates, ramped colors, hide_long_bonds)
+  bool coordsPatchable = true;
 };
 
 /* RepCylinder -- This function is a helper function that generates a cylinder for RepCylBond.
@@ -113,6 +131,68 @@ RepCylBond::~RepCylBond()
   CGOFree(I->renderCGO);
 }
 
+/**
+ * Move cylinders and stick balls to the current coordinates. The GPU buffers
+ * get regenerated from primitiveCGO on next render, which is much cheaper
+ * than walking the bonds with all their settings again.
+ */
+bool RepCylBond::updateCoords()
+{
+  if (!coordsPatchable || !primitiveCGO) {
+    return false;
+  }
+
+  auto ref = coordRefs.begin();
+  for (auto it = primitiveCGO->begin(); !it.is_stop(); ++it) {
+    float* origin = nullptr;
+    float* axis = nullptr;
+
+    switch (it.op_code()) {
+    case CGO_SHADER_CYLINDER: {
+      auto sp = it.cast<cgo::draw::shadercylinder>();
+      origin = sp->origin;
+      axis = sp->axis;
+    } break;
+    case CGO_SHADER_CYLINDER_WITH_2ND_COLOR: {
+      auto sp = it.cast<cgo::draw::shadercylinder2ndcolor>();
+      origin = sp->origin;
+      axis = sp->axis;
+    } break;
+    case CGO_SPHERE:
+      origin = it.data();
+      break;
+    default:
+      continue;
+    }
+
+    if (ref == coordRefs.end()) {
+      return false;
+    }
+
+    const float* v1 = cs->coordPtr(ref->idx1);
+    const float* v2 = cs->coordPtr(ref->idx2);
+    float bond[3];
+    subtract3f(v2, v1, bond);
+
+    scale3f(bond, ref->start, origin);
+    add3f(v1, origin, origin);
+
+    if (axis) {
+      scale3f(bond, ref->stop - ref->start, axis);
+    }
+
+    ++ref;
+  }
+
+  if (ref != coordRefs.end()) {
+    return false;
+  }
+
+  CGOFree(renderCGO);
+
+  return true;
+}
+
 static int RepCylBondCGOGenerate(RepCylBond * I, RenderInfo * info)
 {
   PyMOLGlobals *G = I->G;
@@ -631,6 +711,7 @@ Rep *RepCylBondNew(CoordSet * cs, int state)
     SettingGet_i(G, cs->Setting.get(), obj->Setting.get(), cSetting_valence_zero_mode);
 
   auto I = new RepCylBond(cs, state);
+  I->coordsPatchable = !hide_long;
 
   I->primitiveCGO = CGONew(G);
   if(ok && obj->NBond) {
@@ -777,7 +858,7 @@ Rep *RepCylBondNew(CoordSet * cs, int state)
 
           /* This means that if stick_ball gets changed, the RepCylBond needs to be completely invalidated */
 
-        auto stick_ball_impl = [&](AtomInfoType * ati1, int b1, int c1, float const* vv1) {
+        auto stick_ball_impl = [&](AtomInfoType * ati1, int b1, int a1, int c1, float const* vv1) {
           int stick_ball_1 = AtomSettingGetWD(G, ati1, cSetting_stick_ball, stick_ball);
           if(stick_ball_1) {
             float vdw = stick_ball_ratio * ((ati1->protons == cAN_H) ? bd_radius : bd_radius_full);
@@ -792,10 +873,12 @@ Rep *RepCylBondNew(CoordSet * cs, int state)
             if(sbc1 == cColorAtomic)
               sbc1 = ati1->color;
             capdrawn[b1] = vdw1;
-            ColorGetCheckRamped(G, sbc1, vv1, rgb1, state);
+            if (ColorGetCheckRamped(G, sbc1, vv1, rgb1, state))
+              I->coordsPatchable = false;
             CGOColorv(I->primitiveCGO, rgb1);
             CGOPickColor(I->primitiveCGO, b1, ati1->masked ? cPickableNoPick : a);
             CGOSphere(I->primitiveCGO, vv1, vdw1);
+            I->coordRefs.push_back({a1, a1, 0.F, 0.F});
           }
         };
 
@@ -812,14 +895,18 @@ Rep *RepCylBondNew(CoordSet * cs, int state)
             }
           }
 
-          if (s1) stick_ball_impl(ati1, b1, c1, vv1);
-          if (s2) stick_ball_impl(ati2, b2, c2, vv2);
+          if (s1) stick_ball_impl(ati1, b1, a1, c1, vv1);
+          if (s2) stick_ball_impl(ati2, b2, a2, c2, vv2);
 
           float rgb1[3], rgb2[3];
           bool isRamped = false;
           isRamped = ColorGetCheckRamped(G, c1, vv1, rgb1, state);
           isRamped = ColorGetCheckRamped(G, c2, vv2, rgb2, state) | isRamped;
 
+          if (isRamped || symop[0] || symop[1]) {
+            I->coordsPatchable = false;
+          }
+
           if (ord == 0) {
             bd_radius *= valence_zero_scale;
             if (valence_zero_mode == 2) {
@@ -829,6 +916,7 @@ Rep *RepCylBondNew(CoordSet * cs, int state)
 
           if (!ord){
             // zero order bonds
+            I->coordsPatchable = false;
             ok &= RepZeroOrderBond(I, I->primitiveCGO, s1, s2, vv1, vv2, bd_radius, rgb1, rgb2, b1, b2, a, ati1->masked, ati2->masked);
           } else {
             all_zero_order_bond_atoms.erase(b1);
@@ -838,6 +926,7 @@ Rep *RepCylBondNew(CoordSet * cs, int state)
               BondSettingGetWD(G, b, cSetting_valence, valence_flag);
 
             if(bd_valence_flag) {
+              I->coordsPatchable = false;
               Pickable pickdata[] = { { b1, ati1->masked ? cPickableNoPick : a },
                                       { b2, ati2->masked ? cPickableNoPick : a } };
               ok &= RepValence(I, I->primitiveCGO, s1, s2, isRamped, vv1, vv2, other,
@@ -855,6 +944,8 @@ Rep *RepCylBondNew(CoordSet * cs, int state)
 
                 ok &= RepCylinder(I->primitiveCGO, s1, s2, isRamped, vv1, vv2,
                     drawcap1, drawcap2, bd_radius, rgb2, &pickdata);
+                I->coordRefs.push_back(
+                    {a1, a2, s1 ? 0.F : 0.5F, s2 ? 1.F : 0.5F});
 
                 if (shader_mode) {
                   // don't render caps twice with the cylinder shader
@@ -880,6 +971,7 @@ Rep *RepCylBondNew(CoordSet * cs, int state)
        exactly the same is used to render a sphere so that we won't need to use 
        the sphere shader excessively. */
     for (auto at : all_zero_order_bond_atoms){
+      I->coordsPatchable = false;
       ai1 = obj->AtomInfo + at;
       c1 = ai1->color;
       float *v1 = cs->coordPtr(cs->atmToIdx(at));
@@ -147,6 +147,38 @@ static int RepGetSphereMode(PyMOLGlobals *G, RepSphere * I, bool use_shader){
   return sphere_mode;
 }
 
+/**
+ * Generate renderCGO for the given sphere_mode. On failure, purges the
+ * representation.
+ */
+static void RepSphereGenerateRenderCGO(
+    PyMOLGlobals* G, RepSphere* I, RenderInfo* info, int sphere_mode)
+{
+  int ok = true;
+
+  switch (sphere_mode) {
+  case 0:              /* memory-efficient sphere rendering */
+  case cSphereModeCube:
+  case cSphereModeTetrahedron:
+    RepSphere_Generate_Triangles(G, I, info);
+    break;
+  case 9: // use GLSL impostor shader
+    RepSphere_Generate_Impostor_Spheres(G, I, info);
+    break;
+  default:
+    // sphere_modes 1,2,3,6,7,8
+    RepSphere_Generate_Point_Sprites(G, I, info, sphere_mode);
+    break;
+  }
+
+  CHECKOK(ok, I->renderCGO);
+  if (!ok){
+    CGOFree(I->renderCGO);
+    I->invalidate(cRepInvPurge);
+    I->cs->Active[cRepSphere] = false;
+  }
+}
+
 void RepSphere::render(RenderInfo* info)
 {
   auto I = this;
@@ -163,8 +195,23 @@ void RepSphere::render(RenderInfo* info)
   }
   int sphere_mode = RepGetSphereMode(G, I, use_shader);
   if(G->HaveGUI && G->ValidContext) {
+    if (I->renderCGOCoordsStale) {
+      if (!I->renderCGO ||
+          CGOUpdateSpheresVBONonIndexed(I->renderCGO, I->primitiveCGO)) {
+        I->renderCGOCoordsStale = false;
+      } else {
+        // layout mismatch, regenerate below (also for picking)
+        CGOFree(I->renderCGO);
+        I->renderCGOCoordsStale = false;
+      }
+    }
     if(pick) {
-      RepSphereRenderPick(I, info, sphere_mode);
+      if (!I->renderCGO) {
+        RepSphereGenerateRenderCGO(G, I, info, sphere_mode);
+      }
+      if (I->renderCGO) {
+        RepSphereRenderPick(I, info, sphere_mode);
+      }
     } else {                    /* not pick, render! */
       if (I->spheroidCGO) {
         CGORender(I->spheroidCGO, nullptr, nullptr, nullptr, info, I);
@@ -180,28 +227,7 @@ void RepSphere::render(RenderInfo* info)
           return;
         }
       }
-      // Generate renderCGO for sphere_mode
-      switch (sphere_mode) {
-      case 0:              /* memory-efficient sphere rendering */
-      case cSphereModeCube:
-      case cSphereModeTetrahedron:
-        RepSphere_Generate_Triangles(G, I, info);
-        break;
-      case 9: // use GLSL impostor shader
-        RepSphere_Generate_Impostor_Spheres(G, I, info);
-        break;
-      default:
-        // sphere_modes 1,2,3,6,7,8
-        RepSphere_Generate_Point_Sprites(G, I, info, sphere_mode);
-        break;
-      }
-
-      CHECKOK(ok, I->renderCGO);
-      if (!ok){
-        CGOFree(I->renderCGO);
-        I->invalidate(cRepInvPurge);
-        I->cs->Active[cRepSphere] = false;
-      }
+      RepSphereGenerateRenderCGO(G, I, info, sphere_mode);
 
       if (I->renderCGO)
         CGORender(I->renderCGO, nullptr, nullptr, nullptr, info, I);
@@ -209,6 +235,42 @@ void RepSphere::render(RenderInfo* info)
   }
 }
 
+/**
+ * Move the spheres to the current coordinates. Sphere operations in
+ * primitiveCGO are in coordinate set index order, one per visible atom.
+ */
+bool RepSphere::updateCoords()
+{
+  if (!coordsPatchable || !LastVisib || !primitiveCGO) {
+    return false;
+  }
+
+  int idx = 0;
+  for (auto it = primitiveCGO->begin(); !it.is_stop(); ++it) {
+    if (it.op_code() != CGO_SPHERE) {
+      continue;
+    }
+    while (idx < cs->NIndex && !LastVisib[idx]) {
+      ++idx;
+    }
+    if (idx == cs->NIndex) {
+      return false;
+    }
+    copy3f(cs->coordPtr(idx++), it.data());
+  }
+
+  if (renderCGO == primitiveCGO) {
+    // immediate mode, nothing to do
+  } else if (renderCGO && renderCGO->has_draw_sphere_buffers) {
+    // patch the vertex buffer on next render (needs GL context)
+    renderCGOCoordsStale = true;
+  } else {
+    CGOFree(renderCGO);
+  }
+
+  return true;
+}
+
 bool RepSphere::sameVis() const
 {
   if (!LastVisib || !LastColor) {
@@ -298,6 +360,7 @@ static void RepSphereAddAtomVisInfoToStoredVC(RepSphere *I, ObjectMolecule *obj,
   if(ColorCheckRamped(G, c1)) {
     ColorGetRamped(G, c1, v0, vc, state);
     vcptr = vc;
+    I->coordsPatchable = false;
   } else {
     vcptr = ColorGet(G, c1);   /* save new color */
   }
@@ -496,8 +559,10 @@ Rep *RepSphereNew(CoordSet * cs, int state)
     return nullptr;
 
   auto I = new RepSphere(cs, state);
-  if (!cs->Spheroid.empty())
+  if (!cs->Spheroid.empty()) {
     I->spheroidCGO = RepSphereGeneratespheroidCGO(obj, cs, GetSpheroidSphereRec(G), state);
+    I->coordsPatchable = false;
+  }
 
   if (ok){
     sphere_color =
@@ -525,6 +590,7 @@ Rep *RepSphereNew(CoordSet * cs, int state)
   bool needNormals = (sphere_mode >= 6) && (sphere_mode < 9);
   int nspheres = 0;
   if (needNormals){
+    I->coordsPatchable = false;
     float *v_tmp = VLAlloc(float, 1024);
   for(a = 0; ok && a < cs->NIndex; a++) {
     a1 = cs->IdxToAtm[a];
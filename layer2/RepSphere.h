@@ -32,12 +32,19 @@ struct RepSphere : Rep {
   cRep_t type() const override { return cRepSphere; }
   void render(RenderInfo* info) override;
   bool sameVis() const override;
+  bool updateCoords() override;
 
   bool* LastVisib = nullptr;
   int* LastColor = nullptr;
   CGO* renderCGO = nullptr;
   CGO* primitiveCGO = nullptr;
   CGO* spheroidCGO = nullptr;
+
+  //! False if the geometry depends on more than the atom coordinates (normals,
+  //! ramped colors, spheroids)
+  bool coordsPatchable = true;
+  //! renderCGO buffers need to be updated from primitiveCGO
+  bool renderCGOCoordsStale = false;
 };
 
 Rep *RepSphereNew(CoordSet * cset, int state);
@@ -37,6 +37,8 @@ Z* -------------------------------------------------------------------
 #include "Setting.h"
 #include "ShaderMgr.h"
 #include "Sphere.h"
+#include "SurfaceCache.h"
+#include "SurfaceGrid.h"
 #include "Triangle.h"
 #include "Util.h"
 #include "Vector.h"
@@ -3123,6 +3125,8 @@ struct SurfaceJob {
   float cavityRadius{};
   float cavityCutoff{};
 
+  int surfaceEngine{};
+
   /* results */
   float* V{};
   float* VN{};
@@ -3195,7 +3199,7 @@ static SurfaceJobAtomInfo *SurfaceJobAtomInfoVLAFromPyTuple(PyObject * tuple)
 
 static PyObject* SurfaceJobInputAsTuple(PyMOLGlobals* G, SurfaceJob* I)
 {
-  PyObject* result = PyTuple_New(24);
+  PyObject* result = PyTuple_New(25);
   if (result) {
     PyTuple_SetItem(result, 0, PyString_FromString("SurfaceJob"));
     PyTuple_SetItem(result, 1, PyInt_FromLong(1)); /* version */
@@ -3222,6 +3226,7 @@ static PyObject* SurfaceJobInputAsTuple(PyMOLGlobals* G, SurfaceJob* I)
     PyTuple_SetItem(result, 21, PyInt_FromLong(I->cavityMode));
     PyTuple_SetItem(result, 22, PyFloat_FromDouble(I->cavityRadius));
     PyTuple_SetItem(result, 23, PyFloat_FromDouble(I->cavityCutoff));
+    PyTuple_SetItem(result, 24, PyInt_FromLong(I->surfaceEngine));
   }
   return result;
 }
@@ -3283,6 +3288,99 @@ static void SurfaceJobFree(PyMOLGlobals* G, SurfaceJob* I)
   DeleteP(I);
 }
 
+/**
+ * Append the raw contents of a VLA (or just a zero size if nullptr)
+ */
+template <typename T>
+static void SurfaceJobKeyAppendVLA(std::string& key, const T* vla)
+{
+  std::size_t const size = vla ? VLAGetSize(vla) : 0;
+  key.append(reinterpret_cast<const char*>(&size), sizeof(size));
+  key.append(reinterpret_cast<const char*>(vla), sizeof(T) * size);
+}
+
+template <typename T>
+static void SurfaceJobKeyAppend(std::string& key, T value)
+{
+  key.append(reinterpret_cast<const char*>(&value), sizeof(T));
+}
+
+/**
+ * Serialize all inputs of a surface job, for the in-memory surface cache.
+ * Same content as SurfaceJobInputAsTuple, without the Python overhead.
+ */
+static std::string SurfaceJobInputAsKey(const SurfaceJob* I)
+{
+  std::string key;
+  SurfaceJobKeyAppendVLA(key, I->coord);
+  SurfaceJobKeyAppendVLA(key, I->atomInfo);
+  SurfaceJobKeyAppendVLA(key, I->presentVla);
+  SurfaceJobKeyAppendVLA(key, I->carveVla);
+  SurfaceJobKeyAppend(key, I->maxVdw);
+  SurfaceJobKeyAppend(key, I->allVisibleFlag);
+  SurfaceJobKeyAppend(key, I->nPresent);
+  SurfaceJobKeyAppend(key, I->solventSphereIndex);
+  SurfaceJobKeyAppend(key, I->sphereIndex);
+  SurfaceJobKeyAppend(key, I->surfaceType);
+  SurfaceJobKeyAppend(key, I->circumscribe);
+  SurfaceJobKeyAppend(key, I->probeRadius);
+  SurfaceJobKeyAppend(key, I->carveCutoff);
+  SurfaceJobKeyAppend(key, I->surfaceMode);
+  SurfaceJobKeyAppend(key, I->surfaceSolvent);
+  SurfaceJobKeyAppend(key, I->cavityCull);
+  SurfaceJobKeyAppend(key, I->pointSep);
+  SurfaceJobKeyAppend(key, I->trimCutoff);
+  SurfaceJobKeyAppend(key, I->trimFactor);
+  SurfaceJobKeyAppend(key, I->cavityMode);
+  SurfaceJobKeyAppend(key, I->cavityRadius);
+  SurfaceJobKeyAppend(key, I->cavityCutoff);
+  SurfaceJobKeyAppend(key, I->surfaceEngine);
+  return key;
+}
+
+template <typename T>
+static std::vector<T> SurfaceJobVLAAsVector(const T* vla)
+{
+  return vla ? std::vector<T>(vla, vla + VLAGetSize(vla)) : std::vector<T>();
+}
+
+template <typename T>
+static T* SurfaceJobVLAFromVector(const std::vector<T>& vec)
+{
+  if (vec.empty())
+    return nullptr;
+  T* vla = VLAlloc(T, vec.size());
+  if (vla)
+    std::copy(vec.begin(), vec.end(), vla);
+  return vla;
+}
+
+static SurfaceCacheResult SurfaceJobResultAsCacheResult(const SurfaceJob* I)
+{
+  SurfaceCacheResult result;
+  result.N = I->N;
+  result.NT = I->NT;
+  result.V = SurfaceJobVLAAsVector(I->V);
+  result.VN = SurfaceJobVLAAsVector(I->VN);
+  result.T = SurfaceJobVLAAsVector(I->T);
+  result.S = SurfaceJobVLAAsVector(I->S);
+  return result;
+}
+
+static int SurfaceJobResultFromCacheResult(
+    PyMOLGlobals* G, SurfaceJob* I, const SurfaceCacheResult& result)
+{
+  SurfaceJobPurgeResult(G, I);
+  I->N = result.N;
+  I->NT = result.NT;
+  I->V = SurfaceJobVLAFromVector(result.V);
+  I->VN = SurfaceJobVLAFromVector(result.VN);
+  I->T = SurfaceJobVLAFromVector(result.T);
+  I->S = SurfaceJobVLAFromVector(result.S);
+  return (I->V || result.V.empty()) && (I->VN || result.VN.empty()) &&
+         (I->T || result.T.empty()) && (I->S || result.S.empty());
+}
+
 static int SurfaceJobEliminateCloseDotsType3orMore(
     PyMOLGlobals* G, SurfaceJob* I, int* repeat_flag, int* dot_flag)
 {
@@ -3802,6 +3900,81 @@ static void SurfaceJobSetProbeRadius(int surface_type, float point_sep,
   *probe_rad_less2 = (*probe_rad_less) * (*probe_rad_less);
 }
 
+/**
+ * Can this job use the grid based engine (SurfaceGrid)? It produces
+ * triangles directly, so dot surfaces and the dot-based cavity modes stay
+ * with the classic engine.
+ */
+static bool SurfaceJobUsesGrid(const SurfaceJob* I)
+{
+  return I->surfaceEngine == 1 &&
+         (I->surfaceType == 0 || I->surfaceType == 2) && I->cavityMode == 0;
+}
+
+/**
+ * Alternative to the dot-based calculation in SurfaceJobRun: triangulates
+ * the surface from a distance field. All present atoms occlude the probe,
+ * the grid spacing follows surface_quality (point_sep).
+ */
+static int SurfaceJobRunGrid(PyMOLGlobals* G, SurfaceJob* I)
+{
+  int const n_atom = VLAGetSize(I->coord) / 3;
+  std::vector<float> coord;
+  std::vector<float> radius;
+  coord.reserve(3 * I->nPresent);
+  radius.reserve(I->nPresent);
+
+  for (int a = 0; a < n_atom; ++a) {
+    if (!I->presentVla || I->presentVla[a]) {
+      coord.insert(coord.end(), I->coord + 3 * a, I->coord + 3 * a + 3);
+      radius.push_back(I->atomInfo[a].vdw);
+    }
+  }
+
+  SurfaceGridParams params;
+  params.probe_radius = I->probeRadius;
+  params.spacing = I->pointSep;
+  params.solvent_accessible = I->surfaceSolvent;
+  params.cavity_cull = I->cavityCull;
+  params.n_thread = std::max(1, SettingGetGlobal_i(G, cSetting_max_threads));
+
+  SurfaceGridMesh mesh;
+  if (!SurfaceGridCompute(G, coord.data(), radius.data(), int(radius.size()),
+          params, mesh)) {
+    return false;
+  }
+
+  I->N = mesh.vertices.size() / 3;
+  I->NT = mesh.triangles.size() / 3;
+  I->V = VLAlloc(float, std::max<std::size_t>(mesh.vertices.size(), 3));
+  I->VN = VLAlloc(float, std::max<std::size_t>(mesh.normals.size(), 3));
+  I->T = VLAlloc(int, std::max<std::size_t>(mesh.triangles.size(), 3));
+  I->S = VLAlloc(int, 4 * I->NT + 1);
+  if (!(I->V && I->VN && I->T && I->S)) {
+    return false;
+  }
+
+  std::copy(mesh.vertices.begin(), mesh.vertices.end(), I->V);
+  std::copy(mesh.normals.begin(), mesh.normals.end(), I->VN);
+  std::copy(mesh.triangles.begin(), mesh.triangles.end(), I->T);
+
+  /* one strip per triangle, zero terminated */
+  int* s = I->S;
+  for (int t = 0; t < I->NT; ++t) {
+    *(s++) = 1;
+    *(s++) = I->T[3 * t];
+    *(s++) = I->T[3 * t + 1];
+    *(s++) = I->T[3 * t + 2];
+  }
+  *s = 0;
+
+  PRINTFB(G, FB_RepSurface, FB_Blather)
+  " RepSurface: %i grid surface points, %i triangles.\n", I->N,
+      I->NT ENDFB(G);
+
+  return true;
+}
+
 static int SurfaceJobRun(PyMOLGlobals* G, SurfaceJob* I)
 {
   int ok = true;
@@ -3812,6 +3985,14 @@ static int SurfaceJobRun(PyMOLGlobals* G, SurfaceJob* I)
 
   SurfaceJobPurgeResult(G, I);
 
+  if (SurfaceJobUsesGrid(I)) {
+    ok = SurfaceJobRunGrid(G, I);
+    if (!ok) {
+      SurfaceJobPurgeResult(G, I);
+    }
+    return ok;
+  }
+
   {
     /* compute limiting storage requirements */
     int tmp = n_present;
@@ -4239,6 +4420,8 @@ static int RepSurfacePrepareSurfaceJob(PyMOLGlobals* G, SurfaceJob* surf_job,
         G, cs->Setting.get(), obj->Setting.get(), cSetting_surface_solvent);
     surf_job->cavityCull = SettingGet_i(
         G, cs->Setting.get(), obj->Setting.get(), cSetting_cavity_cull);
+    surf_job->surfaceEngine = SettingGet_i(
+        G, cs->Setting.get(), obj->Setting.get(), cSetting_surface_engine);
   }
   return ok;
 }
@@ -4417,8 +4600,10 @@ Rep* RepSurfaceNew(CoordSet* cs, int state)
     int surface_flag = false;
     int surface_type = SettingGet_i(
         G, cs->Setting.get(), obj->Setting.get(), cSetting_surface_type);
-    int surface_quality = SettingGet_i(
-        G, cs->Setting.get(), obj->Setting.get(), cSetting_surface_quality);
+    /* one quality step coarser per level of detail */
+    int surface_quality = SettingGet_i(G, cs->Setting.get(),
+                              obj->Setting.get(), cSetting_surface_quality) -
+                          cs->LevelOfDetail;
     float probe_radius = SettingGet_f(
         G, cs->Setting.get(), obj->Setting.get(), cSetting_solvent_radius);
     int optimize = SettingGet_i(G, cs->Setting.get(), obj->Setting.get(),
@@ -4568,19 +4753,37 @@ Rep* RepSurfaceNew(CoordSet* cs, int state)
 
         if (ok) {
           int found = false;
+
+          /* in-memory cache, e.g. for hide/show or identical states */
+          std::string cache_key;
+          if (SettingGet<int>(G, cSetting_surface_cache_size) > 0) {
+            cache_key = SurfaceJobInputAsKey(surf_job);
+            SurfaceCacheResult cached;
+            if (SurfaceCacheGet(G, cache_key, cached)) {
+              found = SurfaceJobResultFromCacheResult(G, surf_job, cached);
+            }
+          }
+
 #ifndef _PYMOL_NOPY
           PyObject* entry = nullptr;
           PyObject* output = nullptr;
           PyObject* input = nullptr;
           int cache_mode = SettingGet_i(
               G, cs->Setting.get(), obj->Setting.get(), cSetting_cache_mode);
-          RepSurfaceConvertSurfaceJobToPyObject(
-              G, surf_job, cs, obj, &entry, &input, &output, &found);
+          if (!found) {
+            RepSurfaceConvertSurfaceJobToPyObject(
+                G, surf_job, cs, obj, &entry, &input, &output, &found);
+          }
 #endif
           if (ok && !found) {
 
             ok &= SurfaceJobRun(G, surf_job);
 
+            if (ok && !cache_key.empty() && !G->Interrupt) {
+              SurfaceCachePut(
+                  G, cache_key, SurfaceJobResultAsCacheResult(surf_job));
+            }
+
 #ifndef _PYMOL_NOPY
             if (cache_mode > 1) {
               int blocked = PAutoBlock(G);
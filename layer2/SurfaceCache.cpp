@@ -0,0 +1,105 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * In-memory cache of molecular surface triangulations.
+ */
+
+#include <functional>
+#include <mutex>
+
+#include "Setting.h"
+#include "SurfaceCache.h"
+#include "pymol/lru_cache.h"
+
+namespace
+{
+struct SurfaceCacheEntry {
+  std::string input; ///< full key, to rule out hash collisions
+  SurfaceCacheResult result;
+};
+} // namespace
+
+/**
+ * Surfaces keyed by the hash of the serialized job input (which can be
+ * large, so it's stored only once per entry). Entry costs are in bytes and
+ * include the input.
+ */
+struct _CSurfaceCache {
+  std::mutex m_mutex;
+  pymol::lru_cache<std::size_t, SurfaceCacheEntry> m_cache;
+};
+
+std::size_t SurfaceCacheResult::byteSize() const
+{
+  return sizeof(float) * (V.size() + VN.size()) +
+         sizeof(int) * (T.size() + S.size()) + sizeof(SurfaceCacheResult);
+}
+
+/**
+ * Memory budget in bytes, from the "surface_cache_size" setting (MB)
+ */
+static std::size_t SurfaceCacheCapacity(PyMOLGlobals* G)
+{
+  int const mb = SettingGet<int>(G, cSetting_surface_cache_size);
+  return (mb > 0) ? std::size_t(mb) << 20 : 0;
+}
+
+int SurfaceCacheInit(PyMOLGlobals* G)
+{
+  G->SurfaceCache = new CSurfaceCache();
+  return 1;
+}
+
+void SurfaceCacheFree(PyMOLGlobals* G)
+{
+  delete G->SurfaceCache;
+  G->SurfaceCache = nullptr;
+}
+
+void SurfaceCachePurge(PyMOLGlobals* G)
+{
+  CSurfaceCache* I = G->SurfaceCache;
+  if (!I)
+    return;
+  std::lock_guard<std::mutex> lock(I->m_mutex);
+  I->m_cache.clear();
+}
+
+bool SurfaceCacheGet(
+    PyMOLGlobals* G, const std::string& key, SurfaceCacheResult& result)
+{
+  CSurfaceCache* I = G->SurfaceCache;
+  auto const hash = std::hash<std::string>()(key);
+  std::lock_guard<std::mutex> lock(I->m_mutex);
+  I->m_cache.set_capacity(SurfaceCacheCapacity(G));
+  auto const* found = I->m_cache.get(hash);
+  if (!found || found->input != key) {
+    return false;
+  }
+  result = found->result;
+  return true;
+}
+
+void SurfaceCachePut(
+    PyMOLGlobals* G, const std::string& key, SurfaceCacheResult&& result)
+{
+  CSurfaceCache* I = G->SurfaceCache;
+  auto const hash = std::hash<std::string>()(key);
+  auto const cost = result.byteSize() + key.size();
+  std::lock_guard<std::mutex> lock(I->m_mutex);
+  I->m_cache.set_capacity(SurfaceCacheCapacity(G));
+  I->m_cache.put(hash, SurfaceCacheEntry{key, std::move(result)}, cost);
+}
+
+SurfaceCacheStats SurfaceCacheGetStats(PyMOLGlobals* G, bool reset)
+{
+  CSurfaceCache* I = G->SurfaceCache;
+  std::lock_guard<std::mutex> lock(I->m_mutex);
+  I->m_cache.set_capacity(SurfaceCacheCapacity(G));
+  SurfaceCacheStats stats = {I->m_cache.hits(), I->m_cache.misses(),
+      I->m_cache.size(), I->m_cache.cost(), I->m_cache.capacity()};
+  if (reset) {
+    I->m_cache.reset_stats();
+  }
+  return stats;
+}
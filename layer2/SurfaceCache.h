@@ -0,0 +1,60 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * In-memory cache of molecular surface triangulations.
+ */
+
+#pragma once
+
+#include <cstddef>
+#include <string>
+#include <vector>
+
+#include "PyMOLGlobals.h"
+
+/**
+ * Result of a surface calculation (SurfaceJob), as plain arrays with the
+ * same layout as the RepSurface VLAs.
+ */
+struct SurfaceCacheResult {
+  std::vector<float> V;  ///< vertices
+  std::vector<float> VN; ///< vertex normals
+  std::vector<int> T;    ///< triangles
+  std::vector<int> S;    ///< strips
+  int N = 0;             ///< number of vertices
+  int NT = 0;            ///< number of triangles
+
+  std::size_t byteSize() const;
+};
+
+/// Statistics of the surface cache
+struct SurfaceCacheStats {
+  std::size_t hits;
+  std::size_t misses;
+  std::size_t size;     ///< number of entries
+  std::size_t cost;     ///< memory used, in bytes
+  std::size_t capacity; ///< memory budget, in bytes
+};
+
+int SurfaceCacheInit(PyMOLGlobals* G);
+void SurfaceCacheFree(PyMOLGlobals* G);
+void SurfaceCachePurge(PyMOLGlobals* G);
+
+/**
+ * Look up the surface for a job input fingerprint. Thread-safe, may be
+ * called from async_builds worker threads.
+ * @param key Serialized job input (coordinates, atom info and settings)
+ * @param[out] result Copy of the cached result
+ * @return True if found
+ */
+bool SurfaceCacheGet(
+    PyMOLGlobals* G, const std::string& key, SurfaceCacheResult& result);
+
+/**
+ * Store a surface for a job input fingerprint. Thread-safe. Does nothing if
+ * the "surface_cache_size" setting is zero.
+ */
+void SurfaceCachePut(
+    PyMOLGlobals* G, const std::string& key, SurfaceCacheResult&& result);
+
+SurfaceCacheStats SurfaceCacheGetStats(PyMOLGlobals* G, bool reset = false);
@@ -0,0 +1,342 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Lazily materialized trajectory states.
+ */
+
+#include <algorithm>
+#include <cassert>
+#include <cstring>
+
+#include "TrajectoryCache.h"
+
+#include "CoordSet.h"
+#include "Feedback.h"
+#include "ObjectMolecule.h"
+#include "Setting.h"
+#include "Symmetry.h"
+
+TrajectoryFrameStore::TrajectoryFrameStore(const CoordSet* tmpl,
+    std::unique_ptr<TrajectoryFrameReader> reader, std::vector<int> xref)
+    : m_template(CoordSetCopy(tmpl))
+    , m_xref(std::move(xref))
+    , m_reader(std::move(reader))
+{
+}
+
+TrajectoryFrameStore::~TrajectoryFrameStore() = default;
+
+std::size_t TrajectoryFrameStore::append(std::size_t index, int n_avg)
+{
+  m_frames.push_back({index, n_avg});
+  return m_frames.size() - 1;
+}
+
+CoordSet* TrajectoryFrameStore::load(ObjectMolecule* obj, std::size_t frame) const
+{
+  assert(frame < m_frames.size());
+
+  auto const& rec = m_frames[frame];
+  auto const natoms = m_reader->natoms();
+  std::unique_ptr<CSymmetry> symmetry;
+
+  std::lock_guard<std::mutex> lock(m_mutex);
+
+  m_buffer.resize(std::size_t(natoms) * 3);
+
+  auto ok = m_reader->read(rec.index, m_buffer.data(), symmetry);
+  if (!ok) {
+    PRINTFB(obj->G, FB_ObjectMolecule, FB_Errors)
+      " ObjectMolecule-Error: %s\n", ok.error().what().c_str() ENDFB(obj->G);
+    return nullptr;
+  }
+
+  auto cs = CoordSetCopy(m_template.get());
+  cs->Obj = obj;
+
+  for (int i = 0; i < natoms; ++i) {
+    int const idx = m_xref.empty() ? i : m_xref[i];
+    if (idx < 0) {
+      continue;
+    }
+    assert(idx < cs->NIndex);
+    float* v = cs->coordPtr(idx);
+    copy3f(m_buffer.data() + 3 * i, v);
+    if (rec.n_avg > 1) {
+      scale3f(v, 1.0F / rec.n_avg, v);
+    }
+  }
+
+  cs->Symmetry.reset(symmetry.release());
+
+  return cs;
+}
+
+std::size_t TrajectoryFrameStore::frameBytes() const
+{
+  return std::size_t(m_template->NIndex) * 3 * sizeof(float);
+}
+
+/*========================================================================*/
+
+/**
+ * Apply an old-to-new atom index lookup to a coordinate set, removes
+ * coordinates of deleted atoms.
+ */
+static void CoordSetRemapAtoms(CoordSet* cs, const std::vector<int>& lookup)
+{
+  int offset = 0;
+
+  for (int idx = 0; idx < cs->NIndex; ++idx) {
+    auto const atm_new = lookup[cs->IdxToAtm[idx]];
+
+    if (atm_new == -1) {
+      --offset;
+    } else {
+      cs->IdxToAtm[idx + offset] = atm_new;
+      if (offset) {
+        copy3f(cs->coordPtr(idx), cs->coordPtr(idx + offset));
+      }
+    }
+  }
+
+  if (offset) {
+    cs->setNIndex(cs->NIndex + offset);
+  }
+}
+
+void TrajectoryCache::set(int state,
+    std::shared_ptr<const TrajectoryFrameStore> store, std::size_t frame)
+{
+  assert(state >= 0);
+  if (m_states.size() <= std::size_t(state)) {
+    m_states.resize(state + 1);
+  }
+  m_loaded.erase(state);
+  m_evicted.erase(state);
+  m_states[state] = {std::move(store), frame, m_remaps.size()};
+}
+
+bool TrajectoryCache::isLazy(int state) const
+{
+  return state >= 0 && std::size_t(state) < m_states.size() &&
+         m_states[state].store;
+}
+
+void TrajectoryCache::forget(int state)
+{
+  if (isLazy(state)) {
+    m_states[state].store.reset();
+    m_loaded.erase(state);
+    m_evicted.erase(state);
+  }
+}
+
+void TrajectoryCache::forget(const CoordSet* cs)
+{
+  int state = -1;
+
+  m_loaded.erase_if([&](int key, CoordSet* loaded) {
+    if (loaded != cs) {
+      return false;
+    }
+    state = key;
+    return true;
+  });
+
+  if (state == -1) {
+    for (auto const& item : m_evicted) {
+      if (item.second == cs) {
+        state = item.first;
+        break;
+      }
+    }
+  }
+
+  forget(state);
+}
+
+CoordSet* TrajectoryCache::decode(ObjectMolecule* obj, int state) const
+{
+  if (!isLazy(state)) {
+    return nullptr;
+  }
+
+  auto const& rec = m_states[state];
+  auto cs = rec.store->load(obj, rec.frame);
+  if (!cs) {
+    return nullptr;
+  }
+
+  for (auto i = rec.remap_begin; i < m_remaps.size(); ++i) {
+    CoordSetRemapAtoms(cs, *m_remaps[i]);
+  }
+
+  // also covers atoms which were added after loading
+  cs->updateNonDiscreteAtmToIdx(obj->NAtom);
+
+  return cs;
+}
+
+CoordSet* TrajectoryCache::get(ObjectMolecule* obj, int state)
+{
+  if (!isLazy(state) || state >= obj->NCSet) {
+    return nullptr;
+  }
+
+  auto& cs = obj->CSet[state];
+
+  if (cs) {
+    auto loaded = m_loaded.get(state);
+    if (loaded && *loaded == cs) {
+      return cs;
+    }
+
+    auto evicted = m_evicted.find(state);
+    if (evicted != m_evicted.end() && evicted->second == cs) {
+      // evicted while pinned and still in use
+      m_evicted.erase(evicted);
+      manage(obj, state, cs);
+    } else {
+      // replaced by something else, no longer backed by the trajectory
+      forget(state);
+    }
+    return cs;
+  }
+
+  cs = decode(obj, state);
+
+  if (cs) {
+    manage(obj, state, cs);
+  }
+
+  return obj->CSet[state];
+}
+
+/**
+ * Put a materialized state into the LRU cache, evicts other states if
+ * necessary.
+ */
+void TrajectoryCache::manage(ObjectMolecule* obj, int state, CoordSet* cs)
+{
+  // keep at least two states, e.g. for state-to-state comparisons
+  std::size_t const cost = m_states[state].store->frameBytes() + 1;
+  std::size_t const budget =
+      std::size_t(std::max(0, SettingGet<int>(obj->G, obj->Setting.get(),
+                                  nullptr, cSetting_traj_cache_size)))
+      << 20;
+  m_loaded.set_capacity(std::max(budget, 2 * cost));
+
+  m_loaded.set_on_evict([this, obj](int evicted, CoordSet*& loaded) {
+    if (evicted >= obj->NCSet || obj->CSet[evicted] != loaded) {
+      return;
+    }
+    if (isLazy(evicted) && m_states[evicted].pins > 0) {
+      m_evicted[evicted] = loaded;
+    } else {
+      delete loaded;
+      obj->CSet[evicted] = nullptr;
+    }
+  });
+
+  m_loaded.put(state, cs, cost);
+}
+
+CoordSet* TrajectoryCache::pin(ObjectMolecule* obj, int state)
+{
+  if (!isLazy(state)) {
+    return nullptr;
+  }
+
+  // pin first, so that get() can't evict it right away
+  ++m_states[state].pins;
+
+  return get(obj, state);
+}
+
+void TrajectoryCache::unpin(ObjectMolecule* obj, int state)
+{
+  if (!isLazy(state) || m_states[state].pins == 0 ||
+      --m_states[state].pins > 0) {
+    return;
+  }
+
+  auto evicted = m_evicted.find(state);
+  if (evicted == m_evicted.end()) {
+    return;
+  }
+
+  if (state < obj->NCSet && obj->CSet[state] == evicted->second) {
+    delete evicted->second;
+    obj->CSet[state] = nullptr;
+  }
+
+  m_evicted.erase(evicted);
+}
+
+void TrajectoryCache::setStateOrder(const int* order, int len)
+{
+  std::vector<LazyState> states(len);
+  for (int a = 0; a < len; ++a) {
+    if (isLazy(order[a])) {
+      states[a] = m_states[order[a]];
+    }
+  }
+  m_states = std::move(states);
+
+  // materialized states stay in the object but are no longer managed
+  m_loaded.clear();
+  m_evicted.clear();
+}
+
+void TrajectoryCache::erase(int state)
+{
+  if (state < 0 || std::size_t(state) >= m_states.size()) {
+    return;
+  }
+  m_states.erase(m_states.begin() + state);
+  m_loaded.clear();
+  m_evicted.clear();
+}
+
+bool TrajectoryCache::empty() const
+{
+  return std::none_of(m_states.begin(), m_states.end(),
+      [](const LazyState& rec) { return bool(rec.store); });
+}
+
+void TrajectoryCache::remapAtoms(const int* lookup, int natom)
+{
+  if (!empty()) {
+    m_remaps.push_back(
+        std::make_shared<const std::vector<int>>(lookup, lookup + natom));
+  }
+}
+
+/*========================================================================*/
+
+TrajectoryStatePins::~TrajectoryStatePins()
+{
+  for (auto it = m_pins.rbegin(); it != m_pins.rend(); ++it) {
+    if (it->first->LazyStates) {
+      it->first->LazyStates->unpin(it->first, it->second);
+    }
+  }
+}
+
+void TrajectoryStatePins::load(ObjectMolecule* obj, int state)
+{
+  if (!obj || !obj->LazyStates) {
+    return;
+  }
+
+  int const start = (state < 0) ? 0 : state;
+  int const stop = (state < 0) ? obj->NCSet : std::min(state + 1, obj->NCSet);
+
+  for (int s = start; s < stop; ++s) {
+    if (obj->LazyStates->isLazy(s)) {
+      obj->LazyStates->pin(obj, s);
+      m_pins.emplace_back(obj, s);
+    }
+  }
+}
@@ -0,0 +1,230 @@
+/*
+ * Copyright (c) Schrodinger, LLC.
+ *
+ * Lazily materialized trajectory states.
+ */
+
+#pragma once
+
+#include <memory>
+#include <mutex>
+#include <unordered_map>
+#include <vector>
+
+#include "Result.h"
+#include "pymol/lru_cache.h"
+
+struct CoordSet;
+struct CSymmetry;
+struct ObjectMolecule;
+
+/**
+ * Random access to the timesteps of a trajectory file.
+ */
+class TrajectoryFrameReader
+{
+public:
+  virtual ~TrajectoryFrameReader() = default;
+
+  /**
+   * Read the timestep with the given (zero based) index in the file.
+   * @param[out] coords Coordinates of all atoms in the file
+   * @param[out] symmetry Unit cell of the timestep, or nullptr
+   */
+  virtual pymol::Result<> read(std::size_t index, float* coords,
+      std::unique_ptr<CSymmetry>& symmetry) = 0;
+
+  /// Number of atoms in the file
+  virtual int natoms() const = 0;
+};
+
+/**
+ * Trajectory frames which are read from the trajectory file when needed.
+ *
+ * All frames share the topology of a template coordinate set. Immutable after
+ * loading, so it can be shared by all copies of an object.
+ */
+class TrajectoryFrameStore
+{
+  struct Frame {
+    std::size_t index; ///< timestep in the file
+    int n_avg;         ///< see PlugIOManagerLoadTraj(average)
+  };
+
+  std::unique_ptr<CoordSet> m_template;
+  std::vector<int> m_xref;
+  std::vector<Frame> m_frames;
+
+  mutable std::mutex m_mutex;
+  mutable std::unique_ptr<TrajectoryFrameReader> m_reader;
+  mutable std::vector<float> m_buffer;
+
+public:
+  /**
+   * @param tmpl Template coordinate set, gets copied
+   * @param reader Reader for the trajectory file
+   * @param xref File atom index to template index (-1: skip), or empty
+   */
+  TrajectoryFrameStore(const CoordSet* tmpl,
+      std::unique_ptr<TrajectoryFrameReader> reader, std::vector<int> xref);
+  ~TrajectoryFrameStore();
+
+  TrajectoryFrameStore(const TrajectoryFrameStore&) = delete;
+  TrajectoryFrameStore& operator=(const TrajectoryFrameStore&) = delete;
+
+  /**
+   * Append a frame.
+   * @param index Timestep in the file
+   * @param n_avg Coordinates get divided by this number
+   * @return Frame index
+   */
+  std::size_t append(std::size_t index, int n_avg = 1);
+
+  /**
+   * Create a new coordinate set for the given frame.
+   * @return nullptr if the trajectory file can't be read
+   */
+  CoordSet* load(ObjectMolecule* obj, std::size_t frame) const;
+
+  std::size_t size() const { return m_frames.size(); }
+
+  /// Memory footprint of one decoded frame
+  std::size_t frameBytes() const;
+};
+
+/**
+ * Per-object table of states which are backed by a TrajectoryFrameStore,
+ * with a size-bounded LRU cache of the states which are currently
+ * materialized in `ObjectMolecule::CSet`.
+ *
+ * A lazy state has `CSet[state] == nullptr` until it's accessed with
+ * `ObjectMolecule::getCoordSet()`. The least recently used materialized
+ * states get deleted (and their `CSet` slot reset to nullptr) once the
+ * `traj_cache_size` budget is exceeded. Pinned states are not deleted
+ * before they get unpinned.
+ */
+class TrajectoryCache
+{
+  struct LazyState {
+    std::shared_ptr<const TrajectoryFrameStore> store;
+    std::size_t frame = 0;
+    /// first atom remapping which applies to this state
+    std::size_t remap_begin = 0;
+    int pins = 0;
+  };
+
+  std::vector<LazyState> m_states; // indexed by state
+  /// atom index lookups (old to new, -1 for removed) since loading
+  std::vector<std::shared_ptr<const std::vector<int>>> m_remaps;
+  pymol::lru_cache<int, CoordSet*> m_loaded;
+  /// evicted while pinned, deleted by unpin()
+  std::unordered_map<int, CoordSet*> m_evicted;
+
+  void manage(ObjectMolecule* obj, int state, CoordSet* cs);
+
+public:
+  TrajectoryCache() = default;
+
+  /// Copies the state table, but not the materialized states
+  TrajectoryCache(const TrajectoryCache& other)
+      : m_states(other.m_states)
+      , m_remaps(other.m_remaps)
+  {
+    for (auto& rec : m_states) {
+      rec.pins = 0;
+    }
+  }
+
+  /**
+   * Back `state` by the given frame.
+   */
+  void set(int state, std::shared_ptr<const TrajectoryFrameStore> store,
+      std::size_t frame);
+
+  /**
+   * True if `state` is backed by a trajectory frame store
+   */
+  bool isLazy(int state) const;
+
+  /**
+   * Drop the backing of `state`. If it's materialized, the coordinate set
+   * stays in the object and becomes a regular state.
+   */
+  void forget(int state);
+
+  /**
+   * Drop the backing of the lazy state which is materialized as `cs`, e.g.
+   * because its coordinates were modified and must not be reloaded from the
+   * file after eviction. No-op if `cs` is not a materialized lazy state.
+   */
+  void forget(const CoordSet* cs);
+
+  /**
+   * Get the coordinate set for `state`, materialize it if necessary.
+   * @return nullptr if `state` is not lazy
+   */
+  CoordSet* get(ObjectMolecule* obj, int state);
+
+  /**
+   * Materialize `state` and keep it in `CSet` until unpin(), so that raw
+   * `CSet[state]` pointers stay valid (e.g. in worker threads).
+   * @return nullptr if `state` is not lazy
+   */
+  CoordSet* pin(ObjectMolecule* obj, int state);
+
+  /**
+   * Release a pin. Deletes the state if it was evicted in the meantime.
+   */
+  void unpin(ObjectMolecule* obj, int state);
+
+  /**
+   * Decode a lazy state into a new coordinate set, bypassing the cache.
+   * @return nullptr if `state` is not lazy
+   */
+  CoordSet* decode(ObjectMolecule* obj, int state) const;
+
+  /**
+   * Reorder states, see ObjectMoleculeSetStateOrder
+   */
+  void setStateOrder(const int* order, int len);
+
+  /**
+   * Remove a state and shift the following ones
+   */
+  void erase(int state);
+
+  /**
+   * Record a change of atom indices (sorting or removal of atoms) which
+   * needs to be applied to lazy states when they get decoded.
+   * @param lookup Old to new atom index mapping, -1 for removed atoms
+   * @param natom Old number of atoms (size of `lookup`)
+   */
+  void remapAtoms(const int* lookup, int natom);
+
+  /// True if no state is lazy
+  bool empty() const;
+};
+
+/**
+ * Pins lazy trajectory states for the lifetime of this object.
+ *
+ * Raw `ObjectMolecule::CSet` access does not decode lazy states. Code which
+ * reads `CSet[state]` directly, or from several threads, loads the states
+ * first with load().
+ */
+class TrajectoryStatePins
+{
+  std::vector<std::pair<ObjectMolecule*, int>> m_pins;
+
+public:
+  TrajectoryStatePins() = default;
+  TrajectoryStatePins(const TrajectoryStatePins&) = delete;
+  TrajectoryStatePins& operator=(const TrajectoryStatePins&) = delete;
+  ~TrajectoryStatePins();
+
+  /**
+   * Materialize and pin `state` (-1 for all states) of `obj`. No-op for
+   * states which are not lazy.
+   */
+  void load(ObjectMolecule* obj, int state);
+};
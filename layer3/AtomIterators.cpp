@@ -153,7 +153,17 @@ bool SeleCoordIterator::next() {
       prev_obj = obj;
     }
 
-    if(state >= obj->NCSet || !(cs = obj->CSet[state]))
+    if(state >= obj->NCSet)
+      continue;
+
+    cs = obj->CSet[state];
+
+    if(!cs && obj->LazyStates) {
+      // decode lazy trajectory state
+      cs = obj->getCoordSet(state);
+    }
+
+    if(!cs)
       continue;
 
     atm = I->Table[a].atom;
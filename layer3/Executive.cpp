@@ -76,6 +76,8 @@
 #include"Control.h"
 #include"Menu.h"
 #include"Map.h"
+#include"MapExpression.h"
+#include"SurfaceCache.h"
 #include"Editor.h"
 #include"RepDot.h"
 #include"Seq.h"
@@ -1588,6 +1590,10 @@ void ExecutiveInvalidateGroups(PyMOLGlobals * G, bool force)
   if(!(force || I->ValidGroups)) {
     return;
   }
+
+  // group names can be used in selection expressions
+  SelectorCacheInvalidate(G);
+
   for (auto& rec : pymol::make_list_adapter(G->Executive->Spec)) {
     rec.group = nullptr;
     if (ExecutiveIsObjectType(rec, cObjectGroup)) {
@@ -2976,6 +2982,7 @@ static int ExecutiveSetObjectMatrix2(PyMOLGlobals * G, pymol::CObject * obj, int
   } else {
     if (auto* objstate = obj->getObjectState(state)) {
       ObjectStateSetMatrix(objstate, matrix);
+      obj->markChanged();
       ok = true;
     }
   }
@@ -3457,6 +3464,7 @@ pymol::Result<> ExecutiveSetObjectColor(PyMOLGlobals * G, const char *name, cons
   auto obj = ExecutiveFindObjectByName(G, name);
   if(obj) {
     obj->Color = col_ind;
+    obj->markChanged();
   } else {
     return pymol::make_error("Object ", name, " not found.");
   }
@@ -3754,6 +3762,13 @@ ExecutiveLoadPrepareArgs(PyMOLGlobals * G,
       break;
     }
 
+    // density maps get memory mapped by the loader
+    if (content_format == cLoadTypeCCP4Map ||
+        content_format == cLoadTypeCCP4Unspecified ||
+        content_format == cLoadTypeMRC) {
+      break;
+    }
+
     try {
       args.content = pymol::file_get_contents(fname);
       PRINTFB(G, FB_Executive, FB_Blather)
@@ -3858,6 +3873,7 @@ pymol::Result<> ExecutiveLoad(PyMOLGlobals* G, ExecutiveLoadArgs const& args)
   auto finish = args.finish;
   auto multiplex = args.multiplex;
   auto quiet = args.quiet;
+  const float* map_box = args.map_box.size() == 6 ? args.map_box.data() : nullptr;
 
   if (multiplex != 1) {
     origObj = ExecutiveGetExistingCompatible(G, object_name, content_format);
@@ -4000,13 +4016,20 @@ pymol::Result<> ExecutiveLoad(PyMOLGlobals* G, ExecutiveLoadArgs const& args)
         state, true, size, quiet);
     break;
   case cLoadTypeCCP4Map:
-  case cLoadTypeCCP4Str:
   case cLoadTypeCCP4Unspecified:
-  case cLoadTypeCCP4UnspecifiedStr:
   case cLoadTypeMRC:
+    if (args.content.empty()) {
+      obj = ObjectMapLoadCCP4(G, (ObjectMap *) origObj, fname,
+          state, false, 0, quiet, content_format, map_box);
+      break;
+    }
+    // file contents already in memory (e.g. compressed file)
+    // fall through
+  case cLoadTypeCCP4Str:
+  case cLoadTypeCCP4UnspecifiedStr:
   case cLoadTypeMRCStr:
     obj = ObjectMapLoadCCP4(G, (ObjectMap *) origObj, content,
-        state, true, size, quiet, content_format);
+        state, true, size, quiet, content_format, map_box);
     break;
   case cLoadTypeCGO:
     obj = ObjectCGOFromFloatArray(G, (ObjectCGO *) origObj,
@@ -5291,7 +5314,30 @@ static int ExecutiveSetSelectionsFromPyList(PyMOLGlobals * G, PyObject * names)
   return (!incomplete);
 }
 
-static PyObject *ExecutiveGetExecObjectAsPyList(PyMOLGlobals * G, SpecRec * rec)
+/**
+ * Incremental session saving: Look up the object's previous change stamp in
+ * `stamps` and store the current one.
+ *
+ * @param stamps Dictionary of object names to change stamps
+ * @return True if the object didn't change since the stamp in `stamps`
+ */
+static bool ExecutiveUpdateChangeStamp(pymol::CObject* obj, PyObject* stamps)
+{
+  auto stamp = PyLong_FromSize_t(obj->ChangeStamp);
+  auto prev = PyDict_GetItemString(stamps, obj->Name);
+  bool unchanged = prev && PyObject_RichCompareBool(prev, stamp, Py_EQ) == 1;
+  PyDict_SetItemString(stamps, obj->Name, stamp);
+  Py_DECREF(stamp);
+  return unchanged;
+}
+
+/**
+ * @param stamps If not null, skip objects which didn't change since the
+ * stamps in this dictionary (set their data to None), see
+ * ExecutiveGetSession
+ */
+static PyObject *ExecutiveGetExecObjectAsPyList(PyMOLGlobals * G, SpecRec * rec,
+    PyObject * stamps = nullptr)
 {
 
   PyObject *result = nullptr;
@@ -5305,6 +5351,10 @@ static PyObject *ExecutiveGetExecObjectAsPyList(PyMOLGlobals * G, SpecRec * rec)
       }
     }
   }
+
+  bool unchanged = stamps && ExecutiveUpdateChangeStamp(rec->obj, stamps) &&
+                   recobjtype == rec->obj->type;
+
   result = PyList_New(7);
   PyList_SetItem(result, 0, PyString_FromString(rec->obj->Name));
   PyList_SetItem(result, 1, PyInt_FromLong(cExecObject));
@@ -5312,49 +5362,54 @@ static PyObject *ExecutiveGetExecObjectAsPyList(PyMOLGlobals * G, SpecRec * rec)
   /* before version 1.8 item 3 was rec reps (repOn) */
   PyList_SetItem(result, 3, PConvAutoNone(nullptr));
   PyList_SetItem(result, 4, PyInt_FromLong(recobjtype));
-  switch (rec->obj->type) {
-  case cObjectGadget:
-    PyList_SetItem(result, 5, ObjectGadgetAsPyList((ObjectGadget *) rec->obj));
-    break;
-  case cObjectMolecule:
-    PyList_SetItem(result, 5, ObjectMoleculeAsPyList((ObjectMolecule *) rec->obj));
-    break;
-  case cObjectMeasurement:
-    PyList_SetItem(result, 5, ObjectDistAsPyList((ObjectDist *) rec->obj));
-    break;
-  case cObjectMap:
-    PyList_SetItem(result, 5, ObjectMapAsPyList((ObjectMap *) rec->obj));
-    break;
-  case cObjectMesh:
-    PyList_SetItem(result, 5, ObjectMeshAsPyList((ObjectMesh *) rec->obj));
-    break;
-  case cObjectSlice:
-    PyList_SetItem(result, 5, ObjectSliceAsPyList((ObjectSlice *) rec->obj));
-    break;
-  case cObjectSurface:
-    PyList_SetItem(result, 5, ObjectSurfaceAsPyList((ObjectSurface *) rec->obj));
-    break;
-  case cObjectCGO:
-    PyList_SetItem(result, 5, ObjectCGOAsPyList((ObjectCGO *) rec->obj));
-    break;
-  case cObjectAlignment:
-    PyList_SetItem(result, 5, ObjectAlignmentAsPyList((ObjectAlignment *) rec->obj));
-    break;
-  case cObjectGroup:
-    PyList_SetItem(result, 5, ObjectGroupAsPyList((ObjectGroup *) rec->obj));
-    break;
-  case cObjectVolume:
-    PyList_SetItem(result, 5, ObjectVolumeAsPyList((ObjectVolume *) rec->obj));
-    break;
-  case cObjectCallback:
-    PyList_SetItem(result, 5, ObjectCallbackAsPyList((ObjectCallback *) rec->obj));
-    break;
-  case cObjectCurve:
-    PyList_SetItem(result, 5, static_cast<ObjectCurve*>(rec->obj)->asPyList());
-    break;
-  default:
+  if (unchanged) {
+    // caller already has the data
     PyList_SetItem(result, 5, PConvAutoNone(nullptr));
-    break;
+  } else {
+    switch (rec->obj->type) {
+    case cObjectGadget:
+      PyList_SetItem(result, 5, ObjectGadgetAsPyList((ObjectGadget *) rec->obj));
+      break;
+    case cObjectMolecule:
+      PyList_SetItem(result, 5, ObjectMoleculeAsPyList((ObjectMolecule *) rec->obj));
+      break;
+    case cObjectMeasurement:
+      PyList_SetItem(result, 5, ObjectDistAsPyList((ObjectDist *) rec->obj));
+      break;
+    case cObjectMap:
+      PyList_SetItem(result, 5, ObjectMapAsPyList((ObjectMap *) rec->obj));
+      break;
+    case cObjectMesh:
+      PyList_SetItem(result, 5, ObjectMeshAsPyList((ObjectMesh *) rec->obj));
+      break;
+    case cObjectSlice:
+      PyList_SetItem(result, 5, ObjectSliceAsPyList((ObjectSlice *) rec->obj));
+      break;
+    case cObjectSurface:
+      PyList_SetItem(result, 5, ObjectSurfaceAsPyList((ObjectSurface *) rec->obj));
+      break;
+    case cObjectCGO:
+      PyList_SetItem(result, 5, ObjectCGOAsPyList((ObjectCGO *) rec->obj));
+      break;
+    case cObjectAlignment:
+      PyList_SetItem(result, 5, ObjectAlignmentAsPyList((ObjectAlignment *) rec->obj));
+      break;
+    case cObjectGroup:
+      PyList_SetItem(result, 5, ObjectGroupAsPyList((ObjectGroup *) rec->obj));
+      break;
+    case cObjectVolume:
+      PyList_SetItem(result, 5, ObjectVolumeAsPyList((ObjectVolume *) rec->obj));
+      break;
+    case cObjectCallback:
+      PyList_SetItem(result, 5, ObjectCallbackAsPyList((ObjectCallback *) rec->obj));
+      break;
+    case cObjectCurve:
+      PyList_SetItem(result, 5, static_cast<ObjectCurve*>(rec->obj)->asPyList());
+      break;
+    default:
+      PyList_SetItem(result, 5, PConvAutoNone(nullptr));
+      break;
+    }
   }
   PyList_SetItem(result, 6, PyString_FromString(rec->group_name));
 
@@ -5382,7 +5437,8 @@ static PyObject *ExecutiveGetExecSeleAsPyList(PyMOLGlobals * G, SpecRec * rec)
   return (PConvAutoNone(result));
 }
 
-static PyObject *ExecutiveGetNamedEntries(PyMOLGlobals * G, int list_id, int partial)
+static PyObject *ExecutiveGetNamedEntries(PyMOLGlobals * G, int list_id, int partial,
+    PyObject * stamps)
 {
   CExecutive *I = G->Executive;
   CTracker *I_Tracker = I->Tracker;
@@ -5414,7 +5470,7 @@ static PyObject *ExecutiveGetNamedEntries(PyMOLGlobals * G, int list_id, int par
     if(rec) {
       switch (rec->type) {
       case cExecObject:
-        PyList_SetItem(result, count, ExecutiveGetExecObjectAsPyList(G, rec));
+        PyList_SetItem(result, count, ExecutiveGetExecObjectAsPyList(G, rec, stamps));
         break;
       case cExecSelection:
         if(!partial) {
@@ -5449,8 +5505,17 @@ static PyObject *ExecutiveGetNamedEntries(PyMOLGlobals * G, int list_id, int par
 #include "ExecutiveEvalMessage.h"
 #endif
 
+/**
+ * Export the session into `dict`.
+ *
+ * @param names Names of objects to export, all objects if empty
+ * @param partial Only export objects (no selections, settings, view, ...)
+ * @param stamps Optional dictionary of object names to change stamps from a
+ * previous export (see pymol::CObject::markChanged). Objects with a matching
+ * stamp are exported without their data (None). All stamps get updated.
+ */
 int ExecutiveGetSession(PyMOLGlobals * G, PyObject * dict, const char *names, int partial,
-                        int quiet)
+                        int quiet, PyObject * stamps)
 {
   assert(PyGILState_Check());
 
@@ -5470,7 +5535,7 @@ int ExecutiveGetSession(PyMOLGlobals * G, PyObject * dict, const char *names, in
   PyDict_SetItemString(dict, "version", tmp);
   Py_XDECREF(tmp);
 
-  tmp = ExecutiveGetNamedEntries(G, list_id, partial);
+  tmp = ExecutiveGetNamedEntries(G, list_id, partial, stamps);
   PyDict_SetItemString(dict, "names", tmp);
   Py_XDECREF(tmp);
 
@@ -6393,6 +6458,113 @@ int ***ExecutiveGetBondPrint(PyMOLGlobals * G, const char *name, int max_bond, i
 #define cMapOperatorDifference 4
 #define cMapOperatorCopy     5
 #define cMapOperatorUnique   6
+#define cMapOperatorExpression 7
+
+/**
+ * Express one of the classic map_set operators as a map expression over the
+ * maps in `list_id` which have `state`.
+ */
+static MapExpression ExecutiveMapSetProgram(PyMOLGlobals* G, int operator_,
+    int list_id, const ObjectMap* first_operand, int state)
+{
+  using Op = MapExpression::Op;
+  CTracker* I_Tracker = G->Executive->Tracker;
+  MapExpression program;
+  int n_operand = 0;
+
+  switch (operator_) {
+  case cMapOperatorSum:
+  case cMapOperatorAverage:
+  case cMapOperatorDifference:
+  case cMapOperatorUnique:
+    program.push(Op::Constant, 0, 0.0F);
+  }
+
+  int iter_id = TrackerNewIter(I_Tracker, 0, list_id);
+  SpecRec* rec;
+  while (TrackerIterNextCandInList(
+      I_Tracker, iter_id, (TrackerRef**) (void*) &rec)) {
+    if (!rec || rec->type != cExecObject || rec->obj->type != cObjectMap)
+      continue;
+
+    auto* obj = (ObjectMap*) rec->obj;
+    if (!ObjectMapGetState(obj, state))
+      continue;
+
+    int index = program.addMap(obj);
+
+    switch (operator_) {
+    case cMapOperatorCopy:
+      // only the last operand counts
+      program = MapExpression();
+      program.push(Op::Load, program.addMap(obj));
+      break;
+    case cMapOperatorMinimum:
+    case cMapOperatorMaximum:
+      program.push(Op::Load, index);
+      if (n_operand)
+        program.push(
+            operator_ == cMapOperatorMinimum ? Op::Minimum : Op::Maximum);
+      break;
+    case cMapOperatorDifference:
+    case cMapOperatorUnique:
+      program.push(Op::Load, index);
+      program.push(obj == first_operand ? Op::Add : Op::Subtract);
+      break;
+    default:
+      program.push(Op::Load, index);
+      program.push(Op::Add);
+    }
+
+    ++n_operand;
+  }
+  TrackerDelIter(I_Tracker, iter_id);
+
+  switch (operator_) {
+  case cMapOperatorAverage:
+    if (n_operand) {
+      program.push(Op::Constant, 0, float(n_operand));
+      program.push(Op::Divide);
+    }
+    break;
+  case cMapOperatorUnique:
+    program.push(Op::Constant, 0, 0.0F);
+    program.push(Op::Maximum);
+    break;
+  }
+
+  return program;
+}
+
+/**
+ * True if all maps in `list_id` which have any of the given states are on
+ * the same grid as `first_operand`, so that its geometry can be used for the
+ * result without interpolation.
+ */
+static bool ExecutiveMapSetSameGrid(PyMOLGlobals* G, int list_id,
+    const ObjectMap* first_operand, int state_start, int state_stop)
+{
+  CTracker* I_Tracker = G->Executive->Tracker;
+  bool same = true;
+
+  for (int state = state_start; same && state < state_stop; ++state) {
+    auto* first_ms = ObjectMapGetState(first_operand, state);
+    int iter_id = TrackerNewIter(I_Tracker, 0, list_id);
+    SpecRec* rec;
+    while (same && TrackerIterNextCandInList(
+                       I_Tracker, iter_id, (TrackerRef**) (void*) &rec)) {
+      if (!rec || rec->type != cExecObject || rec->obj->type != cObjectMap)
+        continue;
+      auto* ms = ObjectMapGetState((ObjectMap*) rec->obj, state);
+      if (ms) {
+        same = first_ms && ObjectMapStateSameGrid(first_ms, ms);
+      }
+    }
+    TrackerDelIter(I_Tracker, iter_id);
+  }
+
+  return same;
+}
 
 pymol::Result<> ExecutiveMapSet(PyMOLGlobals* G, const char* name,
     int operator_, const char* operands, int target_state, int source_state,
@@ -6404,6 +6576,29 @@ pymol::Result<> ExecutiveMapSet(PyMOLGlobals* G, const char* name,
   ObjectMap *target = ExecutiveFindObjectMapByName(G, name);
   ObjectMap *first_operand = nullptr;
   int src_state_start = 0, src_state_stop = 0;
+
+  /* for expressions, the operands are the referenced maps */
+
+  pymol::Result<MapExpression> expression;
+  std::string operand_names;
+
+  if(operator_ == cMapOperatorExpression) {
+    expression = MapExpression::parse(operands);
+    if(!expression)
+      return expression.error();
+
+    const auto& names = expression.result().names();
+    for(size_t i = 0; i < names.size(); ++i) {
+      auto* obj = ExecutiveFindObjectMapByName(G, names[i].c_str());
+      if(!obj)
+        return pymol::make_error("Map '", names[i], "' not found.");
+      expression.result().setMap(i, obj);
+      operand_names.append(names[i]).append(" ");
+    }
+
+    operands = operand_names.c_str();
+  }
+
   int list_id = ExecutiveGetNamesListFromPattern(G, operands, true, true);
 
   if(target_state < 0)          /* if we're targeting all states, 0 is the offset */
@@ -6493,10 +6688,20 @@ pymol::Result<> ExecutiveMapSet(PyMOLGlobals* G, const char* name,
         break;
       case cMapOperatorUnique:
       case cMapOperatorCopy:
+      case cMapOperatorExpression:
         need_first_geometry = true;
         break;
       }
 
+      /* operands on identical grids: the result is exact, no interpolation */
+
+      if(need_union_geometry && first_operand &&
+          ExecutiveMapSetSameGrid(G, list_id, first_operand,
+            src_state_start, src_state_stop)) {
+        need_union_geometry = false;
+        need_first_geometry = true;
+      }
+
       if(need_union_geometry) {
         int src_state, trg_state;
         ObjectMapDesc desc;
@@ -6597,193 +6802,35 @@ pymol::Result<> ExecutiveMapSet(PyMOLGlobals* G, const char* name,
 
   /* now do the actual operation */
 
-  int src_state;
-  for(src_state = src_state_start; src_state < src_state_stop; src_state++) {
+  for(int src_state = src_state_start; src_state < src_state_stop; src_state++) {
     int trg_state = src_state + target_state;
-    ObjectMapState *ms;
     VecCheckEmplace(target->State, trg_state, G);
 
-    ms = &target->State[target_state];
-    if(ms->Active) {
-      int iter_id = TrackerNewIter(I_Tracker, 0, list_id);
-      int n_pnt = (ms->Field->points->size() / ms->Field->points->base_size) / 3;
-      float *pnt = (float *) ms->Field->points->data.data();
-      float *r_value = pymol::malloc<float>(n_pnt);
-      float *l_value = pymol::calloc<float>(n_pnt);
-      int *present = pymol::calloc<int>(n_pnt);
-      int *inside = pymol::malloc<int>(n_pnt);
-      SpecRec *rec;
-
-      while(TrackerIterNextCandInList(I_Tracker, iter_id,
-                                      (TrackerRef **) (void *) &rec)) {
-        if(rec) {
-          if(rec->type == cExecObject) {
-            if(rec->obj->type == cObjectMap) {
-              ObjectMap *obj = (ObjectMap *) rec->obj;
-              if (ObjectMapInterpolate(obj, src_state, pnt, r_value, inside, n_pnt))
-              {
-                int a;
-                float *rv = r_value;
-                float *lv = l_value;
-                int *flg = inside;
-                int *pre = present;
-
-                switch (operator_) {
-                case cMapOperatorCopy:
-                  for(a = 0; a < n_pnt; a++) {
-                    if(flg) {
-                      *lv = *rv;
-                    }
-                    rv++;
-                    lv++;
-                    flg++;
-                  }
-                  break;
-                case cMapOperatorMinimum:
-                  for(a = 0; a < n_pnt; a++) {
-                    if(flg) {
-                      if(*pre) {
-                        if(*lv > *rv)
-                          *lv = *rv;
-                      } else {        /* first map */
-                        *pre = 1;
-                        *lv = *rv;
-                      }
-
-                    }
-                    rv++;
-                    lv++;
-                    flg++;
-                    pre++;
-                  }
-                  break;
-                case cMapOperatorMaximum:
-                  for(a = 0; a < n_pnt; a++) {
-                    if(flg) {
-                      if(*pre) {
-                        if(*lv < *rv)
-                          *lv = *rv;
-                      } else {        /* first map */
-                        *pre = 1;
-                        *lv = *rv;
-                      }
-                    }
-                    rv++;
-                    lv++;
-                    flg++;
-                    pre++;
-                  }
-                  break;
-                case cMapOperatorSum:
-                  for(a = 0; a < n_pnt; a++) {
-                    if(flg) {
-                      *lv += *rv;
-                    }
-                    rv++;
-                    lv++;
-                    flg++;
-                  }
-                  break;
-                case cMapOperatorAverage:
-                  for(a = 0; a < n_pnt; a++) {
-                    if(flg) {
-                      *lv += *rv;
-                    }
-                    (*pre)++;
-                    rv++;
-                    lv++;
-                    flg++;
-                    pre++;
-                  }
-                  break;
-                case cMapOperatorDifference:
-                  if(obj != first_operand) {
-                    for(a = 0; a < n_pnt; a++) {
-                      if(flg) {
-                        *lv -= *rv;
-                      }
-                      rv++;
-                      lv++;
-                      flg++;
-                    }
-                  } else {
-                    for(a = 0; a < n_pnt; a++) {
-                      if(flg) {
-                        *lv += *rv;
-                      }
-                      rv++;
-                      lv++;
-                      flg++;
-                    }
-                  }
-                  break;
-                case cMapOperatorUnique:
-                  if(obj != first_operand) {
-                    for(a = 0; a < n_pnt; a++) {
-                      if(flg) {
-                        *lv -= *rv;
-                      }
-                      rv++;
-                      lv++;
-                      flg++;
-                    }
-                  } else {
-                    for(a = 0; a < n_pnt; a++) {
-                      if(flg) {
-                        *lv += *rv;
-                      }
-                      rv++;
-                      lv++;
-                      flg++;
-                    }
-                  }
+    ObjectMapState *ms = &target->State[trg_state];
+    if(!ms->Active)
+      continue;
 
-                  break;
-                }
-              }
-            }
-          }
-        }
-      }
+    MapExpression program = (operator_ == cMapOperatorExpression)
+                                ? expression.result()
+                                : ExecutiveMapSetProgram(G, operator_, list_id,
+                                      first_operand, src_state);
 
-      {
-        int a;
-        float *lv = l_value;
-        int *pre = present;
-
-        switch (operator_) {
-        case cMapOperatorUnique:
-          lv = l_value;
-          for(a = 0; a < n_pnt; a++) {
-            if(*lv < 0.0F)
-              *lv = 0.0F;
-            lv++;
-          }
-          break;
-        case cMapOperatorAverage:
-          lv = l_value;
-          pre = present;
-          for(a = 0; a < n_pnt; a++) {
-            if(*pre)
-              *lv /= *pre;
-            lv++;
-            pre++;
-          }
-        }
-      }
+    int n_pnt = (ms->Field->points->size() / ms->Field->points->base_size) / 3;
+    std::vector<float> values(n_pnt);
 
-      /* copy after calculation so that operand can include target */
+    auto evaluated = program.evaluate(G, ms, src_state, values.data());
+    if(!evaluated) {
+      PRINTFB(G, FB_Executive, FB_Warnings)
+        " MapSet-Warning: %s, skipping state %d.\n",
+        evaluated.error().what().c_str(), trg_state + 1 ENDFB(G);
+      continue;
+    }
 
-      memcpy(ms->Field->data->data.data(), l_value, n_pnt * sizeof(float));
+    /* copy after calculation so that operand can include target */
 
-      FreeP(present);
-      FreeP(l_value);
-      FreeP(r_value);
-      FreeP(inside);
-      TrackerDelIter(I_Tracker, iter_id);
-    }
+    std::copy(values.begin(), values.end(), ms->Field->data->ptr<float>(0, 0, 0));
+    IsofieldInvalidate(ms->Field.get());
   }
-  
 
   /* and finally, update */
 
@@ -9013,6 +9060,7 @@ void ExecutiveRebuildAll(PyMOLGlobals * G)
         break;
       case cObjectMolecule:
         level = defer_builds_mode ? cRepInvPurge : cRepInvRep;
+      case cObjectMap:
       case cObjectSurface:
       case cObjectMesh:
       case cObjectSlice:
@@ -10292,6 +10340,7 @@ pymol::Result<int> ExecutiveIterateList(PyMOLGlobals* G, const char* str1,
       }
     }
     if (!read_only) {
+      SelectorTouchObject(obj);
       SeqChanged(G);
     }
   }
@@ -10302,6 +10351,80 @@ pymol::Result<int> ExecutiveIterateList(PyMOLGlobals* G, const char* str1,
 #endif
 }
 
+#ifndef _PYMOL_NOPY
+/**
+ * Atoms of a selection, in the same order as `iterate`
+ */
+static pymol::Result<PAtomRefs> ExecutiveGetAtomRefs(
+    PyMOLGlobals* G, const char* s1)
+{
+  auto tmpsele1 = SelectorTmp::make(G, s1, false);
+  p_return_if_error(tmpsele1);
+
+  SelectorUpdateTable(G, cSelectorUpdateTableAllStates, -1);
+
+  PAtomRefs atoms;
+  SeleAtomIterator iter(G, tmpsele1->getIndex());
+  while (iter.next()) {
+    atoms.emplace_back(iter.obj, iter.getAtm());
+  }
+  return atoms;
+}
+#endif
+
+/**
+ * Get atom properties as numpy arrays, see PGetAtomPropertyArrays
+ */
+pymol::Result<PyObject*> ExecutiveGetAtomProperties(PyMOLGlobals* G,
+    const char* s1, const std::vector<std::string>& names)
+{
+#ifdef _PYMOL_NOPY
+  return pymol::make_error("Not available.");
+#else
+  auto atoms = ExecutiveGetAtomRefs(G, s1);
+  p_return_if_error(atoms);
+  return PGetAtomPropertyArrays(G, *atoms, names);
+#endif
+}
+
+/**
+ * Set atom properties from arrays, see PSetAtomPropertyArrays
+ * @return Number of modified atoms
+ */
+pymol::Result<int> ExecutiveSetAtomProperties(
+    PyMOLGlobals* G, const char* s1, PyObject* values, int quiet)
+{
+#ifdef _PYMOL_NOPY
+  return pymol::make_error("Not available.");
+#else
+  auto atoms = ExecutiveGetAtomRefs(G, s1);
+  p_return_if_error(atoms);
+
+  auto result = PSetAtomPropertyArrays(G, *atoms, values);
+
+  // also after partial modification
+  ObjectMolecule* prev = nullptr;
+  for (auto const& atom : *atoms) {
+    if (atom.first != prev) {
+      SelectorTouchObject(prev = atom.first);
+    }
+  }
+
+  p_return_if_error(result);
+
+  if (!quiet) {
+    PRINTFB(G, FB_Executive, FB_Actions)
+      " SetAtomProperties: modified %zu atoms.\n", atoms->size() ENDFB(G);
+  }
+
+  if (!atoms->empty()) {
+    SeqChanged(G);
+  }
+
+  return int(atoms->size());
+#endif
+}
+
 
 /*========================================================================*/
 #ifdef _WEBGL
@@ -11963,6 +12086,7 @@ pymol::Result<> ExecutiveSetSetting(PyMOLGlobals * G, int index, PyObject * tupl
                 handle = rec->obj->getSettingHandle(state);
                 if(handle) {
                   SettingCheckHandle(G, *handle);
+                  rec->obj->markChanged();
                   ok = SettingSetFromTuple(G, handle->get(), index, tuple);
                   if(updates)
                     side_effects = true;
@@ -12085,6 +12209,7 @@ pymol::Result<> ExecutiveSetSetting(PyMOLGlobals * G, int index, PyObject * tupl
             handle = rec->obj->getSettingHandle(state);
             if(handle) {
               SettingCheckHandle(G, *handle);
+              rec->obj->markChanged();
               ok = SettingSetFromTuple(G, handle->get(), index, tuple);
               if(ok) {
                 if(updates)
@@ -12271,6 +12396,7 @@ int ExecutiveSetSettingFromString(PyMOLGlobals * G,
                 handle = rec->obj->getSettingHandle(state);
                 if(handle) {
                   SettingCheckHandle(G, *handle);
+                  rec->obj->markChanged();
                   ok = SettingSetFromString(G, handle->get(), index, value);
                   if(updates)
                     SettingGenerateSideEffects(G, index, rec->name, state, quiet);
@@ -12335,6 +12461,7 @@ int ExecutiveSetSettingFromString(PyMOLGlobals * G,
             handle = rec->obj->getSettingHandle(state);
             if(handle) {
               SettingCheckHandle(G, *handle);
+              rec->obj->markChanged();
               ok = SettingSetFromString(G, handle->get(), index, value);
               if(ok) {
                 if(updates)
@@ -12400,6 +12527,7 @@ int ExecutiveSetObjSettingFromString(PyMOLGlobals * G,
       handle = obj->getSettingHandle(state);
       if(handle) {
         SettingCheckHandle(G, *handle);
+        obj->markChanged();
         ok = SettingSetFromString(G, handle->get(), index, value);
         if(ok) {
           if(updates)
@@ -12486,6 +12614,7 @@ pymol::Result<> ExecutiveUnsetSetting(PyMOLGlobals * G, int index, pymol::zstrin
               {
                 handle = rec->obj->getSettingHandle(state);
                 if (handle && *handle && SettingUnset(handle->get(), index)) {
+                  rec->obj->markChanged();
                   nObj++;
                 }
               }
@@ -12542,6 +12671,7 @@ pymol::Result<> ExecutiveUnsetSetting(PyMOLGlobals * G, int index, pymol::zstrin
           {
             handle = rec->obj->getSettingHandle(state);
             if (handle && *handle && SettingUnset(handle->get(), index)) {
+                rec->obj->markChanged();
                 if(!quiet) {
                   if(state < 0) {       /* object-specific */
                     if(Feedback(G, FB_Setting, FB_Actions)) {
@@ -16388,6 +16518,7 @@ pymol::Result<> ExecutiveReinitialize(PyMOLGlobals * G, int what, pymol::zstring
 #endif
 
       SculptCachePurge(G);
+      SurfaceCachePurge(G);
       SceneReinitialize(G);
       SelectorReinit(G);
       SeqChanged(G);
@@ -16598,58 +16729,82 @@ PyObject * ExecutiveCEAlign(PyMOLGlobals * G, PyObject * listA, PyObject * listB
 #ifdef _PYMOL_NOPY
   return nullptr;
 #else
-  int i=0;
-  int smaller;
-  double **dmA ,**dmB, **S;
-  int bufferSize;
-  pcePoint coordsA, coordsB;
-  pathCache paths = nullptr;
-  PyObject * result;
-
-  smaller = lenA < lenB ? lenA : lenB;
-	
   /* get the coodinates from the Python objects */
-  coordsA = (pcePoint) getCoords(listA, lenA);
-  coordsB = (pcePoint) getCoords(listB, lenB);
-	
-  /* calculate the distance matrix for each protein */
-  dmA = (double**) calcDM(coordsA, lenA);
-  dmB = (double**) calcDM(coordsB, lenB);
-	
-  /* calculate the CE Similarity matrix */
-  S = (double**) calcS(dmA, dmB, lenA, lenB, windowSize);
-	
-  /* find the best path through the CE Sim. matrix */
-  bufferSize = 0;
-
-  /* the following line HANGS PyMOL */
-  paths = (pathCache) findPath(S, dmA, dmB, lenA, lenB, d0, d1, windowSize, gapMax, &bufferSize);
-	
-  /* Get the optimal superposition here... */
-  result = (PyObject*) findBest(coordsA, coordsB, paths, bufferSize, smaller, windowSize);
-	
-  /* release memory */
-  free(coordsA);
-  free(coordsB);
-  for ( i = 0; i < bufferSize; ++i )
-    free(paths[i]);
-  free(paths);
-	
-  /* distance matrices	 */
-  for ( i = 0; i < lenA; i++ )
-    free( dmA[i] );
-  free(dmA);
-	
-  for  ( i = 0; i < lenB; i++ )
-    free( dmB[i] );
-  free(dmB);
-	
-  /* similarity matrix */
-  for ( i = 0; i < lenA; i++ )
-    free( S[i] );
-  free(S);
-	
-  return (PyObject*) result;
+  auto coordsA = getCoords(listA, lenA);
+  auto coordsB = getCoords(listB, lenB);
+
+  int nThread = std::max(1, SettingGetGlobal_i(G, cSetting_max_threads));
+
+  ceResult result;
+  if (!ceAlign(coordsA, coordsB, d0, d1, windowSize, gapMax, nThread, result))
+    return nullptr;
+
+  return ceResultAsPyList(result);
+#endif
+}
+
+/**
+ * CE alignment of all pairs of coordinate lists. Every pair is aligned once
+ * (first list as target) and pairs are distributed over threads. Returns
+ * (rmsd, length, tm) lists of n*n values in row-major order, where tm[i*n+j]
+ * is normalized by the length of list i.
+ *
+ * Caller must hold the API lock and the GIL, the GIL is released while the
+ * pairs are aligned.
+ */
+PyObject* ExecutiveCEAlignMatrix(PyMOLGlobals* G, PyObject* lists, float d0,
+    float d1, int windowSize, int gapMax, int nThread)
+{
+#ifdef _PYMOL_NOPY
+  return nullptr;
+#else
+  const int n = PyList_Size(lists);
+
+  std::vector<std::vector<cePoint>> coords(n);
+  for (int i = 0; i < n; ++i) {
+    PyObject* list = PyList_GetItem(lists, i);
+    coords[i] = getCoords(list, PyList_Size(list));
+  }
+
+  std::vector<std::pair<int, int>> pairs;
+  for (int i = 0; i < n; ++i)
+    for (int j = i + 1; j < n; ++j)
+      pairs.emplace_back(i, j);
+
+  std::vector<double> rmsd(n * n, 0.0), tm(n * n, 1.0);
+  std::vector<int> length(n * n, 0);
+
+  for (int i = 0; i < n; ++i)
+    length[i * n + i] = coords[i].size();
+
+  PUnblock(G);
+
+#pragma omp parallel for if (nThread > 1) num_threads(nThread) schedule(dynamic)
+  for (int p = 0; p < (int) pairs.size(); ++p) {
+    const int i = pairs[p].first, ij = i * n + pairs[p].second;
+    const int j = pairs[p].second, ji = j * n + i;
+    const auto& coordsA = coords[i];
+    const auto& coordsB = coords[j];
+
+    ceResult result;
+    if ((int) coordsA.size() < 2 * windowSize ||
+        (int) coordsB.size() < 2 * windowSize ||
+        !ceAlign(coordsA, coordsB, d0, d1, windowSize, gapMax, 1, result)) {
+      rmsd[ij] = rmsd[ji] = -1.0;
+      tm[ij] = tm[ji] = 0.0;
+      continue;
+    }
+
+    rmsd[ij] = rmsd[ji] = result.rmsd;
+    length[ij] = length[ji] = result.length;
+    tm[ij] = ceTMScore(coordsA, coordsB, result, windowSize, coordsA.size());
+    tm[ji] = ceTMScore(coordsA, coordsB, result, windowSize, coordsB.size());
+  }
+
+  PBlock(G);
+
+  return Py_BuildValue("NNN", PConvToPyObject(rmsd), PConvToPyObject(length),
+      PConvToPyObject(tm));
 #endif
 }
 
@@ -16917,7 +17072,7 @@ pymol::Result<> ExecutiveAddBondByIndices(PyMOLGlobals* G,
 pymol::Result<> ExecutiveLoadTraj(PyMOLGlobals* G, pymol::zstring_view oname,
     pymol::zstring_view fname, int frame, int type, int interval, int average,
     int start, int stop, int max, pymol::zstring_view str1, int image,
-    const float* shift, pymol::zstring_view plugin, int quiet)
+    const float* shift, pymol::zstring_view plugin, int quiet, bool lazy)
 {
   auto  s1 = SelectorTmp::make(G, str1.c_str());
   p_return_if_error(s1);
@@ -16934,6 +17089,11 @@ pymol::Result<> ExecutiveLoadTraj(PyMOLGlobals* G, pymol::zstring_view oname,
   switch (type) {
   case cLoadTypeTRJ: /* this is the ascii AMBER trajectory format... */
     PRINTFD(G, FB_CCmd) " ExecutiveLoadTraj-DEBUG: loading TRJ\n" ENDFD;
+    if (lazy) {
+      PRINTFB(G, FB_Executive, FB_Warnings)
+        " ExecutiveLoadTraj-Warning: lazy loading not supported for TRJ files.\n"
+        ENDFB(G);
+    }
     ObjectMoleculeLoadTRJFile(G, (ObjectMolecule*) origObj, fname.c_str(), frame,
         interval, average, start, stop, max, s1->getName(), image, shift, quiet);
     PRINTFB(G, FB_Executive, FB_Actions)
@@ -16944,7 +17104,7 @@ pymol::Result<> ExecutiveLoadTraj(PyMOLGlobals* G, pymol::zstring_view oname,
   default:
     ok = PlugIOManagerLoadTraj(G, (ObjectMolecule*) origObj, fname.c_str(), frame,
         interval, average, start, stop, max, s1->getName(), image, shift, quiet,
-        plugin.c_str());
+        plugin.c_str(), lazy);
   }
   if(ok) {
     return {};
@@ -282,6 +282,10 @@ pymol::Result<int> ExecutiveIterate(PyMOLGlobals * G, const char *str1, const ch
 #endif
 pymol::Result<int> ExecutiveIterateList(PyMOLGlobals* G, const char* s1,
     PyObject* list, int read_only, int quiet, PyObject* space);
+pymol::Result<PyObject*> ExecutiveGetAtomProperties(PyMOLGlobals* G,
+    const char* s1, const std::vector<std::string>& names);
+pymol::Result<int> ExecutiveSetAtomProperties(
+    PyMOLGlobals* G, const char* s1, PyObject* values, int quiet);
 
 struct SelectArgs
 {
@@ -642,7 +646,7 @@ pymol::Result<> ExecutiveSymmetryCopy(PyMOLGlobals * G,
 			  const char *source_name, const char *target_name,
 			  int source_state, int target_state, int quiet);
 int ExecutiveGetSession(PyMOLGlobals * G, PyObject * dict, const char *names, int partial,
-                        int quiet);
+                        int quiet, PyObject * stamps = nullptr);
 int ExecutiveSetSession(PyMOLGlobals * G, PyObject * session, int partial_restore,
                         int quiet);
 int ExecutiveSetSessionNoMLock(PyMOLGlobals* G, PyObject* session);
@@ -791,6 +795,8 @@ int ExecutiveAssignAtomTypes(PyMOLGlobals * G, const char *s1, int format, int s
 
 PyObject * ExecutiveCEAlign(PyMOLGlobals * G, PyObject * listA, PyObject * listB, int lenA, int lenB,
 			    float d0, float d1, int windowSize, int gapMax);
+PyObject* ExecutiveCEAlignMatrix(PyMOLGlobals* G, PyObject* lists, float d0,
+    float d1, int windowSize, int gapMax, int nThread);
 
 pymol::Result<> ExecutiveSetFeedbackMask(
     PyMOLGlobals* G, int action, unsigned int sysmod, unsigned char mask);
@@ -852,7 +858,8 @@ void ExecutiveInvalidateMapDependents(
 pymol::Result<> ExecutiveLoadTraj(PyMOLGlobals* G, pymol::zstring_view oname,
     pymol::zstring_view fname, int frame, int type, int interval, int average,
     int start, int stop, int max, pymol::zstring_view str1, int image,
-    const float* shift, pymol::zstring_view plugin, int quiet);
+    const float* shift, pymol::zstring_view plugin, int quiet,
+    bool lazy = false);
 
 pymol::TrackerAdapter<SpecRec> ExecutiveGetSpecRecParents(
     PyMOLGlobals* G, SpecRec& rec);
@@ -19,6 +19,8 @@ struct ExecutiveLoadArgs {
   std::string atom_props;
   bool mimic;
   int plugin_mask = 0;
+  //! CCP4/MRC maps: min and max corner of the region to load (empty = all)
+  std::vector<float> map_box;
 };
 
 /**
@@ -16,6 +16,8 @@ Z* -------------------------------------------------------------------
 */
 
 #include <algorithm>
+#include <memory>
+#include <string>
 #include <vector>
 
 #include"os_python.h"
@@ -36,6 +38,7 @@ Z* -------------------------------------------------------------------
 #include "PyMOLGlobals.h"
 #include "ObjectMolecule.h"
 #include "ObjectMap.h"
+#include "TrajectoryCache.h"
 
 #ifndef _PYMOL_VMD_PLUGINS
 int PlugIOManagerInit(PyMOLGlobals * G)
@@ -58,7 +61,8 @@ int PlugIOManagerLoadTraj(PyMOLGlobals * G, ObjectMolecule * obj,
                           const char *fname, int frame,
                           int interval, int average, int start,
                           int stop, int max, const char *sele, int image,
-                          const float *shift, int quiet, const char *plugin_type)
+                          const float *shift, int quiet, const char *plugin_type,
+                          bool lazy)
 {
 
   PRINTFB(G, FB_ObjectMolecule, FB_Errors)
@@ -150,11 +154,92 @@ static molfile_plugin_t* find_plugin(
 static CSymmetry* SymmetryNewFromTimestep(
     PyMOLGlobals* G, molfile_timestep_t* ts);
 
+/**
+ * Reads timesteps on demand with a molfile plugin. Plugins can only read
+ * forward, so going back reopens the file. Skipped timesteps are not
+ * decoded (read_next_timestep with a null timestep).
+ */
+class MolfileFrameReader : public TrajectoryFrameReader
+{
+  PyMOLGlobals* m_G;
+  molfile_plugin_t* m_plugin;
+  std::string m_fname;
+  std::string m_plugin_type;
+  int m_natoms;
+  void* m_handle = nullptr;
+  std::size_t m_cursor = 0; ///< index of the next timestep in the file
+
+  void close()
+  {
+    if (m_handle) {
+      m_plugin->close_file_read(m_handle);
+      m_handle = nullptr;
+    }
+  }
+
+public:
+  MolfileFrameReader(PyMOLGlobals* G, molfile_plugin_t* plugin,
+      const char* fname, const char* plugin_type, int natoms)
+      : m_G(G)
+      , m_plugin(plugin)
+      , m_fname(fname)
+      , m_plugin_type(plugin_type)
+      , m_natoms(natoms)
+  {
+  }
+
+  ~MolfileFrameReader() override { close(); }
+
+  int natoms() const override { return m_natoms; }
+
+  pymol::Result<> read(std::size_t index, float* coords,
+      std::unique_ptr<CSymmetry>& symmetry) override
+  {
+    if (m_handle && m_cursor > index) {
+      close();
+    }
+
+    if (!m_handle) {
+      int natoms = 0;
+      m_handle = m_plugin->open_file_read(
+          m_fname.c_str(), m_plugin_type.c_str(), &natoms);
+      m_cursor = 0;
+      if (!m_handle) {
+        return pymol::make_error("plugin '", m_plugin_type, "' cannot open '",
+            m_fname, "'");
+      }
+    }
+
+    for (; m_cursor < index; ++m_cursor) {
+      if (m_plugin->read_next_timestep(m_handle, m_natoms, nullptr)) {
+        close();
+        return pymol::make_error("'", m_fname, "' has no timestep ",
+            index + 1);
+      }
+    }
+
+    molfile_timestep_t timestep{};
+    timestep.coords = coords;
+
+    if (m_plugin->read_next_timestep(m_handle, m_natoms, &timestep)) {
+      close();
+      return pymol::make_error("cannot read timestep ", index + 1, " of '",
+          m_fname, "'");
+    }
+
+    ++m_cursor;
+    symmetry.reset(SymmetryNewFromTimestep(m_G, &timestep));
+
+    return {};
+  }
+};
+
 int PlugIOManagerLoadTraj(PyMOLGlobals * G, ObjectMolecule * obj,
                           const char *fname, int frame,
                           int interval, int average, int start,
                           int stop, int max, const char *sele, int image,
-                          const float *shift, int quiet, const char *plugin_type)
+                          const float *shift, int quiet, const char *plugin_type,
+                          bool lazy)
 {
   CPlugIOManager *I = G->PlugIOManager;
   molfile_plugin_t *plugin = nullptr;
@@ -225,13 +310,26 @@ int PlugIOManagerLoadTraj(PyMOLGlobals * G, ObjectMolecule * obj,
 
       auto xref = LoadTrajSeleHelper(obj, cs, sele);
 
+      /* lazy mode: only count the timesteps, they are read from the file
+       * when needed, see TrajectoryCache */
+      std::shared_ptr<TrajectoryFrameStore> store;
+      std::vector<std::pair<int, std::size_t>> lazy_frames;
+      if(lazy) {
+        store = std::make_shared<TrajectoryFrameStore>(cs,
+            std::unique_ptr<TrajectoryFrameReader>(new MolfileFrameReader(
+                G, plugin, fname, plugin_type, natoms)),
+            xref ? std::vector<int>(xref.get(), xref.get() + natoms)
+                 : std::vector<int>());
+      }
+
       auto coordbuf = std::vector<float>(natoms * 3);
       timestep.coords = coordbuf.data();
 
       {
 	  /* read_next_timestep fills in &timestep for each iteration; we need
 	   * to copy that out to a new CoordSet, each time. */
-          while(!plugin->read_next_timestep(file_handle, natoms, &timestep)) {
+          while(!plugin->read_next_timestep(file_handle, natoms,
+                store ? nullptr : &timestep)) {
             cnt++;
 	    /* start at the 'start'-th frame; skip 'start' frames,
 	     * and skip every interval/icnt frames */
@@ -250,7 +348,7 @@ int PlugIOManagerLoadTraj(PyMOLGlobals * G, ObjectMolecule * obj,
                     " ObjectMolecule: averaging set %d...\n", cnt ENDFB(G);
                 } else {
                   /* compute average */
-                  if(n_avg > 1) {
+                  if(!store && n_avg > 1) {
                     // TODO this doesn't make any sense
                     float* fp = timestep.coords;
                     for (int i = 0; i < natoms; ++i) {
@@ -261,7 +359,7 @@ int PlugIOManagerLoadTraj(PyMOLGlobals * G, ObjectMolecule * obj,
                   }
                   /* add new coord set */
 
-                  for (int i = 0; i < natoms; ++i) {
+                  for (int i = 0; !store && i < natoms; ++i) {
                     int idx = xref ? xref[i] : i;
                     if (idx >= 0) {
                       assert(idx < cs->NIndex);
@@ -280,8 +378,19 @@ int PlugIOManagerLoadTraj(PyMOLGlobals * G, ObjectMolecule * obj,
                   if(obj->NCSet <= frame) obj->NCSet = frame + 1;
 		  /* if there's data in this state's coordset, emtpy it */
                   delete obj->CSet[frame];
-		  /* set this state's coordset to cs */
-                  obj->CSet[frame] = cs;
+                  obj->CSet[frame] = nullptr;
+
+                  if(store) {
+                    lazy_frames.emplace_back(frame, store->append(cnt - 1, n_avg));
+                  } else {
+                    // symmetry
+                    cs->Symmetry.reset(SymmetryNewFromTimestep(G, &timestep));
+
+                    if(obj->LazyStates)
+                      obj->LazyStates->forget(frame);
+		    /* set this state's coordset to cs */
+                    obj->CSet[frame] = cs;
+                  }
                   ncnt++;
                   if(average < 2) {
                     PRINTFB(G, FB_ObjectMolecule, FB_Details)
@@ -295,17 +404,16 @@ int PlugIOManagerLoadTraj(PyMOLGlobals * G, ObjectMolecule * obj,
                       ENDFB(G);
                   }
 
-                  // symmetry
-                  cs->Symmetry.reset(SymmetryNewFromTimestep(G, &timestep));
-
                   if((stop > 0 && cnt >= stop) || (max > 0 && ncnt >= max)) {
-                    cs = nullptr;
+                    if(!store)
+                      cs = nullptr;
                     break;
                   }
 
                   frame++;
                   /* make a new cs */
-                  cs = CoordSetCopy(cs);        /* otherwise, we need a place to put the next set */
+                  if(!store)
+                    cs = CoordSetCopy(cs);        /* otherwise, we need a place to put the next set */
                   n_avg = 0;
                 }
               }
@@ -317,6 +425,19 @@ int PlugIOManagerLoadTraj(PyMOLGlobals * G, ObjectMolecule * obj,
         }
         plugin->close_file_read(file_handle);
         delete cs;
+
+        if(store) {
+          if(!obj->LazyStates)
+            obj->LazyStates.reset(new TrajectoryCache());
+          for(auto const& lazy_frame : lazy_frames)
+            obj->LazyStates->set(lazy_frame.first, store, lazy_frame.second);
+          if(zoom_flag && !lazy_frames.empty())
+            obj->getCoordSet(lazy_frames.front().first); /* for auto zoom */
+          PRINTFB(G, FB_ObjectMolecule, FB_Details)
+            " ObjectMolecule: %zu states will be read on demand from '%s'.\n",
+            lazy_frames.size(), fname ENDFB(G);
+        }
+
         SceneChanged(G);
         SceneCountFrames(G);
         if(zoom_flag)
@@ -325,9 +446,8 @@ int PlugIOManagerLoadTraj(PyMOLGlobals * G, ObjectMolecule * obj,
           }
 
         auto const defer_limit = SettingGet<int>(G, cSetting_auto_defer_builds);
-        if (defer_limit >= 0                   //
-            && obj->getNFrame() >= defer_limit //
-            && SettingGet<int>(G, cSetting_defer_builds_mode) <= 0) {
+        if ((store || (defer_limit >= 0 && obj->getNFrame() >= defer_limit)) &&
+            SettingGet<int>(G, cSetting_defer_builds_mode) <= 0) {
           PRINTFB(G, FB_ObjectMolecule, FB_Details)
           " ObjectMolecule-Details: Enabling defer_builds_mode\n" ENDFB(G);
           SettingSet(G, cSetting_defer_builds_mode, 3);
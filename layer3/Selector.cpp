@@ -15,11 +15,16 @@ Z* -------------------------------------------------------------------
 */
 
 #include <algorithm>
+#include <atomic>
 #include <cctype>
 #include <functional>
 #include <string>
 #include <vector>
 
+#ifdef PYMOL_OPENMP
+#include <omp.h>
+#endif
+
 #include"os_python.h"
 #include"os_numpy.h"
 #include"os_std.h"
@@ -56,6 +61,7 @@ Z* -------------------------------------------------------------------
 
 #include "P.h"
 #include"ListMacros.h"
+#include "GaussianMap.h"
 
 #ifdef _PYMOL_IP_PROPERTIES
 #endif
@@ -80,6 +86,12 @@ using SelectorInfoIter_t = decltype(CSelectorManager::Info)::iterator;
 #define cDummyOrigin 0
 #define cDummyCenter 1
 
+/**
+ * Minimum table size for evaluating per-atom selection operators with
+ * multiple threads. Below this, the threading overhead dominates.
+ */
+#define cSelectorParallelMinAtoms 50000
+
 
 /* special selections, unknown to executive */
 #define cSelectorSecretsPrefix "_!"
@@ -159,8 +171,10 @@ static int SelectorSelect2(PyMOLGlobals * G, EvalElem * base, int state);
 static int SelectorLogic1(PyMOLGlobals * G, EvalElem * base, int state);
 static int SelectorLogic2(PyMOLGlobals * G, EvalElem * base);
 static int SelectorOperator22(PyMOLGlobals * G, EvalElem * base, int state);
-static pymol::Result<sele_array_t> SelectorEvaluate(
-    PyMOLGlobals* G, std::vector<std::string>& word, int state, int quiet);
+struct SelectorEvalDeps;
+static pymol::Result<sele_array_t> SelectorEvaluate(PyMOLGlobals* G,
+    std::vector<std::string>& word, int state, int quiet,
+    SelectorEvalDeps* deps = nullptr);
 static std::vector<std::string> SelectorParse(PyMOLGlobals * G, const char *s);
 static void SelectorPurgeMembers(PyMOLGlobals * G, SelectorID_t sele);
 static int SelectorEmbedSelection(PyMOLGlobals * G, const int *atom, pymol::zstring_view name,
@@ -169,6 +183,18 @@ static int *SelectorGetIndexVLA(PyMOLGlobals * G, SelectorID_t sele);
 static int *SelectorGetIndexVLAImpl(PyMOLGlobals * G, CSelector *I, int sele);
 static void SelectorClean(PyMOLGlobals * G);
 
+/**
+ * Private selections (names starting with an underscore, like temporary
+ * selections) don't invalidate the selection cache.
+ */
+static bool SelectorNameIsPrivate(const char* name)
+{
+  while (name[0] == '%' || name[0] == '?') {
+    ++name;
+  }
+  return name[0] == '_';
+}
+
 static void SelectorUpdateTableSingleObject(PyMOLGlobals* G,
     ObjectMolecule* obj, int req_state, bool no_dummies = false);
 
@@ -713,6 +739,154 @@ static short fcmp(float a, float b, int oper) {
   return false;
 }
 
+/**
+ * Number of threads to use for per-atom loops over the selection table,
+ * governed by the `max_threads` setting.
+ */
+static int SelectorGetNThread(PyMOLGlobals* G, size_t table_size)
+{
+#ifdef PYMOL_OPENMP
+  if (table_size >= cSelectorParallelMinAtoms) {
+    return std::max(1, SettingGetGlobal_i(G, cSetting_max_threads));
+  }
+#endif
+  return 1;
+}
+
+/**
+ * Decode the lazy trajectory states of all table objects for `state` and
+ * keep them while `pins` is alive, so that `CSet[state]` can be read
+ * directly, also from worker threads.
+ */
+static void SelectorLoadLazyStates(
+    CSelector* I, int state, TrajectoryStatePins& pins)
+{
+  for (auto* obj : I->Obj) {
+    pins.load(obj, state);
+  }
+}
+
+/**
+ * Marks all atoms `j` which are within `dist` of any atom of `sele_in` in
+ * state `state` (input atoms) and which pass `accept(j)`.
+ *
+ * The input atoms are distributed over threads. Every thread collects hits
+ * in a private mask and the masks are OR-merged into `sele_out`, so the
+ * result is independent of scheduling.
+ *
+ * @param map Spatial map of `coords`, with express table
+ * @param coords Candidate coordinates, indexed by table index
+ * @param sele_in Input mask
+ * @param state Coordinate set of the input atoms
+ * @param dist Distance cutoff
+ * @param[in,out] sele_out Output mask (only set, never cleared)
+ * @param accept Additional predicate for candidate atoms
+ */
+template <typename AcceptFn>
+static void SelectorMarkWithin(PyMOLGlobals* G, MapType& map,
+    const float (*coords)[3], const int* sele_in, int state, float dist,
+    int* sele_out, AcceptFn&& accept)
+{
+  CSelector* I = G->Selector;
+  const int table_size = I->Table.size();
+  const int n_thread = SelectorGetNThread(G, table_size);
+
+  TrajectoryStatePins pins;
+  SelectorLoadLazyStates(I, state, pins);
+
+  // Don't let MapEIter set up the express table inside the parallel region
+  if (!map.EList) {
+    MapSetupExpress(&map);
+  }
+
+  auto const mark_for_atom = [&](int a, int* mask) {
+    auto const* obj = I->Obj[I->Table[a].model];
+    if (state >= obj->NCSet)
+      return;
+    auto const* cs = obj->CSet[state];
+    if (!cs)
+      return;
+    int const idx = cs->atmToIdx(I->Table[a].atom);
+    if (idx < 0)
+      return;
+    const float* v2 = cs->coordPtr(idx);
+    for (const auto j : MapEIter(map, v2, false)) {
+      if (!mask[j] && accept(j) && within3f(coords[j], v2, dist)) {
+        mask[j] = true;
+      }
+    }
+  };
+
+  if (n_thread < 2) {
+    for (int a = 0; a < table_size; ++a) {
+      if (sele_in[a]) {
+        mark_for_atom(a, sele_out);
+      }
+    }
+    return;
+  }
+
+#ifdef PYMOL_OPENMP
+  std::vector<std::vector<int>> masks(n_thread);
+
+#pragma omp parallel num_threads(n_thread)
+  {
+    auto& mask = masks[omp_get_thread_num()];
+    mask.assign(table_size, 0);
+
+#pragma omp for schedule(dynamic, 1024)
+    for (int a = 0; a < table_size; ++a) {
+      if (sele_in[a]) {
+        mark_for_atom(a, mask.data());
+      }
+    }
+
+    // deterministic merge, partitioned over the output
+#pragma omp for
+    for (int j = 0; j < table_size; ++j) {
+      for (auto const& other : masks) {
+        if (!other.empty() && other[j]) {
+          sele_out[j] = true;
+          break;
+        }
+      }
+    }
+  }
+#endif
+}
+
+/**
+ * Fills `coords` and `flags` with the coordinates of all table atoms in
+ * state `state`.
+ *
+ * @return Number of atoms with coordinates
+ */
+static int SelectorGetTableCoords(PyMOLGlobals* G, int state,
+    float (*coords)[3], MapFlag_t* flags, int start = 0)
+{
+  CSelector* I = G->Selector;
+  const int table_size = I->Table.size();
+  const int n_thread = SelectorGetNThread(G, table_size);
+  int n1 = 0;
+
+  TrajectoryStatePins pins;
+  SelectorLoadLazyStates(I, state, pins);
+
+#ifdef PYMOL_OPENMP
+#pragma omp parallel for if (n_thread > 1) num_threads(n_thread) reduction(+ : n1)
+#endif
+  for (int a = start; a < table_size; ++a) {
+    auto const* obj = I->Obj[I->Table[a].model];
+    auto const* cs = (state < obj->NCSet) ? obj->CSet[state] : nullptr;
+    if (cs && CoordSetGetAtomVertex(cs, I->Table[a].atom, coords[a])) {
+      flags[a] = true;
+      ++n1;
+    }
+  }
+
+  return n1;
+}
+
 #define cINTER_ENTRIES 11
 
 int SelectorRenameObjectAtoms(PyMOLGlobals* G, ObjectMolecule* obj,
@@ -1509,6 +1683,9 @@ typedef struct {
 
 static void SelectorDeleteSeleAtIter(PyMOLGlobals* G, SelectorInfoIter_t it)
 {
+  if (!SelectorNameIsPrivate(it->name.c_str())) {
+    SelectorCacheInvalidate(G);
+  }
   SelectorPurgeMembers(G, it->ID);
   G->SelectorMgr->Info.erase(it);
 }
@@ -3029,6 +3206,10 @@ int SelectorFromPyList(PyMOLGlobals * G, const char *name, PyObject * list)
   /* get rid of existing selection */
   SelectorDelete(G, name);
 
+  if (!SelectorNameIsPrivate(name)) {
+    SelectorCacheInvalidate(G);
+  }
+
   int sele = I->NSelection++;
   I->Info.emplace_back(SelectionInfoRec(sele, name));
   if(ok) {
@@ -3735,6 +3916,9 @@ bool SelectorMoveMember(PyMOLGlobals * G, SelectorMemberOffset_t s, SelectorID_t
     }
     s = I->Member[s].next;
   }
+  if (result) {
+    SelectorCacheInvalidate(G);
+  }
   return result;
 }
 
@@ -4836,6 +5020,103 @@ static double max6d(double a, double b, double c, double d, double e, double f)
 
 typedef double AtomSF[11];
 
+/**
+ * Gaussian map by splatting and FFT convolution (GaussianMapFFT), if forced
+ * by the `gaussian_fft` setting, or (auto) for maps where the estimated cost
+ * is well below the direct summation. Can't do `use_max`.
+ *
+ * @return False if the direct summation should be used instead
+ */
+static bool SelectorMapGaussianFFT(PyMOLGlobals * G, ObjectMapState * oMap,
+                                   int n1, const float *point, const int *sfidx,
+                                   const float *b_factor, const float *occup,
+                                   const double (*sf)[11], const AtomSF * atom_sf,
+                                   float blur_factor, float max_rcut, double elim,
+                                   int use_max, int quiet)
+{
+  const int mode = SettingGetGlobal_i(G, cSetting_gaussian_fft);
+  if(use_max || !mode)
+    return false;
+
+  GaussianMapParams params;
+  params.cutoff = max_rcut;
+  params.elim = elim;
+  params.n_thread = std::max(1, SettingGetGlobal_i(G, cSetting_max_threads));
+
+  // grid geometry, only orthogonal grids
+  const auto& points = oMap->Field->points;
+  const float *p0 = F4Ptr(points, oMap->Min[0], oMap->Min[1], oMap->Min[2], 0);
+  copy3f(p0, params.origin);
+  for(int a = 0; a < 3; a++) {
+    params.dim[a] = oMap->Max[a] - oMap->Min[a] + 1;
+    if(params.dim[a] > 1) {
+      int idx[3] = {oMap->Min[0], oMap->Min[1], oMap->Min[2]};
+      idx[a]++;
+      const float *p1 = F4Ptr(points, idx[0], idx[1], idx[2], 0);
+      for(int b = 0; b < 3; b++) {
+        if(b != a && fabs(p1[b] - p0[b]) > R_SMALL4)
+          return false;
+      }
+      params.spacing[a] = p1[a] - p0[a];
+    } else {
+      params.spacing[a] = (oMap->Grid.size() == 3) ? oMap->Grid[a] : 1.0F;
+    }
+    if(params.spacing[a] < R_SMALL4)
+      return false;
+  }
+
+  // e_val(d) = sum_k atom_sf[2k] * exp(-atom_sf[2k+1] * (d * blur)^2) * blur
+  // is a sum of normalized Gaussians with weight (occ * sfa / blur^2) and
+  // variance ((sfb + bfact) / (8 pi^2 blur^2))
+  const double var_scale = 1.0 / (8.0 * PI * PI * blur_factor * blur_factor);
+  std::vector<int> element_index(256, -1);
+  std::vector<GaussianMapElement> elements;
+  std::vector<GaussianMapAtom> atoms(n1);
+  double direct_cost = 0.0;
+
+  for(int a = 0; a < n1; a++) {
+    int &e = element_index[sfidx[a]];
+    if(e < 0) {
+      e = elements.size();
+      elements.emplace_back();
+      for(int k = 0; k < GaussianMapElement::NTerms; k++) {
+        elements[e].weight[k] = sf[sfidx[a]][2 * k] / (blur_factor * blur_factor);
+        elements[e].variance[k] = sf[sfidx[a]][2 * k + 1] * var_scale;
+      }
+    }
+    copy3f(point + 3 * a, atoms[a].pos);
+    atoms[a].element = e;
+    atoms[a].occup = occup[a];
+    atoms[a].variance = b_factor[a] * var_scale;
+
+    const double rcut = atom_sf[a][10];
+    direct_cost += rcut * rcut * rcut;
+  }
+
+  // sphere volume in grid points, ~100 operations per point (5 exp + lookup)
+  direct_cost *= 100.0 * (4.0 / 3.0) * PI /
+    (params.spacing[0] * params.spacing[1] * params.spacing[2]);
+
+  GaussianMapFFT engine(params, elements, atoms);
+  const double fft_cost = engine.cost();
+
+  PRINTFD(G, FB_ObjectMap)
+    " %s: estimated cost direct %.3g FFT %.3g\n", __func__, direct_cost, fft_cost
+    ENDFD;
+
+  // auto: not worth it for small maps
+  if(mode < 0 && !(direct_cost > 1e8 && fft_cost < direct_cost))
+    return false;
+
+  if(!quiet) {
+    PRINTFB(G, FB_ObjectMap, FB_Details)
+      " ObjectMap: Using splatting and FFT convolution.\n" ENDFB(G);
+  }
+
+  engine.compute(oMap->Field->data.get(), oMap->Min);
+  return true;
+}
+
 
 /*========================================================================*/
 int SelectorMapGaussian(PyMOLGlobals * G, int sele1, ObjectMapState * oMap,
@@ -5228,14 +5509,25 @@ int SelectorMapGaussian(PyMOLGlobals * G, int sele1, ObjectMapState * oMap,
   c = 0;
   if(n1) {
     n2 = 0;
-    std::unique_ptr<MapType> map(MapNew(G, -max_rcut, point, n1, nullptr));
-    if(map) {
+    bool fft_done = SelectorMapGaussianFFT(G, oMap, n1, point, sfidx, b_factor,
+        occup, sf, atom_sf, blur_factor, max_rcut, elim, use_max, quiet);
+    std::unique_ptr<MapType> map;
+    if(!fft_done)
+      map.reset(MapNew(G, -max_rcut, point, n1, nullptr));
+    if(map || fft_done) {
       sum = 0.0;
       sumsq = 0.0;
       for(a = oMap->Min[0]; a <= oMap->Max[0]; a++) {
         OrthoBusyFast(G, a - oMap->Min[0], oMap->Max[0] - oMap->Min[0] + 1);
         for(b = oMap->Min[1]; b <= oMap->Max[1]; b++) {
           for(c = oMap->Min[2]; c <= oMap->Max[2]; c++) {
+            if(fft_done) {
+              e_val = F3(oMap->Field->data, a, b, c);
+              sum += e_val;
+              sumsq += (e_val * e_val);
+              n2++;
+              continue;
+            }
             e_val = 0.0;
             v2 = F4Ptr(oMap->Field->points, a, b, c, 0);
                 if(use_max) {
@@ -6284,6 +6576,7 @@ int SelectorSetName(PyMOLGlobals * G, const char *new_name, const char *old_name
   auto it = SelectGetInfoIter(G, old_name, 1, ignore_case);
   if (it != I->Info.end()) {
     it->name = new_name;
+    SelectorCacheInvalidate(G);
     return true;
   } else {
     return false;
@@ -6638,6 +6931,10 @@ static int SelectorEmbedSelection(PyMOLGlobals * G, const int *atom, pymol::zstr
     newFlag = false;
   }
 
+  if (!SelectorNameIsPrivate(name.c_str())) {
+    SelectorCacheInvalidate(G);
+  }
+
   sele = IM->NSelection++;
   IM->Info.emplace_back(SelectionInfoRec(sele, name.c_str()));
 
@@ -7130,10 +7427,15 @@ int SelectorUpdateTableImpl(PyMOLGlobals * G, CSelector *I, int req_state, Selec
     } else {
       if(state >= obj->NCSet)
         skip_flag = true;
-      else if(!obj->CSet[state])
+      else if(!obj->CSet[state] && !obj->getCoordSet(state))
         skip_flag = true;
     }
 
+    if(state >= 0 && obj->LazyStates) {
+      /* decode lazy trajectory state */
+      obj->getCoordSet(state);
+    }
+
     if(!skip_flag) {
       /* fill in the table */
       I->Obj[modelCnt] = obj;
@@ -7226,13 +7528,186 @@ int SelectorUpdateTableImpl(PyMOLGlobals * G, CSelector *I, int req_state, Selec
 
 
 /*========================================================================*/
+/**
+ * What the result of a selection expression depends on, besides atoms,
+ * atom properties and coordinates.
+ */
+struct SelectorEvalDeps {
+  /// Colors, representations or labels
+  bool appearance = false;
+  /// Camera (origin/center), current state, object visibility or private
+  /// selections. Such results are never cached.
+  bool uncacheable = false;
+};
+
+/**
+ * Get a new revision stamp for `obj`, invalidates all cached selection
+ * results which involve this object. Also marks the object as changed for
+ * incremental session saving.
+ *
+ * @param appearance_only Only colors, representations or labels may have
+ * changed
+ */
+void SelectorTouchObject(ObjectMolecule* obj, bool appearance_only)
+{
+  static std::atomic<size_t> s_revision{0};
+  obj->SeleAppearanceRevision = ++s_revision;
+  if (!appearance_only) {
+    obj->SeleRevision = obj->SeleAppearanceRevision;
+  }
+  obj->markChanged();
+}
+
+/**
+ * Drop all cached selection results. Call this on changes which are not
+ * tracked per object (named selections, settings, groups).
+ */
+void SelectorCacheInvalidate(PyMOLGlobals* G)
+{
+  if (G->SelectorMgr) {
+    G->SelectorMgr->Cache.clear();
+  }
+}
+
+/**
+ * @param reset Reset the hit/miss counters after reading them
+ */
+SelectorCacheStats SelectorGetCacheStats(PyMOLGlobals* G, bool reset)
+{
+  auto& cache = G->SelectorMgr->Cache;
+  SelectorCacheStats stats{cache.hits(), cache.misses(), cache.size(),
+      size_t(std::max(0, SettingGet<int>(G, cSetting_selection_cache_size)))};
+  if (reset) {
+    cache.reset_stats();
+  }
+  return stats;
+}
+
+/**
+ * @pre Table is up-to-date for all states and no domain
+ */
+static bool SelectorCacheEntryIsValid(
+    const CSelector* I, const SelectorCacheEntry& entry)
+{
+  if (entry.table_size != I->Table.size() ||
+      entry.revisions.size() + cNDummyModels != I->Obj.size()) {
+    return false;
+  }
+
+  for (size_t i = 0; i != entry.revisions.size(); ++i) {
+    auto const* obj = I->Obj[i + cNDummyModels];
+    if (obj->SeleRevision != entry.revisions[i]) {
+      return false;
+    }
+    if (!entry.appearance_revisions.empty() &&
+        obj->SeleAppearanceRevision != entry.appearance_revisions[i]) {
+      return false;
+    }
+  }
+
+  return true;
+}
+
+/**
+ * Look up the result of a selection expression in the cache.
+ *
+ * @pre Table is up-to-date for all states and no domain
+ * @return nullptr if not found or stale
+ */
+static sele_array_t SelectorCacheGet(PyMOLGlobals* G, const char* sele)
+{
+  CSelector* I = G->Selector;
+  auto& cache = G->SelectorMgr->Cache;
+
+  auto const* entry = cache.get(sele, [I](const SelectorCacheEntry& entry) {
+    return SelectorCacheEntryIsValid(I, entry);
+  });
+
+  if (!entry) {
+    return nullptr;
+  }
+
+  sele_array_t result;
+  sele_array_calloc(result, I->Table.size());
+  for (auto const& run : entry->runs) {
+    std::fill_n(result.get() + run.start, run.length, run.tag);
+  }
+  return result;
+}
+
+/**
+ * Store the result of a selection expression in the cache.
+ *
+ * @pre Table is up-to-date for all states and no domain
+ */
+static void SelectorCachePut(PyMOLGlobals* G, const char* sele,
+    const int* result, const SelectorEvalDeps& deps)
+{
+  CSelector* I = G->Selector;
+
+  if (deps.uncacheable || !result) {
+    return;
+  }
+
+  // results which include the origin/center dummies depend on the view
+  for (int a = 0; a < cNDummyAtoms; ++a) {
+    if (result[a]) {
+      return;
+    }
+  }
+
+  SelectorCacheEntry entry;
+  entry.table_size = I->Table.size();
+
+  for (int a = cNDummyAtoms, n = entry.table_size; a < n;) {
+    int const tag = result[a];
+    int const start = a;
+    while (++a < n && result[a] == tag) {
+    }
+    if (tag) {
+      entry.runs.push_back({start, a - start, tag});
+    }
+  }
+
+  for (size_t i = cNDummyModels; i < I->Obj.size(); ++i) {
+    entry.revisions.push_back(I->Obj[i]->SeleRevision);
+    if (deps.appearance) {
+      entry.appearance_revisions.push_back(I->Obj[i]->SeleAppearanceRevision);
+    }
+  }
+
+  G->SelectorMgr->Cache.put(sele, std::move(entry));
+}
+
 static pymol::Result<sele_array_t> SelectorSelect(
     PyMOLGlobals* G, const char* sele, int state, SelectorID_t domain, int quiet)
 {
   SelectorUpdateTable(G, state, domain);
+
+  // only cache the common case
+  bool use_cache =
+      state == cSelectorUpdateTableAllStates && domain == cSelectionInvalid;
+
+  if (use_cache) {
+    int const capacity = SettingGet<int>(G, cSetting_selection_cache_size);
+    G->SelectorMgr->Cache.set_capacity(std::max(0, capacity));
+    use_cache = capacity > 0;
+  }
+
+  if (use_cache) {
+    if (auto cached = SelectorCacheGet(G, sele)) {
+      return cached;
+    }
+  }
+
   auto parsed = SelectorParse(G, sele);
   if (!parsed.empty()) {
-    return SelectorEvaluate(G, parsed, state, quiet);
+    SelectorEvalDeps deps;
+    auto result = SelectorEvaluate(G, parsed, state, quiet, &deps);
+    if (use_cache && result) {
+      SelectorCachePut(G, sele, result.result().get(), deps);
+    }
+    return result;
   }
   return {};
 }
@@ -7283,54 +7758,23 @@ static int SelectorModulate1(PyMOLGlobals * G, EvalElem * base, int state)
           auto Flag1 = std::vector<MapFlag_t>(table_size, 0);
 
           // Potential atoms to be selected (exclude dummies)
-          for (a = cNDummyAtoms; a < I->Table.size(); a++) {
-            at = I->Table[a].atom;
-            obj = I->Obj[I->Table[a].model];
-            if(d < obj->NCSet)
-              cs = obj->CSet[d];
-            else
-              cs = nullptr;
-            if(cs) {
-              if (CoordSetGetAtomVertex(cs, at, coords[a])) {
-                Flag1[a] = true;
-                n1++;
-              }
-            }
-          }
+          n1 = SelectorGetTableCoords(
+              G, d, coords, Flag1.data(), cNDummyAtoms);
           if(n1) {
             std::unique_ptr<MapType> map(MapNewFlagged(G, -dist,
                 pymol::flatten(coords), table_size, nullptr, Flag1.data()));
 	    CHECKOK(ok, map);
             if(ok) {
+              const int* sele_in = base[1].sele_data();
+              const bool expand = (base[1].code == SELE_EXP_);
               nCSet = SelectorGetArrayNCSet(G, base[1].sele, false);
               for(e = 0; ok && e < nCSet; e++) {
                 if((state < 0) || (e == state)) {
                   // Input selection (include dummies)
-                  for(a = 0; ok && a < I->Table.size(); a++) {
-                    if(base[1].sele[a]) {
-                      at = I->Table[a].atom;
-                      obj = I->Obj[I->Table[a].model];
-                      if(e < obj->NCSet)
-                        cs = obj->CSet[e];
-                      else
-                        cs = nullptr;
-                      if(cs) {
-                        idx = cs->atmToIdx(at);
-                        if(idx >= 0) {
-                          v2 = cs->coordPtr(idx);
-                          for (const auto j : MapEIter(*map, v2, false)) {
-                            if (!base[0].sele[j] &&
-                                (!base[1].sele[j] ||
-                                    base[1].code == SELE_EXP_)) {
-                              /*exclude current selection */
-                              if (within3f(coords[j], v2, dist))
-                                base[0].sele[j] = true;
-                            }
-                          }
-                        }
-                      }
-                    }
-                  }
+                  /*exclude current selection */
+                  SelectorMarkWithin(G, *map, coords, sele_in, e, dist,
+                      base[0].sele_data(),
+                      [&](int j) { return !sele_in[j] || expand; });
                 }
               }
             }
@@ -8436,7 +8880,6 @@ static int SelectorSelect2(PyMOLGlobals * G, EvalElem * base, int state)
   int exact;
   int ignore_case = SettingGetGlobal_b(G, cSetting_ignore_case);
 
-  AtomInfoType *at1;
   CSelector *I = G->Selector;
   base->type = STYP_LIST;
   base->sele_calloc(I->Table.size());
@@ -8458,30 +8901,39 @@ static int SelectorSelect2(PyMOLGlobals * G, EvalElem * base, int state)
       break;
     }
     if(ok) {
-      ObjectMolecule *obj;
-      CoordSet *cs;
-      int at, idx, s, s0 = 0, sN = I->NCSet;
+      int s, s0 = 0, sN = I->NCSet;
 
       if (state != cStateAll) {
         s0 = (state < cStateAll) ? SceneGetState(G) : state;
         sN = s0 + 1;
       }
 
-      for(a = cNDummyAtoms; a < I->Table.size(); a++)
+      const int table_size = I->Table.size();
+      const int n_thread = SelectorGetNThread(G, table_size);
+
+      for(a = cNDummyAtoms; a < table_size; a++)
         base[0].sele[a] = false;
 
       for(s = s0; s < sN; s++) {
-        for(a = cNDummyAtoms; a < I->Table.size(); a++) {
+        TrajectoryStatePins pins;
+        SelectorLoadLazyStates(I, s, pins);
+
+#ifdef PYMOL_OPENMP
+#pragma omp parallel for if (n_thread > 1) num_threads(n_thread)
+#endif
+        for (int a = cNDummyAtoms; a < table_size; a++) {
           if(base[0].sele[a])
             continue;
 
-          obj = I->Obj[I->Table[a].model];
+          auto const* obj = I->Obj[I->Table[a].model];
           if(s >= obj->NCSet)
             continue;
 
-          at = I->Table[a].atom;
-          cs = obj->CSet[s];
-          idx = cs->atmToIdx(at);
+          auto const* cs = obj->CSet[s];
+          if (!cs)
+            continue;
+
+          int idx = cs->atmToIdx(I->Table[a].atom);
           if(idx < 0)
             continue;
 
@@ -8514,154 +8966,37 @@ static int SelectorSelect2(PyMOLGlobals * G, EvalElem * base, int state)
           ok = ErrMessage(G, "Selector", "Invalid Number");
         break;
       }
-      if(ok) {
-        switch (oper) {
-        case SCMP_GTHN:
-          switch (base->code) {
-          case SELE_BVLx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(at1->b > comp1) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          case SELE_QVLx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(at1->q > comp1) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          case SELE_PCHx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(at1->partialCharge > comp1) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          case SELE_FCHx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(at1->formalCharge > comp1) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          }
+      if (ok && oper != SCMP_RANG) {
+        float AtomInfoType::*member = nullptr;
+        switch (base->code) {
+        case SELE_BVLx:
+          member = &AtomInfoType::b;
           break;
-        case SCMP_LTHN:
-          switch (base->code) {
-          case SELE_BVLx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(at1->b < comp1) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          case SELE_QVLx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(at1->q < comp1) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          case SELE_PCHx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(at1->partialCharge < comp1) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          case SELE_FCHx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(at1->formalCharge < comp1) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          }
+        case SELE_QVLx:
+          member = &AtomInfoType::q;
           break;
-        case SCMP_EQAL:
-          switch (base->code) {
-          case SELE_BVLx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(fabs(at1->b - comp1) < R_SMALL4) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          case SELE_QVLx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(fabs(at1->q - comp1) < R_SMALL4) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          case SELE_PCHx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(fabs(at1->partialCharge - comp1) < R_SMALL4) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          case SELE_FCHx:
-            for(a = cNDummyAtoms; a < I->Table.size(); a++) {
-              at1 = &I->Obj[I->Table[a].model]->AtomInfo[I->Table[a].atom];
-              if(fabs(at1->formalCharge - comp1) < R_SMALL4) {
-                base[0].sele[a] = true;
-                c++;
-              } else {
-                base[0].sele[a] = false;
-              }
-            }
-            break;
-          }
+        case SELE_PCHx:
+          member = &AtomInfoType::partialCharge;
           break;
         }
-        break;
+
+        const int table_size = I->Table.size();
+        const int n_thread = SelectorGetNThread(G, table_size);
+
+#ifdef PYMOL_OPENMP
+#pragma omp parallel for if (n_thread > 1) num_threads(n_thread) reduction(+ : c)
+#endif
+        for (int a = cNDummyAtoms; a < table_size; a++) {
+          auto const* ai1 =
+              I->Obj[I->Table[a].model]->AtomInfo + I->Table[a].atom;
+          float const value = member ? ai1->*member : ai1->formalCharge;
+          if (fcmp(value, comp1, oper)) {
+            base[0].sele[a] = true;
+            c++;
+          } else {
+            base[0].sele[a] = false;
+          }
+        }
       }
     }
   }
@@ -9373,13 +9708,11 @@ int SelectorOperator22(PyMOLGlobals * G, EvalElem * base, int state)
   int c = 0;
   int a, d, e;
   CSelector *I = G->Selector;
-  ObjectMolecule *obj;
 
   float dist;
-  CoordSet *cs;
   int ok = true;
   int nCSet;
-  int n1, at, idx;
+  int n1;
   int code = base[1].code;
 
   if(state < 0) {
@@ -9411,53 +9744,21 @@ int SelectorOperator22(PyMOLGlobals * G, EvalElem * base, int state)
 
       for(d = 0; d < I->NCSet; d++) {
         if((state < 0) || (d == state)) {
-          n1 = 0;
           auto Flag1 = std::vector<MapFlag_t>(table_size);
-          for(a = 0; a < table_size; a++) {
-            at = I->Table[a].atom;
-            obj = I->Obj[I->Table[a].model];
-            if(d < obj->NCSet)
-              cs = obj->CSet[d];
-            else
-              cs = nullptr;
-            if(cs) {
-              if(CoordSetGetAtomVertex(cs, at, coords[a])) {
-                Flag1[a] = true;
-                n1++;
-              }
-            }
-          }
+          n1 = SelectorGetTableCoords(G, d, coords, Flag1.data());
           if(n1) {
             std::unique_ptr<MapType> map(MapNewFlagged(G, -dist,
                 pymol::flatten(coords), table_size, nullptr, Flag1.data()));
 	    CHECKOK(ok, map);
             if(ok) {
+              const int* sele_in = base[4].sele_data();
               nCSet = SelectorGetArrayNCSet(G, base[4].sele, false);
               for(e = 0; ok && e < nCSet; e++) {
                 if((state < 0) || (e == state)) {
-                  for(a = 0; a < I->Table.size(); a++) {
-                    if(base[4].sele[a]) {
-                      at = I->Table[a].atom;
-                      obj = I->Obj[I->Table[a].model];
-                      if(e < obj->NCSet)
-                        cs = obj->CSet[e];
-                      else
-                        cs = nullptr;
-                      if(cs) {
-                        idx = cs->atmToIdx(at);
-                        if(idx >= 0) {
-                          const float* v2 = cs->coordPtr(idx);
-                          for (const auto j : MapEIter(*map, v2, false)) {
-                            if (!base[0].sele[j] && Flag2[j] &&
-                                within3f(coords[j], v2, dist) &&
-                                (code != SELE_NTO_ || !base[4].sele[j])) {
-                              base[0].sele[j] = true;
-                            }
-                          }
-                        }
-                      }
-                    }
-                  }
+                  SelectorMarkWithin(G, *map, coords, sele_in, e, dist,
+                      base[0].sele_data(), [&](int j) {
+                        return Flag2[j] && (code != SELE_NTO_ || !sele_in[j]);
+                      });
                 }
               }
             }
@@ -9598,9 +9899,46 @@ static std::string indicate_last_token(
   }
 
 /*========================================================================*/
+/**
+ * Collect the dependencies of an expression from the operation stack.
+ */
+static void SelectorGetEvalDeps(
+    const EvalElem* stack, int depth, SelectorEvalDeps& deps)
+{
+  for (int a = 1; a <= depth; ++a) {
+    if (stack[a].type == STYP_VALU) {
+      continue;
+    }
+
+    switch (stack[a].code) {
+    case SELE_COLs:
+    case SELE_CCLs:
+    case SELE_RCLs:
+    case SELE_REPs:
+    case SELE_LABs:
+      deps.appearance = true;
+      break;
+    case SELE_ORIz:
+    case SELE_CENz:
+    case SELE_VISz:
+    case SELE_ENAz:
+    case SELE_PREz:
+      deps.uncacheable = true;
+      break;
+    case SELE_SELs:
+      // "??name" depends on the enabled state
+      if (a == depth || SelectorNameIsPrivate(stack[a + 1].text()) ||
+          strncmp(stack[a + 1].text(), "??", 2) == 0) {
+        deps.uncacheable = true;
+      }
+      break;
+    }
+  }
+}
+
 pymol::Result<sele_array_t> SelectorEvaluate(PyMOLGlobals* G,
     std::vector<std::string>& word,
-    int state, int quiet)
+    int state, int quiet, SelectorEvalDeps* deps)
 {
   int level = 0, imp_op_level = 0;
   int depth = 0;
@@ -9807,6 +10145,9 @@ pymol::Result<sele_array_t> SelectorEvaluate(PyMOLGlobals* G,
   if(level > 0){
     return_error_with_tokens("Malformed selection.");
   }
+  if (ok && deps) {
+    SelectorGetEvalDeps(Stack.data(), depth, *deps);
+  }
   if(ok) {                      /* this is the main operation loop */
     totDepth = depth;
     opFlag = true;
@@ -114,6 +114,18 @@ ObjectMolecule *SelectorGetFirstObjectMolecule(PyMOLGlobals * G, SelectorID_t se
 int SelectorRenameObjectAtoms(PyMOLGlobals* G, ObjectMolecule* obj,
     SelectorID_t sele, bool force, bool update_table);
 void SelectorUpdateObjectSele(PyMOLGlobals * G, ObjectMolecule * obj);
+void SelectorTouchObject(ObjectMolecule* obj, bool appearance_only = false);
+void SelectorCacheInvalidate(PyMOLGlobals* G);
+
+/// Statistics of the selection result cache
+struct SelectorCacheStats {
+  size_t hits;
+  size_t misses;
+  size_t size;
+  size_t capacity;
+};
+
+SelectorCacheStats SelectorGetCacheStats(PyMOLGlobals* G, bool reset = false);
 void SelectorDeletePrefixSet(PyMOLGlobals * G, const char *pref);
 pymol::Result<> SelectorUpdateCmd(PyMOLGlobals* G, SelectorID_t sele0, SelectorID_t sele1,
     int sta0, int sta1, int method, int quiet);
@@ -7,6 +7,7 @@
 #pragma once
 
 #include "os_std.h"
+#include "pymol/lru_cache.h"
 #include "pymol/memory.h"
 
 #include "AtomIterators.h"
@@ -50,6 +51,28 @@ struct MemberType {
   SelectorMemberOffset_t next;
 };
 
+/**
+ * Evaluated selection expression, stored as a run-length encoded mask over
+ * the selector table (all states, no domain).
+ */
+struct SelectorCacheEntry {
+  struct Run {
+    int start;
+    int length;
+    int tag;
+  };
+
+  std::vector<Run> runs;
+  size_t table_size = 0;
+
+  /// SeleRevision of every object in the table, in table order
+  std::vector<size_t> revisions;
+
+  /// SeleAppearanceRevision of every object, only used if the expression
+  /// depends on colors, representations or labels
+  std::vector<size_t> appearance_revisions;
+};
+
 struct CSelectorManager
 {
   std::vector<MemberType> Member;
@@ -57,6 +80,7 @@ struct CSelectorManager
   std::vector<SelectionInfoRec> Info;
   SelectorID_t NSelection = 0;
   std::unordered_map<std::string, int> Key;
+  pymol::lru_cache<std::string, SelectorCacheEntry> Cache;
   CSelectorManager();
 };
 
@@ -54,6 +54,7 @@ Z* -------------------------------------------------------------------
 #include"ObjectMolecule.h"
 #include"ObjectMolecule3.h"
 #include"Executive.h"
+#include"ExecutiveLoad.h"
 #include"ExecutivePython.h"
 #include"Selector.h"
 #include"main.h"
@@ -67,6 +68,7 @@ Z* -------------------------------------------------------------------
 #include"Editor.h"
 #include"Wizard.h"
 #include"SculptCache.h"
+#include"SurfaceCache.h"
 #include"TestPyMOL.h"
 #include"Seq.h"
 #include"PyMOL.h"
@@ -76,9 +78,11 @@ Z* -------------------------------------------------------------------
 #include"Feedback.h"
 
 #include "MovieScene.h"
+#include "MyPNG.h"
 #include "CifFile.h"
 
 #include "MoleculeExporter.h"
+#include "RepBuildQueue.h"
 
 #define tmpSele "_tmp"
 #define tmpSele1 "_tmp1"
@@ -200,6 +204,9 @@ static void APIEnter(PyMOLGlobals * G)
   if(!PIsGlutThread())
     G->P_inst->glut_thread_keep_out++;
   PUnblock(G);
+
+  // commands may modify what background builds read
+  RepBuildQueueInterrupt(G);
 }
 
 static int APIEnterNotModal(PyMOLGlobals * G)
@@ -234,6 +241,9 @@ static void APIEnterBlocked(PyMOLGlobals * G)
 
   if(!PIsGlutThread())
     G->P_inst->glut_thread_keep_out++;
+
+  // commands may modify what background builds read
+  RepBuildQueueInterrupt(G);
 }
 
 static int APIEnterBlockedNotModal(PyMOLGlobals * G)
@@ -513,6 +523,23 @@ static PyObject *CmdCoordSetUpdateThread(PyObject * self, PyObject * args)
   return APISuccess();
 }
 
+static PyObject *CmdRepUpdateThread(PyObject * self, PyObject * args)
+{
+  PyMOLGlobals *G = nullptr;
+  PyObject *py_thread_info;
+  API_SETUP_ARGS(G, self, args, "OO", &self, &py_thread_info);
+
+  auto thread_info = reinterpret_cast<CRepUpdateThreadInfo*>(
+      PyCapsule_GetPointer(py_thread_info, nullptr));
+  API_ASSERT(thread_info);
+
+  PUnblock(G);
+  CoordSetRepUpdateThread(thread_info);
+  PBlock(G);
+
+  return APISuccess();
+}
+
 static PyObject *CmdObjectUpdateThread(PyObject * self, PyObject * args)
 {
   PyMOLGlobals *G = nullptr;
@@ -725,6 +752,13 @@ static PyObject * CmdGetVolumeField(PyObject * self, PyObject * args)
     CField * field = ExecutiveGetVolumeField(G, objName, state);
     if (field) {
       result = FieldAsNumPyArray(field, copy);
+      if (result && !copy) {
+        // caller may modify the data in place, drop derived data now and
+        // again with rebuild() after the changes
+        auto obj = ExecutiveFindObjectByName(G, objName);
+        if (obj && obj->type == cObjectMap)
+          obj->invalidate(cRepAll, cRepInvAll, state);
+      }
     }
     APIExitBlocked(G);
   }
@@ -979,10 +1013,12 @@ static PyObject *CmdGetSession(PyObject * self, PyObject * args)
   const char* names;
   int binary = -1;
   float version = -1.f;
+  PyObject* stamps = Py_None;
 
-  API_SETUP_ARGS(G, self, args, "OOsii|if", &self, &dict, &names, &partial,
-      &quiet, &binary, &version);
+  API_SETUP_ARGS(G, self, args, "OOsii|ifO", &self, &dict, &names, &partial,
+      &quiet, &binary, &version, &stamps);
   API_ASSERT(-1 <= binary && binary <= 1);
+  API_ASSERT(stamps == Py_None || PyDict_Check(stamps));
 
   APIEnterBlocked(G);
 
@@ -994,7 +1030,8 @@ static PyObject *CmdGetSession(PyObject * self, PyObject * args)
   if (version >= 0.f)
     SettingSet(G, cSetting_pse_export_version, version);
 
-  ExecutiveGetSession(G, dict, names, partial, quiet);
+  ExecutiveGetSession(G, dict, names, partial, quiet,
+      stamps == Py_None ? nullptr : stamps);
 
   SettingSet(G, cSetting_pse_binary_dump, binary_orig);
   SettingSet(G, cSetting_pse_export_version, version_orig);
@@ -3226,6 +3263,35 @@ static PyObject *CmdAlter(PyObject * self, PyObject * args)
   return APIResult(G, result);
 }
 
+static PyObject* CmdGetAtomProperties(PyObject* self, PyObject* args)
+{
+  PyMOLGlobals* G = nullptr;
+  const char* sele;
+  PyObject* pynames = nullptr;
+  API_SETUP_ARGS(G, self, args, "OsO", &self, &sele, &pynames);
+
+  std::vector<std::string> names;
+  API_ASSERT(PConvFromPyObject(G, pynames, names));
+
+  API_ASSERT(APIEnterBlockedNotModal(G));
+  auto result = ExecutiveGetAtomProperties(G, sele, names);
+  APIExitBlocked(G);
+  return APIResult(G, result);
+}
+
+static PyObject* CmdSetAtomProperties(PyObject* self, PyObject* args)
+{
+  PyMOLGlobals* G = nullptr;
+  const char* sele;
+  PyObject* values = nullptr;
+  int quiet;
+  API_SETUP_ARGS(G, self, args, "OsOi", &self, &sele, &values, &quiet);
+  API_ASSERT(APIEnterBlockedNotModal(G));
+  auto result = ExecutiveSetAtomProperties(G, sele, values, quiet);
+  APIExitBlocked(G);
+  return APIResult(G, result);
+}
+
 static PyObject *CmdAlterList(PyObject * self, PyObject * args)
 {
   PyMOLGlobals *G = nullptr;
@@ -4785,6 +4851,105 @@ static PyObject *CmdPNG(PyObject * self, PyObject * args)
   return APIResultCode(result);
 }
 
+static void SceneImageCapsuleDestructor(PyObject* capsule)
+{
+  delete static_cast<std::shared_ptr<pymol::Image>*>(
+      PyCapsule_GetPointer(capsule, "pymol::Image"));
+}
+
+/**
+ * Get a copy of the current scene image (e.g. after ray tracing), which can
+ * be written with CmdWriteImage while the scene moves on.
+ */
+static PyObject *CmdGetSceneImage(PyObject * self, PyObject * args)
+{
+  PyMOLGlobals *G = nullptr;
+  int prior;
+  API_SETUP_ARGS(G, self, args, "Oi", &self, &prior);
+  API_ASSERT(APIEnterNotModal(G));
+  auto image = SceneGetImageForSave(G, prior);
+  if (image) {
+    // the scene may modify its image in place
+    image = std::make_shared<pymol::Image>(*image);
+  }
+  APIExit(G);
+
+  if (!image) {
+    return APIFailure(G, "no image available");
+  }
+
+  return PyCapsule_New(new std::shared_ptr<pymol::Image>(std::move(image)),
+      "pymol::Image", SceneImageCapsuleDestructor);
+}
+
+/**
+ * Write an image from CmdGetSceneImage to a PNG or PPM file. Only touches
+ * the image copy, so it doesn't need the API lock and can run in a
+ * background thread while the scene moves on. Releases the GIL while
+ * writing.
+ */
+static PyObject *CmdWriteImage(PyObject * self, PyObject * args)
+{
+  PyMOLGlobals *G = nullptr;
+  PyObject *py_image;
+  const char *filename;
+  float dpi, screen_gamma, file_gamma;
+  int format;
+  API_SETUP_ARGS(G, self, args, "OOsifff", &self, &py_image, &filename,
+      &format, &dpi, &screen_gamma, &file_gamma);
+
+  auto image = static_cast<std::shared_ptr<pymol::Image>*>(
+      PyCapsule_GetPointer(py_image, "pymol::Image"));
+  API_ASSERT(image && *image);
+
+  int ok;
+  Py_BEGIN_ALLOW_THREADS
+  ok = MyPNGWrite(filename, **image, dpi, format, true, screen_gamma,
+      file_gamma);
+  Py_END_ALLOW_THREADS
+
+  if (!ok) {
+    return APIFailure(G, pymol::string_format(
+                             "error writing \"%s\"", filename).c_str());
+  }
+  return APISuccess();
+}
+
+/**
+ * Get the pixels of an image from CmdGetSceneImage as a
+ * (width, height, bytes) tuple with top-to-bottom rows of RGBA values, e.g.
+ * for piping to a video encoder.
+ */
+static PyObject *CmdGetImageRGBA(PyObject * self, PyObject * args)
+{
+  PyMOLGlobals *G = nullptr;
+  PyObject *py_image;
+  API_SETUP_ARGS(G, self, args, "OO", &self, &py_image);
+
+  auto image = static_cast<std::shared_ptr<pymol::Image>*>(
+      PyCapsule_GetPointer(py_image, "pymol::Image"));
+  API_ASSERT(image && *image);
+
+  auto const& img = **image;
+  auto const width = img.getWidth();
+  auto const height = img.getHeight();
+  auto const row_bytes = std::size_t(width) * img.getPixelSize();
+
+  PyObject* py_bytes = PyBytes_FromStringAndSize(nullptr, row_bytes * height);
+  if (!py_bytes) {
+    return nullptr;
+  }
+
+  // scene images are stored bottom-to-top
+  auto dst = reinterpret_cast<unsigned char*>(PyBytes_AS_STRING(py_bytes));
+  for (int y = 0; y < height; ++y) {
+    memcpy(dst + row_bytes * y, img.bits() + row_bytes * (height - 1 - y),
+        row_bytes);
+  }
+
+  return Py_BuildValue("iiN", width, height, py_bytes);
+}
+
 static PyObject *CmdMPNG(PyObject * self, PyObject * args)
 {
   PyMOLGlobals *G = nullptr;
@@ -4998,13 +5163,29 @@ static PyObject *CmdRay(PyObject * self, PyObject * args)
   float angle, shift;
   int quiet;
   int antialias;
-  API_SETUP_ARGS(G, self, args, "Oiiiffii", &self, &w, &h,
-                        &antialias, &angle, &shift, &mode, &quiet);
+  PyObject* preview = Py_None;
+  API_SETUP_ARGS(G, self, args, "Oiiiffii|O", &self, &w, &h,
+                        &antialias, &angle, &shift, &mode, &quiet, &preview);
+  API_ASSERT(preview == Py_None || PyCallable_Check(preview));
   API_ASSERT(APIEnterNotModal(G));
   {
     if(mode < 0)
       mode = SettingGetGlobal_i(G, cSetting_ray_default_renderer);
+    if(preview != Py_None) {
+      // args keep the callable alive during the call
+      G->Scene->RayPreviewCallback = [G, preview](const pymol::Image& image) {
+        pymol::pautoblock block(G);
+        PyObject* data = PyBytes_FromStringAndSize(
+            reinterpret_cast<const char*>(image.bits()),
+            image.getSizeInBytes());
+        PXDecRef(PyObject_CallFunction(preview, "Nii", data,
+            image.getWidth(), image.getHeight()));
+        if(PyErr_Occurred())
+          PyErr_Print();
+      };
+    }
     ExecutiveRay(G, w, h, mode, angle, shift, quiet, false, antialias); /* TODO STATUS */
+    G->Scene->RayPreviewCallback = nullptr;
     APIExit(G);
   }
   return APISuccess();
@@ -5496,17 +5677,30 @@ static PyObject *CmdLoad(PyObject * self, PyObject * args)
   Py_ssize_t bytes;
   int mimic;
   const char* contents;
+  PyObject* map_box = Py_None;
 
-  API_SETUP_ARGS(G, self, args, "Oszz#iiiiiii|zzzi", &self,
+  API_SETUP_ARGS(G, self, args, "Oszz#iiiiiii|zzziO", &self,
                         &oname, &fname, &contents, &bytes, &frame, &type,
                         &finish, &discrete, &quiet, &multiplex, &zoom,
-                        &plugin, &object_props, &atom_props, &mimic);
+                        &plugin, &object_props, &atom_props, &mimic,
+                        &map_box);
+
+  std::vector<float> box;
+  if (map_box != Py_None) {
+    API_ASSERT(PConvFromPyObject(G, map_box, box) &&
+               box.size() == 6);
+  }
+
   API_ASSERT(APIEnterNotModal(G));
 
-  auto result = ExecutiveLoad(G,
-                         fname, contents, bytes, type,
-                         oname, frame, zoom,
-                         discrete, finish, multiplex, quiet, plugin);
+  auto result = [&]() -> pymol::Result<> {
+    auto load_args = ExecutiveLoadPrepareArgs(G, fname, contents, bytes, type,
+        oname, frame, zoom, discrete, finish, multiplex, quiet, plugin,
+        nullptr, nullptr);
+    p_return_if_error(load_args);
+    load_args.result().map_box = std::move(box);
+    return ExecutiveLoad(G, load_args.result());
+  }();
 
   OrthoRestorePrompt(G);
   APIExit(G);
@@ -5524,12 +5718,14 @@ static PyObject *CmdLoadTraj(PyObject * self, PyObject * args)
   float shift[3];
   char *plugin = nullptr;
   int quiet = 0;                /* TODO */
-  API_SETUP_ARGS(G, self, args, "Ossiiiiiiisifffs", &self, &oname, &fname,
+  int lazy = 0;
+  API_SETUP_ARGS(G, self, args, "Ossiiiiiiisifffs|i", &self, &oname, &fname,
       &frame, &type, &interval, &average, &start, &stop, &max, &str1, &image,
-      &shift[0], &shift[1], &shift[2], &plugin);
+      &shift[0], &shift[1], &shift[2], &plugin, &lazy);
   API_ASSERT(APIEnterNotModal(G));
   auto result = ExecutiveLoadTraj(G, oname, fname, frame, type,
-      interval, average, start, stop, max, str1, image, shift, plugin, quiet);
+      interval, average, start, stop, max, str1, image, shift, plugin, quiet,
+      lazy);
   APIExit(G);
   return APIResult(G, result);
 }
@@ -6063,6 +6259,21 @@ static PyObject *CmdCEAlign(PyObject *self, PyObject *args)
   return result;
 }
 
+static PyObject *CmdCEAlignMatrix(PyObject *self, PyObject *args)
+{
+  PyMOLGlobals * G = nullptr;
+  PyObject *lists;
+  float d0, d1;
+  int windowSize, gap_max, n_thread;
+  API_SETUP_ARGS(G, self, args, "OO!ffiii", &self, &PyList_Type, &lists, &d0,
+      &d1, &windowSize, &gap_max, &n_thread);
+  API_ASSERT(APIEnterBlockedNotModal(G));
+  PyObject* result = ExecutiveCEAlignMatrix(G, lists, d0, d1, windowSize,
+      gap_max, std::max(1, n_thread));
+  APIExitBlocked(G);
+  return APIAutoNone(result);
+}
+
 static PyObject *CmdVolume(PyObject *self, PyObject *args)
 { 
   PyMOLGlobals *G = nullptr;
@@ -6159,6 +6370,74 @@ ok_except2:
   return Py_BuildValue("i", discrete);
 }
 
+static PyObject* CmdGetSelectionCacheStats(PyObject* self, PyObject* args)
+{
+  PyMOLGlobals* G = nullptr;
+  int reset = 0;
+  API_SETUP_ARGS(G, self, args, "Oi", &self, &reset);
+  API_ASSERT(APIEnterBlockedNotModal(G));
+  auto const stats = SelectorGetCacheStats(G, reset);
+  APIExitBlocked(G);
+  return Py_BuildValue("{s:n,s:n,s:n,s:n}", //
+      "hits", Py_ssize_t(stats.hits), //
+      "misses", Py_ssize_t(stats.misses), //
+      "size", Py_ssize_t(stats.size), //
+      "capacity", Py_ssize_t(stats.capacity));
+}
+
+static PyObject* CmdGetSurfaceCacheStats(PyObject* self, PyObject* args)
+{
+  PyMOLGlobals* G = nullptr;
+  int reset = 0;
+  API_SETUP_ARGS(G, self, args, "Oi", &self, &reset);
+  API_ASSERT(APIEnterBlockedNotModal(G));
+  auto const stats = SurfaceCacheGetStats(G, reset);
+  APIExitBlocked(G);
+  return Py_BuildValue("{s:n,s:n,s:n,s:n,s:n}", //
+      "hits", Py_ssize_t(stats.hits), //
+      "misses", Py_ssize_t(stats.misses), //
+      "size", Py_ssize_t(stats.size), //
+      "bytes", Py_ssize_t(stats.cost), //
+      "capacity", Py_ssize_t(stats.capacity));
+}
+
+static PyObject* CmdGetMovieCacheStats(PyObject* self, PyObject* args)
+{
+  PyMOLGlobals* G = nullptr;
+  int reset = 0;
+  API_SETUP_ARGS(G, self, args, "Oi", &self, &reset);
+  API_ASSERT(APIEnterBlockedNotModal(G));
+  auto const stats = MovieGetCacheStats(G, reset);
+  APIExitBlocked(G);
+  return Py_BuildValue("{s:n,s:n,s:n,s:n,s:n}", //
+      "hits", Py_ssize_t(stats.hits), //
+      "misses", Py_ssize_t(stats.misses), //
+      "size", Py_ssize_t(stats.size), //
+      "bytes", Py_ssize_t(stats.bytes), //
+      "capacity", Py_ssize_t(stats.capacity));
+}
+
+/**
+ * Representation build times as a list of (count, seconds, max seconds)
+ * tuples, indexed by representation type
+ */
+static PyObject* CmdGetRepBuildStats(PyObject* self, PyObject* args)
+{
+  PyMOLGlobals* G = nullptr;
+  int reset = 0;
+  API_SETUP_ARGS(G, self, args, "Oi", &self, &reset);
+  API_ASSERT(APIEnterBlockedNotModal(G));
+  auto const stats = RepBuildStatsGet(G, reset);
+  APIExitBlocked(G);
+  PyObject* result = PyList_New(stats.size());
+  for (std::size_t i = 0; i < stats.size(); ++i) {
+    PyList_SET_ITEM(result, i,
+        Py_BuildValue("(idd)", stats[i].count, stats[i].time,
+            stats[i].max_time));
+  }
+  return result;
+}
+
 /**
  * Experimental - SUBJECT TO CHANGE
  */
@@ -6269,11 +6548,13 @@ static PyMethodDef Cmd_methods[] = {
   {"bond", CmdBond, METH_VARARGS},
   {"add_bond", CmdAddBond, METH_VARARGS},
   {"rebond", CmdRebond, METH_VARARGS},
+  {"rep_update_thread", CmdRepUpdateThread, METH_VARARGS},
   {"busy_draw", CmdBusyDraw, METH_VARARGS},
   {"button", CmdButton, METH_VARARGS},
   /*  {"cache",                 CmdCache,                METH_VARARGS }, */
   {"cartoon", CmdCartoon, METH_VARARGS},
   {"cealign", CmdCEAlign, METH_VARARGS},
+  {"cealign_matrix", CmdCEAlignMatrix, METH_VARARGS},
   {"center", CmdCenter, METH_VARARGS},
   {"cif_get_array", CmdCifGetArray, METH_VARARGS},
   {"clip", CmdClip, METH_VARARGS},
@@ -6321,8 +6602,11 @@ static PyMethodDef Cmd_methods[] = {
   {"fuse", CmdFuse, METH_VARARGS},
   {"get_angle", CmdGetAngle, METH_VARARGS},
   {"get_area", CmdGetArea, METH_VARARGS},
+  {"get_atom_properties", CmdGetAtomProperties, METH_VARARGS},
   {"get_atom_coords", CmdGetAtomCoords, METH_VARARGS},
   {"get_bond_print", CmdGetBondPrint, METH_VARARGS},
+  {"get_image_rgba", CmdGetImageRGBA, METH_VARARGS},
+  {"get_scene_image", CmdGetSceneImage, METH_VARARGS},
   {"get_busy", CmdGetBusy, METH_VARARGS},
   {"get_chains", CmdGetChains, METH_VARARGS},
   {"get_click_string", CmdGetClickString, METH_VARARGS},
@@ -6364,6 +6648,10 @@ static PyMethodDef Cmd_methods[] = {
   {"get_renderer", CmdGetRenderer, METH_VARARGS},
   {"get_raw_alignment", CmdGetRawAlignment, METH_VARARGS},
   {"get_seq_align_str", CmdGetSeqAlignStr, METH_VARARGS},
+  {"get_selection_cache_stats", CmdGetSelectionCacheStats, METH_VARARGS},
+  {"get_surface_cache_stats", CmdGetSurfaceCacheStats, METH_VARARGS},
+  {"get_rep_build_stats", CmdGetRepBuildStats, METH_VARARGS},
+  {"get_movie_cache_stats", CmdGetMovieCacheStats, METH_VARARGS},
   {"get_session", CmdGetSession, METH_VARARGS},
   {"get_setting_of_type", CmdGetSettingOfType, METH_VARARGS},
   {"get_setting_type", CmdGetSettingType, METH_VARARGS},
@@ -6495,6 +6783,7 @@ static PyMethodDef Cmd_methods[] = {
   {"sculpt_iterate", CmdSculptIterate, METH_VARARGS},
   {"sculpt_purge", CmdSculptPurge, METH_VARARGS},
   {"set_raw_alignment", CmdSetRawAlignment, METH_VARARGS},
+  {"set_atom_properties", CmdSetAtomProperties, METH_VARARGS},
   {"set_busy", CmdSetBusy, METH_VARARGS},
   {"set_colorection", CmdSetColorection, METH_VARARGS},
   {"set_dihe", CmdSetDihe, METH_VARARGS},
@@ -6543,6 +6832,7 @@ static PyMethodDef Cmd_methods[] = {
   {"unset_bond", CmdUnsetBond, METH_VARARGS},
   {"update", CmdUpdate, METH_VARARGS},
   {"window", CmdWindow, METH_VARARGS},
+  {"write_image", CmdWriteImage, METH_VARARGS},
   {"zoom", CmdZoom, METH_VARARGS},
   {NULL, nullptr}                  /* sentinel */
 };
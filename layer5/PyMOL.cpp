@@ -47,6 +47,9 @@
 #include "P.h"
 #include "Editor.h"
 #include "SculptCache.h"
+#include "SurfaceCache.h"
+#include "Rep.h"
+#include "RepBuildQueue.h"
 #include "Isosurf.h"
 #include "Tetsurf.h"
 #include "PConv.h"
@@ -1960,6 +1963,9 @@ void PyMOL_Start(CPyMOL * I)
   ControlInit(G);
   AtomInfoInit(G);
   SculptCacheInit(G);
+  SurfaceCacheInit(G);
+  RepBuildStatsInit(G);
+  RepBuildQueueInit(G);
   VFontInit(G);
   ExecutiveInit(G);
   IsosurfInit(G);
@@ -2011,6 +2017,7 @@ void PyMOL_Stop(CPyMOL * I)
 {
   PyMOLGlobals *G = I->G;
   G->Terminating = true;
+  RepBuildQueueFree(G);
   TetsurfFree(G);
   IsosurfFree(G);
   WizardFree(G);
@@ -2020,6 +2027,8 @@ void PyMOL_Stop(CPyMOL * I)
   EditorFree(G);
   ExecutiveFree(G);
   VFontFree(G);
+  RepBuildStatsFree(G);
+  SurfaceCacheFree(G);
   SculptCacheFree(G);
   AtomInfoFree(G);
   ButModeFree(G);
@@ -2326,7 +2335,10 @@ void PyMOL_DrawWithoutLock(CPyMOL * I)
     I->RedisplayFlag = false;
 
     OrthoBusyPrime(G);
-    ExecutiveDrawNow(G);
+    {
+      RepBuildQueueInteractive interactive(G);
+      ExecutiveDrawNow(G);
+    }
 
     if(I->ImageRequestedFlag) {
       if(SceneHasImage(G)) {
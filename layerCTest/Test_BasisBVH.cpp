@@ -0,0 +1,162 @@
+#include "Test.h"
+
+#include "BasisBVH.h"
+
+#include <algorithm>
+#include <cmath>
+#include <random>
+#include <set>
+#include <vector>
+
+namespace
+{
+
+/// Spheres at random positions, some clustered, some spread out
+struct SphereScene {
+  std::vector<float> vertex;
+  std::vector<float> radius;
+  std::vector<int> vert2prim;
+  std::vector<CPrimitive> prim;
+  CBasis basis{};
+
+  explicit SphereScene(int n)
+  {
+    std::mt19937 rng(42);
+    std::uniform_real_distribution<float> near(-2.f, 2.f), far(-50.f, 50.f),
+        rad(0.2f, 1.5f);
+
+    prim.resize(n);
+    for (int a = 0; a < n; ++a) {
+      bool const clustered = a % 4 != 0;
+      for (int k = 0; k < 3; ++k) {
+        vertex.push_back(clustered ? near(rng) : far(rng));
+      }
+      radius.push_back(rad(rng));
+      vert2prim.push_back(a);
+      prim[a].type = cPrimSphere;
+      prim[a].vert = a;
+    }
+
+    basis.Vertex = vertex.data();
+    basis.Radius = radius.data();
+    basis.NVertex = n;
+  }
+
+  /// Spheres which intersect the ray (origin, dir) at dist >= 0
+  std::set<int> hits(const float* origin, const float* dir) const
+  {
+    std::set<int> result;
+    for (int a = 0; a < basis.NVertex; ++a) {
+      const float* v = basis.Vertex + a * 3;
+      float d[3] = {v[0] - origin[0], v[1] - origin[1], v[2] - origin[2]};
+      float const t = d[0] * dir[0] + d[1] * dir[1] + d[2] * dir[2];
+      float const dd = d[0] * d[0] + d[1] * d[1] + d[2] * d[2];
+      float const r2 = basis.Radius[a] * basis.Radius[a];
+      if (dd - t * t <= r2 && (t >= 0 || dd <= r2)) {
+        result.insert(a);
+      }
+    }
+    return result;
+  }
+};
+
+std::set<int> visit(const BasisBVH& bvh, const float* origin, const float* dir)
+{
+  std::set<int> result;
+  BasisBVH::Cursor cursor(&bvh, origin, dir);
+  while (const int* ip = cursor.next(1e30f)) {
+    for (; *ip >= 0; ++ip) {
+      REQUIRE(result.insert(*ip).second); // every primitive once
+    }
+  }
+  return result;
+}
+
+} // namespace
+
+TEST_CASE("BasisBVH visits all hit primitives", "[BasisBVH]")
+{
+  SphereScene scene(500);
+  auto bvh = BasisBVH::build(
+      &scene.basis, scene.vert2prim.data(), scene.prim.data(), 0.f);
+
+  REQUIRE(bvh->size() > 1);
+  REQUIRE(bvh->depth() <= BasisBVH::MaxDepth);
+
+  std::mt19937 rng(7);
+  std::uniform_real_distribution<float> xy(-10.f, 10.f);
+
+  for (int n = 0; n < 200; ++n) {
+    // orthoscopic and shadow rays point along -Z
+    float const origin[3] = {xy(rng), xy(rng), 100.f};
+    float const dir[3] = {0.f, 0.f, -1.f};
+    auto const expected = scene.hits(origin, dir);
+    auto const visited = visit(*bvh, origin, dir);
+    REQUIRE(std::includes(visited.begin(), visited.end(), expected.begin(),
+        expected.end()));
+  }
+
+  for (int n = 0; n < 200; ++n) {
+    // perspective rays from inside the scene
+    float const origin[3] = {xy(rng), xy(rng), xy(rng)};
+    float dir[3] = {xy(rng), xy(rng), xy(rng)};
+    float const len = std::sqrt(dir[0] * dir[0] + dir[1] * dir[1] + dir[2] * dir[2]);
+    for (auto& d : dir) {
+      d /= len;
+    }
+    auto const expected = scene.hits(origin, dir);
+    auto const visited = visit(*bvh, origin, dir);
+    REQUIRE(std::includes(visited.begin(), visited.end(), expected.begin(),
+        expected.end()));
+  }
+}
+
+TEST_CASE("BasisBVH nearest hit with shrinking max_dist", "[BasisBVH]")
+{
+  SphereScene scene(300);
+  auto bvh = BasisBVH::build(
+      &scene.basis, scene.vert2prim.data(), scene.prim.data(), 0.f);
+
+  std::mt19937 rng(3);
+  std::uniform_real_distribution<float> xy(-3.f, 3.f);
+
+  for (int n = 0; n < 200; ++n) {
+    float const origin[3] = {xy(rng), xy(rng), 100.f};
+    float const dir[3] = {0.f, 0.f, -1.f};
+
+    // like BasisHitOrthoscopic: prune with the nearest hit so far
+    float nearest = 1e30f, expected = 1e30f;
+    for (int a : scene.hits(origin, dir)) {
+      expected = std::min(expected,
+          origin[2] - scene.basis.Vertex[a * 3 + 2] - scene.basis.Radius[a]);
+    }
+
+    BasisBVH::Cursor cursor(bvh.get(), origin, dir);
+    while (const int* ip = cursor.next(nearest)) {
+      for (; *ip >= 0; ++ip) {
+        if (scene.hits(origin, dir).count(*ip)) {
+          nearest = std::min(nearest, origin[2] -
+                                          scene.basis.Vertex[*ip * 3 + 2] -
+                                          scene.basis.Radius[*ip]);
+        }
+      }
+    }
+
+    REQUIRE(nearest == expected);
+  }
+
+  BasisBVH::Cursor empty(nullptr, scene.basis.Vertex, scene.basis.Vertex);
+  REQUIRE(empty.next(1e30f) == nullptr);
+}
+
+TEST_CASE("BasisBVH empty", "[BasisBVH]")
+{
+  SphereScene scene(0);
+  auto bvh = BasisBVH::build(&scene.basis, nullptr, nullptr, 0.f);
+  REQUIRE(bvh->size() == 0);
+
+  float const origin[3] = {0.f, 0.f, 0.f};
+  float const dir[3] = {0.f, 0.f, -1.f};
+  BasisBVH::Cursor cursor(bvh.get(), origin, dir);
+  REQUIRE(cursor.next(1e30f) == nullptr);
+}
@@ -2,6 +2,8 @@
 
 #include "CifFile.h"
 
+#include <string>
+
 using namespace pymol::test;
 
 const char* SAMPLE_CIF_STR = R"""(
@@ -148,4 +150,39 @@ TEST_CASE("misc", "[CifFile]")
   REQUIRE(blocks.find("baz")->second.get_opt("_typed_float3")->as<double>() == Approx(1.23456789));
 }
 
+TEST_CASE("large input", "[CifFile]")
+{
+  // big enough to be tokenized in parallel chunks (if OpenMP is enabled)
+  const int nrows = 100000;
+  std::string str = "data_big\nloop_\n_big.id\n_big.name\n_big.text\n";
+  for (int i = 0; i < nrows; ++i) {
+    auto const id = std::to_string(i);
+    str += id + " 'atom " + id + "' ";
+    str += (i % 1000) ? "?\n" : "\n;line1\r\n;\n";
+  }
+
+  pymol::cif_file cf;
+  cf.set_n_thread(4);
+  cf.parse_string(str.c_str());
+  auto const& blocks = cf.datablocks();
+  REQUIRE(blocks.size() == 1);
+  auto const& data = blocks.begin()->second;
+  REQUIRE(data.get_opt("_big.id")->size() == nrows);
+  for (int i : {0, 1, 999, 1000, 1001, nrows / 2, nrows - 1}) {
+    REQUIRE(data.get_opt("_big.id")->as_i(i) == i);
+    REQUIRE(data.get_opt("_big.name")->as_s(i) == "atom " + std::to_string(i));
+    REQUIRE(data.get_opt("_big.text")->as_s(i, "?") ==
+            std::string((i % 1000) ? "?" : "line1"));
+  }
+
+  // quoted value which spans lines
+  str.replace(str.find("'atom 30000'"), 12, "'atom\n30000'");
+  pymol::cif_file cf2;
+  cf2.set_n_thread(4);
+  cf2.parse_string(str.c_str());
+  auto const& data2 = cf2.datablocks().begin()->second;
+  REQUIRE(data2.get_opt("_big.name")->as_s(30000) == std::string("atom\n30000"));
+  REQUIRE(data2.get_opt("_big.id")->as_i(nrows - 1) == nrows - 1);
+}
+
 // vi:sw=2:expandtab
@@ -0,0 +1,157 @@
+#include "Test.h"
+
+#include "SurfaceGrid.h"
+
+#include <cmath>
+#include <map>
+#include <utility>
+#include <vector>
+
+namespace
+{
+
+float distance(const float* a, const float* b)
+{
+  float const d[3] = {a[0] - b[0], a[1] - b[1], a[2] - b[2]};
+  return std::sqrt(d[0] * d[0] + d[1] * d[1] + d[2] * d[2]);
+}
+
+/// Every edge must be shared by exactly two triangles, with opposite
+/// orientation
+bool isClosedManifold(const SurfaceGridMesh& mesh)
+{
+  std::map<std::pair<int, int>, int> edges;
+  for (std::size_t t = 0; t < mesh.triangles.size(); t += 3) {
+    for (int k = 0; k < 3; ++k) {
+      int const a = mesh.triangles[t + k];
+      int const b = mesh.triangles[t + (k + 1) % 3];
+      ++edges[{a, b}];
+    }
+  }
+  for (auto const& edge : edges) {
+    auto const it = edges.find({edge.first.second, edge.first.first});
+    if (edge.second != 1 || it == edges.end() || it->second != 1) {
+      return false;
+    }
+  }
+  return true;
+}
+
+} // namespace
+
+TEST_CASE("SurfaceGrid single sphere", "[SurfaceGrid]")
+{
+  float const center[3] = {1.f, 2.f, 3.f};
+  float const radius[1] = {1.7f};
+
+  SurfaceGridParams params;
+  params.spacing = 0.25f;
+
+  for (bool sas : {false, true}) {
+    params.solvent_accessible = sas;
+    SurfaceGridMesh mesh;
+    REQUIRE(SurfaceGridCompute(nullptr, center, radius, 1, params, mesh));
+    REQUIRE(mesh.triangles.size() > 100);
+    REQUIRE(mesh.vertices.size() == mesh.normals.size());
+    REQUIRE(isClosedManifold(mesh));
+
+    // SES of a single sphere is its vdW surface
+    float const expected = sas ? radius[0] + params.probe_radius : radius[0];
+    for (std::size_t i = 0; i < mesh.vertices.size(); i += 3) {
+      const float* v = mesh.vertices.data() + i;
+      const float* n = mesh.normals.data() + i;
+      REQUIRE(std::fabs(distance(v, center) - expected) < 0.05f);
+      // outward normals
+      float const radial[3] = {v[0] - center[0], v[1] - center[1],
+          v[2] - center[2]};
+      float const dot = (n[0] * radial[0] + n[1] * radial[1] +
+                            n[2] * radial[2]) /
+                        distance(v, center);
+      REQUIRE(dot > 0.95f);
+    }
+  }
+}
+
+TEST_CASE("SurfaceGrid reentrant surface", "[SurfaceGrid]")
+{
+  // two spheres with a gap smaller than the probe diameter
+  float const coord[6] = {0.f, 0.f, 0.f, 4.f, 0.f, 0.f};
+  float const radius[2] = {1.6f, 1.6f};
+
+  SurfaceGridParams params;
+  params.spacing = 0.2f;
+  params.n_thread = 4;
+
+  SurfaceGridMesh mesh;
+  REQUIRE(SurfaceGridCompute(nullptr, coord, radius, 2, params, mesh));
+  REQUIRE(isClosedManifold(mesh));
+
+  // analytic SES: no vertex inside the atoms or closer than the probe to
+  // the probe accessible region, reentrant patch between the spheres
+  bool bridged = false;
+  for (std::size_t i = 0; i < mesh.vertices.size(); i += 3) {
+    const float* v = mesh.vertices.data() + i;
+    float const d0 = distance(v, coord);
+    float const d1 = distance(v, coord + 3);
+    REQUIRE(d0 > radius[0] - 0.1f);
+    REQUIRE(d1 > radius[1] - 0.1f);
+    if (std::fabs(v[0] - 2.f) < 0.1f) {
+      // probe touching both spheres at the center plane
+      float const probe_x = 2.f;
+      float const r = radius[0] + params.probe_radius;
+      float const probe_dist = std::sqrt(r * r - probe_x * probe_x);
+      float const rho = std::sqrt(v[1] * v[1] + v[2] * v[2]);
+      REQUIRE(std::fabs(rho - (probe_dist - params.probe_radius)) < 0.1f);
+      bridged = true;
+    }
+  }
+  REQUIRE(bridged);
+}
+
+TEST_CASE("SurfaceGrid cavities", "[SurfaceGrid]")
+{
+  // shell of spheres around an empty center
+  std::vector<float> coord;
+  std::vector<float> radius;
+  for (int x = -3; x <= 3; ++x) {
+    for (int y = -3; y <= 3; ++y) {
+      for (int z = -3; z <= 3; ++z) {
+        int const r2 = x * x + y * y + z * z;
+        if (r2 >= 6 && r2 <= 11) {
+          coord.insert(coord.end(), {x * 1.5f, y * 1.5f, z * 1.5f});
+          radius.push_back(1.2f);
+        }
+      }
+    }
+  }
+
+  SurfaceGridParams params;
+  params.probe_radius = 0.5f;
+  params.spacing = 0.3f;
+
+  auto const count_inner = [&](int cavity_cull) {
+    params.cavity_cull = cavity_cull;
+    SurfaceGridMesh mesh;
+    REQUIRE(SurfaceGridCompute(nullptr, coord.data(), radius.data(),
+        int(radius.size()), params, mesh));
+    int inner = 0;
+    float const origin[3] = {0.f, 0.f, 0.f};
+    for (std::size_t i = 0; i < mesh.vertices.size(); i += 3) {
+      if (distance(mesh.vertices.data() + i, origin) < 3.2f) {
+        ++inner;
+      }
+    }
+    return inner;
+  };
+
+  REQUIRE(count_inner(0) > 0);
+  REQUIRE(count_inner(1000000) == 0);
+}
+
+TEST_CASE("SurfaceGrid empty", "[SurfaceGrid]")
+{
+  SurfaceGridMesh mesh;
+  REQUIRE(SurfaceGridCompute(nullptr, nullptr, nullptr, 0, {}, mesh));
+  REQUIRE(mesh.vertices.empty());
+  REQUIRE(mesh.triangles.empty());
+}
@@ -0,0 +1,101 @@
+#include "Test.h"
+
+#include "pymol/lru_cache.h"
+
+#include <string>
+#include <vector>
+
+TEST_CASE("lru_cache get and put", "[lru_cache]")
+{
+  pymol::lru_cache<std::string, int> cache(2);
+  REQUIRE(cache.get("a") == nullptr);
+  REQUIRE(cache.put("a", 1));
+  REQUIRE(cache.put("b", 2));
+  REQUIRE(cache.size() == 2);
+  REQUIRE(*cache.get("a") == 1);
+  REQUIRE(*cache.get("b") == 2);
+  REQUIRE(cache.hits() == 2);
+  REQUIRE(cache.misses() == 1);
+}
+
+TEST_CASE("lru_cache evicts least recently used", "[lru_cache]")
+{
+  pymol::lru_cache<std::string, int> cache(2);
+  cache.put("a", 1);
+  cache.put("b", 2);
+  cache.get("a");
+  cache.put("c", 3);
+  REQUIRE(cache.size() == 2);
+  REQUIRE(cache.peek("a") != nullptr);
+  REQUIRE(cache.peek("b") == nullptr);
+  REQUIRE(cache.peek("c") != nullptr);
+}
+
+TEST_CASE("lru_cache replace", "[lru_cache]")
+{
+  pymol::lru_cache<int, int> cache(2);
+  cache.put(1, 10);
+  cache.put(1, 11);
+  REQUIRE(cache.size() == 1);
+  REQUIRE(*cache.get(1) == 11);
+}
+
+TEST_CASE("lru_cache cost", "[lru_cache]")
+{
+  pymol::lru_cache<int, int> cache(10);
+  REQUIRE(cache.put(1, 1, 4));
+  REQUIRE(cache.put(2, 2, 4));
+  REQUIRE(cache.cost() == 8);
+  REQUIRE(cache.put(3, 3, 4));
+  REQUIRE(cache.cost() == 8);
+  REQUIRE(cache.peek(1) == nullptr);
+  REQUIRE(!cache.put(4, 4, 11));
+  REQUIRE(cache.peek(4) == nullptr);
+  cache.set_capacity(4);
+  REQUIRE(cache.size() == 1);
+  REQUIRE(cache.peek(3) != nullptr);
+}
+
+TEST_CASE("lru_cache erase", "[lru_cache]")
+{
+  pymol::lru_cache<int, int> cache(10);
+  for (int i = 0; i < 5; ++i) {
+    cache.put(i, i * i);
+  }
+  REQUIRE(cache.erase(0));
+  REQUIRE(!cache.erase(0));
+  cache.erase_if([](int key, int) { return key % 2; });
+  REQUIRE(cache.size() == 2);
+  REQUIRE(cache.cost() == 2);
+  REQUIRE(*cache.peek(4) == 16);
+  cache.clear();
+  REQUIRE(cache.empty());
+  REQUIRE(cache.cost() == 0);
+}
+
+TEST_CASE("lru_cache stale entries", "[lru_cache]")
+{
+  pymol::lru_cache<int, int> cache(10);
+  cache.put(1, 10);
+  auto is_even = [](int value) { return value % 2 == 0; };
+  REQUIRE(cache.get(1, is_even) != nullptr);
+  cache.put(1, 11);
+  REQUIRE(cache.get(1, is_even) == nullptr);
+  REQUIRE(cache.empty());
+  REQUIRE(cache.hits() == 1);
+  REQUIRE(cache.misses() == 1);
+}
+
+TEST_CASE("lru_cache eviction callback", "[lru_cache]")
+{
+  pymol::lru_cache<int, int> cache(2);
+  std::vector<int> evicted;
+  cache.set_on_evict([&](int key, int&) { evicted.push_back(key); });
+  cache.put(1, 10);
+  cache.put(2, 20);
+  cache.put(3, 30);
+  REQUIRE(evicted == std::vector<int>{1});
+  cache.erase(2);
+  cache.set_capacity(0);
+  REQUIRE(evicted == std::vector<int>{1, 3});
+}
@@ -0,0 +1,66 @@
+#include "Test.h"
+
+#include "pymol/work_stealing_queue.h"
+
+#include <algorithm>
+#include <atomic>
+#include <thread>
+#include <vector>
+
+TEST_CASE("work_stealing_queue single worker", "[work_stealing_queue]")
+{
+  pymol::work_stealing_queue queue(5, 1);
+  std::vector<std::size_t> items;
+  for (std::size_t item; queue.pop(0, item);) {
+    items.push_back(item);
+  }
+  REQUIRE(items == std::vector<std::size_t>{0, 1, 2, 3, 4});
+  REQUIRE(queue.popped() == 5);
+}
+
+TEST_CASE("work_stealing_queue empty", "[work_stealing_queue]")
+{
+  pymol::work_stealing_queue queue(0, 4);
+  std::size_t item;
+  REQUIRE(!queue.pop(3, item));
+  REQUIRE(queue.size() == 0);
+}
+
+TEST_CASE("work_stealing_queue steals", "[work_stealing_queue]")
+{
+  pymol::work_stealing_queue queue(8, 2);
+  std::size_t item;
+  // worker 1 owns items 4..7, then steals from worker 0
+  std::vector<std::size_t> items;
+  while (queue.pop(1, item)) {
+    items.push_back(item);
+  }
+  REQUIRE(items.size() == 8);
+  std::sort(items.begin(), items.end());
+  REQUIRE(items == std::vector<std::size_t>{0, 1, 2, 3, 4, 5, 6, 7});
+  REQUIRE(!queue.pop(0, item));
+}
+
+TEST_CASE("work_stealing_queue threads", "[work_stealing_queue]")
+{
+  const std::size_t n = 1000;
+  const std::size_t n_thread = 4;
+  pymol::work_stealing_queue queue(n, n_thread);
+  std::vector<std::atomic<int>> count(n);
+
+  std::vector<std::thread> threads;
+  for (std::size_t t = 0; t < n_thread; ++t) {
+    threads.emplace_back([&, t]() {
+      for (std::size_t item; queue.pop(t, item);) {
+        ++count[item];
+      }
+    });
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+
+  REQUIRE(std::all_of(count.begin(), count.end(),
+      [](const std::atomic<int>& c) { return c == 1; }));
+  REQUIRE(queue.popped() == n);
+}
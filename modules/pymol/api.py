@@ -13,6 +13,7 @@ from .importing import \
       load_coordset,      \
       load_embedded,      \
       load_map,           \
+      load_map_region,    \
       load_model,         \
       load_mtz,           \
       load_object,        \
@@ -127,6 +128,7 @@ from .querying import \
       get_modal_draw,     \
       get_model,          \
       get_movie_locked,   \
+      get_movie_cache_stats, \
       get_movie_length,   \
       get_names,          \
       get_names_of_type,  \
@@ -140,7 +142,10 @@ from .querying import \
       get_povray,         \
       get_raw_alignment,  \
       get_renderer,       \
+      get_rep_build_stats, \
+      get_selection_cache_stats, \
       get_selection_state,\
+      get_surface_cache_stats, \
       get_symmetry,       \
       get_title,          \
       get_type,           \
@@ -178,6 +183,7 @@ from .exporting import \
       multifilenamegen,   \
       multisave,          \
       png,                \
+      render_batch,       \
       save
 
 #--------------------------------------------------------------------
@@ -199,6 +205,7 @@ from .editing import \
       fix_chemistry,      \
       flag,               \
       fuse,               \
+      get_atom_properties, \
       get_editor_scheme,  \
       h_add,              \
       h_fill,             \
@@ -232,6 +239,7 @@ from .editing import \
       sculpt_deactivate,  \
       sculpt_activate,    \
       sculpt_iterate,     \
+      set_atom_properties, \
       set_dihedral,       \
       set_name,           \
       set_geometry,       \
@@ -292,6 +300,7 @@ from .wizarding import \
 #--------------------------------------------------------------------
 from .fitting import \
       align,             \
+      align_matrix,      \
       alignto,		 \
       extra_fit,	 \
       fit,               \
@@ -180,6 +180,8 @@ if True:
         _ray_anti_spawn = internal._ray_anti_spawn
         _ray_hash_spawn = internal._ray_hash_spawn
         _ray_spawn = internal._ray_spawn
+        _rep_update_spawn = internal._rep_update_spawn
+        _rep_update_thread = internal._rep_update_thread
         _refresh = internal._refresh
         _special = internal._special
         _validate_color_sc = internal._validate_color_sc
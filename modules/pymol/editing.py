@@ -1536,6 +1536,80 @@ SEE ALSO
             return _cmd.alter(_self._COb, selection, expression, True,
                               int(quiet), dict(space))
 
+    def get_atom_properties(selection, names, *, _self=cmd):
+        '''
+DESCRIPTION
+
+    API only. Get atom properties as numpy arrays, one value per atom in
+    the same order as "iterate". Much faster than "iterate" for large
+    selections, since no Python code is evaluated per atom.
+
+ARGUMENTS
+
+    selection = str: atom selection
+
+    names = list of str: property names, same as in the "iterate"
+    namespace (except x/y/z, use get_coords for coordinates)
+
+RETURNS
+
+    dict with one array per name. String properties like "name" or
+    "chain" are object arrays of str.
+
+EXAMPLE
+
+    props = cmd.get_atom_properties('polymer', ['b', 'resi', 'chain'])
+    props['b'].mean()
+
+SEE ALSO
+
+    set_atom_properties, iterate, get_coords
+        '''
+        if isinstance(names, str):
+            names = names.split()
+
+        selection = selector.process(selection)
+
+        with _self.lockcm:
+            return _cmd.get_atom_properties(_self._COb, selection,
+                                            [str(n) for n in names])
+
+    def set_atom_properties(selection, values, quiet=1, *, _self=cmd):
+        '''
+DESCRIPTION
+
+    API only. Set atom properties from arrays, one value per atom in the
+    same order as "iterate" (or a single value for all atoms). Much faster
+    than "alter" for large selections, since no Python code is evaluated
+    per atom.
+
+ARGUMENTS
+
+    selection = str: atom selection
+
+    values = dict: property names (same as in the "alter" namespace) as
+    keys and sequences or scalars as values
+
+EXAMPLE
+
+    props = cmd.get_atom_properties('all', ['b'])
+    cmd.set_atom_properties('all', {'b': props['b'] * 2, 'q': 1.0})
+
+NOTES
+
+    Like with "alter", you may need to issue a "rebuild" in order to
+    update associated representations.
+
+SEE ALSO
+
+    get_atom_properties, alter
+        '''
+        selection = selector.process(selection)
+
+        with _self.lockcm:
+            return _cmd.set_atom_properties(_self._COb, selection,
+                                            dict(values), int(quiet))
+
     def alter_state(state, selection, expression, quiet=1,
                     space=None, atomic=1, _self=cmd):
 
@@ -2326,6 +2400,7 @@ PYMOL API
         'difference'    : 4,
         'copy'          : 5,
         'unique'        : 6,
+        'expression'    : 7,
         }
 
     map_op_sc = Shortcut(map_op_dict.keys())
@@ -2342,17 +2417,31 @@ USAGE
 
     map_set name, operator, operands, target_state, source_state
 
-    operator may be "minimum, maximum, average, sum, or difference"
+    operator may be "minimum, maximum, average, sum, difference, copy,
+    unique, or expression"
+
+    With "expression", operands is an arithmetic expression over map
+    names with + - * /, parentheses, numbers, min(), max() and abs(). It
+    is evaluated in a single pass, without intermediate maps. Map names
+    with other characters than letters, digits, "_" and "." must be
+    quoted, like 'map-1'.
 
 EXAMPLES
 
-    map my_sum, add, map1 map2 map3
-    map my_avg, average, map1 map2 map3
-    
+    map_set my_sum, sum, map1 map2 map3
+    map_set my_avg, average, map1 map2 map3
+    map_set my_diff, expression, (half1 + half2) / 2 - model
+    map_set my_max, expression, "max(map1, map2, 0)"
+
 NOTES
 
     source_state = 0 means all states
     target_state = -1 means current state
+
+    Operands on the same grid as the result are used without
+    interpolation. If all operands share one grid, a new result map gets
+    that grid as well. Otherwise, the result of the expression operator
+    is computed on the grid of the first map.
     
     experimental
     
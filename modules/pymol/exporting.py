@@ -369,7 +369,7 @@ NOTES
                             state.append(state[0])
 
     def get_session(names='', partial=0, quiet=1, compress=-1, cache=-1,
-                    binary=-1, version=-1,
+                    binary=-1, version=-1, stamps=None,
                     *, _self=cmd):
         '''
         :param names: Names of objects to export, or the empty string to export all objects.
@@ -379,6 +379,10 @@ NOTES
         :param cache: ?
         :param binary: Use efficient binary format {default: pse_binary_dump}
         :param version: {default: pse_export_version}
+        :param stamps: Dictionary of object names to change stamps from a
+        previous call, for incremental saving. Objects which didn't change
+        since then are exported without data (None). Gets updated with the
+        current stamps.
         '''
         session = {}
         cache = int(cache)
@@ -423,7 +427,7 @@ NOTES
 
         with _self.lockcm:
             _cmd.get_session(_self._COb, session, str(names), int(partial),
-                             int(quiet), binary, pse_export_version)
+                             int(quiet), binary, pse_export_version, stamps)
 
         if True:
                 try:
@@ -601,6 +605,139 @@ PYMOL API
 
         return _self._call_with_opengl_context(func)
 
+    _RENDER_BATCH_FIELDS = ('view', 'selection', 'size', 'filename')
+
+    def render_batch(jobs, antialias=-1, quiet=1, queue_size=4, *, _self=cmd):
+        '''
+DESCRIPTION
+
+    "render_batch" ray traces many images in one go, e.g. thumbnails for
+    a compound library.
+
+    Representations which are already built are reused for all jobs, only
+    the view (and which objects are enabled) changes between images. The
+    PNG files are compressed and written in a background thread, while the
+    next images are ray traced. The batch only waits for the writer once
+    "queue_size" images are pending.
+
+    After the batch, the view and the enabled objects are restored.
+
+ARGUMENTS
+
+    jobs = list of (view, selection, size, filename) tuples or of
+    dictionaries with these keys:
+
+        view = scene name, view matrix (see get_view) or None {default:
+        orient on "selection"}
+
+        selection = str: enable only the objects in this selection, or
+        None to keep the enabled objects {default: None}
+
+        size = (width, height) or int (width) in pixels {default: (0, 0),
+        current size}
+
+        filename = str: PNG file to write
+
+    antialias = int: see ray {default: -1 (use setting)}
+
+    queue_size = int: maximum number of images waiting to be written
+    {default: 4}
+
+EXAMPLE
+
+    jobs = [(None, name, (200, 200), name + '.png')
+            for name in cmd.get_object_list()]
+    cmd.render_batch(jobs)
+
+PYMOL API
+
+    cmd.render_batch(list jobs, int antialias, int quiet, int queue_size)
+
+SEE ALSO
+
+    ray, png, mpng
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+
+        jobs = list(jobs)
+        dpi = _self.get_setting_float('image_dots_per_inch')
+        gamma = (_self.get_setting_float('png_screen_gamma'),
+                 _self.get_setting_float('png_file_gamma'))
+
+        saved_view = _self.get_view()
+        saved_enabled = _self.get_names('public_objects', enabled_only=1)
+
+        pending = []
+        failed = []
+
+        def write(image, filename):
+            _cmd.write_image(_self._COb, image, filename, 0, dpi, *gamma)
+
+        def wait(future, filename):
+            try:
+                future.result()
+            except pymol.CmdException as e:
+                failed.append(filename)
+                print(' render_batch-Error: ' + str(e))
+
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                for job in jobs:
+                    if not isinstance(job, dict):
+                        job = dict(zip(_RENDER_BATCH_FIELDS, job))
+
+                    view = job.get('view')
+                    selection = job.get('selection')
+                    size = job.get('size') or (0, 0)
+                    if not isinstance(size, (list, tuple)):
+                        size = (size, 0)
+
+                    filename = cmd.exp_path(job['filename'])
+                    if not filename.endswith('.png'):
+                        filename += '.png'
+
+                    if selection is not None:
+                        _self.disable('all')
+                        for name in _self.get_object_list(selection):
+                            _self.enable(name)
+
+                    if isinstance(view, str):
+                        _self.scene(view, 'recall', animate=0)
+                    elif view is not None:
+                        _self.set_view(view)
+                    elif selection is not None:
+                        _self.orient(selection)
+
+                    _self.ray(int(size[0]), int(size[1]), antialias,
+                              quiet=quiet)
+
+                    with _self.lockcm:
+                        image = _cmd.get_scene_image(_self._COb, 1)
+
+                    # writing blocks only if the writer falls behind
+                    if len(pending) >= max(1, int(queue_size)):
+                        wait(*pending.pop(0))
+
+                    pending.append((executor.submit(write, image, filename),
+                        filename))
+
+                for item in pending:
+                    wait(*item)
+        finally:
+            _self.disable('all')
+            for name in saved_enabled:
+                _self.enable(name)
+            _self.set_view(saved_view)
+
+        if failed:
+            raise pymol.CmdException('failed to write %d of %d images' %
+                                     (len(failed), len(jobs)))
+
+        if not int(quiet):
+            print(' render_batch: wrote %d images.' % len(jobs))
+
+        return DEFAULT_SUCCESS
+
     def multisave(filename, pattern="all", state=-1,
                   append=0, format='', quiet=1, *, _self=cmd):
         '''
@@ -808,8 +945,15 @@ NOTES
 
     The file format is automatically chosen if the extesion is one of
     the supported output formats: pdb, pqr, mol, sdf, pkl, pkla, mmd, out,
-    dat, mmod, cif, pov, png, pse, psw, aln, fasta, obj, mtl, wrl, dae, idtf,
-    or mol2.
+    dat, mmod, cif, pov, png, pse, psw, psb, aln, fasta, obj, mtl, wrl, dae,
+    idtf, or mol2.
+
+    "psb" is a binary session format which stores coordinates, atom info and
+    map data as contiguous arrays. It loads much faster than "pse" for large
+    sessions, but cannot be compressed and is not readable by older PyMOL
+    versions. With the "session_incremental" setting, saving again to the
+    same .psb file only appends the objects which changed since the last
+    save.
 
     If the file format is not recognized, then a PDB file is written
     by default.
@@ -843,7 +987,7 @@ SEE ALSO
             format = format_guessed
 
         # PyMOL session
-        if format in ('pse', 'psw',):
+        if format in ('pse', 'psw', 'psb',):
             _self.set("session_file",
                     # always use unix-like path separators
                     filename.replace("\\", "/"), quiet=1)
@@ -998,6 +1142,7 @@ SEE ALSO
 
         'pse': get_psestr,
         'psw': get_psestr,
+        'psb': 'pymol.sessionio:save_psb',
 
         'fasta': get_fastastr,
         'aln': get_alnstr,
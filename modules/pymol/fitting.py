@@ -196,6 +196,168 @@ SEE ALSO
             _self.delete(sele_name)
 
 
+        def _tm_score(dist2, length):
+            import numpy
+            # TM-score distance scale
+            d0 = max(0.5, 1.24 * numpy.cbrt(length - 15.0) - 1.8)
+            return float(numpy.sum(1.0 / (1.0 + dist2 / d0**2)) / length)
+
+        def _superposition_dist2(target, mobile):
+            '''
+            Squared distances of two (N, 3) coordinate arrays after the
+            least-squares superposition of "mobile" onto "target".
+            '''
+            import numpy
+            t = target - target.mean(0)
+            m = mobile - mobile.mean(0)
+            u, _, vt = numpy.linalg.svd(m.T.dot(t))
+            if numpy.linalg.det(u) * numpy.linalg.det(vt) < 0:
+                u[:, -1] = -u[:, -1]
+            return ((m.dot(u).dot(vt) - t)**2).sum(1)
+
+        def align_matrix(objects='all', method='cealign', state=1, guide=1,
+                         quiet=1, *, _self=cmd, **kwargs):
+            '''
+DESCRIPTION
+
+    "align_matrix" aligns all pairs of objects and returns matrices of
+    RMSD values and TM-scores, e.g. for clustering an ensemble.
+
+    No coordinates are modified.
+
+USAGE
+
+    align_matrix [ objects [, method [, state [, guide [, quiet ]]]]]
+
+ARGUMENTS
+
+    objects = str or list: atom selection or list of object names
+    {default: all}
+
+    method = cealign, align or super {default: cealign}
+
+    state = int: object state {default: 1}
+
+    guide = 0/1: only use guide atoms (CA) {default: 1}
+
+    ... extra arguments are passed to "method", e.g. d0, d1, window and
+    gap_max for cealign or cutoff and cycles for align and super
+
+RETURNS
+
+    dictionary with these keys (N = number of objects):
+
+    names = list of N object names
+
+    rmsd = (N, N) array: RMSD of the aligned atoms, -1.0 if an alignment
+    failed
+
+    length = (N, N) int array: number of aligned atoms
+
+    tm = (N, N) array: TM-score of the aligned atoms after superposition,
+    tm[i, j] is normalized by the number of atoms of object i
+
+NOTES
+
+    Selections and coordinates are evaluated once per object, and every
+    pair is only aligned once (the object which comes first in "names" is
+    the target). With cealign, pairs are aligned in parallel
+    ("max_threads" setting).
+
+    align and super run one full "align" or "super" command per pair, one
+    pair at a time: residues are extracted and scored again for every
+    pair, and nothing runs in parallel, because these commands work on
+    selections and alignment objects. For large ensembles, use cealign.
+
+EXAMPLE
+
+    r = cmd.align_matrix('model*', method='super')
+    print(r['rmsd'])
+
+SEE ALSO
+
+    cealign, align, super, extra_fit
+            '''
+            import numpy
+
+            state, quiet = int(state), int(quiet)
+            guide = ' & guide' if int(guide) else ''
+
+            if _self.is_string(objects):
+                names = _self.get_object_list('(' + objects + ')')
+            else:
+                names = list(objects)
+                objects = ' '.join(names)
+
+            n = len(names)
+            prefix = _self.get_unused_name('_align_matrix')
+            seles = ['%s_%d' % (prefix, i) for i in range(n)]
+            aln = prefix + '_aln'
+
+            try:
+                coords = []
+                for name, sele in zip(names, seles):
+                    _self.select(sele, '(%s) & ?%s%s' % (objects, name, guide), 0)
+                    xyz = _self.get_coords(sele, state)
+                    coords.append(numpy.zeros((0, 3)) if xyz is None else xyz)
+
+                if method == 'cealign':
+                    args = {'d0': 3.0, 'd1': 4.0, 'window': 8, 'gap_max': 30}
+                    args.update(kwargs)
+                    max_threads = _self.get_setting_int('max_threads')
+                    with _self.lockcm:
+                        rmsd, length, tm = _cmd.cealign_matrix(_self._COb,
+                                [xyz.tolist() for xyz in coords],
+                                float(args['d0']), float(args['d1']),
+                                int(args['window']), int(args['gap_max']),
+                                max_threads)
+                    rmsd = numpy.array(rmsd).reshape((n, n))
+                    length = numpy.array(length).reshape((n, n))
+                    tm = numpy.array(tm).reshape((n, n))
+                elif method in ('align', 'super'):
+                    func = getattr(_self, method)
+                    rmsd = numpy.zeros((n, n))
+                    tm = numpy.identity(n)
+                    length = numpy.diag([len(xyz) for xyz in coords])
+
+                    # atom index -> row in coords
+                    rows = []
+                    for sele in seles:
+                        idx = []
+                        _self.iterate(sele, 'idx.append(index)',
+                                      space={'idx': idx})
+                        rows.append({j: k for k, j in enumerate(idx)})
+
+                    for i in range(n):
+                        for j in range(i + 1, n):
+                            r = func(seles[j], seles[i], object=aln,
+                                     mobile_state=state, target_state=state,
+                                     transform=0, quiet=1, **kwargs)
+                            rmsd[i, j] = rmsd[j, i] = r[0]
+                            length[i, j] = length[j, i] = r[1]
+
+                            pairs = [(rows[i][col[names[i]]],
+                                      rows[j][col[names[j]]])
+                                     for col in map(dict,
+                                         _self.get_raw_alignment(aln))]
+                            if not pairs:
+                                continue
+                            ri, rj = numpy.array(pairs).T
+                            dist2 = _superposition_dist2(coords[i][ri],
+                                                         coords[j][rj])
+                            tm[i, j] = _tm_score(dist2, len(coords[i]))
+                            tm[j, i] = _tm_score(dist2, len(coords[j]))
+                else:
+                    raise pymol.CmdException('unknown method "%s"' % method)
+            finally:
+                _self.delete(prefix + '_*')
+
+            if not quiet:
+                for i in range(n):
+                    print(' ' + ' '.join('%6.2f' % v for v in rmsd[i]))
+
+            return {'names': names, 'rmsd': rmsd, 'length': length, 'tm': tm}
+
         def alignto(target='', method="cealign", selection='', quiet=1, *, _self=cmd, **kwargs):
                 """
 DESCRIPTION
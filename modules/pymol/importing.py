@@ -338,9 +338,83 @@ PYMOL API
         lst.extend(list(arg))
         return _self.load_object(*lst, **kw)
 
+    def load_map_region(filename, selection, buffer=2.0, object='', state=0,
+                        format='', sele_state=0, quiet=1, *, _self=cmd):
+        '''
+DESCRIPTION
+
+    "load_map_region" loads only the part of a CCP4 or MRC map which
+    covers a selection. Use it to inspect local regions of maps which are
+    too large to load entirely.
+
+USAGE
+
+    load_map_region filename, selection [, buffer [, object [, state
+            [, format [, sele_state ]]]]]
+
+ARGUMENTS
+
+    filename = str: path to a ccp4, mrc or map file
+
+    selection = str: atoms to cover
+
+    buffer = float: padding around the selection in Angstrom {default: 2.0}
+
+    object = str: name of the map object {default: filename prefix}
+
+    state = int: map state to load into, or 0 to append {default: 0}
+
+    format = ccp4, mrc or map {default: use file extension}
+
+    sele_state = int: selection state, or 0 for all states {default: 0}
+
+EXAMPLE
+
+    fetch 1ubq
+    load_map_region emd_1234.map, resi 10-20, 5.0
+
+NOTES
+
+    Uncompressed files are memory mapped, only the region's pages are
+    read from disk. With normalize_ccp4_maps=1, the map is normalized with
+    the mean and RMS from the file header (like normalize_ccp4_maps=2).
+    Only if the header has no RMS, the statistics are computed over the
+    entire map, with one sequential pass over the file.
+
+SEE ALSO
+
+    load, map_trim
+        '''
+        format_ftypes = {
+            'ccp4': loadable.ccp4,
+            'mrc': loadable.mrc,
+            'map': loadable.map,
+        }
+
+        filename = _self.exp_path(unquote(filename))
+        noext, ext, format_guessed, zipped = filename_to_format(filename)
+        format = str(format) or format_guessed
+
+        if format not in format_ftypes:
+            raise pymol.CmdException('unsupported map format: ' + format)
+
+        if not _self.count_atoms(selection, state=sele_state):
+            raise pymol.CmdException('empty selection')
+
+        buffer = float(buffer)
+        mn, mx = _self.get_extent(selection, state=sele_state)
+        map_box = [v - buffer for v in mn] + [v + buffer for v in mx]
+
+        object = str(object).strip() or noext
+
+        with _self.lockcm:
+            return pymol.internal._load(object, filename, int(state),
+                    format_ftypes[format], 1, -1, quiet, -2, -1,
+                    map_box=map_box, _self=_self)
+
     def load_traj(filename,object='',state=1,format='',interval=1,
                       average=1,start=1,stop=-1,max=-1,selection='all',image=1,
-                      shift="[0.0,0.0,0.0]",plugin="", *, _self=cmd):
+                      shift="[0.0,0.0,0.0]",plugin="",lazy=0, *, _self=cmd):
         '''
 DESCRIPTION
 
@@ -387,6 +461,11 @@ ARGUMENTS
     plugin = str: name of VMD plugin to use {default: guess from magic string
     of from format}
 
+    lazy = 0/1: only read the frames which are displayed or queried from the
+    trajectory file, when they are needed (plugin formats only). The file
+    must stay in place. The "traj_cache_size" setting limits the memory (in
+    MB) of built states {default: 0}
+
 NOTES
 
     You must first load a corresponding topology file before attempting
@@ -398,6 +477,11 @@ NOTES
     The average option is not a running average.  To perform this type of
     average, use the "smooth" command after loading the trajectory file.
 
+    With lazy=1, a state whose coordinates get modified (e.g. with
+    alter_state, translate or smooth) is no longer read from the file and
+    stays in memory. Displaying all states at once (the "all_states"
+    setting) only shows states which fit into the cache.
+
 SEE ALSO
 
     load
@@ -456,7 +540,8 @@ SEE ALSO
                                          int(stop),int(max),str(selection),
                                          int(image),
                                          float(shift[0]),float(shift[1]),
-                                         float(shift[2]),str(plugin))
+                                         float(shift[2]),str(plugin),
+                                         int(lazy))
 
     def _processALN(fname,quiet=1, *, _self=cmd):
         legal_dict = {}
@@ -829,11 +914,15 @@ SEE ALSO
             return func(**kw)
 
     def load_pse(filename, partial=0, quiet=1, format='pse', *, _self=cmd):
-        try:
-            contents = _self.file_read(filename)
-            session = io.pkl.fromString(contents)
-        except AttributeError as e:
-            raise pymol.CmdException('PSE contains objects which cannot be unpickled (%s)' % str(e))
+        if format == 'psb':
+            from pymol import sessionio
+            session = sessionio.read_session(filename)
+        else:
+            try:
+                contents = _self.file_read(filename)
+                session = io.pkl.fromString(contents)
+            except AttributeError as e:
+                raise pymol.CmdException('PSE contains objects which cannot be unpickled (%s)' % str(e))
 
         r = _self.set_session(session, quiet=quiet, partial=partial, steal=1)
 
@@ -1636,6 +1725,7 @@ DESCRIPTION
         'idx': load_idx,
         'pse': load_pse,
         'psw': load_pse,
+        'psb': load_pse,
         'ply': load_ply,
         'r3d': load_r3d,
         'cc1': load_cc1,
@@ -204,6 +204,34 @@ def _coordset_update_spawn(thread_info,n_thread,_self=cmd):
         for t in thread_list:
             t.join()
 
+def _rep_update_thread(list_lock,thread_info,_self=cmd):
+    # WARNING: internal routine, subject to change
+    while 1:
+        list_lock.acquire()
+        if not len(thread_info):
+            list_lock.release()
+            break
+        else:
+            info = thread_info.pop(0)
+            list_lock.release()
+        _cmd.rep_update_thread(_self._COb,info)
+
+def _rep_update_spawn(thread_info,n_thread,_self=cmd):
+    # WARNING: internal routine, subject to change
+    if len(thread_info):
+        list_lock = threading.Lock() # mutex for list
+        thread_list = []
+        for a in range(1,min(n_thread,len(thread_info))):
+            t = threading.Thread(target=_rep_update_thread,
+                                        args=(list_lock,thread_info))
+            t.setDaemon(1)
+            thread_list.append(t)
+        for t in thread_list:
+            t.start()
+        _rep_update_thread(list_lock,thread_info)
+        for t in thread_list:
+            t.join()
+
 def _object_update_thread(list_lock,thread_info,_self=cmd):
     # WARNING: internal routine, subject to change
     while 1:
@@ -308,6 +336,26 @@ def file_read(finfo, _self=cmd):
 
     return contents
 
+# map formats which the C loader memory-maps if given an uncompressed file
+_mmap_ftypes = (loadable.ccp4, loadable.mrc, loadable.map)
+
+def _is_plain_file(finfo):
+    '''
+    True if finfo is the name of a local, uncompressed file
+    (see file_read for the compressed formats)
+    '''
+    if not is_string(finfo) or '://' in finfo:
+        return False
+
+    try:
+        with open(finfo, 'rb') as handle:
+            magic = handle.read(10)
+    except IOError:
+        return False
+
+    return not (magic[:2] == b'\x1f\x8b' or
+            magic[:2] == b'BZ' and magic[4:10] == b'1AY&SY')
+
 def download_chem_comp(resn, quiet=1, _self=cmd):
     '''
     WARNING: internal routine, subject to change
@@ -347,23 +395,25 @@ def _load(oname,finfo,state,ftype,finish,discrete,
           quiet=1,multiplex=0,zoom=-1,mimic=1,
           plugin='',
           object_props=None,
-          atom_props=None, _self=cmd):
+          atom_props=None, map_box=None, _self=cmd):
     # WARNING: internal routine, subject to change
     # caller must already hold API lock
     # NOTE: state index assumes 1-based state
+    # map_box: (ccp4/mrc only) [minx, miny, minz, maxx, maxy, maxz] region
     r = DEFAULT_ERROR
     contents = None
     size = 0
     if ftype not in (loadable.model,loadable.brick):
-        if True:
-            if ftype in _load2str:
-                contents = _self.file_read(finfo)
-                ftype = _load2str[ftype]
+        if ftype in _load2str and not (
+                ftype in _mmap_ftypes and _is_plain_file(finfo)):
+            contents = _self.file_read(finfo)
+            ftype = _load2str[ftype]
         return _cmd.load(_self._COb, str(oname), str(finfo), contents,
                           int(state) - 1, int(ftype),
                           int(finish),int(discrete),int(quiet),
                           int(multiplex),int(zoom), plugin,
-                          object_props, atom_props, int(mimic))
+                          object_props, atom_props, int(mimic),
+                          map_box)
     else:
         try:
             x = chempy.io.pkl.fromFile(finfo)
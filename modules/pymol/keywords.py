@@ -15,6 +15,7 @@ def get_command_keywords(self_cmd=cmd):
         'accept'        : [ self_cmd.accept            , 0 , 0 , ''  , parsing.STRICT ],
         'alias'         : [ self_cmd.alias             , 0 , 0 , ''  , parsing.LITERAL1 ], # insecure
         'align'         : [ self_cmd.align             , 0 , 0 , ''  , parsing.STRICT ],
+        'align_matrix'  : [ self_cmd.align_matrix      , 0 , 0 , ''  , parsing.STRICT ],
         'alignto'       : [ self_cmd.alignto           , 0 , 0 , ''  , parsing.STRICT ],
         'alter'         : [ self_cmd.alter             , 0 , 0 , ''  , parsing.LITERAL1 ], # insecure
         '_alt'          : [ self_cmd._alt              , 0 , 0 , ''  , parsing.STRICT ],
@@ -107,10 +108,14 @@ def get_command_keywords(self_cmd=cmd):
         'get_dihedral'  : [ self_cmd.get_dihedral      , 0 , 0 , ''  , parsing.STRICT ],
         'get_distance'  : [ self_cmd.get_distance      , 0 , 0 , ''  , parsing.STRICT ],
         'get_extent'    : [ self_cmd.get_extent        , 0 , 0 , ''  , parsing.STRICT ],
+        'get_movie_cache_stats': [ self_cmd.get_movie_cache_stats, 0 , 0 , '' , parsing.STRICT ],
         'get_position'  : [ self_cmd.get_position      , 0 , 0 , ''  , parsing.STRICT ],
+        'get_selection_cache_stats': [ self_cmd.get_selection_cache_stats, 0 , 0 , '' , parsing.STRICT ],
         'get_sasa_relative' : [ self_cmd.get_sasa_relative , 0 , 0 , ''  , parsing.STRICT ],
+        'get_surface_cache_stats': [ self_cmd.get_surface_cache_stats, 0 , 0 , '' , parsing.STRICT ],
         'get_symmetry'  : [ self_cmd.get_symmetry      , 0 , 0 , ''  , parsing.STRICT ],
         'get_renderer'  : [ self_cmd.get_renderer      , 0 , 0 , ''  , parsing.STRICT ],
+        'get_rep_build_stats': [ self_cmd.get_rep_build_stats, 0 , 0 , '' , parsing.STRICT ],
         'get_title'     : [ self_cmd.get_title         , 0 , 0 , ''  , parsing.STRICT ],
         'get_type'      : [ self_cmd.get_type          , 0 , 0 , ''  , parsing.STRICT ],
         'get_version'   : [ self_cmd.get_version       , 0 , 0 , ''  , parsing.STRICT ],
@@ -147,6 +152,7 @@ def get_command_keywords(self_cmd=cmd):
         'loadall'       : [ self_cmd.loadall           , 0 , 0 , ''  , parsing.STRICT ],
         'space'         : [ self_cmd.space             , 0 , 0 , ''  , parsing.STRICT ],
         'load_embedded' : [ self_cmd.load_embedded     , 0 , 0 , ''  , parsing.STRICT ],
+        'load_map_region': [ self_cmd.load_map_region  , 0 , 0 , ''  , parsing.STRICT ],
         'load_mtz'      : [ self_cmd.load_mtz          , 0 , 0 , ''  , parsing.STRICT ],
         'load_png'      : [ self_cmd.load_png          , 0 , 0 , ''  , parsing.STRICT ],
         'load_traj'     : [ self_cmd.load_traj         , 0 , 0 , ''  , parsing.STRICT ],
@@ -684,6 +684,109 @@ def _watch(filename,done_event):
         if done_event.isSet():
             break
 
+def _ffmpeg_codec_args(filename, quality):
+    if filename.endswith('.webm'):
+        args_crf = ['-crf', '{:.0f}'.format(65 - (quality / 2))]
+        return ['-c:v', 'libvpx-vp9', '-b:v', '0'] + args_crf
+    return [
+        '-crf', '10' if quality > 90 else '15' if quality > 80 else '20',
+        '-pix_fmt', 'yuv420p', # needed for Mac support
+    ]
+
+def _encode_pipe(filename, first, last, mode, width, height, quality,
+                 quiet, queue_size=4, _self=cmd):
+    '''
+    Render frames first..last and pipe them as raw RGBA video to ffmpeg,
+    without writing intermediate image files. A writer thread feeds the
+    encoder while the next frame renders; at most queue_size frames are
+    held in memory, beyond that rendering waits for the encoder.
+    '''
+    import queue
+    import subprocess
+    from pymol import _cmd, CmdException
+
+    # like SceneValidateImageMode: without a GUI there is nothing to draw
+    if _self._pymol.invocation.options.no_gui or (
+            mode < 0 and _self.get_setting_boolean('ray_trace_frames')):
+        mode = 2
+    elif mode < 0:
+        mode = 1
+
+    fps = get_movie_fps(_self)
+    frames = queue.Queue(max(1, queue_size))
+    process = None
+    writer = None
+    errors = []
+
+    def write():
+        while True:
+            data = frames.get()
+            if data is None:
+                break
+            if errors:
+                continue # drain, so that the render loop doesn't block
+            try:
+                process.stdin.write(data)
+            except OSError as e:
+                errors.append(e)
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+
+    try:
+        for frame in range(first, last + 1):
+            _self.frame(frame)
+            if mode == 2:
+                _self.ray(width, height, quiet=1)
+            else:
+                _self.draw(width, height, quiet=1)
+
+            with _self.lockcm:
+                image = _cmd.get_scene_image(_self._COb, 1)
+                w, h, data = _cmd.get_image_rgba(_self._COb, image)
+
+            if process is None:
+                args = ['ffmpeg', '-v', 'warning', '-y',
+                    '-f', 'rawvideo', '-pix_fmt', 'rgba',
+                    '-s', '%dx%d' % (w, h),
+                    '-framerate', '{:.3f}'.format(fps),
+                    '-i', '-',
+                ]
+                if filename.endswith('.gif'):
+                    args += ['-lavfi', 'split [a][b]; [a] palettegen [p]; '
+                                       '[b][p] paletteuse']
+                else:
+                    args += _ffmpeg_codec_args(filename, quality)
+                process = subprocess.Popen(args + [filename],
+                                           stdin=subprocess.PIPE)
+                writer = threading.Thread(target=write)
+                writer.start()
+                frame_bytes = len(data)
+            elif len(data) != frame_bytes:
+                raise CmdException('frame %d has a different size' % frame)
+
+            frames.put(data)
+
+            if errors:
+                break
+
+            if not quiet:
+                print(" produce: frame %d of %d" % (frame - first + 1,
+                                                    last - first + 1))
+    finally:
+        if writer is not None:
+            frames.put(None)
+            writer.join()
+        if process is not None:
+            process.wait()
+
+    if errors or process is None or process.returncode != 0:
+        raise CmdException('ffmpeg failed to encode "%s"' % filename)
+
+    if not quiet:
+        print(" produce: finished.")
+
 def _encode(filename,first,last,preserve,
             encoder,tmp_path,prefix,img_ext,quality,quiet,_self=cmd):
     import os
@@ -775,14 +878,7 @@ def _encode(filename,first,last,preserve,
                     '-framerate', '{:.3f}'.format(fps),
                     '-i', prefix + '%04d' + img_ext,
                 ]
-                if fn_rel.endswith('.webm'):
-                    args_crf = ['-crf', '{:.0f}'.format(65 - (quality / 2))]
-                    args += ['-c:v', 'libvpx-vp9', '-b:v', '0'] + args_crf
-                else:
-                    args += [
-                    '-crf', '10' if quality > 90 else '15' if quality > 80 else '20',
-                    '-pix_fmt', 'yuv420p', # needed for Mac support
-                    ]
+                args += _ffmpeg_codec_args(fn_rel, quality)
                 process = subprocess.Popen(args + [fn_rel], stderr=subprocess.PIPE)
             stderr = process.communicate()[1]
             colorprinting.warning(stderr.strip().decode(errors='replace'))
@@ -812,6 +908,53 @@ def _encode(filename,first,last,preserve,
     if preserve<1:
         shutil.rmtree(tmp_path)
 
+def _mpng_parallel(tmp_path, prefix, img_ext, first, last, processes,
+                   width, height, quiet, _self=cmd):
+    '''
+    Ray trace frames first..last into tmp_path with several headless PyMOL
+    processes. Each worker loads a snapshot of the current session and
+    renders one contiguous frame range, so the numbered files are identical
+    to what a single mpng call would have written.
+    '''
+    import subprocess
+    from pymol import CmdException
+
+    session = '_produce.pse'
+    _self.save(os.path.join(tmp_path, session), quiet=1)
+
+    n_frames = last - first + 1
+    processes = max(1, min(processes, n_frames))
+    chunk = (n_frames + processes - 1) // processes
+    threads = max(1, _self.get_setting_int('max_threads') // processes)
+
+    if not quiet:
+        print(" produce: rendering %d frames with %d processes..." %
+              (n_frames, processes))
+
+    workers = []
+    try:
+        for start in range(first, last + 1, chunk):
+            stop = min(start + chunk - 1, last)
+            args = [sys.executable, '-m', 'pymol', '-ckq', session,
+                    '-d', 'unset keep_alive',
+                    '-d', 'set max_threads, %d' % threads,
+                    '-d', 'mpng %s, %d, %d, mode=2, width=%d, height=%d' %
+                    (prefix + img_ext, start, stop, width, height)]
+            # relative paths: avoid passing non-ascii paths to sub processes
+            workers.append(subprocess.Popen(args, cwd=tmp_path,
+                                            stdout=subprocess.DEVNULL))
+        failed = [w.args for w in workers if w.wait() != 0]
+    finally:
+        for w in workers:
+            if w.poll() is None:
+                w.kill()
+        os.unlink(os.path.join(tmp_path, session))
+
+    if failed:
+        raise CmdException('%d of %d render processes failed' %
+                           (len(failed), len(workers)))
+
+
 produce_mode_dict = {
     'normal'  : 0,
     'draw'    : 1,
@@ -845,7 +988,7 @@ def find_exe(exe):
 
 def produce(filename, mode='', first=0, last=0, preserve=0,
             encoder='', quality=-1, quiet=1,
-            width=0, height=0, _self=cmd):
+            width=0, height=0, processes=0, pipe=0, _self=cmd):
     '''
 DESCRIPTION
 
@@ -874,10 +1017,25 @@ ARGUMENTS
 
     height = int: Height in pixels {default: from viewport}
 
+    processes = int: Ray trace frames in this many parallel background
+    PyMOL processes, -1 for one per CPU core {default: 0 (render in
+    this process)}
+
+    pipe = 0 or 1: Stream raw frames to the "ffmpeg" encoder instead of
+    writing temporary image files {default: 0}
+
+NOTES
+
+    With processes > 1, frames are always ray traced. Every process loads
+    a copy of the current session, so the movie must not depend on state
+    which isn't stored in sessions (like Python callbacks).
+
 EXAMPLE
 
     movie.produce video.mp4, height=1080
     movie.produce video.webm, height=720
+    movie.produce video.mp4, processes=-1
+    movie.produce video.mp4, height=2160, pipe=1
     '''
     from pymol import CmdException
 
@@ -909,6 +1067,11 @@ EXAMPLE
         splitext=(splitext[0],'.mpg')
     filename = splitext[0]+splitext[1]
     width, height = int(width), int(height)
+    processes = int(processes)
+    pipe = int(pipe)
+    if processes < 0:
+        import multiprocessing
+        processes = multiprocessing.cpu_count()
     img_ext = '.png'
 
     # guess encoder
@@ -953,6 +1116,20 @@ EXAMPLE
     # clean up old files if necessary
     if os.path.exists(filename):
         os.unlink(filename)
+
+    if pipe:
+        if encoder != 'ffmpeg':
+            raise CmdException('pipe=1 requires the "ffmpeg" encoder')
+        if processes > 1:
+            raise CmdException('pipe=1 can not be combined with processes')
+        if first <= 0:
+            first = 1
+        if last <= 0:
+            last = max(1, _self.count_frames())
+        _encode_pipe(filename, first, last, mode, int(width), int(height),
+                     quality, quiet, _self=_self)
+        return _self.DEFAULT_SUCCESS
+
     if not os.path.exists(tmp_path):
         os.mkdir(tmp_path)
     elif preserve==0:
@@ -968,11 +1145,24 @@ EXAMPLE
             last = _self.count_frames()
         if last <= 1:
             last = 1
-        _self.set("keep_alive")
-        _self.mpng(os.path.join(tmp_path,prefix + img_ext),first,last,
-                   preserve,mode=mode,modal=-1,quiet=quiet,
-                   width=width, height=height)
-        # this may run asynchronously
+        if processes > 1 and last > first:
+            if width < 1 or height < 1:
+                w, h = _self.get_viewport()
+                if width > 0:
+                    height = width * h // w
+                elif height > 0:
+                    width = height * w // h
+                else:
+                    width, height = w, h
+            _mpng_parallel(tmp_path, prefix, img_ext, first, last, processes,
+                           int(width), int(height), quiet, _self=_self)
+            _self.set("keep_alive")
+        else:
+            _self.set("keep_alive")
+            _self.mpng(os.path.join(tmp_path,prefix + img_ext),first,last,
+                       preserve,mode=mode,modal=-1,quiet=quiet,
+                       width=width, height=height)
+            # this may run asynchronously
     else:
         ok = 0
     if ok:
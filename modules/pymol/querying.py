@@ -12,7 +12,7 @@
 #-*
 #Z* -------------------------------------------------------------------
 
-from .constants import CURRENT_STATE, ALL_STATES
+from .constants import CURRENT_STATE, ALL_STATES, repres
 
 if True:
 
@@ -53,7 +53,8 @@ ARGUMENTS
     copy = 0/1: {default: 1} WARNING: only use copy=0 if you know what you're
     doing. copy=0 will return a numpy array which is a wrapper of the internal
     memory. If the internal memory gets freed or reallocated, this wrapper
-    will become invalid.
+    will become invalid. After modifying a map through such a wrapper, call
+    rebuild() so that cached data derived from the values gets updated.
         '''
         with _self.lockcm:
             r = _self._cmd.get_volume_field(_self._COb, objName, int(state) - 1, int(copy))
@@ -1449,6 +1450,159 @@ USAGE
                 print(' count_discrete: %d' % r)
             return r
 
+    def get_selection_cache_stats(reset=0, quiet=1, *, _self=cmd):
+        '''
+DESCRIPTION
+
+    Get statistics of the selection cache. Results of selection
+    expressions are cached until the involved objects or named
+    selections change. The cache size is controlled by the
+    "selection_cache_size" setting (0 disables caching).
+
+USAGE
+
+    get_selection_cache_stats [ reset ]
+
+ARGUMENTS
+
+    reset = 0/1: reset the hit and miss counters {default: 0}
+
+PYMOL API
+
+    cmd.get_selection_cache_stats(int reset=0, int quiet=1)
+
+RETURNS
+
+    dict with keys "hits", "misses", "size" and "capacity"
+        '''
+        with _self.lockcm:
+            r = _cmd.get_selection_cache_stats(_self._COb, int(reset))
+        if not int(quiet):
+            print(' Selection cache: %(hits)d hits, %(misses)d misses,'
+                  ' %(size)d/%(capacity)d entries' % r)
+        return r
+
+    def get_surface_cache_stats(reset=0, quiet=1, *, _self=cmd):
+        '''
+DESCRIPTION
+
+    Get statistics of the surface cache. Computed molecular surfaces
+    are kept in memory, keyed by the coordinates, atom properties and
+    surface settings, so showing a surface again (e.g. after hide/show
+    or for identical states) doesn't recompute it. The memory budget
+    (in MB) is controlled by the "surface_cache_size" setting (0
+    disables caching).
+
+USAGE
+
+    get_surface_cache_stats [ reset ]
+
+ARGUMENTS
+
+    reset = 0/1: reset the hit and miss counters {default: 0}
+
+PYMOL API
+
+    cmd.get_surface_cache_stats(int reset=0, int quiet=1)
+
+RETURNS
+
+    dict with keys "hits", "misses", "size", "bytes" and "capacity"
+        '''
+        with _self.lockcm:
+            r = _cmd.get_surface_cache_stats(_self._COb, int(reset))
+        if not int(quiet):
+            print(' Surface cache: %(hits)d hits, %(misses)d misses,'
+                  ' %(size)d entries, %(bytes)d/%(capacity)d bytes' % r)
+        return r
+
+    def get_movie_cache_stats(reset=0, quiet=1, *, _self=cmd):
+        '''
+DESCRIPTION
+
+    Get statistics of the movie frame cache. With "cache_frames",
+    rendered (or ray traced) movie frames are kept in memory for
+    playback. The memory budget (in MB) is controlled by the
+    "cache_frames_size" setting (0 = unlimited), least recently shown
+    frames are dropped first.
+
+    During playback with "defer_builds_mode", the "movie_prefetch"
+    setting builds the representations for that many upcoming movie
+    frames in the background (following the frame to state mapping), so
+    that they are ready when the frames are shown.
+
+USAGE
+
+    get_movie_cache_stats [ reset ]
+
+ARGUMENTS
+
+    reset = 0/1: reset the hit and miss counters {default: 0}
+
+PYMOL API
+
+    cmd.get_movie_cache_stats(int reset=0, int quiet=1)
+
+RETURNS
+
+    dict with keys "hits", "misses", "size", "bytes" and "capacity"
+        '''
+        with _self.lockcm:
+            r = _cmd.get_movie_cache_stats(_self._COb, int(reset))
+        if not int(quiet):
+            print(' Movie cache: %(hits)d hits, %(misses)d misses,'
+                  ' %(size)d frames, %(bytes)d/%(capacity)d bytes' % r)
+        return r
+
+    def get_rep_build_stats(reset=0, quiet=1, *, _self=cmd):
+        '''
+DESCRIPTION
+
+    Get the time spent building molecular representations, per
+    representation type. With "async_builds", the representations of
+    different objects, states and representation types are built
+    concurrently.
+
+USAGE
+
+    get_rep_build_stats [ reset ]
+
+ARGUMENTS
+
+    reset = 0/1: reset the statistics {default: 0}
+
+PYMOL API
+
+    cmd.get_rep_build_stats(int reset=0, int quiet=1)
+
+RETURNS
+
+    dict which maps representation names to dicts with keys "count",
+    "time" (total seconds) and "max" (slowest build in seconds). Only
+    builds from scratch are counted, not recoloring.
+
+NOTES
+
+    With "background_builds", cylinders, spheres, ribbons, cartoons,
+    dots, ellipsoids and (uncarved) surfaces are rebuilt on worker
+    threads during interactive drawing. The previous representation
+    stays on screen until the new one is ready. Any command stops the
+    pending builds, they restart with the next scene update, and images
+    for commands like png, ray or movie export are always rendered from
+    complete representations.
+        '''
+        with _self.lockcm:
+            r = _cmd.get_rep_build_stats(_self._COb, int(reset))
+        names = dict((v, k) for (k, v) in repres.items())
+        r = dict((names[i], {'count': count, 'time': seconds, 'max': max_seconds})
+                 for (i, (count, seconds, max_seconds)) in enumerate(r)
+                 if count)
+        if not int(quiet):
+            for name, stats in sorted(r.items()):
+                print(' %-12s %4d builds, %8.3fs total, %8.3fs max' % (
+                    name, stats['count'], stats['time'], stats['max']))
+        return r
+
     def get_names_of_type(type, public=1, *, _self=cmd):
         """
 DESCRIPTION
@@ -0,0 +1,340 @@
+'''
+Binary session files (.psb)
+
+A binary session stores the same session dictionary as a .pse file, but
+the large arrays of the objects (coordinates, atom and bond info, map data)
+are written as aligned, contiguous blocks next to small pickled headers
+instead of being embedded in the pickle. On load, the file is memory-mapped
+and the arrays are passed to `set_session` as memoryviews into the mapping,
+so they are copied exactly once (into the PyMOL objects).
+
+The file is a sequence of chunks. Every object is stored in its own chunk,
+and a session chunk holds the remaining session dictionary and an index of
+the object chunks. With the `session_incremental` setting, saving to an
+existing file only appends the objects which changed since the last save
+(according to their change stamps, see `cmd.get_session`) and a new session
+chunk. Chunks which are no longer referenced are garbage, the file gets
+rewritten (compacted) once they make up more than COMPACT_RATIO of it.
+
+File layout (little endian):
+
+    magic       8 bytes     b"PYMOLPSB"
+    version     uint32
+    reserved    12 bytes
+    chunks      each aligned to ALIGNMENT bytes
+
+Chunk layout:
+
+    kind        4 bytes     b"OBJ\\0" (object data) or b"SESS" (session)
+    nbuf        uint32      number of array blocks
+    headersize  uint64
+    size        uint64      total size of the chunk
+    table       nbuf * (uint64 offset, uint64 size), relative to the chunk
+    header      pickle (protocol 5) with out-of-band buffers
+    blocks      array data, each block aligned to ALIGNMENT bytes
+
+Version 1 files (no chunks, preamble followed by a single table and
+header) can still be read.
+
+Copyright (c) Schrodinger, LLC.
+'''
+
+import mmap
+import os
+import pickle
+import struct
+import uuid
+
+import pymol
+from pymol import cmd
+from pymol.cmd import DEFAULT_SUCCESS
+
+MAGIC = b'PYMOLPSB'
+VERSION = 2
+ALIGNMENT = 64
+
+# arrays smaller than this stay in the pickled header
+MIN_BUFFER_SIZE = 4096
+
+# rewrite the file on incremental save if more than this fraction is garbage
+COMPACT_RATIO = 0.5
+
+KIND_OBJECT = b'OBJ\0'
+KIND_SESSION = b'SESS'
+
+# spec record type of objects (cExecObject)
+_EXEC_OBJECT = 0
+
+_PREAMBLE = struct.Struct('<8sIIQ')
+_CHUNK = struct.Struct('<4sIQQ')
+_TABLE_ENTRY = struct.Struct('<QQ')
+
+# change stamps are only meaningful within this process
+_TOKEN = uuid.uuid4().hex
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _export_buffers(obj):
+    '''
+    Replace large bytes objects (pse_binary_dump arrays) in a nested list by
+    pickle buffers, so that they get serialized out-of-band. Modifies `obj`
+    in place.
+    '''
+    if isinstance(obj, list):
+        for i, item in enumerate(obj):
+            if isinstance(item, bytes):
+                if len(item) >= MIN_BUFFER_SIZE:
+                    obj[i] = pickle.PickleBuffer(item)
+            elif isinstance(item, list):
+                _export_buffers(item)
+    return obj
+
+
+def _write_chunk(handle, kind, obj):
+    '''
+    Write a chunk at the current (aligned) position of `handle`.
+
+    :return: (offset, size) of the chunk
+    '''
+    buffers = []
+    header = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    views = [buf.raw() for buf in buffers]
+
+    offset = _CHUNK.size + len(views) * _TABLE_ENTRY.size + len(header)
+    table = []
+    for view in views:
+        offset = _align(offset)
+        table.append((offset, view.nbytes))
+        offset += view.nbytes
+
+    start = _align(handle.tell())
+    handle.write(b'\0' * (start - handle.tell()))
+    handle.write(_CHUNK.pack(kind, len(views), len(header), offset))
+    for entry in table:
+        handle.write(_TABLE_ENTRY.pack(*entry))
+    handle.write(header)
+    for (offset, _), view in zip(table, views):
+        handle.write(b'\0' * (start + offset - handle.tell()))
+        handle.write(view)
+
+    return start, handle.tell() - start
+
+
+def _load_blocks(data, offset, nbuf, headersize, base=0):
+    '''
+    Unpickle a header at `offset` which is preceded by its table, with
+    block offsets relative to `base`.
+    '''
+    buffers = []
+    for _ in range(nbuf):
+        start, size = _TABLE_ENTRY.unpack_from(data, offset)
+        offset += _TABLE_ENTRY.size
+        if base + start + size > len(data):
+            raise pymol.CmdException('binary session is truncated')
+        buffers.append(data[base + start:base + start + size])
+
+    return pickle.loads(data[offset:offset + headersize], buffers=buffers)
+
+
+def _read_chunk(data, offset):
+    kind, nbuf, headersize, _ = _CHUNK.unpack_from(data, offset)
+    return _load_blocks(data, offset + _CHUNK.size, nbuf, headersize, offset)
+
+
+def _find_session_chunk(data):
+    '''
+    Walk the chunks and find the last complete session chunk.
+
+    :return: (offset, size) or None
+    '''
+    found = None
+    offset = _align(_PREAMBLE.size)
+    while offset + _CHUNK.size <= len(data):
+        kind, _, _, size = _CHUNK.unpack_from(data, offset)
+        if kind not in (KIND_OBJECT, KIND_SESSION) or not size or \
+                offset + size > len(data):
+            break  # incomplete append
+        if kind == KIND_SESSION:
+            found = (offset, size)
+        offset = _align(offset + size)
+    return found
+
+
+def _map_file(filename):
+    '''
+    :return: Memoryview of the memory-mapped file and the file format version
+    '''
+    with open(filename, 'rb') as handle:
+        try:
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            mapping = b''  # empty file
+
+    data = memoryview(mapping)
+
+    if len(data) < _PREAMBLE.size or data[:len(MAGIC)] != MAGIC:
+        raise pymol.CmdException('"%s" is not a binary PyMOL session' % filename)
+
+    version = _PREAMBLE.unpack_from(data)[1]
+
+    if version > VERSION:
+        raise pymol.CmdException(
+            'binary session version %d not supported by this PyMOL' % version)
+
+    return data, version
+
+
+def _read_index(filename):
+    '''
+    Read the object index of the current session chunk, for appending.
+
+    :return: Index dictionary or None if the file can't be appended to
+    '''
+    try:
+        data, version = _map_file(filename)
+    except (OSError, pymol.CmdException):
+        return None
+
+    found = _find_session_chunk(data) if version == 2 else None
+    if found is None:
+        return None
+
+    index = _read_chunk(data, found[0])['index']
+    index['end'] = found[0] + found[1]
+    index['session_size'] = found[1]
+    return index
+
+
+def read_session(filename):
+    '''
+    Read a binary session file. The arrays of the returned session reference
+    the memory-mapped file, the mapping gets closed once the session (after
+    `cmd.set_session`) is garbage collected.
+    '''
+    data, version = _map_file(filename)
+
+    try:
+        if version == 1:
+            nbuf, headersize = _PREAMBLE.unpack_from(data)[2:]
+            return _load_blocks(data, _PREAMBLE.size, nbuf, headersize)
+
+        found = _find_session_chunk(data)
+        if found is None:
+            raise pymol.CmdException(
+                'binary session "%s" is incomplete' % filename)
+
+        content = _read_chunk(data, found[0])
+        session = content['session']
+        refs = content['index']['refs']
+
+        for entry in session.get('names', ()):
+            if entry and entry[0] in refs:
+                entry[5] = _read_chunk(data, refs[entry[0]][0])
+
+        return session
+    except AttributeError as e:
+        raise pymol.CmdException(
+            'PSB contains objects which cannot be unpickled (%s)' % str(e))
+
+
+def _write_objects(handle, session, stamps, prev=None):
+    '''
+    Write object chunks and the session chunk.
+
+    :param stamps: Current change stamps of the objects in `session`
+    :param prev: Index of the previous save, to reuse unchanged objects
+    '''
+    refs = {}
+
+    for entry in session.get('names', ()):
+        if not entry or entry[1] != _EXEC_OBJECT:
+            continue
+
+        name = entry[0]
+
+        if prev is not None and entry[5] is None and name in prev['refs'] \
+                and prev['stamps'].get(name) == stamps.get(name):
+            refs[name] = prev['refs'][name]
+        else:
+            refs[name] = _write_chunk(handle, KIND_OBJECT,
+                                      _export_buffers(entry[5]))
+
+        entry[5] = None
+
+    index = {'refs': refs, 'stamps': stamps, 'token': _TOKEN}
+    _write_chunk(handle, KIND_SESSION, {'index': index, 'session': session})
+
+
+def write_session(filename, session, stamps=None):
+    '''
+    Write a session dictionary (as returned by `cmd.get_session`) to a new
+    binary session file. The object lists of `session` get modified.
+
+    :param stamps: Change stamps from `cmd.get_session`, to allow
+    incremental saving to this file later
+    '''
+    tmpname = filename + '.tmp'
+
+    with open(tmpname, 'wb') as handle:
+        handle.write(_PREAMBLE.pack(MAGIC, VERSION, 0, 0))
+        _write_objects(handle, session, stamps or {})
+
+    os.replace(tmpname, filename)
+
+
+def append_session(filename, session, stamps, index):
+    '''
+    Append the changed objects and a new session chunk to an existing binary
+    session file.
+
+    :param stamps: Change stamps from `cmd.get_session`
+    :param index: Index of the file (see _read_index), which was used for
+    the `stamps` argument of `cmd.get_session`
+    '''
+    with open(filename, 'r+b') as handle:
+        # drop the leftovers of an incomplete append
+        handle.truncate(index['end'])
+        handle.seek(index['end'])
+        _write_objects(handle, session, stamps, index)
+
+
+def _needs_compaction(filename, index):
+    live = _PREAMBLE.size + index['session_size'] + sum(
+        size for (_, size) in index['refs'].values())
+    return live < (1.0 - COMPACT_RATIO) * os.path.getsize(filename)
+
+
+def save_psb(filename, selection='', partial=0, quiet=1, *, _self=cmd):
+    '''
+    Save the session (or the objects named by `selection`) to a binary
+    session file. Appends to an existing file if `session_incremental` is
+    set and the file was written by this process.
+    '''
+    if '(' in selection: # ignore selections
+        selection = ''
+
+    index = None
+    if _self.get_setting_boolean('session_incremental'):
+        index = _read_index(filename)
+        if index is not None and (index['token'] != _TOKEN or
+                                  _needs_compaction(filename, index)):
+            index = None
+
+    stamps = dict(index['stamps']) if index is not None else {}
+
+    session = _self.get_session(selection, partial, quiet, compress=0,
+                                binary=1, version=0, stamps=stamps)
+
+    if index is None:
+        write_session(filename, session, stamps)
+    else:
+        append_session(filename, session, stamps, index)
+        if not int(quiet):
+            print(' Save: appended %d of %d objects to "%s".' % (
+                sum(1 for n, s in stamps.items()
+                    if index['stamps'].get(n) != s), len(stamps), filename))
+
+    return DEFAULT_SUCCESS
@@ -1578,7 +1578,8 @@ NOTES
         with _self.lockcm:
             return _cmd.cartoon(_self._COb, selection, int(type))
 
-    def _ray(width,height,antialias,angle,shift,renderer,quiet,_self=cmd):
+    def _ray(width,height,antialias,angle,shift,renderer,quiet,_self=cmd,
+             preview=None):
         r = DEFAULT_ERROR
         try:
             _self.lock_without_glut()
@@ -1588,7 +1589,7 @@ NOTES
                                 int(antialias),
                                 float(angle),
                                 float(shift),int(renderer),
-                                int(quiet))
+                                int(quiet), preview)
             finally:
                 _cmd.set_busy(_self._COb,0)
         finally:
@@ -1660,7 +1661,8 @@ SEE ALSO
         return _self._call_with_opengl_context(func)
 
     def ray(width=0, height=0, antialias=-1, angle=0.0, shift=0.0,
-            renderer=-1, quiet=1, async_=0, _self=cmd, **kwargs):
+            renderer=-1, quiet=1, async_=0, _self=cmd, preview=None,
+            **kwargs):
         '''
 DESCRIPTION
 
@@ -1691,6 +1693,10 @@ ARGUMENTS
     pov-ray, or dry-run {default: 0}
     
     async = 0 or 1: should rendering be done in a background thread?
+
+    preview = callable: API only, called as preview(data, width, height)
+    with low-sample RGBA previews (bytes) while rendering with the
+    built-in renderer {default: None}
     
 EXAMPLES
 
@@ -1710,6 +1716,16 @@ NOTES
         "povray" in your path.  It utilizes two two temporary files:
         "tmp_pymol.pov" and "tmp_pymol.png".
 
+    With a preview callback, the first preview only samples every n-th
+    pixel in x and y, according to the "ray_progressive" setting (0
+    or 1 disables the sparse pass). Another preview is delivered
+    before edge oversampling and antialiasing.
+
+    The "ray_acceleration" setting selects how rays find the primitives
+    they hit: 0 (default) uses a uniform grid, 1 a bounding volume
+    hierarchy, which is faster for scenes with very uneven density
+    (e.g. a few distant objects next to a dense surface).
+
     See "help faster" for optimization tips with the builtin renderer.
     See "help povray" for how to use PovRay instead of PyMOL\'s
     built-in ray-tracing engine.
@@ -1729,7 +1745,7 @@ SEE ALSO
 
         arg_tup = (int(width),int(height),
                    int(antialias),float(angle),
-                   float(shift),int(renderer),int(quiet),_self)
+                   float(shift),int(renderer),int(quiet),_self,preview)
         # stop movies, rocking, and sculpting if they're on...
         if _self.get_movie_playing():
             _self.mstop()
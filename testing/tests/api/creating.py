@@ -231,6 +231,50 @@ class TestCreating(testing.PyMOLTestCase):
         cmd.isolevel('dot', 10)
         self.assertImageHasNotColor(meshcolor)
 
+    @testing.requires_version('3.2')
+    def testIsolevelMaxThreads(self):
+        cmd.viewport(100, 100)
+
+        cmd.fab('ACDEFGHIKLMNPQRSTVWY', 'm1', ss=1)
+        cmd.map_new('map', 'gaussian', 0.25, 'm1', 2.0)
+        cmd.delete('m1')
+
+        # marching tetrahedra for the surface, spans several blocks
+        cmd.set('isosurface_algorithm', 2)
+        cmd.isomesh('mesh', 'map')
+        cmd.isosurface('surf', 'map')
+        cmd.color('red', 'mesh')
+        cmd.color('blue', 'surf')
+        cmd.orient('map')
+        self.ambientOnly()
+
+        levels = (0.5, 2.0, 1.0)
+        images = {}
+        for max_threads in (1, 4):
+            cmd.set('max_threads', max_threads)
+            for level in levels:
+                cmd.isolevel('mesh', level)
+                cmd.isolevel('surf', level)
+                images[max_threads, level] = self.get_imagearray()
+
+        for level in levels:
+            self.assertImageHasColor('red', images[1, level])
+            self.assertImageHasColor('blue', images[1, level])
+            self.assertArrayEqual(images[1, level], images[4, level])
+
+        # above the maximum, until the map is modified in place
+        level = float(cmd.get_volume_field('map').max()) * 1.5
+        cmd.isolevel('mesh', level)
+        cmd.isolevel('surf', level)
+        self.assertImageHasNotColor('red')
+        self.assertImageHasNotColor('blue')
+
+        cmd.map_set('map', 'sum', 'map map')
+        cmd.isolevel('mesh', level)
+        cmd.isolevel('surf', level)
+        self.assertImageHasColor('red')
+        self.assertImageHasColor('blue')
+
     def testGradient(self):
         cmd.viewport(100,100)
 
@@ -294,6 +338,27 @@ class TestCreating(testing.PyMOLTestCase):
         self.assertEqual(cmd.get_symmetry('map1'), cmd.get_symmetry('map2'))
         self.assertArrayEqual(cmd.get_volume_field('map1'), cmd.get_volume_field('map2'))
 
+    @testing.requires_version('3.2')
+    def testMapNewGaussianFFT(self):
+        import numpy
+        cmd.fab('ACDEFGHIKLMNPQRSTVWY', 'm1', ss=1)
+        cmd.alter('m1', 'b = 10 + (index % 7) * 10')
+
+        fields = {}
+        for gaussian_fft in (0, 1):
+            cmd.set('gaussian_fft', gaussian_fft)
+            for resolution in (2.0, 4.0):
+                cmd.map_new('map', 'gaussian', resolution / 3.0, 'm1', 3.0,
+                        normalize=0, resolution=resolution)
+                fields[gaussian_fft, resolution] = cmd.get_volume_field('map')
+
+        for resolution in (2.0, 4.0):
+            direct = fields[0, resolution]
+            fft = fields[1, resolution]
+            self.assertEqual(direct.shape, fft.shape)
+            # both truncate the atomic densities at exp(-7), but differently
+            self.assertTrue(numpy.allclose(direct, fft, atol=1e-2 * direct.max()))
+
     @testing.foreach((0, 0), (1, 1))
     def testSymexp(self, matrix_mode, segi):
         cmd.set("matrix_mode", matrix_mode)
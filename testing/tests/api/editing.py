@@ -156,6 +156,44 @@ class TestEditing(testing.PyMOLTestCase):
         cmd.iterate('gly', 'name_list.append(name)', space=locals())
         self.assertEqual(name_list, ['X%d' % i for i in range(7)])
 
+    @testing.requires_version('3.2')
+    def test_get_atom_properties(self):
+        import numpy
+        cmd.fragment('gly', 'm1')
+        cmd.alter('all', 'b = index * 10; chain = "A"')
+        names = ['b', 'name', 'chain', 'resi', 'index', 'formal_charge']
+        props = cmd.get_atom_properties('m1', names)
+        stored.props = {name: [] for name in names}
+        cmd.iterate('m1', ';'.join(
+            'stored.props["{0}"].append({0})'.format(name) for name in names))
+        for name in names:
+            self.assertEqual(list(props[name]), stored.props[name], name)
+        self.assertEqual(props['b'].dtype, numpy.float32)
+        self.assertEqual(len(cmd.get_atom_properties('none', ['b'])['b']), 0)
+        with self.assertRaisesRegex(CmdException, 'Unknown atom property'):
+            cmd.get_atom_properties('all', ['foo'])
+
+    @testing.requires_version('3.2')
+    def test_set_atom_properties(self):
+        import numpy
+        cmd.fragment('gly', 'm1')
+        n = cmd.count_atoms('m1')
+        cmd.set_atom_properties('m1', {
+            'b': numpy.arange(n) * 2.0,
+            'q': 0.5,
+            'resi': '10A',
+            'elem': ['C'] * n,
+        })
+        stored.props = []
+        cmd.iterate('m1', 'stored.props.append((b, q, resi, resv, elem))')
+        self.assertEqual(stored.props,
+                         [(i * 2.0, 0.5, '10A', 10, 'C') for i in range(n)])
+        self.assertEqual(cmd.count_atoms('b > 7'), 3)
+        with self.assertRaisesRegex(CmdException, 'does not match'):
+            cmd.set_atom_properties('m1', {'b': [1.0, 2.0]})
+        with self.assertRaisesRegex(CmdException, 'read-only'):
+            cmd.set_atom_properties('m1', {'model': 'm2'})
+
     @testing.requires_version('2.5')
     def test_alter_exceptions(self):
         cmd.fragment('gly')
@@ -493,9 +531,50 @@ class TestEditing(testing.PyMOLTestCase):
         cmd.map_halve
         self.skipTest("TODO")
 
+    @testing.requires_version('3.2')
     def test_map_set(self):
-        cmd.map_set
-        self.skipTest("TODO")
+        import numpy
+        cmd.fragment('gly', 'm1')
+        cmd.map_new('a', 'gaussian', 0.5, 'm1', 3.0)
+        cmd.set('gaussian_b_floor', 30)
+        cmd.map_new('b', 'gaussian', 0.5, 'm1', 3.0)
+        cmd.map_new('c', 'gaussian', 0.7, 'm1', 3.0)
+        a = cmd.get_volume_field('a')
+        b = cmd.get_volume_field('b')
+
+        # identical grids, result on the same grid without interpolation
+        cmd.map_set('sum', 'sum', 'a b')
+        self.assertArrayEqual(cmd.get_volume_field('sum'), a + b, delta=1e-5)
+        cmd.map_set('avg', 'average', 'a b')
+        cmd.map_set('expr', 'expression', '(a + b) / 2')
+        self.assertArrayEqual(cmd.get_volume_field('expr'),
+                cmd.get_volume_field('avg'), delta=1e-5)
+        cmd.map_set('unique', 'unique', 'a b')
+        self.assertArrayEqual(cmd.get_volume_field('unique'),
+                numpy.maximum(a - b, 0), delta=1e-5)
+
+        # chained expression in place
+        cmd.map_set('expr', 'expression', 'max(a, b, 0.5) * 2 - abs(-a) + 1')
+        self.assertArrayEqual(cmd.get_volume_field('expr'),
+                numpy.maximum(numpy.maximum(a, b), 0.5) * 2 - a + 1, delta=1e-5)
+        cmd.map_set('a', 'expression', 'a * 2')
+        self.assertArrayEqual(cmd.get_volume_field('a'), a * 2, delta=1e-5)
+
+        # different grid, interpolated onto the grid of the first map
+        cmd.map_set('expr', 'expression', 'b - c + c')
+        self.assertArrayEqual(cmd.get_volume_field('expr'), b, delta=1e-5)
+
+        # quoted names may contain operator characters
+        cmd.map_new('b-1', 'gaussian', 0.5, 'm1', 3.0)
+        cmd.map_set('expr', 'expression', '"b-1" + \'b-1\' - b')
+        self.assertArrayEqual(cmd.get_volume_field('expr'), b, delta=1e-5)
+
+        with self.assertRaisesRegex(CmdException, 'not found'):
+            cmd.map_set('expr', 'expression', 'a + nonexistent')
+        with self.assertRaisesRegex(CmdException, 'Invalid map expression'):
+            cmd.map_set('expr', 'expression', 'a +')
+        with self.assertRaisesRegex(CmdException, 'Missing closing'):
+            cmd.map_set('expr', 'expression', 'a + "b-1')
 
     def test_map_set_border(self):
         cmd.map_set_border
@@ -154,6 +154,45 @@ class TestExporting(testing.PyMOLTestCase):
         self.assertEqual(img.shape[:2], (nrow, ncol))
         self.assertImageHasColor('yellow', img)
 
+    @testing.requires('no_edu') # ray
+    @testing.requires_version('3.2')
+    def testRenderBatch(self):
+        self.ambientOnly()
+        cmd.fragment('gly')
+        cmd.fragment('trp')
+        cmd.color('yellow', 'gly')
+        cmd.color('blue', 'trp')
+        cmd.show_as('spheres')
+        cmd.disable('trp')
+        view = cmd.get_view()
+
+        with testing.mkdtemp() as dirname:
+            names = [os.path.join(dirname, n + '.png') for n in ('a', 'b', 'c')]
+            cmd.render_batch([
+                (None, 'gly', (40, 30), names[0]),
+                (None, 'trp', (60, 30), names[1]),
+                {'view': view, 'size': 50, 'filename': names[2][:-4]},
+            ])
+
+            img = self.get_imagearray(names[0])
+            self.assertEqual(img.shape[:2], (30, 40))
+            self.assertImageHasColor('yellow', img)
+            self.assertImageHasNotColor('blue', img)
+
+            img = self.get_imagearray(names[1])
+            self.assertEqual(img.shape[:2], (30, 60))
+            self.assertImageHasColor('blue', img)
+            self.assertImageHasNotColor('yellow', img)
+
+            self.assertEqual(Image.open(names[2]).size[0], 50)
+
+        # restored
+        self.assertEqual(cmd.get_names(enabled_only=1), ['gly'])
+        self.assertArrayEqual(cmd.get_view(), view, delta=1e-4)
+
+        with self.assertRaises(pymol.CmdException):
+            cmd.render_batch([(None, None, 20, '/nonexistent/dir/x.png')])
+
     # not supported in older versions: xyz (no ref)
     @testing.foreach('pdb', 'sdf', 'mol', 'mol2')
     def testSaveRef(self, format):
@@ -348,6 +387,84 @@ class TestExporting(testing.PyMOLTestCase):
             m2 = cmd.get_model()
             self.assertModelsAreSame(m1, m2)
 
+    @testing.requires_version('3.2')
+    def testPSBExportImport(self):
+        cmd.load(self.datafile("1oky-frag.pdb"))
+        cmd.load_traj(self.datafile("1oky-frag.pdb"), "1oky-frag")
+        cmd.map_new("map", "gaussian", 0.5, "all")
+        m1 = cmd.get_model()
+        field1 = cmd.get_volume_field("map")
+        with testing.mktemp('.psb') as filename:
+            cmd.save(filename)
+            self.assertEqual(cmd.get('session_file'), filename)
+            cmd.reinitialize()
+            cmd.load(filename)
+        m2 = cmd.get_model()
+        self.assertModelsAreSame(m1, m2)
+        self.assertEqual(cmd.count_states("1oky-frag"), 2)
+        self.assertArrayEqual(cmd.get_volume_field("map"), field1)
+
+        with testing.mktemp('.psb') as filename:
+            with open(filename, 'wb') as handle:
+                handle.write(b'not a session')
+            with self.assertRaises(pymol.CmdException):
+                cmd.load(filename)
+
+    @testing.requires_version('3.2')
+    def testPSBIncremental(self):
+        cmd.set('session_incremental')
+        cmd.fragment('gly', 'm1')
+        cmd.load(self.datafile("1oky-frag.pdb"), 'm2')
+        with testing.mktemp('.psb') as filename:
+            cmd.save(filename)
+            size1 = os.path.getsize(filename)
+
+            # only m1 gets appended
+            cmd.alter('m1', 'b = 12.0')
+            cmd.color('red', 'm1')
+            cmd.save(filename)
+            size2 = os.path.getsize(filename)
+            self.assertTrue(size1 < size2 < 2 * size1)
+
+            stamps = {}
+            cmd.get_session(stamps=stamps)
+            session = cmd.get_session(stamps=dict(stamps))
+            names = dict((entry[0], entry[5]) for entry in session['names'])
+            self.assertIsNone(names['m2'])
+
+            m2 = cmd.get_model('m2')
+            cmd.delete('*')
+            cmd.load(filename)
+            self.assertEqual(cmd.get_names(), ['m1', 'm2'])
+            self.assertEqual(cmd.get_model('m1').atom[0].b, 12.0)
+            self.assertModelsAreSame(cmd.get_model('m2'), m2)
+
+    @testing.requires_version('3.2')
+    def testPSBIncrementalMotionAndTitle(self):
+        def get_motion(name):
+            session = cmd.get_session(name)
+            entry = [e for e in session['names'] if e and e[0] == name][0]
+            return entry[5][0][13]
+
+        cmd.set('session_incremental')
+        cmd.fragment('gly', 'm1')
+        cmd.mset('1x4')
+        with testing.mktemp('.psb') as filename:
+            cmd.save(filename)
+
+            # neither changes atoms or coordinates
+            cmd.set_title('m1', 1, 'edited')
+            cmd.frame(2)
+            cmd.mview('store', object='m1')
+            motion = get_motion('m1')
+            self.assertIsNotNone(motion)
+            cmd.save(filename)
+
+            cmd.delete('*')
+            cmd.load(filename)
+            self.assertEqual(cmd.get_title('m1', 1), 'edited')
+            self.assertEqual(get_motion('m1'), motion)
+
     def testGetModelObjectName(self):
         cmd.load(self.datafile("1oky-frag.pdb"))
         cmd.load(self.datafile('1rna.cif'))
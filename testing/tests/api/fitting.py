@@ -27,6 +27,49 @@ class TestFitting(testing.PyMOLTestCase):
         self.assertEqual(alen, 40)
         self.assertEqual(alen, cmd.count_atoms("aln") / 2)
 
+    @testing.requires_version('3.2')
+    def testCealignMaxThreads(self):
+        cmd.load(self.datafile("1oky-frag.pdb"), "m1")
+        cmd.load(self.datafile("1t46-frag.pdb"), "m2")
+        results = []
+        for max_threads in (1, 4):
+            cmd.set('max_threads', max_threads)
+            results.append(cmd.cealign("m2", "m1", transform=0))
+        self.assertEqual(results[0], results[1])
+        self.assertAlmostEqual(results[0]["RMSD"], 1.90375, delta=1e-4)
+
+    @testing.requires_version('3.2')
+    @testing.foreach('cealign', 'align', 'super')
+    def testAlignMatrix(self, method):
+        cmd.load(self.datafile("1oky-frag.pdb"), "m1")
+        cmd.load(self.datafile("1t46-frag.pdb"), "m2")
+        cmd.create("m3", "m1")
+        coords = cmd.get_coords("all")
+
+        r = cmd.align_matrix(["m1", "m2", "m3"], method=method)
+        self.assertEqual(r["names"], ["m1", "m2", "m3"])
+        self.assertEqual(r["rmsd"].shape, (3, 3))
+        self.assertArrayEqual(r["rmsd"], r["rmsd"].T)
+        self.assertArrayEqual(r["length"], r["length"].T)
+        self.assertArrayEqual(r["rmsd"].diagonal(), [0, 0, 0])
+        self.assertArrayEqual(r["tm"].diagonal(), [1, 1, 1], delta=1e-6)
+
+        # identical copy (CE only aligns complete windows)
+        self.assertAlmostEqual(r["rmsd"][0, 2], 0.0, delta=1e-3)
+        self.assertTrue(r["tm"][0, 2] > 0.8)
+
+        self.assertTrue(0.0 < r["tm"][0, 1] < r["tm"][0, 2])
+        if method != 'cealign':
+            self.assertEqual(r["length"][0, 2], cmd.count_atoms("m1 & guide"))
+            self.assertAlmostEqual(r["tm"][0, 2], 1.0, delta=1e-3)
+            expect = getattr(cmd, method)("m2 & guide", "m1 & guide", transform=0)
+            self.assertAlmostEqual(r["rmsd"][0, 1], expect[0], delta=1e-4)
+            self.assertEqual(r["length"][0, 1], expect[1])
+
+        # no coordinates modified, no temporary names left
+        self.assertArrayEqual(cmd.get_coords("all"), coords)
+        self.assertEqual(cmd.get_names("all"), ["m1", "m2", "m3"])
+
     def testFit(self):
         cmd.fragment("gly", "m1")
         cmd.create("m2", "m1")
@@ -244,6 +244,34 @@ class TestImporting(testing.PyMOLTestCase):
             extent = cmd.get_extent('map1')
             self.assertArrayEqual(extent, [[0.0, 0.0, 0.0], [2296.0, 1476.0, 4592.0]], delta=1e-2)
 
+    @testing.requires_version('3.2')
+    def testLoadMapRegion(self):
+        filename = self.datafile('h2o-elf-nstart.ccp4')
+        spacing = 6.0 / 40
+        # region loads normalize with the header statistics
+        cmd.set('normalize_ccp4_maps', 2)
+        cmd.load(filename, 'full')
+        cmd.set('normalize_ccp4_maps', 1)
+        cmd.pseudoatom('p1', pos=[1.5, 2.0, 2.5])
+        cmd.load_map_region(filename, 'p1', 0.5, 'part')
+
+        full = cmd.get_volume_field('full')
+        part = cmd.get_volume_field('part')
+        self.assertTrue(all(n < 10 for n in part.shape))
+
+        # same values as the corresponding block of the full map
+        full_min = cmd.get_extent('full')[0]
+        part_min, part_max = cmd.get_extent('part')
+        offset = [int(round((p - f) / spacing))
+                  for (p, f) in zip(part_min, full_min)]
+        block = full[tuple(slice(o, o + n)
+                           for (o, n) in zip(offset, part.shape))]
+        self.assertArrayEqual(part, block, delta=1e-6)
+
+        # covers the selection plus buffer
+        for (lo, hi, v) in zip(part_min, part_max, [1.5, 2.0, 2.5]):
+            self.assertTrue(lo <= v - 0.5 and v + 0.5 <= hi)
+
     @testing.requires_version('1.7.3.0')
     def testLoad_cube(self):
         cmd.load(self.datafile('h2o-elf.cube'))
@@ -384,6 +412,49 @@ class TestImporting(testing.PyMOLTestCase):
         cmd.load_traj(base + ".xtc", selection="backbone", state=0)
         self.assertEqual(55, cmd.count_atoms('state 10'))
 
+    @testing.requires_version('3.2')
+    def testLoadTraj_lazy(self):
+        base = self.datafile("sampletrajectory")
+        cmd.load(base + ".pdb", "m1")
+        cmd.load(base + ".pdb", "m2")
+        cmd.load_traj(base + ".dcd", "m1", state=0)
+        cmd.load_traj(base + ".dcd", "m2", state=0, lazy=1)
+        self.assertEqual(11, cmd.count_states("m2"))
+
+        # only room for the minimum of two decoded states
+        cmd.set("traj_cache_size", 0, "m2")
+
+        for _ in range(2):
+            for state in range(1, 12):
+                self.assertArrayEqual(
+                    cmd.get_coords("m1", state),
+                    cmd.get_coords("m2", state), delta=1e-6)
+
+        # coordinate based selections over all or individual states
+        for sele in ['({0} & resi 5) around 4', '({0} & resi 5) expand 3',
+                     '{0} & x > 5']:
+            for state in [0, 3, 11]:
+                self.assertEqual(
+                    cmd.count_atoms(sele.format('m1'), state=state),
+                    cmd.count_atoms(sele.format('m2'), state=state))
+
+        # atom removal after loading
+        cmd.remove("resn LYS")
+        for state in [11, 2, 5]:
+            self.assertArrayEqual(
+                cmd.get_coords("m1", state),
+                cmd.get_coords("m2", state), delta=1e-6)
+
+        # edits survive eviction
+        for obj in ["m1", "m2"]:
+            cmd.translate([1, 2, 3], obj, state=4, camera=0)
+            cmd.alter_state(6, obj, "x = x + 5")
+        for _ in range(2):
+            for state in range(1, 12):
+                self.assertArrayEqual(
+                    cmd.get_coords("m1", state),
+                    cmd.get_coords("m2", state), delta=1e-6)
+
     @testing.requires_version('1.8.5')
     def testLoadCharmmCor(self):
         # http://www.ks.uiuc.edu/Research/vmd/plugins/molfile/corplugin.html
@@ -501,6 +572,30 @@ class TestImporting(testing.PyMOLTestCase):
         cmd.load_coords(coords, 'm1')
         self.assertTrue(numpy.allclose(coords, cmd.get_coords('m1')))
 
+    @testing.requires_version('3.2')
+    def testLoadCoordsUpdatesGeometry(self):
+        import numpy
+        cmd.fab('AWGY', 'm1', ss=1)
+        cmd.show_as('sticks')
+        cmd.show('spheres', 'elem N+O')
+        cmd.show('cartoon')
+        cmd.set('sphere_scale', 0.3)
+        cmd.set('valence', 0)
+        pov_before = cmd.get_povray()[1]
+
+        coords = cmd.get_coords('m1')
+        coords += numpy.random.RandomState(1).uniform(-0.3, 0.3, coords.shape)
+        cmd.get_rep_build_stats(reset=1)
+        cmd.load_coords(coords, 'm1')
+        pov_patched = cmd.get_povray()[1]
+
+        # sticks and spheres are moved in place, cartoon is rebuilt
+        self.assertEqual(sorted(cmd.get_rep_build_stats()), ['cartoon'])
+        self.assertNotEqual(pov_patched, pov_before)
+
+        cmd.rebuild()
+        self.assertEqual(pov_patched, cmd.get_povray()[1])
+
     @testing.requires_version('1.7.3.0')
     def testLoadCoordset(self):
         import numpy
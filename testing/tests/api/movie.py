@@ -87,5 +87,71 @@ class TestMovie(testing.PyMOLTestCase):
         movie.add_scenes('["001", "002"]') # string
         self.assertEqual(cmd.count_frames(), 615)
 
+    @testing.requires_version('3.2')
+    def test_mpng_parallel(self):
+        import glob, os
+        cmd.mset("1x4")
+        cmd.mdo(1, 'bg_color red')
+        cmd.mdo(3, 'bg_color blue')
+
+        with testing.mkdtemp() as dirname:
+            movie._mpng_parallel(dirname, 'mov', '.png', 1, 4, 2, 100, 80,
+                                 quiet=1, _self=cmd)
+            filenames = sorted(glob.glob(os.path.join(dirname, 'mov*.png')))
+            self.assertEqual(4, len(filenames))
+            self.assertEqual(filenames, sorted(glob.glob(os.path.join(dirname, '*'))))
+
+            img = self.get_imagearray(filenames[0])
+            self.assertEqual(img.shape[:2], (80, 100))
+            self.assertImageHasColor('red', img)
+
+            img = self.get_imagearray(filenames[-1])
+            self.assertImageHasColor('blue', img)
+
+    @testing.requires_version('3.2')
+    def test_produce_pipe(self):
+        import os
+        if not movie.find_exe('ffmpeg'):
+            self.skipTest('no ffmpeg')
+        cmd.mset("1x4")
+        cmd.mdo(1, 'bg_color red')
+        cmd.mdo(3, 'bg_color blue')
+
+        with testing.mkdtemp() as dirname:
+            filename = os.path.join(dirname, 'movie.mp4')
+            movie.produce(filename, 'ray', width=100, height=80, pipe=1)
+            self.assertTrue(os.path.getsize(filename) > 0)
+            self.assertEqual(os.listdir(dirname), ['movie.mp4'])
+
+    @testing.requires_version('3.2')
+    def test_produce_pipe_headless(self):
+        import os
+        from pymol import invocation
+        if not invocation.options.no_gui:
+            self.skipTest('requires no gui')
+        if not movie.find_exe('ffmpeg'):
+            self.skipTest('no ffmpeg')
+        cmd.unset('ray_trace_frames')
+        cmd.mset("1x2")
+
+        with testing.mkdtemp() as dirname:
+            # default mode and "draw" must fall back to ray tracing
+            for mode in ('', 'draw'):
+                filename = os.path.join(dirname, 'movie.mp4')
+                movie.produce(filename, mode, width=100, height=80, pipe=1)
+                self.assertTrue(os.path.getsize(filename) > 0)
+
+    @testing.requires_version('3.2')
+    def test_get_image_rgba(self):
+        from pymol import _cmd
+        cmd.bg_color('red')
+        cmd.ray(20, 10)
+        with cmd.lockcm:
+            image = _cmd.get_scene_image(cmd._COb, 1)
+            width, height, data = _cmd.get_image_rgba(cmd._COb, image)
+        self.assertEqual((width, height), (20, 10))
+        self.assertEqual(len(data), 20 * 10 * 4)
+        self.assertEqual(tuple(data[:4]), (255, 0, 0, 255))
+
     def test_produce(self):
         self.skipTest("TODO") # movie.produce(filename, mode='', first=0, last=0, preserve=0,
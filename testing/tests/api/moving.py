@@ -221,6 +221,33 @@ class TestMoving(testing.PyMOLTestCase):
             self.assertEqual(img.shape[:2], shape2)
             self.assertImageHasColor('blue', img)
 
+    @testing.requires_version('3.2')
+    def testMovieCacheSize(self):
+        cmd.mset("1x40")
+        frame_bytes = 100 * 100 * 4
+
+        with testing.mktemp('.png') as filename:
+            cmd.png(filename, width=100, height=100, ray=1)
+
+            def fill_cache():
+                cmd.mclear()
+                for frame in range(1, 41):
+                    cmd.frame(frame)
+                    cmd.load_png(filename, movie=1, quiet=1)
+
+            cmd.set('cache_frames_size', 1)
+            fill_cache()
+            stats = cmd.get_movie_cache_stats()
+            self.assertEqual(stats['capacity'], 1 << 20)
+            self.assertEqual(stats['size'], (1 << 20) // frame_bytes)
+            self.assertEqual(stats['bytes'], stats['size'] * frame_bytes)
+
+            cmd.set('cache_frames_size', 0)
+            fill_cache()
+            stats = cmd.get_movie_cache_stats()
+            self.assertEqual(stats['capacity'], 0)
+            self.assertEqual(stats['size'], 40)
+
     def testMset(self):
         # basic tet
         self.prep_movie()
@@ -539,6 +539,43 @@ class TestQuerying(testing.PyMOLTestCase):
         hist2 = cmd.get_volume_histogram('map1', 2, (0.3, 0.7))
         self.assertArrayEqual(hist2, [0.3, 0.7, 0.0692, 0.172, 62263.0, 1737.0], delta=1e-4)
 
+    @testing.requires_version('3.2')
+    def testGetVolumeHistogramIndex(self):
+        import numpy
+        cmd.load(self.datafile('emd_1155.ccp4'), 'map1')
+        cmd.set('volume_data_range', 0)
+        field = cmd.get_volume_field('map1').astype(float)
+        n = 50
+
+        for limits in [(0.0, 0.0), (-0.01, 0.02)]:
+            hist = cmd.get_volume_histogram('map1', n, limits)
+            if limits[0] == limits[1]:
+                self.assertAlmostEqual(hist[0], field.min(), delta=1e-4)
+                self.assertAlmostEqual(hist[1], field.max(), delta=1e-4)
+            self.assertAlmostEqual(hist[2], field.mean(), delta=1e-4)
+            self.assertAlmostEqual(hist[3], field.std(), delta=1e-4)
+            irange = numpy.float32(n - 1) / numpy.float32(hist[1] - hist[0])
+            pos = (float(irange) * (field - hist[0])).astype(int)
+            expected = numpy.bincount(pos[(pos >= 0) & (pos < n)], minlength=n)
+            self.assertArrayEqual(hist[4:], expected.tolist(), delta=0.5)
+
+        # in-place modification must not use stale statistics
+        view = cmd.get_volume_field('map1', copy=0)
+        view += 5.0
+        hist = cmd.get_volume_histogram('map1', n)
+        self.assertAlmostEqual(hist[0], field.min() + 5.0, delta=1e-4)
+        self.assertAlmostEqual(hist[1], field.max() + 5.0, delta=1e-4)
+        self.assertAlmostEqual(hist[2], field.mean() + 5.0, delta=1e-3)
+
+        # statistics queried before the edit are dropped by rebuild
+        view = cmd.get_volume_field('map1', copy=0)
+        cmd.get_volume_histogram('map1', n)
+        view += 5.0
+        cmd.rebuild('map1')
+        hist = cmd.get_volume_histogram('map1', n)
+        self.assertAlmostEqual(hist[0], field.min() + 10.0, delta=1e-4)
+        self.assertAlmostEqual(hist[1], field.max() + 10.0, delta=1e-4)
+
     def testGetVrml(self):
         cmd.fragment('gly')
         cmd.show_as('sticks')
@@ -646,3 +683,119 @@ class TestQuerying(testing.PyMOLTestCase):
         # ostate-level
         s = cmd.get_object_settings("m1", state=1)
         self.assertEqual(s, [[19, 2, 9], [750, 2, 7]])
+
+    @testing.requires_version('3.2')
+    def test_get_surface_cache_stats(self):
+        cmd.fragment('trp', 'm1')
+        cmd.show_as('surface')
+        ref = cmd.get_mtl_obj()[1]
+        stats = cmd.get_surface_cache_stats(reset=1)
+        self.assertGreater(stats['size'], 0)
+        self.assertGreater(stats['bytes'], 0)
+        self.assertLessEqual(stats['bytes'], stats['capacity'])
+
+        # rebuilding with the same input reuses the surface
+        cmd.rebuild()
+        self.assertEqual(cmd.get_mtl_obj()[1], ref)
+        stats = cmd.get_surface_cache_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 0)
+
+        # showing the same atoms again
+        cmd.hide('surface', 'not name CA')
+        cmd.get_mtl_obj()
+        cmd.show('surface')
+        self.assertEqual(cmd.get_mtl_obj()[1], ref)
+        self.assertEqual(cmd.get_surface_cache_stats()['hits'], 2)
+
+        # different settings or coordinates don't
+        cmd.get_surface_cache_stats(reset=1)
+        cmd.set('surface_quality', 1)
+        cmd.get_mtl_obj()
+        cmd.translate([1, 0, 0], 'm1', camera=0)
+        cmd.get_mtl_obj()
+        stats = cmd.get_surface_cache_stats()
+        self.assertEqual(stats['hits'], 0)
+        self.assertEqual(stats['misses'], 2)
+
+        # reinitialize frees the cached surfaces
+        cmd.reinitialize()
+        self.assertEqual(cmd.get_surface_cache_stats()['size'], 0)
+        self.assertEqual(cmd.get_surface_cache_stats()['bytes'], 0)
+
+        cmd.fragment('trp', 'm1')
+        cmd.show_as('surface')
+        cmd.get_mtl_obj()
+        cmd.set('surface_cache_size', 0)
+        self.assertEqual(cmd.get_surface_cache_stats()['size'], 0)
+
+    @testing.requires_version('3.2')
+    def test_surface_engine(self):
+        def get_vertices():
+            obj = cmd.get_mtl_obj()[1]
+            return [[float(x) for x in line.split()[1:4]]
+                    for line in obj.splitlines() if line.startswith('v ')]
+
+        cmd.pseudoatom('m1', vdw=2.0, pos=(1., 2., 3.))
+        cmd.set('surface_engine', 1)
+        cmd.set('surface_quality', 1)
+        cmd.show_as('surface')
+
+        # single sphere: SES is the vdW sphere, SAS adds the probe radius
+        for surface_solvent, radius in [(0, 2.0), (1, 3.4)]:
+            cmd.set('surface_solvent', surface_solvent)
+            vertices = get_vertices()
+            self.assertGreater(len(vertices), 100)
+            center = [sum(v[i] for v in vertices) / len(vertices)
+                      for i in range(3)]
+            for v in vertices:
+                d = sum((v[i] - center[i])**2 for i in range(3))**0.5
+                self.assertAlmostEqual(d, radius, delta=0.1)
+
+
+    @testing.requires_version('3.2')
+    def test_get_rep_build_stats(self):
+        cmd.fragment('trp', 'm1')
+        cmd.show_as('sticks')
+        cmd.show('surface')
+        cmd.get_rep_build_stats(reset=1)
+        cmd.get_mtl_obj()
+        stats = cmd.get_rep_build_stats()
+        self.assertEqual(sorted(stats), ['sticks', 'surface'])
+        self.assertEqual(stats['surface']['count'], 1)
+        self.assertGreaterEqual(stats['surface']['time'],
+                                stats['surface']['max'])
+
+        # nothing to rebuild
+        cmd.get_mtl_obj()
+        self.assertEqual(cmd.get_rep_build_stats(reset=1), stats)
+
+        cmd.rebuild()
+        cmd.get_mtl_obj()
+        stats = cmd.get_rep_build_stats()
+        self.assertEqual(stats['sticks']['count'], 1)
+        self.assertEqual(stats['surface']['count'], 1)
+
+        # recoloring is not a build
+        cmd.get_rep_build_stats(reset=1)
+        cmd.color('red')
+        cmd.get_mtl_obj()
+        self.assertEqual(cmd.get_rep_build_stats(), {})
+
+    @testing.requires_version('3.2')
+    def test_get_rep_build_stats_background(self):
+        # commands never render placeholders, builds complete synchronously
+        cmd.set('background_builds')
+        cmd.fragment('trp', 'm1')
+        cmd.show_as('cartoon')
+        cmd.show('surface')
+        cmd.get_rep_build_stats(reset=1)
+        cmd.get_mtl_obj()
+        stats = cmd.get_rep_build_stats()
+        self.assertEqual(stats['surface']['count'], 1)
+
+        # stale surface gets rebuilt
+        cmd.set('surface_quality', 1)
+        cmd.get_mtl_obj()
+        stats = cmd.get_rep_build_stats()
+        self.assertEqual(stats['surface']['count'], 2)
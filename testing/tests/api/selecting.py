@@ -387,3 +387,63 @@ class TestSelecting(testing.PyMOLTestCase):
     @testing.requires_version('2.5')
     def _test_no_implicit_dummy_selection(self):
         self.assertEqual(cmd.count_atoms('(p1 around 1.5) around 1.5'), 0)
+
+    @testing.requires_version('3.2')
+    def test_max_threads_deterministic(self):
+        # large enough for multi-threaded evaluation
+        cmd.load(self.datafile("1aon.pdb.gz"), "m1")
+        expressions = [
+            'chain A around 5',
+            'chain A expand 4',
+            'all within 4 of chain A',
+            'polymer near_to 3.5 of chain B',
+            'polymer beyond 8 of chain C',
+            'b > 50',
+            'q = 1',
+            'x < 80',
+        ]
+        results = {}
+        for max_threads in (1, 4):
+            cmd.set('max_threads', max_threads)
+            for expr in expressions:
+                results.setdefault(expr, []).append(cmd.identify(expr))
+        for expr, (serial, parallel) in results.items():
+            self.assertTrue(serial, expr)
+            self.assertEqual(serial, parallel, expr)
+
+    @testing.requires_version('3.2')
+    def test_selection_cache(self):
+        cmd.fragment('gly', 'm1')
+        self.assertEqual(cmd.count_atoms('name CA'), 1)
+        hits = cmd.get_selection_cache_stats()['hits']
+        self.assertEqual(cmd.count_atoms('name CA'), 1)
+        self.assertGreater(cmd.get_selection_cache_stats()['hits'], hits)
+
+        # modified atoms invalidate cached results
+        cmd.alter('name CA', 'name = "CX"')
+        self.assertEqual(cmd.count_atoms('name CA'), 0)
+        cmd.translate([1, 0, 0], 'm1', camera=0)
+        self.assertEqual(cmd.count_atoms('x > 50'), 0)
+        cmd.translate([100, 0, 0], 'm1', camera=0)
+        self.assertEqual(cmd.count_atoms('x > 50'), 7)
+
+        # colors only invalidate color dependent results
+        cmd.color('red', 'elem C')
+        self.assertEqual(cmd.count_atoms('color red'), 2)
+        cmd.color('blue')
+        self.assertEqual(cmd.count_atoms('color red'), 0)
+
+        # named selections
+        cmd.select('s1', 'elem N')
+        self.assertEqual(cmd.count_atoms('s1'), 1)
+        cmd.select('s1', 'elem O')
+        self.assertEqual(cmd.count_atoms('s1'), 1)
+        self.assertEqual(cmd.identify('s1'), cmd.identify('elem O'))
+
+        cmd.set('selection_cache_size', 0)
+        cmd.get_selection_cache_stats(reset=1)
+        cmd.count_atoms('name CX')
+        cmd.count_atoms('name CX')
+        stats = cmd.get_selection_cache_stats()
+        self.assertEqual(stats['hits'], 0)
+        self.assertEqual(stats['size'], 0)
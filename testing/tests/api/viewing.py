@@ -423,6 +423,51 @@ class TestViewing(testing.PyMOLTestCase):
         # tested in many other tests
         pass
 
+    def _get_ray_imagearray(self, **kwargs):
+        with testing.mktemp('.png') as filename:
+            cmd.ray(60, 40, antialias=2, **kwargs)
+            cmd.png(filename)
+            return self.get_imagearray(filename)
+
+    @testing.requires('no_edu')
+    @testing.requires_version('3.2')
+    def testRayPreview(self):
+        cmd.fragment('trp')
+        cmd.orient()
+        cmd.set('max_threads', 2)
+        cmd.set('ray_progressive', 4)
+
+        previews = []
+        def preview(data, width, height):
+            previews.append((len(data), width, height))
+
+        img1 = self._get_ray_imagearray(preview=preview)
+        self.assertEqual(previews, [(60 * 40 * 4, 60, 40)] * 2)
+
+        # progressive passes must not change the final image
+        img2 = self._get_ray_imagearray()
+        self.assertImageEqual(img1, img2)
+
+    @testing.requires_version('3.2')
+    def testRayAcceleration(self):
+        cmd.fragment('trp')
+        cmd.show_as('sticks')
+        cmd.show('spheres', 'elem N')
+        cmd.show('surface')
+        cmd.set('transparency', 0.3)
+        cmd.orient()
+
+        images = []
+        for perspective in (0, 1):
+            cmd.set('orthoscopic', not perspective)
+            for ray_acceleration in (0, 1):
+                cmd.set('ray_acceleration', ray_acceleration)
+                images.append(self._get_ray_imagearray())
+
+        # grid and BVH find the same intersections
+        self.assertImageEqual(images[0], images[1], delta=2, count=10)
+        self.assertImageEqual(images[2], images[3], delta=2, count=10)
+
     def testRefresh(self):
         cmd.refresh
         self.skipTest('TODO')
@@ -566,3 +611,43 @@ class TestViewing(testing.PyMOLTestCase):
         cmd.set_color(longname, [0xFF, 0xFF, 0x00])
         cmd.color(longname)
         self.assertImageHasColor('yellow')
+
+    @testing.requires_version('3.2')
+    def testLevelOfDetail(self):
+        def count_vertices():
+            obj = cmd.get_mtl_obj()[1]
+            return sum(1 for line in obj.splitlines() if line.startswith('v '))
+
+        cmd.load(self.datafile('1oky-frag.pdb'), 'm1')
+        cmd.set('surface_cache_size', 0)
+
+        for rep in ['cartoon', 'surface']:
+            cmd.show_as(rep)
+            cmd.zoom('m1')
+            cmd.set('lod_distance', 0)
+            cmd.set('lod_atom_count', 0)
+            full = count_vertices()
+
+            # above the atom count threshold
+            cmd.set('lod_atom_count', 10)
+            coarse = count_vertices()
+            self.assertLess(coarse, full)
+
+            cmd.set('lod_atom_count', 0)
+            self.assertEqual(count_vertices(), full)
+
+            # far from the camera
+            cmd.set('lod_distance', 200)
+            self.assertEqual(count_vertices(), full)
+            cmd.zoom('m1', 500)
+            self.assertLess(count_vertices(), coarse)
+            cmd.zoom('m1')
+            self.assertEqual(count_vertices(), full)
+
+            # built levels are kept, switching between them doesn't rebuild
+            cmd.get_rep_build_stats(reset=1)
+            cmd.set('lod_atom_count', 10)
+            self.assertEqual(count_vertices(), coarse)
+            cmd.set('lod_atom_count', 0)
+            self.assertEqual(count_vertices(), full)
+            self.assertEqual(cmd.get_rep_build_stats(), {})
@@ -28,3 +28,18 @@ class TestAsyncBuilds(testing.PyMOLTestCase):
         with self.timing('%s' % msg):
             cmd.show_as(rep)
             cmd.draw()
+
+    @testing.foreach(0, 1)
+    def testAsyncBuildsRepTypes(self, async_builds):
+        # single object and state: representation types build concurrently
+        cmd.set("async_builds", async_builds)
+        cmd.load(self.datafile('1aon.pdb.gz'))
+
+        with self.timing('async_builds=%d' % async_builds):
+            cmd.show_as('cartoon')
+            cmd.show('surface')
+            cmd.show('sticks')
+            cmd.show('spheres', 'hetatm')
+            cmd.draw()
+
+        cmd.get_rep_build_stats(quiet=0)
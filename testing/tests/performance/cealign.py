@@ -0,0 +1,19 @@
+'''
+CE structural alignment of chain pairs of increasing length
+'''
+
+from pymol import cmd, testing
+
+@testing.requires('no_run_all')
+class TestCEAlign(testing.PyMOLTestCase):
+
+    @testing.foreach.product((100, 200, 400, 524), (1, 4))
+    def testCEAlign(self, length, max_threads):
+        cmd.load(self.datafile('1aon.pdb.gz'))
+        cmd.set('max_threads', max_threads)
+        sele = 'resi 1-%d & guide' % length
+
+        with self.timing('%d residues, max_threads=%d' % (length, max_threads)):
+            for target in 'BCDEFG':
+                cmd.cealign('chain %s & %s' % (target, sele),
+                            'chain A & %s' % sele, transform=0)
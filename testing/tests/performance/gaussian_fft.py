@@ -0,0 +1,19 @@
+'''
+Gaussian map of a large selection, direct summation vs. splatting and FFT
+(gaussian_fft setting)
+'''
+
+from pymol import cmd, testing
+
+@testing.requires('no_run_all')
+class TestGaussianFFT(testing.PyMOLTestCase):
+
+    @testing.foreach.product((0, 1), (2.0, 4.0))
+    def testMapNew(self, gaussian_fft, resolution):
+        cmd.load(self.datafile('1aon.pdb.gz'))
+        cmd.set('gaussian_fft', gaussian_fft)
+
+        with self.timing('gaussian_fft=%d resolution=%.1f' % (
+                gaussian_fft, resolution)):
+            cmd.map_new('map', 'gaussian', resolution / 3.0, '1aon', 5.0,
+                    resolution=resolution)
@@ -0,0 +1,24 @@
+'''
+Changing the contour level of a mesh and a surface of a large map
+'''
+
+from pymol import cmd, testing
+
+@testing.requires('no_run_all')
+class TestIsolevel(testing.PyMOLTestCase):
+
+    @testing.foreach(1, 4)
+    def testIsolevel(self, max_threads):
+        cmd.load(self.datafile('1aon.pdb.gz'))
+        cmd.map_new('map', 'gaussian', 1.0, 'chain A+B+C', 5.0)
+        cmd.delete('1aon')
+        cmd.set('max_threads', max_threads)
+        cmd.isomesh('mesh', 'map')
+        cmd.isosurface('surf', 'map')
+        cmd.draw()
+
+        with self.timing('max_threads=%d' % max_threads):
+            for level in (0.5, 1.0, 1.5, 2.0, 2.5, 3.0):
+                cmd.isolevel('mesh', level)
+                cmd.isolevel('surf', level)
+                cmd.draw()
@@ -0,0 +1,19 @@
+'''
+Map arithmetic with map_set, on identical and on different grids
+'''
+
+from pymol import cmd, testing
+
+@testing.requires('no_run_all')
+class TestMapSet(testing.PyMOLTestCase):
+
+    @testing.foreach.product((1, 4), (0.5, 0.7))
+    def testMapSet(self, max_threads, spacing):
+        cmd.load(self.datafile('1aon.pdb.gz'))
+        cmd.map_new('a', 'gaussian', 0.5, '1aon', 5.0, resolution=3.0)
+        cmd.map_new('b', 'gaussian', spacing, '1aon', 5.0, resolution=6.0)
+        cmd.set('max_threads', max_threads)
+
+        with self.timing('max_threads=%d spacing=%.1f' % (
+                max_threads, spacing)):
+            cmd.map_set('diff', 'expression', '(a - b) * 2 + abs(b)')
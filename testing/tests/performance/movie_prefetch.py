@@ -0,0 +1,29 @@
+'''
+Movie playback with deferred builds
+'''
+
+import time
+
+from pymol import cmd, testing
+
+@testing.requires('gui', 'no_run_all')
+class TestMoviePrefetch(testing.PyMOLTestCase):
+
+    @testing.foreach.product([0, 8], [0, 1])
+    def testMoviePrefetch(self, movie_prefetch, background_builds):
+        cmd.load(self.datafile('desmond/Bace_mapper_20143_3a51a59_e85111a_solvent_11_replica0-out.idx'), state=1)
+        cmd.show_as('sticks')
+        cmd.show('cartoon')
+        cmd.set('defer_builds_mode', 2)
+        cmd.set('background_builds', background_builds)
+        cmd.set('movie_prefetch', movie_prefetch)
+        cmd.set('movie_loop', 0)
+        cmd.set('movie_fps', -1)
+        # play backwards, prefetching follows the frame to state mapping
+        cmd.mset('%d -1' % cmd.count_states())
+
+        with self.timing('prefetch=%d background_builds=%d' % (movie_prefetch, background_builds)):
+            cmd.mplay()
+            # every command interrupts background builds, poll rarely
+            while cmd.get_movie_playing():
+                time.sleep(0.5)
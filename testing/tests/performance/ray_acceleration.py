@@ -0,0 +1,39 @@
+'''
+Ray tracing with the uniform grid vs. the bounding volume hierarchy
+(ray_acceleration setting)
+'''
+
+import random
+from pymol import cmd, testing
+
+@testing.requires('no_run_all')
+class TestRayAcceleration(testing.PyMOLTestCase):
+
+    def _setup_surface(self):
+        # many small triangles, densely packed
+        cmd.load(self.datafile('1aon.pdb.gz'))
+        cmd.show_as('surface')
+        cmd.orient()
+
+    def _setup_sparse(self):
+        # few primitives, spread over a large, mostly empty volume
+        random.seed(0)
+        cmd.fragment('trp', 'frag')
+        for i in range(50):
+            name = 'frag%02d' % i
+            cmd.create(name, 'frag')
+            cmd.translate([random.uniform(-200, 200) for _ in range(3)],
+                          name, camera=0)
+        cmd.delete('frag')
+        cmd.show_as('sticks')
+        cmd.show('spheres', 'elem O')
+        cmd.orient()
+
+    @testing.foreach.product(['surface', 'sparse'], [0, 1])
+    def testRay(self, scene, ray_acceleration):
+        getattr(self, '_setup_' + scene)()
+        cmd.set('ray_acceleration', ray_acceleration)
+        cmd.set('ray_shadow', 1)
+
+        with self.timing('%s ray_acceleration=%d' % (scene, ray_acceleration)):
+            cmd.ray(800, 600)
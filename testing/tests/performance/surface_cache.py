@@ -0,0 +1,23 @@
+'''
+Showing surfaces again with and without the in-memory surface cache
+(surface_cache_size setting)
+'''
+
+from pymol import cmd, testing
+
+@testing.requires('no_run_all')
+class TestSurfaceCache(testing.PyMOLTestCase):
+
+    @testing.foreach(0, 256)
+    def testHideShow(self, surface_cache_size):
+        cmd.set('surface_cache_size', surface_cache_size)
+        cmd.load(self.datafile('1aon.pdb.gz'))
+        cmd.show_as('surface')
+        cmd.draw()
+
+        with self.timing('surface_cache_size=%d' % surface_cache_size):
+            for _ in range(3):
+                cmd.hide('surface')
+                cmd.draw()
+                cmd.show('surface')
+                cmd.draw()
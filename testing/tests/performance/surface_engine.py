@@ -0,0 +1,21 @@
+'''
+Surface calculation with the dot-based and the grid-based engine
+(surface_engine setting) at several qualities
+'''
+
+from pymol import cmd, testing
+
+@testing.requires('no_run_all')
+class TestSurfaceEngine(testing.PyMOLTestCase):
+
+    @testing.foreach.product((0, 1), (-1, 0, 1))
+    def testShowSurface(self, surface_engine, surface_quality):
+        cmd.set('surface_cache_size', 0)
+        cmd.set('surface_engine', surface_engine)
+        cmd.set('surface_quality', surface_quality)
+        cmd.load(self.datafile('1aon.pdb.gz'))
+        cmd.show_as('surface')
+
+        with self.timing('surface_engine=%d surface_quality=%d' % (
+                surface_engine, surface_quality)):
+            cmd.draw()
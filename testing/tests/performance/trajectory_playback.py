@@ -0,0 +1,29 @@
+'''
+Trajectory playback by streaming coordinates into one state
+'''
+
+from pymol import cmd, testing
+
+@testing.requires('gui', 'no_run_all')
+class TestTrajectoryPlayback(testing.PyMOLTestCase):
+
+    @testing.foreach.product(['sticks', 'spheres', 'sticks cartoon'], [0, 1])
+    def testLoadCoords(self, reps, valence):
+        import numpy
+        cmd.load(self.datafile('1aon.pdb.gz'), 'm1')
+        cmd.set('valence', valence)
+        cmd.hide('everything')
+        for rep in reps.split():
+            cmd.show(rep)
+        cmd.draw()
+
+        coords = cmd.get_coords('m1')
+        noise = numpy.random.RandomState(1).uniform(-0.2, 0.2, coords.shape)
+        n_frames = 20
+
+        with self.timing('%s valence=%d, %d frames' % (reps, valence, n_frames)):
+            for i in range(n_frames):
+                cmd.load_coords(coords + noise * (i % 2), 'm1')
+                cmd.draw()
+
+        cmd.get_rep_build_stats(quiet=0)